@@ -24,13 +24,14 @@ class Server:
     TEMPLATE_ROOT = utils.templating.get_template_root(__file__, 'templates')
 
     # CONSTRUCTOR ##########################################################
-    def __init__(self, conn: connection, db_connection_callback: Callable[[str], connection] = None):
+    def __init__(self, conn: connection, db_connection_callback: Callable[[str], connection] = None, metadata=None):
         """
         Initializes a server object using the provided connection
         :param conn: psycopg2 connection
+        :param metadata: Optional metadata already read from the connection, see ServerConnection
         """
         # Everything we know about the server will be based on the connection
-        self._conn: utils.querying.ServerConnection = utils.querying.ServerConnection(conn)
+        self._conn: utils.querying.ServerConnection = utils.querying.ServerConnection(conn, metadata)
         self._db_connection_callback = db_connection_callback
 
         # Declare the server properties
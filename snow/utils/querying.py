@@ -12,21 +12,27 @@ from psycopg2.extensions import Column, connection, cursor      # noqa
 class ServerConnection:
     """Wrapper for a psycopg2 connection that makes various properties easier to access"""
 
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, metadata=None):
         """
-        Creates a new connection wrapper. Parses version string
+        Creates a new connection wrapper. Parses version string, unless metadata is provided
         :param conn: PsycoPG2 connection object
+        :param metadata: Optional metadata already read from the connection, with dsn_parameters
+            and version properties, so that every wrapper of the connection shares it
         """
         self._conn = conn
-        self._dsn_parameters = conn.get_dsn_parameters()
+        if metadata is not None:
+            self._dsn_parameters: Mapping[str, str] = metadata.dsn_parameters
+            self._version: Tuple[int, int, int] = metadata.version
+        else:
+            self._dsn_parameters: Mapping[str, str] = conn.get_dsn_parameters()
 
-        # Calculate the server version
-        version_string = str(conn.server_version)
-        self._version: Tuple[int, int, int] = (
-            int(version_string[:-4]),
-            int(version_string[-4:-2]),
-            int(version_string[-2:])
-        )
+            # Calculate the server version
+            version_string = str(conn.server_version)
+            self._version: Tuple[int, int, int] = (
+                int(version_string[:-4]),
+                int(version_string[-4:-2]),
+                int(version_string[-2:])
+            )
 
     # PROPERTIES ###########################################################
     @property
@@ -5,7 +5,7 @@
 
 from typing import Any, Dict  # noqa
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -32,4 +32,4 @@ class GetDatabaseInfoResponse:
         self.database_info: DatabaseInfo = database_info
 
 
-GET_DATABASE_INFO_REQUEST = IncomingMessageConfiguration('admin/getdatabaseinfo', GetDatabaseInfoParameters)
+GET_DATABASE_INFO_REQUEST = IncomingMessageConfiguration('admin/getdatabaseinfo', GetDatabaseInfoParameters, DispatchConcurrency.SERIAL_PER_OWNER_URI)
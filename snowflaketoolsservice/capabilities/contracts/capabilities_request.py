@@ -5,7 +5,7 @@
 
 from typing import List
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -101,4 +101,4 @@ class CapabilitiesResult(object):
         self.capabilities: DMPServerCapabilities = capabilities
 
 
-CAPABILITIES_REQUEST = IncomingMessageConfiguration('capabilities/list', CapabilitiesRequestParams)
+CAPABILITIES_REQUEST = IncomingMessageConfiguration('capabilities/list', CapabilitiesRequestParams, DispatchConcurrency.PARALLEL)
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.connection.connection_service import ConnectionInfo, ConnectionService
+from snowflaketoolsservice.connection.connection_metadata import ConnectionMetadata, get_connection_metadata
+from snowflaketoolsservice.connection.connection_service import ConnectionInfo, ConnectionRegistry, ConnectionService
 
-__all__ = ['ConnectionInfo', 'ConnectionService']
+__all__ = ['ConnectionInfo', 'ConnectionMetadata', 'ConnectionRegistry', 'ConnectionService', 'get_connection_metadata']
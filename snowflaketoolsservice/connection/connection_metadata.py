@@ -0,0 +1,85 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the cache of metadata that doesn't change for the lifetime of a connection"""
+
+import threading
+from typing import Mapping, Optional, Tuple  # noqa
+import weakref
+
+import psycopg2.extensions
+
+
+class ConnectionMetadata:
+    """
+    Properties of a physical connection that are looked up once and shared by everything that uses
+    the connection: connection responses, snow Server objects and the templates they pick by version
+    """
+
+    def __init__(self, connection: psycopg2.extensions.connection):
+        """
+        Reads the metadata of a connection
+        :param connection: psycopg2 connection
+        """
+        self._connection_ref = weakref.ref(connection)
+        self._dsn_parameters: Mapping[str, str] = connection.get_dsn_parameters()
+        self._version: Tuple[int, int, int] = parse_server_version(connection.server_version)
+        self._server_version: Optional[str] = None
+
+        host = self._dsn_parameters.get('host') or ''
+        self._is_cloud: bool = host.endswith('database.azure.com') or host.endswith('database.windows.net')
+
+    # PROPERTIES ###########################################################
+    @property
+    def dsn_parameters(self) -> Mapping[str, str]:
+        """DSN properties of the connection"""
+        return self._dsn_parameters
+
+    @property
+    def version(self) -> Tuple[int, int, int]:
+        """Server version as (major, minor, patch)"""
+        return self._version
+
+    @property
+    def server_version(self) -> Optional[str]:
+        """Server version as reported by the server, which may include details of the build"""
+        if self._server_version is None:
+            connection = self._connection_ref()
+            if connection is not None:
+                self._server_version = connection.get_parameter_status('server_version')
+        return self._server_version
+
+    @property
+    def is_cloud(self) -> bool:
+        """Whether the server is a cloud hosted server"""
+        return self._is_cloud
+
+
+def get_connection_metadata(connection: psycopg2.extensions.connection) -> ConnectionMetadata:
+    """
+    Gets the metadata of a connection, reading it the first time the connection is seen. The
+    metadata is dropped along with the connection
+    :param connection: psycopg2 connection
+    :return: Metadata shared by every caller for the same connection
+    """
+    with _cache_lock:
+        metadata = _cache.get(connection)
+        if metadata is None:
+            metadata = ConnectionMetadata(connection)
+            _cache[connection] = metadata
+        return metadata
+
+
+def parse_server_version(server_version) -> Tuple[int, int, int]:
+    """
+    Splits a server version number, such as 90602 or 100005, into (major, minor, patch)
+    :param server_version: Version number of the server as an int or string
+    """
+    version_string = str(server_version)
+    return int(version_string[:-4]), int(version_string[-4:-2]), int(version_string[-2:])
+
+
+_cache: 'weakref.WeakKeyDictionary[psycopg2.extensions.connection, ConnectionMetadata]' = weakref.WeakKeyDictionary()
+_cache_lock: threading.Lock = threading.Lock()
@@ -0,0 +1,441 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the pool that connections are checked out of and back into, per set of connection options"""
+
+from concurrent.futures import Future, ThreadPoolExecutor  # noqa
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple  # noqa
+
+import psycopg2
+import psycopg2.extensions
+
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+
+
+class ConnectionPoolExhaustedError(Exception):
+    """Raised when a connection could not be checked out because the pool stayed at its maximum size"""
+
+
+class ConnectTimeoutError(Exception):
+    """Raised when a connection could not be established before the connect deadline"""
+
+
+class PooledConnection:
+    """Bookkeeping for a connection opened by the pool"""
+
+    def __init__(self, connection: psycopg2.extensions.connection, key: tuple):
+        self.connection: psycopg2.extensions.connection = connection
+        self.key: tuple = key
+        self.created_time: float = time.monotonic()
+        self.last_used_time: float = self.created_time
+        self.checkout_time: Optional[float] = None
+        self.owner: Optional[str] = None
+        self.leak_reported: bool = False
+
+
+class ConnectionPool:
+    """
+    Pool of open connections, partitioned by normalized connection options so that a connection
+    closed by one owner URI can be reused by any other owner URI that connects with the same options.
+    Connections are checked out for exclusive use and checked back in once the owner disconnects,
+    at which point their session is reset. Idle connections are closed after a timeout, and
+    connections that stay checked out suspiciously long are reported as possible leaks.
+
+    New connections are opened on a bounded set of connect workers. A checkout waits for its
+    connection until the connect deadline or until it is canceled, whichever comes first, and then
+    abandons the attempt instead of waiting for the network to give up. Abandoned attempts are
+    closed when they complete, and are bounded by the same deadline through libpq's connect_timeout.
+    """
+
+    # CONSTANTS ############################################################
+    REAPER_THREAD_NAME = u"Connection_Pool_Reaper"
+    CONNECT_THREAD_PREFIX = u"Connection_Pool_Connect"
+
+    # libpq doesn't accept a connect_timeout below 2 seconds
+    MIN_LIBPQ_CONNECT_TIMEOUT = 2
+
+    def __init__(self, min_size: int = 0, max_size: int = 100, idle_timeout: float = 300, leak_threshold: Optional[float] = 3600,
+                 checkout_timeout: float = 30, reap_interval: float = 60, connect_timeout: float = 30, max_concurrent_connects: int = 8,
+                 logger=None):
+        """
+        Initializes an empty pool
+        :param min_size: Number of connections per set of options that idle eviction keeps open
+        :param max_size: Maximum number of open connections per set of options, checked out or idle
+        :param idle_timeout: Seconds a connection may stay idle in the pool before it is closed
+        :param leak_threshold: Seconds a connection may stay checked out before it is reported as a
+            possible leak, or None to disable leak detection
+        :param checkout_timeout: Seconds a checkout waits for a connection when the pool is at its maximum size
+        :param reap_interval: Seconds between idle eviction and leak detection passes of the reaper thread
+        :param connect_timeout: Seconds to wait for a new connection to be established
+        :param max_concurrent_connects: Maximum number of connections being established at once. Other
+            connects wait for a worker, within their deadline
+        :param logger: Optional destination for logging
+        """
+        self.min_size: int = min_size
+        self.max_size: int = max_size
+        self.idle_timeout: float = idle_timeout
+        self.leak_threshold: Optional[float] = leak_threshold
+        self.checkout_timeout: float = checkout_timeout
+        self.reap_interval: float = reap_interval
+        self.connect_timeout: float = connect_timeout
+        self.logger = logger
+
+        self._lock: threading.Lock = threading.Lock()
+        self._available: threading.Condition = threading.Condition(self._lock)
+        self._idle: Dict[tuple, List[PooledConnection]] = {}
+        self._checked_out: Dict[int, PooledConnection] = {}
+        self._sizes: Dict[tuple, int] = {}
+        self._closed: bool = False
+
+        self._created_count: int = 0
+        self._reused_count: int = 0
+        self._evicted_count: int = 0
+        self._leak_count: int = 0
+        self._abandoned_count: int = 0
+
+        self._connect_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_concurrent_connects,
+            thread_name_prefix=self.CONNECT_THREAD_PREFIX
+        )
+        self._stop_event = threading.Event()
+        self._reaper_thread = None
+
+    # METHODS ##############################################################
+    @staticmethod
+    def get_key(options: dict) -> tuple:
+        """
+        Normalizes connection options into the key of the partition of the pool they connect with
+        :param options: psycopg2 connection keyword arguments
+        :return: Hashable key that is equal for options that open equivalent sessions
+        """
+        normalized = {}
+        for option, value in options.items():
+            if value is None or value == '':
+                continue
+            value = str(value)
+            if option == 'host':
+                value = value.lower()
+            normalized[option] = value
+        return tuple(sorted(normalized.items()))
+
+    def checkout(self, options: dict, owner: str = None, cancellation_token: CancellationToken = None) -> psycopg2.extensions.connection:
+        """
+        Checks out an idle connection opened with the given options, or opens a new one
+        :param options: psycopg2 connection keyword arguments
+        :param owner: Description of what the connection is used for, reported if it leaks
+        :param cancellation_token: Optional token that stops waiting for a connection when canceled,
+            abandoning a connect in progress
+        :raises ConnectionPoolExhaustedError: The pool stayed at its maximum size until the timeout
+        :raises ConnectTimeoutError: A new connection was not established before the connect timeout
+        :raises OperationCanceledError: The token was canceled while waiting for a connection
+        :return: The connection, which must be returned with checkin
+        """
+        key = self.get_key(options)
+        deadline = time.monotonic() + self.checkout_timeout
+
+        def wake_waiters():
+            with self._available:
+                self._available.notify_all()
+
+        if cancellation_token is not None:
+            cancellation_token.register(wake_waiters)
+        try:
+            with self._available:
+                while True:
+                    if cancellation_token is not None:
+                        cancellation_token.raise_if_canceled()
+                    if self._closed:
+                        raise RuntimeError('Connection pool has been closed')
+
+                    pooled = self._pop_idle(key)
+                    if pooled is not None:
+                        self._reused_count += 1
+                        return self._mark_checked_out(pooled, owner)
+
+                    if self._sizes.get(key, 0) < self.max_size:
+                        # Reserve the slot while connecting outside the lock
+                        self._sizes[key] = self._sizes.get(key, 0) + 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionPoolExhaustedError(
+                            f'Timed out waiting for a connection, all {self.max_size} connections with these options are in use'  # TODO: Localize
+                        )
+                    self._available.wait(remaining)
+        finally:
+            if cancellation_token is not None:
+                cancellation_token.unregister(wake_waiters)
+
+        try:
+            connection = self._connect(options, cancellation_token)
+        except BaseException:
+            with self._available:
+                self._release_slot(key)
+            raise
+
+        with self._available:
+            self._created_count += 1
+            return self._mark_checked_out(PooledConnection(connection, key), owner)
+
+    def checkin(self, connection: psycopg2.extensions.connection) -> None:
+        """
+        Returns a checked out connection to the pool after resetting its session. Connections that
+        can't be reset, and connections the pool did not open, are closed instead
+        :param connection: Connection to return
+        """
+        with self._available:
+            pooled = self._checked_out.pop(id(connection), None)
+        if pooled is None:
+            _close_quietly(connection)
+            return
+
+        reusable = self._reset(connection)
+        with self._available:
+            if not reusable or self._closed:
+                self._release_slot(pooled.key)
+            else:
+                pooled.last_used_time = time.monotonic()
+                pooled.checkout_time = None
+                pooled.owner = None
+                self._idle.setdefault(pooled.key, []).append(pooled)
+                self._available.notify_all()
+        if not reusable or self._closed:
+            _close_quietly(connection)
+
+    def discard(self, connection: psycopg2.extensions.connection) -> None:
+        """
+        Closes a checked out connection instead of returning it, such as when it is known to be broken
+        :param connection: Connection to close
+        """
+        with self._available:
+            pooled = self._checked_out.pop(id(connection), None)
+            if pooled is not None:
+                self._release_slot(pooled.key)
+        _close_quietly(connection)
+
+    def prewarm(self, options: dict) -> bool:
+        """
+        Opens a connection and leaves it idle in the pool, so that the next checkout with the same
+        options doesn't wait for the connection to be established
+        :param options: psycopg2 connection keyword arguments
+        :return: True if a connection was added, False if the pool is already at its maximum size
+        """
+        key = self.get_key(options)
+        with self._available:
+            if self._closed or self._sizes.get(key, 0) >= self.max_size:
+                return False
+            self._sizes[key] = self._sizes.get(key, 0) + 1
+
+        try:
+            connection = self._connect(options)
+        except BaseException:
+            with self._available:
+                self._release_slot(key)
+            raise
+
+        with self._available:
+            self._created_count += 1
+            if self._closed:
+                self._release_slot(key)
+            else:
+                self._idle.setdefault(key, []).append(PooledConnection(connection, key))
+                self._available.notify_all()
+                return True
+        _close_quietly(connection)
+        return False
+
+    def evict_idle(self) -> int:
+        """
+        Closes connections that have been idle for longer than the idle timeout, keeping at least
+        the minimum number of connections open for each set of options
+        :return: Number of connections that were closed
+        """
+        evicted = []
+        now = time.monotonic()
+        with self._available:
+            for key, idle in list(self._idle.items()):
+                # The idle list is ordered by checkin time, so the oldest connections are first
+                while idle and self._sizes[key] > self.min_size and now - idle[0].last_used_time > self.idle_timeout:
+                    evicted.append(idle.pop(0))
+                    self._release_slot(key)
+                if not idle:
+                    self._idle.pop(key, None)
+            self._evicted_count += len(evicted)
+
+        for pooled in evicted:
+            _close_quietly(pooled.connection)
+        return len(evicted)
+
+    def find_leaks(self) -> List[PooledConnection]:
+        """
+        Finds connections that have been checked out for longer than the leak threshold, logging
+        each the first time it is found
+        :return: The possibly leaked connections
+        """
+        if self.leak_threshold is None:
+            return []
+
+        now = time.monotonic()
+        with self._available:
+            leaks = [pooled for pooled in self._checked_out.values() if now - pooled.checkout_time > self.leak_threshold]
+            new_leaks = [pooled for pooled in leaks if not pooled.leak_reported]
+            for pooled in new_leaks:
+                pooled.leak_reported = True
+            self._leak_count += len(new_leaks)
+
+        if self.logger is not None:
+            for pooled in new_leaks:
+                self.logger.warn(f'Connection checked out by {pooled.owner} has not been returned for '
+                                 f'{now - pooled.checkout_time:.0f} seconds and may have leaked')
+        return leaks
+
+    def get_statistics(self) -> dict:
+        """
+        Gets a snapshot of the state of the pool
+        :return: Dictionary of the number of partitions, idle and checked out connections, and the
+            running totals of connections opened, reused, evicted, reported as possible leaks and
+            connects abandoned because they were canceled or timed out
+        """
+        with self._available:
+            return {
+                'partitions': len(self._sizes),
+                'idle': sum(len(idle) for idle in self._idle.values()),
+                'checkedOut': len(self._checked_out),
+                'created': self._created_count,
+                'reused': self._reused_count,
+                'evicted': self._evicted_count,
+                'suspectedLeaks': self._leak_count,
+                'abandonedConnects': self._abandoned_count
+            }
+
+    def start_reaper(self) -> None:
+        """Starts evicting idle connections and detecting leaks in the background"""
+        self._reaper_thread = threading.Thread(target=self._reap, name=self.REAPER_THREAD_NAME)
+        self._reaper_thread.daemon = True
+        self._reaper_thread.start()
+
+    def close(self) -> None:
+        """Stops the reaper and closes the idle connections. Connections checked in later are closed"""
+        self._stop_event.set()
+        self._connect_executor.shutdown(wait=False)
+        with self._available:
+            self._closed = True
+            idle = [pooled for key_idle in self._idle.values() for pooled in key_idle]
+            for pooled in idle:
+                self._release_slot(pooled.key)
+            self._idle = {}
+            self._available.notify_all()
+
+        for pooled in idle:
+            _close_quietly(pooled.connection)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _connect(self, options: dict, cancellation_token: CancellationToken = None) -> psycopg2.extensions.connection:
+        """
+        Opens a connection on a connect worker, waiting for it until the connect deadline or until
+        the token is canceled
+        """
+        if not options.get('connect_timeout'):
+            # Have libpq give up at the deadline too, so an abandoned attempt doesn't hold a worker for longer
+            options = dict(options, connect_timeout=max(self.MIN_LIBPQ_CONNECT_TIMEOUT, math.ceil(self.connect_timeout)))
+
+        future: Future = self._connect_executor.submit(psycopg2.connect, **options)
+        finished = threading.Event()
+        future.add_done_callback(lambda _: finished.set())
+        if cancellation_token is not None:
+            cancellation_token.register(finished.set)
+        try:
+            finished.wait(self.connect_timeout)
+        finally:
+            if cancellation_token is not None:
+                cancellation_token.unregister(finished.set)
+
+        if cancellation_token is not None and cancellation_token.canceled:
+            self._abandon(future)
+            raise OperationCanceledError()
+        if not future.done():
+            self._abandon(future)
+            raise ConnectTimeoutError(f'Timed out after {self.connect_timeout:g} seconds establishing a connection')  # TODO: Localize
+        return future.result()
+
+    def _abandon(self, future: Future) -> None:
+        """Gives up on a connect, closing the connection if the attempt still succeeds"""
+        with self._available:
+            self._abandoned_count += 1
+        # A connect still waiting for a worker never starts
+        if not future.cancel():
+            future.add_done_callback(_close_if_connected)
+
+    def _pop_idle(self, key: tuple) -> Optional[PooledConnection]:
+        """Takes the most recently used idle connection for the key that is still open. Must hold the lock"""
+        idle = self._idle.get(key)
+        while idle:
+            pooled = idle.pop()
+            if not pooled.connection.closed:
+                return pooled
+            # The server closed the connection while it was idle
+            self._release_slot(key)
+        return None
+
+    def _mark_checked_out(self, pooled: PooledConnection, owner: Optional[str]) -> psycopg2.extensions.connection:
+        """Records that a connection is checked out. Must hold the lock"""
+        pooled.checkout_time = time.monotonic()
+        pooled.owner = owner
+        pooled.leak_reported = False
+        self._checked_out[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def _release_slot(self, key: tuple) -> None:
+        """Forgets a connection that was closed or never opened. Must hold the lock"""
+        self._sizes[key] -= 1
+        if not self._sizes[key]:
+            del self._sizes[key]
+            self._idle.pop(key, None)
+        self._available.notify_all()
+
+    def _reset(self, connection: psycopg2.extensions.connection) -> bool:
+        """
+        Resets the session of a connection being checked in so the next owner doesn't inherit its
+        transaction or settings
+        :return: True if the connection can be reused
+        """
+        try:
+            if connection.closed:
+                return False
+            if connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_ACTIVE:
+                # A query is still running on the connection, closing it is the only way to stop it
+                return False
+            connection.reset()
+            return True
+        except Exception:
+            if self.logger is not None:
+                self.logger.exception('Failed to reset a connection returned to the pool, closing it')
+            return False
+
+    def _reap(self) -> None:
+        while not self._stop_event.wait(self.reap_interval):
+            try:
+                self.evict_idle()
+                self.find_leaks()
+            except Exception:
+                if self.logger is not None:
+                    self.logger.exception('Unhandled exception while reaping the connection pool')
+
+
+def _close_if_connected(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _close_quietly(future.result())
+
+
+def _close_quietly(connection: psycopg2.extensions.connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        # Ignore errors when disconnecting
+        pass
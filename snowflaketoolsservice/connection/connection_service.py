@@ -6,13 +6,18 @@
 """This module holds the connection service class, which allows for the user to connect and
 disconnect and holds the current connection, if one is present"""
 
+from concurrent.futures import Future
+import contextlib
 import threading
-from typing import Callable, Dict, List, Optional, Tuple  # noqa
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple  # noqa
 import uuid
 
 import psycopg2
 import psycopg2.extensions
 
+from snowflaketoolsservice.connection.connection_metadata import get_connection_metadata
+from snowflaketoolsservice.connection.connection_pool import ConnectionPool
 from snowflaketoolsservice.connection.contracts import (
     BUILD_CONNECTION_INFO_REQUEST, BuildConnectionInfoParams,
     CANCEL_CONNECT_REQUEST, CancelConnectParams,
@@ -24,9 +29,10 @@ from snowflaketoolsservice.connection.contracts import (
     GET_CONNECTION_STRING_REQUEST, GetConnectionStringParams,
     LIST_DATABASES_REQUEST, ListDatabasesParams, ListDatabasesResponse
 )
-from snowflaketoolsservice.hosting import RequestContext, ServiceProvider
+from snowflaketoolsservice.hosting import LatencyHistogram, RequestContext, ServiceProvider
 from snowflaketoolsservice.utils import constants
-from snowflaketoolsservice.utils.cancellation import CancellationToken
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+from snowflaketoolsservice.utils.thread import run_in_background
 
 
 class ConnectionInfo(object):
@@ -37,48 +43,193 @@ class ConnectionInfo(object):
         self.details: ConnectionDetails = details
         self.connection_id: str = str(uuid.uuid4())
         self._connection_map: Dict[ConnectionType, psycopg2.extensions.connection] = {}
+        self._session_settings: Dict[ConnectionType, List[Tuple[str, str]]] = {}
+        self._lock: threading.Lock = threading.Lock()
 
     def get_connection(self, connection_type: ConnectionType) -> Optional[psycopg2.extensions.connection]:
         """Get the connection associated with the given connection type, or return None"""
         return self._connection_map.get(connection_type)
 
-    def get_all_connections(self):
+    def get_all_connections(self) -> List[psycopg2.extensions.connection]:
         """Get all connections held by this object"""
-        return self._connection_map.values()
+        with self._lock:
+            return list(self._connection_map.values())
 
     def add_connection(self, connection_type: ConnectionType, connection: psycopg2.extensions.connection):
         """Add a connection to the connection map, associated with the given connection type"""
-        self._connection_map[connection_type] = connection
+        with self._lock:
+            self._connection_map[connection_type] = connection
 
     def remove_connection(self, connection_type: ConnectionType):
         """
         Remove the connection associated with the given connection type, or raise a KeyError if
         there is no such connection
         """
-        self._connection_map.pop(connection_type)
+        with self._lock:
+            self._connection_map.pop(connection_type)
+            self._session_settings.pop(connection_type, None)
 
     def remove_all_connections(self):
         """Remove all connections held by this object"""
-        self._connection_map = {}
+        with self._lock:
+            self._connection_map = {}
+            self._session_settings = {}
+
+    def pop_connection(self, connection_type: ConnectionType) -> Optional[psycopg2.extensions.connection]:
+        """Remove and return the connection associated with the given connection type, or return None"""
+        with self._lock:
+            self._session_settings.pop(connection_type, None)
+            return self._connection_map.pop(connection_type, None)
+
+    def pop_all_connections(self) -> List[psycopg2.extensions.connection]:
+        """Remove and return all connections held by this object"""
+        with self._lock:
+            connections = list(self._connection_map.values())
+            self._connection_map = {}
+            self._session_settings = {}
+            return connections
+
+    def replace_connection(self, connection_type: ConnectionType, old_connection: psycopg2.extensions.connection,
+                           new_connection: Optional[psycopg2.extensions.connection]) -> bool:
+        """
+        Replace the connection associated with the given connection type, unless it is no longer the old connection
+        :param new_connection: Connection to put in its place, or None to remove the old connection
+        :return: True if the connection was replaced
+        """
+        with self._lock:
+            if self._connection_map.get(connection_type) is not old_connection:
+                return False
+            if new_connection is None:
+                del self._connection_map[connection_type]
+                self._session_settings.pop(connection_type, None)
+            else:
+                self._connection_map[connection_type] = new_connection
+            return True
+
+    def get_session_settings(self, connection_type: ConnectionType) -> List[Tuple[str, str]]:
+        """Get the settings last seen changed in the session of the connection of the given type"""
+        return self._session_settings.get(connection_type, [])
+
+    def set_session_settings(self, connection_type: ConnectionType, settings: List[Tuple[str, str]]):
+        """Remember the settings changed in the session of the connection of the given type, to restore them on reconnect"""
+        self._session_settings[connection_type] = settings
 
     def has_connection(self, connection_type: ConnectionType):
         """Return whether this object has a connection matching the given connection type"""
         return connection_type in self._connection_map
 
 
+class ConnectionRegistry:
+    """
+    Thread safe map of owner URI to ConnectionInfo, which supports the dictionary operations services
+    use. Owner URIs are spread over stripes that each have a dictionary and a lock of their own, so
+    that connects and disconnects for different owner URIs don't wait on each other
+    """
+
+    DEFAULT_STRIPE_COUNT = 16
+
+    def __init__(self, stripe_count: int = DEFAULT_STRIPE_COUNT):
+        self._stripes: List[Dict[str, ConnectionInfo]] = [{} for _ in range(stripe_count)]
+        self._locks: List[threading.RLock] = [threading.RLock() for _ in range(stripe_count)]
+
+    # METHODS ##############################################################
+    def lock(self, owner_uri: str) -> threading.RLock:
+        """
+        Gets the lock of the stripe the owner URI is in, for operations on the owner URI that must be atomic
+        :param owner_uri: URI of the owner
+        :return: Reentrant lock, shared with the other owner URIs in the stripe
+        """
+        return self._locks[self._get_stripe_index(owner_uri)]
+
+    def get_or_create(self, owner_uri: str, details: ConnectionDetails) -> Tuple[ConnectionInfo, Optional[ConnectionInfo]]:
+        """
+        Gets the ConnectionInfo of an owner URI, replacing it with a new one if the owner URI has none
+        or its connection options don't match
+        :param owner_uri: URI of the owner
+        :param details: Connection details the owner URI connects with
+        :return: The ConnectionInfo, and the ConnectionInfo it replaced, whose connections the caller must close
+        """
+        index = self._get_stripe_index(owner_uri)
+        with self._locks[index]:
+            stripe = self._stripes[index]
+            connection_info = stripe.get(owner_uri)
+            if connection_info is not None and connection_info.details.options == details.options:
+                return connection_info, None
+            stripe[owner_uri] = ConnectionInfo(owner_uri, details)
+            return stripe[owner_uri], connection_info
+
+    def get(self, owner_uri: str, default: Optional[ConnectionInfo] = None) -> Optional[ConnectionInfo]:
+        return self._stripes[self._get_stripe_index(owner_uri)].get(owner_uri, default)
+
+    def pop(self, owner_uri: str, *default) -> Optional[ConnectionInfo]:
+        index = self._get_stripe_index(owner_uri)
+        with self._locks[index]:
+            return self._stripes[index].pop(owner_uri, *default)
+
+    def values(self) -> List[ConnectionInfo]:
+        """Gets a snapshot of the ConnectionInfo of every owner URI"""
+        values = []
+        for index, stripe in enumerate(self._stripes):
+            with self._locks[index]:
+                values.extend(stripe.values())
+        return values
+
+    def __getitem__(self, owner_uri: str) -> ConnectionInfo:
+        return self._stripes[self._get_stripe_index(owner_uri)][owner_uri]
+
+    def __setitem__(self, owner_uri: str, connection_info: ConnectionInfo):
+        index = self._get_stripe_index(owner_uri)
+        with self._locks[index]:
+            self._stripes[index][owner_uri] = connection_info
+
+    def __delitem__(self, owner_uri: str):
+        self.pop(owner_uri)
+
+    def __contains__(self, owner_uri: str) -> bool:
+        return owner_uri in self._stripes[self._get_stripe_index(owner_uri)]
+
+    def __len__(self) -> int:
+        return sum(len(stripe) for stripe in self._stripes)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_stripe_index(self, owner_uri: str) -> int:
+        return hash(owner_uri) % len(self._stripes)
+
+
 class ConnectionService:
     """Manage connections, including the ability to connect/disconnect"""
 
+    HEALTH_MONITOR_THREAD_NAME = 'Connection_Health_Monitor'
+    HEALTH_MONITOR_DISABLED_POLL_INTERVAL = 5
+
     def __init__(self):
-        self.owner_to_connection_map: Dict[str, ConnectionInfo] = {}
+        self.owner_to_connection_map: ConnectionRegistry = ConnectionRegistry()
         self.owner_to_thread_map = {}
         self._service_provider = None
         self._cancellation_map: Dict[Tuple[str, ConnectionType], CancellationToken] = {}
-        self._cancellation_lock: threading.Lock = threading.Lock()
+        self._connect_attempts: Dict[Tuple[str, ConnectionType], Tuple[ConnectionInfo, Future]] = {}
         self._on_connect_callbacks: List[Callable[[ConnectionInfo], None]] = []
+        self._pool: ConnectionPool = ConnectionPool()
+        self._connect_latencies: Dict[ConnectionType, LatencyHistogram] = {
+            connection_type: LatencyHistogram() for connection_type in ConnectionType
+        }
+        self._reconnect_count: int = 0
+        self._reconnect_count_lock: threading.Lock = threading.Lock()
+        # Number of users of each connection that is in use, and the connections being probed, by the IDs of the connections
+        self._use_counts: Dict[int, int] = {}
+        self._probing: Set[int] = set()
+        self._use_condition: threading.Condition = threading.Condition()
+        self._health_monitor_thread: Optional[threading.Thread] = None
+        self._health_monitor_stop_event: threading.Event = threading.Event()
 
     def register(self, service_provider: ServiceProvider):
         self._service_provider = service_provider
+        self._pool.logger = service_provider.logger
+        self._pool.start_reaper()
+        self._service_provider.server.add_shutdown_handler(self._pool.close)
+        self._service_provider.server.add_shutdown_handler(self._health_monitor_stop_event.set)
+        self._service_provider.server.add_metrics_provider('connections', self.get_statistics)
+        self.start_health_monitor()
 
         # Register the handlers for the service
         self._service_provider.server.set_request_handler(CONNECT_REQUEST, self.handle_connect_request)
@@ -89,6 +240,12 @@ class ConnectionService:
         self._service_provider.server.set_request_handler(BUILD_CONNECTION_INFO_REQUEST, self.handle_build_connection_info_request)
         self._service_provider.server.set_request_handler(GET_CONNECTION_STRING_REQUEST, self.handle_get_connection_string_request)
 
+    # PROPERTIES ###########################################################
+    @property
+    def pool(self) -> ConnectionPool:
+        """Pool the connections of all owner URIs are checked out of"""
+        return self._pool
+
     # PUBLIC METHODS #######################################################
     def connect(self, params: ConnectRequestParams) -> Optional[ConnectionCompleteParams]:
         """
@@ -98,61 +255,45 @@ class ConnectionService:
         whether the connection was successful
         """
 
-        connection_info: ConnectionInfo = self.owner_to_connection_map.get(params.owner_uri)
-
         # If there is no saved connection or the saved connection's options do not match, create a new one
-        if connection_info is None or connection_info.details.options != params.connection.options:
-            if connection_info is not None:
-                self._close_connections(connection_info)
-            connection_info = ConnectionInfo(params.owner_uri, params.connection)
-            self.owner_to_connection_map[params.owner_uri] = connection_info
+        connection_info, replaced_connection_info = self.owner_to_connection_map.get_or_create(params.owner_uri, params.connection)
+        if replaced_connection_info is not None:
+            self._close_connections(replaced_connection_info)
 
         # Get the connection for the given type and build a response if it is present, otherwise open the connection
         connection = connection_info.get_connection(params.type)
         if connection is not None:
             return _build_connection_response(connection_info, params.type)
 
-        # The connection doesn't exist yet. Cancel any ongoing connection and set up a cancellation token
+        # The connection doesn't exist yet. If the same connection is already being opened, wait for that
+        # attempt instead of making another. Otherwise cancel any ongoing connection and set up a cancellation token
         cancellation_key = (params.owner_uri, params.type)
-        cancellation_token = CancellationToken()
-        with self._cancellation_lock:
-            if cancellation_key in self._cancellation_map:
-                self._cancellation_map[cancellation_key].cancel()
-            self._cancellation_map[cancellation_key] = cancellation_token
-
-        # Map the connection options to their psycopg2-specific options
-        connection_options = {CONNECTION_OPTION_KEY_MAP.get(option, option): value for option, value in params.connection.options.items()
-                              if option in PG_CONNECTION_PARAM_KEYWORDS}
-
-        # Use the default database if one was not provided
-        if 'dbname' not in connection_options or not connection_options['dbname']:
-            connection_options['dbname'] = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.default_database
-
-        # Connect using psycopg2
+        with self.owner_to_connection_map.lock(params.owner_uri):
+            attempt = self._connect_attempts.get(cancellation_key)
+            joined = attempt is not None and attempt[0] is connection_info
+            if not joined:
+                cancellation_token = CancellationToken()
+                if cancellation_key in self._cancellation_map:
+                    self._cancellation_map[cancellation_key].cancel()
+                self._cancellation_map[cancellation_key] = cancellation_token
+                attempt = (connection_info, Future())
+                self._connect_attempts[cancellation_key] = attempt
+        if joined:
+            return attempt[1].result()
+
+        response = None
         try:
-            # Pass connection parameters as keyword arguments to psycopg2.connect by unpacking the connection_options dict
-            connection = psycopg2.connect(**connection_options)
-        except Exception as err:
-            return _build_connection_response_error(connection_info, params.type, err)
+            response = self._open_connection(params, connection_info, cancellation_token)
         finally:
-            # Remove this thread's cancellation token if needed
-            with self._cancellation_lock:
+            # Remove this thread's cancellation token and attempt if needed, and hand the outcome to duplicate connects
+            with self.owner_to_connection_map.lock(params.owner_uri):
                 if (cancellation_key in self._cancellation_map
                         and cancellation_token is self._cancellation_map[cancellation_key]):
                     del self._cancellation_map[cancellation_key]
-
-        # If the connection was canceled, close it
-        if cancellation_token.canceled:
-            connection.close()
-            return None
-
-        # Set autocommit mode so that users have control over transactions
-        connection.autocommit = True
-
-        # The connection was not canceled, so add the connection and respond
-        connection_info.add_connection(params.type, connection)
-        self._notify_on_connect(params.type, connection_info)
-        return _build_connection_response(connection_info, params.type)
+                if self._connect_attempts.get(cancellation_key) is attempt:
+                    del self._connect_attempts[cancellation_key]
+            attempt[1].set_result(response)
+        return response
 
     def disconnect(self, owner_uri: str, connection_type: Optional[ConnectionType]) -> bool:
         """
@@ -163,6 +304,13 @@ class ConnectionService:
             connections for the owner URI
         :return: True if the connections were successfully disconnected, false otherwise
         """
+        # Cancel the connections being opened for the owner URI, such as prewarms, so that a connection that
+        # finishes opening after the disconnect is returned to the pool instead of being added to the owner URI
+        with self.owner_to_connection_map.lock(owner_uri):
+            for (cancellation_owner_uri, cancellation_type), cancellation_token in self._cancellation_map.items():
+                if cancellation_owner_uri == owner_uri and (connection_type is None or cancellation_type is connection_type):
+                    cancellation_token.cancel()
+
         # Look up the connection to disconnect
         connection_info = self.owner_to_connection_map.get(owner_uri)
         return self._close_connections(connection_info, connection_type) if connection_info is not None else False
@@ -179,6 +327,12 @@ class ConnectionService:
 
         if not connection_info.has_connection(connection_type):
             self.connect(ConnectRequestParams(connection_info.details, owner_uri, connection_type))
+        else:
+            # Fail fast on a connection that is known to be lost, such as after a query failed on a dead socket,
+            # by replacing it instead of handing it out to fail again
+            connection = connection_info.get_connection(connection_type)
+            if connection.closed:
+                self._reconnect(connection_info, connection_type, connection)
         return connection_info.get_connection(connection_type)
 
     def register_on_connect_callback(self, task: Callable[[ConnectionInfo], None]) -> None:
@@ -188,15 +342,88 @@ class ConnectionService:
         """Get the ConnectionInfo object for the given owner URI, or None if there is no connection"""
         return self.owner_to_connection_map.get(owner_uri)
 
+    def get_statistics(self) -> dict:
+        """
+        Gets a snapshot of the state of the connection pool and the time taken to get connections
+        :return: Dictionary of the pool statistics and a latency histogram per connection type
+        """
+        return {
+            'pool': self._pool.get_statistics(),
+            'connectLatencies': {
+                connection_type.value: histogram.to_dict() for connection_type, histogram in self._connect_latencies.items() if histogram.count
+            },
+            'reconnects': self._reconnect_count
+        }
+
+    def mark_in_use(self, connection) -> None:
+        """
+        Marks a connection in use, so that checking connections leaves it alone until it is marked idle again.
+        Waits for a probe of the connection that is already running to finish
+        :param connection: Connection that is about to be used
+        """
+        key = id(connection)
+        with self._use_condition:
+            while key in self._probing:
+                self._use_condition.wait()
+            self._use_counts[key] = self._use_counts.get(key, 0) + 1
+
+    def mark_idle(self, connection) -> None:
+        """
+        Marks a connection no longer in use by one of the users that marked it in use
+        :param connection: Connection that was marked in use
+        """
+        key = id(connection)
+        with self._use_condition:
+            use_count = self._use_counts.get(key, 0) - 1
+            if use_count > 0:
+                self._use_counts[key] = use_count
+            else:
+                self._use_counts.pop(key, None)
+
+    @contextlib.contextmanager
+    def use_connection(self, owner_uri: str, connection_type: ConnectionType) -> Iterator[psycopg2.extensions.connection]:
+        """
+        Gets the connection for the given owner URI and type, marked in use until the with block exits
+        :raises ValueError: If there is no connection associated with the provided URI
+        """
+        connection = self.get_connection(owner_uri, connection_type)
+        self.mark_in_use(connection)
+        try:
+            yield connection
+        finally:
+            self.mark_idle(connection)
+
+    def check_connections(self) -> int:
+        """
+        Probes the idle connections of every owner URI, replacing those that are no longer alive
+        with new connections to the same database and with the same session settings. Connections
+        that are marked in use are skipped
+        :return: Number of connections that were replaced
+        """
+        reconnect_count = 0
+        for connection_info in list(self.owner_to_connection_map.values()):
+            for connection_type in ConnectionType:
+                connection = connection_info.get_connection(connection_type)
+                if connection is None or not self._begin_probe(connection):
+                    continue
+                try:
+                    if not self._is_alive(connection_info, connection_type, connection):
+                        if self._reconnect(connection_info, connection_type, connection):
+                            reconnect_count += 1
+                finally:
+                    self._end_probe(connection)
+        return reconnect_count
+
+    def start_health_monitor(self) -> None:
+        """Starts checking connections in the background, as often as the health check interval setting says"""
+        self._health_monitor_thread = threading.Thread(target=self._monitor_health, name=self.HEALTH_MONITOR_THREAD_NAME)
+        self._health_monitor_thread.daemon = True
+        self._health_monitor_thread.start()
+
     # REQUEST HANDLERS #####################################################
     def handle_connect_request(self, request_context: RequestContext, params: ConnectRequestParams) -> None:
         """Kick off a connection in response to an incoming connection request"""
-        thread = threading.Thread(
-            target=self._connect_and_respond,
-            args=(request_context, params)
-        )
-        thread.daemon = True
-        thread.start()
+        thread = run_in_background(self._connect_and_respond, request_context, params)
         self.owner_to_thread_map[params.owner_uri] = thread
 
         request_context.send_response(True)
@@ -227,7 +454,7 @@ class ConnectionService:
     def handle_cancellation_request(self, request_context: RequestContext, params: CancelConnectParams) -> None:
         """Cancel a connection attempt in response to a cancellation request"""
         cancellation_key = (params.owner_uri, params.type)
-        with self._cancellation_lock:
+        with self.owner_to_connection_map.lock(params.owner_uri):
             connection_found = cancellation_key in self._cancellation_map
             if connection_found:
                 self._cancellation_map[cancellation_key].cancel()
@@ -264,6 +491,193 @@ class ConnectionService:
         if response is not None:
             request_context.send_notification(CONNECTION_COMPLETE_METHOD, response)
 
+            # Once an editor is connected, open the other connections it is going to need
+            if params.type is ConnectionType.DEFAULT and response.error_message is None:
+                self._prewarm_connections(params)
+
+    def _prewarm_connections(self, params: ConnectRequestParams) -> None:
+        """
+        Opens the connection types listed by the prewarm policy in parallel, so that the first query,
+        completion or cancel doesn't wait for a connection to be established
+        :param params: Parameters of the DEFAULT connection that completed
+        """
+        configuration = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.connection
+        for type_name in configuration.prewarm_connection_types:
+            try:
+                connection_type = ConnectionType(type_name)
+            except ValueError:
+                if self._service_provider.logger is not None:
+                    self._service_provider.logger.warn(f'Ignoring unknown connection type {type_name} in the prewarm policy')
+                continue
+
+            if connection_type is not ConnectionType.DEFAULT:
+                run_in_background(self._prewarm_connection, params, connection_type)
+
+    def _prewarm_connection(self, params: ConnectRequestParams, connection_type: ConnectionType) -> None:
+        start_time = time.perf_counter()
+        try:
+            if connection_type in OWNER_CONNECTION_TYPES:
+                response = self.connect(ConnectRequestParams(params.connection, params.owner_uri, connection_type))
+                error_message = response.error_message if response is not None else 'canceled'
+            else:
+                # These connections belong to other owner URIs, such as an object explorer session,
+                # so leave an idle connection in the pool for them to check out
+                self._pool.prewarm(self._get_connection_options(params.connection))
+                error_message = None
+        except Exception as err:
+            error_message = str(err)
+
+        if self._service_provider.logger is not None:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            if error_message is None:
+                self._service_provider.logger.info(f'Prewarmed {connection_type.value} connection for {params.owner_uri} in {elapsed_ms:.0f} ms')
+            else:
+                self._service_provider.logger.warn(
+                    f'Failed to prewarm {connection_type.value} connection for {params.owner_uri} after {elapsed_ms:.0f} ms: {error_message}'
+                )
+
+    def _get_connection_options(self, details: ConnectionDetails) -> dict:
+        """Maps connection details to psycopg2 connection keyword arguments"""
+        # Map the connection options to their psycopg2-specific options
+        connection_options = {CONNECTION_OPTION_KEY_MAP.get(option, option): value for option, value in details.options.items()
+                              if option in PG_CONNECTION_PARAM_KEYWORDS}
+
+        # Use the default database if one was not provided
+        if 'dbname' not in connection_options or not connection_options['dbname']:
+            connection_options['dbname'] = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.default_database
+
+        # Detect dead sockets within a minute instead of the operating system's default of hours
+        for option, value in KEEPALIVE_OPTIONS.items():
+            connection_options.setdefault(option, value)
+        return connection_options
+
+    def _monitor_health(self) -> None:
+        while True:
+            interval = self._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.connection.health_check_interval
+            # Keep polling the setting while the checks are disabled, in case they are enabled later
+            if self._health_monitor_stop_event.wait(interval if interval > 0 else self.HEALTH_MONITOR_DISABLED_POLL_INTERVAL):
+                return
+            if interval <= 0:
+                continue
+            try:
+                self.check_connections()
+            except Exception:
+                if self._service_provider.logger is not None:
+                    self._service_provider.logger.exception('Unhandled exception while checking connections')
+
+    def _begin_probe(self, connection) -> bool:
+        """Marks a connection as being probed, unless it is in use, so that it isn't used until the probe is done"""
+        key = id(connection)
+        with self._use_condition:
+            if key in self._use_counts or key in self._probing:
+                return False
+            self._probing.add(key)
+            return True
+
+    def _end_probe(self, connection) -> None:
+        with self._use_condition:
+            self._probing.discard(id(connection))
+            self._use_condition.notify_all()
+
+    def _is_alive(self, connection_info: ConnectionInfo, connection_type: ConnectionType,
+                  connection: psycopg2.extensions.connection) -> bool:
+        """
+        Probes a connection with a query, unless it holds a transaction. The query also snapshots the settings
+        changed in the session, so a replacement connection can restore them
+        :return: False if the connection is lost
+        """
+        if connection.closed:
+            return False
+
+        transaction_status = connection.get_transaction_status()
+        if transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # The connection is running a query or holds a transaction, which reconnecting would lose
+            return True
+
+        try:
+            connection_info.set_session_settings(connection_type, [tuple(row) for row in _execute_query(connection, SESSION_SETTINGS_QUERY)])
+            if not connection.autocommit:
+                connection.rollback()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+        except Exception:
+            # Any other error came from the server, so the connection works
+            if self._service_provider.logger is not None:
+                self._service_provider.logger.exception(f'Unexpected error probing {connection_type.value} connection for {connection_info.owner_uri}')
+        return True
+
+    def _reconnect(self, connection_info: ConnectionInfo, connection_type: ConnectionType, lost_connection: psycopg2.extensions.connection) -> bool:
+        """
+        Replaces a lost connection with a new connection to the same database, restoring the session settings
+        :return: True if the connection was replaced. Otherwise the lost connection is removed, so that the
+            next request for it connects again and reports why the connection fails
+        """
+        self._pool.discard(lost_connection)
+        try:
+            connection = self._pool.checkout(self._get_connection_options(connection_info.details),
+                                             f'{connection_info.owner_uri} ({connection_type.value})')
+        except Exception as err:
+            if self._service_provider.logger is not None:
+                self._service_provider.logger.warn(f'Failed to reconnect {connection_type.value} connection for {connection_info.owner_uri}: {err}')
+            connection_info.replace_connection(connection_type, lost_connection, None)
+            return False
+
+        connection.autocommit = True
+        settings = connection_info.get_session_settings(connection_type)
+        for name, setting in settings:
+            try:
+                connection.cursor().execute('SELECT set_config(%s, %s, false)', (name, setting))
+            except psycopg2.Error as err:
+                if self._service_provider.logger is not None:
+                    self._service_provider.logger.warn(f'Failed to restore setting {name} on reconnect: {err}')
+
+        # The owner may have disconnected or connected again while reconnecting
+        if not connection_info.replace_connection(connection_type, lost_connection, connection):
+            self._pool.checkin(connection)
+            return False
+        connection_info.set_session_settings(connection_type, settings)
+        with self._reconnect_count_lock:
+            self._reconnect_count += 1
+        if self._service_provider.logger is not None:
+            self._service_provider.logger.info(f'Reconnected lost {connection_type.value} connection for {connection_info.owner_uri}')
+        return True
+
+    def _open_connection(self, params: ConnectRequestParams, connection_info: ConnectionInfo,
+                         cancellation_token: CancellationToken) -> Optional[ConnectionCompleteParams]:
+        """Checks out a connection for the owner URI and type, returning None if the connection was canceled"""
+        # Check out a connection opened with the same options, connecting using psycopg2 if there is none
+        start_time = time.perf_counter()
+        try:
+            connection = self._pool.checkout(self._get_connection_options(params.connection), f'{params.owner_uri} ({params.type.value})',
+                                             cancellation_token)
+            self._connect_latencies[params.type].record(time.perf_counter() - start_time)
+        except OperationCanceledError:
+            return None
+        except Exception as err:
+            return _build_connection_response_error(connection_info, params.type, err)
+
+        # If the connection was canceled, return it to the pool
+        if cancellation_token.canceled:
+            self._pool.checkin(connection)
+            return None
+
+        # Set autocommit mode so that users have control over transactions
+        connection.autocommit = True
+
+        # The connection was not canceled, so add the connection and respond. The token is checked again under the
+        # owner URI's lock, since a disconnect cancels it under the same lock and then closes the owner's connections
+        with self.owner_to_connection_map.lock(params.owner_uri):
+            canceled = cancellation_token.canceled
+            if not canceled:
+                connection_info.add_connection(params.type, connection)
+        if canceled:
+            self._pool.checkin(connection)
+            return None
+        self._notify_on_connect(params.type, connection_info)
+        return _build_connection_response(connection_info, params.type)
+
     def _notify_on_connect(self, conn_type: ConnectionType, info: ConnectionInfo) -> None:
         """
         Sends a notification to any listeners that a new connection has been established.
@@ -273,39 +687,30 @@ class ConnectionService:
             for callback in self._on_connect_callbacks:
                 callback(info)
 
-    @staticmethod
-    def _close_connections(connection_info: ConnectionInfo, connection_type=None):
+    def _close_connections(self, connection_info: ConnectionInfo, connection_type=None):
         """
-        Close the connections in the given ConnectionInfo object matching the passed type, or
-        close all of them if no type is given.
+        Return the connections in the given ConnectionInfo object matching the passed type to the
+        pool, or return all of them if no type is given.
 
         Return False if no matching connections were found to close, otherwise return True.
         """
-        connections_to_close = []
+        # Take the connections out atomically, so that a connection is returned once even if the owner disconnects twice at once
         if connection_type is None:
-            connections_to_close = connection_info.get_all_connections()
-            if not connections_to_close:
-                return False
-            connection_info.remove_all_connections()
+            connections_to_close = connection_info.pop_all_connections()
         else:
-            connection = connection_info.get_connection(connection_type)
-            if connection is None:
-                return False
-            connections_to_close.append(connection)
-            connection_info.remove_connection(connection_type)
+            connection = connection_info.pop_connection(connection_type)
+            connections_to_close = [connection] if connection is not None else []
+        if not connections_to_close:
+            return False
         for connection in connections_to_close:
-            try:
-                connection.close()
-            except Exception:
-                # Ignore errors when disconnecting
-                pass
+            self._pool.checkin(connection)
         return True
 
 
 def _build_connection_response(connection_info: ConnectionInfo, connection_type: ConnectionType) -> ConnectionCompleteParams:
     """Build a connection complete response object"""
     connection = connection_info.get_connection(connection_type)
-    dsn_parameters = connection.get_dsn_parameters()
+    dsn_parameters = get_connection_metadata(connection).dsn_parameters
 
     connection_summary = ConnectionSummary(
         server_name=dsn_parameters['host'],
@@ -336,10 +741,8 @@ def _build_connection_response_error(connection_info: ConnectionInfo, connection
 
 def _get_server_info(connection):
     """Build the server info response for a connection"""
-    server_version = connection.get_parameter_status('server_version')
-    host = connection.get_dsn_parameters()['host']
-    is_cloud = host.endswith('database.azure.com') or host.endswith('database.windows.net')
-    return ServerInfo(server_version, is_cloud)
+    metadata = get_connection_metadata(connection)
+    return ServerInfo(metadata.server_version, metadata.is_cloud)
 
 
 def _execute_query(connection, query):
@@ -357,6 +760,22 @@ def _execute_query(connection, query):
     return query_results
 
 
+# Connection types that are held by the owner URI of the editor they were opened for. Connections
+# of the other types are held by owner URIs of their own
+OWNER_CONNECTION_TYPES = frozenset([ConnectionType.QUERY, ConnectionType.QUERY_CANCEL, ConnectionType.EDIT])
+
+# TCP keepalive settings used unless the connection options set them. A query on a connection whose
+# server went away fails after keepalives_idle + keepalives_interval * keepalives_count seconds
+KEEPALIVE_OPTIONS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
+# Query used to probe idle connections, which returns the settings changed in the session
+SESSION_SETTINGS_QUERY = "SELECT name, setting FROM pg_settings WHERE source = 'session'"
+
 # Dictionary mapping connection option names to their corresponding connection string keys.
 # If a name is not present in this map, the name should be used as the key.
 CONNECTION_OPTION_KEY_MAP = {
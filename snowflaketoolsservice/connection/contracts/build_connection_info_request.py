@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from snowflaketoolsservice.connection.contracts.common import ConnectionType
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -16,4 +16,4 @@ class BuildConnectionInfoParams(Serializable):
         self.type: ConnectionType = connection_type
 
 
-BUILD_CONNECTION_INFO_REQUEST = IncomingMessageConfiguration('connection/buildconnectioninfo', BuildConnectionInfoParams)
+BUILD_CONNECTION_INFO_REQUEST = IncomingMessageConfiguration('connection/buildconnectioninfo', BuildConnectionInfoParams, DispatchConcurrency.PARALLEL)
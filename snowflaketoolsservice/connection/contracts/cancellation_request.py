@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from snowflaketoolsservice.connection.contracts.common import ConnectionType
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -16,4 +16,4 @@ class CancelConnectParams(Serializable):
         self.type: ConnectionType = connection_type
 
 
-CANCEL_CONNECT_REQUEST = IncomingMessageConfiguration('connection/cancelconnect', CancelConnectParams)
+CANCEL_CONNECT_REQUEST = IncomingMessageConfiguration('connection/cancelconnect', CancelConnectParams, DispatchConcurrency.PARALLEL)
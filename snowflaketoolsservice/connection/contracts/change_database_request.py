@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.connection.contracts.common import ConnectionDetails, ConnectionType  # noqa
 from snowflaketoolsservice.serialization import Serializable
 
@@ -19,4 +19,4 @@ class ChangeDatabaseRequestParams(Serializable):
         self.new_database: str = new_database
 
 
-CHANGE_DATABASE_REQUEST = IncomingMessageConfiguration('connection/changedatabase', ChangeDatabaseRequestParams)
+CHANGE_DATABASE_REQUEST = IncomingMessageConfiguration('connection/changedatabase', ChangeDatabaseRequestParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.connection.contracts.common import ConnectionDetails, ConnectionType  # noqa
 from snowflaketoolsservice.serialization import Serializable
 from snowflaketoolsservice.parsers.owner_uri_parser import get_attribute_value
@@ -26,4 +26,4 @@ class ConnectRequestParams(Serializable):
         self.type: ConnectionType = connection_type
 
 
-CONNECT_REQUEST = IncomingMessageConfiguration('connection/connect', ConnectRequestParams)
+CONNECT_REQUEST = IncomingMessageConfiguration('connection/connect', ConnectRequestParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -14,4 +14,4 @@ class GetConnectionStringParams(Serializable):
         self.owner_uri: str = owner_uri
 
 
-GET_CONNECTION_STRING_REQUEST = IncomingMessageConfiguration('connection/getconnectionstring', GetConnectionStringParams)
+GET_CONNECTION_STRING_REQUEST = IncomingMessageConfiguration('connection/getconnectionstring', GetConnectionStringParams, DispatchConcurrency.PARALLEL)
@@ -7,7 +7,7 @@
 
 from typing import List  # noqa
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -25,4 +25,4 @@ class ListDatabasesResponse:
         self.database_names: List[str] = database_names
 
 
-LIST_DATABASES_REQUEST = IncomingMessageConfiguration('connection/listdatabases', ListDatabasesParams)
+LIST_DATABASES_REQUEST = IncomingMessageConfiguration('connection/listdatabases', ListDatabasesParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
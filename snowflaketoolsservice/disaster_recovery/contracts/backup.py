@@ -9,7 +9,7 @@ import enum
 from typing import List  # noqa
 
 from snowflaketoolsservice.capabilities.contracts import CategoryValue, FeatureMetadataProvider, ServiceOption
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -81,7 +81,7 @@ class BackupType(enum.Enum):
     PLAIN_TEXT = 'sql'
 
 
-BACKUP_REQUEST = IncomingMessageConfiguration('backup/backup', BackupParams)
+BACKUP_REQUEST = IncomingMessageConfiguration('backup/backup', BackupParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 
 # These options are handled in the disaster recovery service's _perform_backup method. A few have special case handling, but most are handled automatically by
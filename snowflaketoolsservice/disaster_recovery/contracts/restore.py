@@ -6,7 +6,7 @@
 """Module containing contracts for restore operations"""
 
 from snowflaketoolsservice.capabilities.contracts import FeatureMetadataProvider, ServiceOption
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -57,7 +57,7 @@ class RestoreOptions(Serializable):
         self.role: str = None
 
 
-RESTORE_REQUEST = IncomingMessageConfiguration('restore/restore', RestoreParams)
+RESTORE_REQUEST = IncomingMessageConfiguration('restore/restore', RestoreParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 # These options are handled in the disaster recovery service's _perform_restore method. The path has special case handling, but most are handled automatically
 # by using the option's name as the flag name, and the setting as the value. The RestoreOptions contract above has a field corresponding to each option.
@@ -6,7 +6,7 @@
 
 from typing import List  # noqa
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import SessionOperationRequest
 
 
@@ -23,4 +23,4 @@ class CreateRowResponse:
         self.new_row_id = new_row_id
 
 
-CREATE_ROW_REQUEST = IncomingMessageConfiguration('edit/createRow', CreateRowRequest)
+CREATE_ROW_REQUEST = IncomingMessageConfiguration('edit/createRow', CreateRowRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
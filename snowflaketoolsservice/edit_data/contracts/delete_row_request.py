@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import RowOperationRequest
 
 
@@ -20,4 +20,4 @@ class DeleteRowResponse:
         pass
 
 
-DELETE_ROW_REQUEST = IncomingMessageConfiguration('edit/deleteRow', DeleteRowRequest)
+DELETE_ROW_REQUEST = IncomingMessageConfiguration('edit/deleteRow', DeleteRowRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import SessionOperationRequest
 
 
@@ -20,4 +20,4 @@ class DisposeResponse:
         pass
 
 
-DISPOSE_REQUEST = IncomingMessageConfiguration('edit/dispose', DisposeRequest)
+DISPOSE_REQUEST = IncomingMessageConfiguration('edit/dispose', DisposeRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
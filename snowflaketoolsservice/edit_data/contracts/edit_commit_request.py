@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import SessionOperationRequest
 
 
@@ -20,4 +20,4 @@ class EditCommitResponse:
         pass
 
 
-EDIT_COMMIT_REQUEST = IncomingMessageConfiguration('edit/commit', EditCommitRequest)
+EDIT_COMMIT_REQUEST = IncomingMessageConfiguration('edit/commit', EditCommitRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -6,7 +6,7 @@
 
 from typing import List
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 from snowflaketoolsservice.edit_data.contracts import EditRow
 
@@ -26,4 +26,4 @@ class EditSubsetResponse:
         self.subset = edit_rows
 
 
-EDIT_SUBSET_REQUEST = IncomingMessageConfiguration('edit/subset', EditSubsetParams)
+EDIT_SUBSET_REQUEST = IncomingMessageConfiguration('edit/subset', EditSubsetParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -7,7 +7,7 @@
 from typing import Optional  # noqa
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -31,4 +31,4 @@ class InitializeEditParams(Serializable):
         self.filters: EditInitializerFilter = None
 
 
-INITIALIZE_EDIT_REQUEST = IncomingMessageConfiguration('edit/initialize', InitializeEditParams)
+INITIALIZE_EDIT_REQUEST = IncomingMessageConfiguration('edit/initialize', InitializeEditParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import RowOperationRequest, EditCellResponse, EditCell
 
 
@@ -21,4 +21,4 @@ class RevertCellResponse(EditCellResponse):
         EditCellResponse.__init__(self, edit_cell, is_row_dirty)
 
 
-REVERT_CELL_REQUEST = IncomingMessageConfiguration('edit/revertCell', RevertCellRequest)
+REVERT_CELL_REQUEST = IncomingMessageConfiguration('edit/revertCell', RevertCellRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
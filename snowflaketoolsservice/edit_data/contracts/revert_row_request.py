@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import RowOperationRequest
 
 
@@ -20,4 +20,4 @@ class RevertRowResponse:
         pass
 
 
-REVERT_ROW_REQUEST = IncomingMessageConfiguration('edit/revertRow', RevertRowRequest)
+REVERT_ROW_REQUEST = IncomingMessageConfiguration('edit/revertRow', RevertRowRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
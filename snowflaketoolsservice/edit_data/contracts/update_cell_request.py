@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.edit_data.contracts import RowOperationRequest, EditCellResponse
 
 
@@ -22,4 +22,4 @@ class UpdateCellResponse(EditCellResponse):
         EditCellResponse.__init__(self)
 
 
-UPDATE_CELL_REQUEST = IncomingMessageConfiguration('edit/updateCell', UpdateCellRequest)
+UPDATE_CELL_REQUEST = IncomingMessageConfiguration('edit/updateCell', UpdateCellRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -183,6 +183,10 @@ class DataEditorSession():
 
         return edit_rows
 
+    def dispose(self) -> None:
+        if self._result_set is not None:
+            self._result_set.dispose()
+
     def _do_commit(self, connection: 'psycopg2.extensions.connection', success: Callable, failure: Callable):
 
         try:
@@ -85,7 +85,13 @@ class EditDataService(object):
         def on_failure(error: str):
             request_context.send_notification(SESSION_READY_NOTIFICATION, SessionReadyNotificationParams(params.owner_uri, False, error))
 
-        session.initialize(params, connection, query_executer, on_success, on_failure)
+        # The table's metadata is queried on this thread, while the query that reads its rows marks the connection
+        # in use on its own
+        self._connection_service.mark_in_use(connection)
+        try:
+            session.initialize(params, connection, query_executer, on_success, on_failure)
+        finally:
+            self._connection_service.mark_idle(connection)
         request_context.send_response({})
 
     def _edit_subset(self, request_context: RequestContext, params: EditSubsetParams) -> None:
@@ -127,19 +133,27 @@ class EditDataService(object):
     def _edit_commit(self, request_context: RequestContext, params: EditCommitRequest) -> None:
         connection = self._connection_service.get_connection(params.owner_uri, ConnectionType.QUERY)
 
+        # The edits are committed on a thread of their own, which marks the connection idle once it is done
         def on_success():
+            self._connection_service.mark_idle(connection)
             request_context.send_response(EditCommitResponse())
 
         def on_failure(error: str):
+            self._connection_service.mark_idle(connection)
             request_context.send_error(error)
 
         edit_session = self._get_active_session(params.owner_uri)
-        edit_session.commit_edit(connection, on_success, on_failure)
+        self._connection_service.mark_in_use(connection)
+        try:
+            edit_session.commit_edit(connection, on_success, on_failure)
+        except Exception:
+            self._connection_service.mark_idle(connection)
+            raise
 
     def _dispose(self, request_context: RequestContext, params: DisposeRequest) -> None:
 
         try:
-            self._active_sessions.pop(params.owner_uri)
+            self._active_sessions.pop(params.owner_uri).dispose()
 
         except KeyError:
             request_context.send_error('Edit data session not found')
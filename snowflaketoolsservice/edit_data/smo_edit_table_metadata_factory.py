@@ -9,6 +9,7 @@ from typing import List  # noqa
 from snow import Server
 from snow.objects.table.table import Table  # noqa
 from snow.objects.table_objects.column import Column  # noqa
+from snowflaketoolsservice.connection.connection_metadata import get_connection_metadata
 from snowflaketoolsservice.edit_data import EditTableMetadata, EditColumnMetadata
 from snowflaketoolsservice.utils import object_finder
 from snowflaketoolsservice.metadata.contracts.object_metadata import ObjectMetadata
@@ -19,7 +20,7 @@ class SmoEditTableMetadataFactory:
 
     def get(self, connection: 'psycopg2.extensions.connection', schema_name: str, object_name: str, object_type: str) -> EditTableMetadata:
 
-        server = Server(connection)
+        server = Server(connection, metadata=get_connection_metadata(connection))
         result_object: Table = None
         object_metadata = ObjectMetadata(server.urn_base, None, object_type, object_name, schema_name)
 
@@ -3,15 +3,23 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency
 from snowflaketoolsservice.hosting.json_rpc_server import (
     JSONRPCServer,
     NotificationContext,
     IncomingMessageConfiguration,
     RequestContext
 )
-from snowflaketoolsservice.hosting.service_provider import ServiceProvider
+from snowflaketoolsservice.hosting.metrics import LatencyHistogram, MetricsDumper, ServerMetrics
+from snowflaketoolsservice.hosting.output_queue import OutputPriority
+from snowflaketoolsservice.hosting.service_provider import LazyService, ServiceProvider
+from snowflaketoolsservice.hosting.traffic_recorder import TrafficRecorder
 
 __all__ = [
+    'DispatchConcurrency',
     'JSONRPCServer', 'NotificationContext', 'IncomingMessageConfiguration', 'RequestContext',
-    'ServiceProvider'
+    'LatencyHistogram', 'MetricsDumper', 'ServerMetrics',
+    'OutputPriority',
+    'LazyService', 'ServiceProvider',
+    'TrafficRecorder'
 ]
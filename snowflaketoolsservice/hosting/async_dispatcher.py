@@ -0,0 +1,197 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the dispatcher that schedules incoming message handlers on an asyncio event loop"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable, Dict, Optional  # noqa
+
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency
+
+
+class AsyncioDispatcher:
+    """
+    Schedules incoming message handlers on an asyncio event loop running on its own thread. Handlers
+    keep their blocking signature and are bridged onto a bounded pool of worker threads, while the
+    loop orders them per owner URI. Short work that handlers hand off to the background, such as
+    connecting, goes to a second bounded pool, so the number of threads does not grow with the number
+    of requests. Work that can run for minutes, such as running a query, keeps a thread of its own so
+    that it doesn't hold up the short work. Drop-in replacement for RequestDispatcher.
+    """
+
+    # CONSTANTS ############################################################
+    LOOP_THREAD_NAME = u"JSON_RPC_Event_Loop"
+    WORKER_THREAD_PREFIX = u"JSON_RPC_Dispatch_Worker"
+    BACKGROUND_THREAD_PREFIX = u"JSON_RPC_Background_Worker"
+
+    def __init__(self, max_workers: int, max_background_workers: int, logger=None):
+        """
+        Initializes the dispatcher and starts its event loop
+        :param max_workers: Maximum number of handlers running at once
+        :param max_background_workers: Maximum number of background tasks running at once
+        :param logger: Optional destination for logging
+        """
+        self._max_workers: int = max(1, max_workers)
+        self._logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=self.WORKER_THREAD_PREFIX)
+        self.background_executor = ThreadPoolExecutor(
+            max_workers=max(1, max_background_workers),
+            thread_name_prefix=self.BACKGROUND_THREAD_PREFIX
+        )
+
+        self._lock: threading.Lock = threading.Lock()
+        self._idle: threading.Condition = threading.Condition(self._lock)
+        self._in_flight: int = 0
+        self._active: int = 0
+
+        # Locks that serialize handlers per owner URI, with the number of handlers holding or
+        # waiting on each. The locks are only touched on the loop thread
+        self._owner_locks: Dict[Any, asyncio.Lock] = {}
+        self._owner_waiters: Dict[Any, int] = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._run_loop, name=self.LOOP_THREAD_NAME)
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+
+    # PROPERTIES ###########################################################
+    @property
+    def is_concurrent(self) -> bool:
+        """Whether handlers are run on worker threads instead of inline"""
+        return True
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def active_workers(self) -> int:
+        """Number of worker threads currently running a handler"""
+        return self._active
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop the handlers are scheduled on"""
+        return self._loop
+
+    # METHODS ##############################################################
+    def dispatch(self, concurrency: DispatchConcurrency, owner_key: Any, action: Callable[[], None]) -> None:
+        """
+        Schedules a handler invocation. Must only be called from the input thread.
+        :param concurrency: How the action may run relative to other dispatched actions
+        :param owner_key: Owner URI the action is serialized on for SERIAL_PER_OWNER_URI
+        :param action: Callable that invokes the handler
+        """
+        if concurrency is DispatchConcurrency.IMMEDIATE:
+            action()
+            return
+
+        if concurrency is DispatchConcurrency.EXCLUSIVE:
+            # Since only the input thread dispatches, nothing new can start until the handler returns
+            self.wait_for_idle()
+            action()
+            return
+
+        if concurrency is not DispatchConcurrency.SERIAL_PER_OWNER_URI:
+            owner_key = None
+
+        with self._lock:
+            self._in_flight += 1
+        # Coroutines are scheduled in arrival order, so handlers for an owner acquire its lock in order
+        self._loop.call_soon_threadsafe(self._schedule, owner_key, action)
+
+    def wait_for_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until no dispatched handlers are running or pending
+        :param timeout: Optional number of seconds to wait
+        :return: True if the dispatcher is idle, False if the timeout expired
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Gets a snapshot of the state of the worker pool
+        :return: Dictionary of the max and active number of workers, the number of submitted handlers
+            that have not finished, and the number of handlers waiting behind another handler for
+            the same owner URI
+        """
+        with self._lock:
+            return {
+                'maxWorkers': self._max_workers,
+                'activeWorkers': self._active,
+                'inFlight': self._in_flight,
+                'queuedPerOwner': sum(waiters - 1 for waiters in self._owner_waiters.values())
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stops the event loop and releases the worker threads
+        :param wait: Whether to block until running handlers have finished
+        """
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait:
+            self._loop_thread.join()
+        self._executor.shutdown(wait=wait)
+        self.background_executor.shutdown(wait=wait)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _schedule(self, owner_key: Any, action: Callable[[], None]) -> None:
+        if owner_key is not None:
+            with self._lock:
+                self._owner_waiters[owner_key] = self._owner_waiters.get(owner_key, 0) + 1
+            if owner_key not in self._owner_locks:
+                self._owner_locks[owner_key] = asyncio.Lock()
+        self._loop.create_task(self._run(owner_key, action))
+
+    async def _run(self, owner_key: Any, action: Callable[[], None]) -> None:
+        try:
+            if owner_key is None:
+                await self._loop.run_in_executor(self._executor, self._invoke, action)
+                return
+
+            try:
+                async with self._owner_locks[owner_key]:
+                    await self._loop.run_in_executor(self._executor, self._invoke, action)
+            finally:
+                with self._lock:
+                    self._owner_waiters[owner_key] -= 1
+                    released = not self._owner_waiters[owner_key]
+                    if released:
+                        del self._owner_waiters[owner_key]
+                if released:
+                    del self._owner_locks[owner_key]
+        except RuntimeError:
+            # The executor has been shut down
+            if self._logger is not None:
+                self._logger.warn('Dropped a dispatched handler because the dispatcher is shutting down')
+        finally:
+            self._mark_finished()
+
+    def _invoke(self, action: Callable[[], None]) -> None:
+        with self._lock:
+            self._active += 1
+        try:
+            action()
+        except Exception:
+            # Handlers report their own failures, so this only guards the worker thread
+            if self._logger is not None:
+                self._logger.exception('Unhandled exception in dispatched handler')
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _mark_finished(self) -> None:
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
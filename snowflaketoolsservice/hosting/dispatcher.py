@@ -0,0 +1,199 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the dispatcher that schedules incoming message handlers onto worker threads"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+import functools
+import threading
+from typing import Any, Callable, Deque, Dict, Optional  # noqa
+
+
+class DispatchConcurrency(Enum):
+    """
+    Describes how the handler for an incoming message may run relative to other handlers.
+
+    Exclusive: Waits for every previously dispatched handler to finish, then runs alone on the
+        input thread. This matches the behavior of the original single-threaded dispatch.
+    SerialPerOwnerUri: Runs in arrival order with the other handlers for the same owner URI, and
+        in parallel with handlers for any other owner URI.
+    Parallel: Runs as soon as a worker thread is available.
+    Immediate: Runs on the input thread right away, without waiting for any other handler. Only
+        suitable for handlers that do trivial work, such as canceling another request.
+    """
+    EXCLUSIVE = 1
+    SERIAL_PER_OWNER_URI = 2
+    PARALLEL = 3
+    IMMEDIATE = 4
+
+
+class RequestDispatcher:
+    """
+    Runs incoming message handlers on a bounded pool of worker threads, honoring the concurrency
+    declared for each method. If no workers are configured, every handler runs inline.
+    """
+
+    # CONSTANTS ############################################################
+    WORKER_THREAD_PREFIX = u"JSON_RPC_Dispatch_Worker"
+
+    def __init__(self, max_workers: int = 0, logger=None):
+        """
+        Initializes the dispatcher
+        :param max_workers: Maximum number of worker threads. 0 runs every handler inline
+        :param logger: Optional destination for logging
+        """
+        self._max_workers: int = max_workers
+        self._logger = logger
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if max_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=self.WORKER_THREAD_PREFIX)
+
+        self._lock: threading.Lock = threading.Lock()
+        self._idle: threading.Condition = threading.Condition(self._lock)
+        self._in_flight: int = 0
+        self._active: int = 0
+
+        # Pending handlers for owner URIs that currently have a worker draining them
+        self._owner_queues: Dict[Any, Deque[Callable[[], None]]] = {}
+
+    # PROPERTIES ###########################################################
+    @property
+    def is_concurrent(self) -> bool:
+        """Whether handlers are run on worker threads instead of inline"""
+        return self._executor is not None
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def active_workers(self) -> int:
+        """Number of worker threads currently running a handler"""
+        return self._active
+
+    # METHODS ##############################################################
+    def dispatch(self, concurrency: DispatchConcurrency, owner_key: Any, action: Callable[[], None]) -> None:
+        """
+        Schedules a handler invocation. Must only be called from the input thread.
+        :param concurrency: How the action may run relative to other dispatched actions
+        :param owner_key: Owner URI the action is serialized on for SERIAL_PER_OWNER_URI
+        :param action: Callable that invokes the handler
+        """
+        if self._executor is None or concurrency is DispatchConcurrency.IMMEDIATE:
+            action()
+            return
+
+        if concurrency is DispatchConcurrency.PARALLEL:
+            self._submit(action)
+        elif concurrency is DispatchConcurrency.SERIAL_PER_OWNER_URI:
+            with self._lock:
+                pending = self._owner_queues.get(owner_key)
+                if pending is not None:
+                    # A worker is already draining this owner's queue and will pick the action up
+                    pending.append(action)
+                    return
+                self._owner_queues[owner_key] = deque()
+            self._submit(functools.partial(self._drain_owner_queue, owner_key, action))
+        else:
+            # Exclusive handlers run on the calling thread once everything else has finished. Since
+            # only the input thread dispatches, nothing new can start until the handler returns
+            self.wait_for_idle()
+            action()
+
+    def wait_for_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until no dispatched handlers are running or pending
+        :param timeout: Optional number of seconds to wait
+        :return: True if the dispatcher is idle, False if the timeout expired
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Gets a snapshot of the state of the worker pool
+        :return: Dictionary of the max and active number of workers, the number of submitted handlers
+            that have not finished, and the number of handlers waiting behind another handler for
+            the same owner URI
+        """
+        with self._lock:
+            return {
+                'maxWorkers': self._max_workers,
+                'activeWorkers': self._active,
+                'inFlight': self._in_flight,
+                'queuedPerOwner': sum(len(pending) for pending in self._owner_queues.values())
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stops accepting new work and releases the worker threads
+        :param wait: Whether to block until running handlers have finished
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _submit(self, action: Callable[[], None]) -> None:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._executor.submit(self._run, action)
+        except RuntimeError:
+            # The executor has been shut down
+            self._mark_finished()
+            raise
+
+    def _run(self, action: Callable[[], None]) -> None:
+        with self._lock:
+            self._active += 1
+        try:
+            self._invoke(action)
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._mark_finished()
+
+    def _drain_owner_queue(self, owner_key: Any, action: Callable[[], None]) -> None:
+        while action is not None:
+            self._invoke(action)
+            with self._lock:
+                pending = self._owner_queues[owner_key]
+                if pending:
+                    action = pending.popleft()
+                else:
+                    del self._owner_queues[owner_key]
+                    action = None
+
+    def _invoke(self, action: Callable[[], None]) -> None:
+        try:
+            action()
+        except Exception:
+            # Handlers report their own failures, so this only guards the worker thread
+            if self._logger is not None:
+                self._logger.exception('Unhandled exception in dispatched handler')
+
+    def _mark_finished(self) -> None:
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+
+def get_owner_key(params: Any) -> Optional[str]:
+    """
+    Finds the owner URI that serial dispatch should be keyed on for a set of deserialized params.
+    Editor requests carry it as owner_uri or text_document.uri, OE requests as session_id
+    :param params: Deserialized parameters of an incoming message
+    :return: The owner URI, or None if the params do not identify an owner
+    """
+    for attribute in ('owner_uri', 'session_id'):
+        owner_key = getattr(params, attribute, None)
+        if owner_key is not None:
+            return owner_key
+
+    text_document = getattr(params, 'text_document', None)
+    return getattr(text_document, 'uri', None)
@@ -96,6 +96,7 @@ class JSONRPCMessage:
         self._message_params = msg_params
         self._message_result = msg_result
         self._message_error = msg_error
+        self._priority = None
 
     # PROPERTIES ###########################################################
     @property
@@ -122,27 +123,49 @@ class JSONRPCMessage:
     def message_type(self):
         return self._message_type
 
+    @property
+    def priority(self):
+        """Lane of the output queue the message is sent from. None uses the default for the message type"""
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+
     @property
     def dictionary(self):
+        return utils.serialization.convert_to_dict(self._get_message_base())
+
+    # METHODS ##############################################################
+    def to_json(self) -> str:
+        """
+        Serializes the message directly to a JSON string, without building an intermediate
+        dictionary of the message contents
+        :return: JSON representation of the message, with sorted keys
+        """
+        return utils.serialization.to_json(self._get_message_base(), sort_keys=True)
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_message_base(self):
         message_base = {'jsonrpc': '2.0'}
 
         if self._message_type is JSONRPCMessageType.Request:
             message_base['method'] = self._message_method
-            message_base['params'] = utils.serialization.convert_to_dict(self._message_params)
+            message_base['params'] = self._message_params
             message_base['id'] = self._message_id
             return message_base
 
         if self._message_type is JSONRPCMessageType.ResponseSuccess:
-            message_base['result'] = utils.serialization.convert_to_dict(self._message_result)
+            message_base['result'] = self._message_result
             message_base['id'] = self._message_id
             return message_base
 
         if self._message_type is JSONRPCMessageType.Notification:
             message_base['method'] = self._message_method
-            message_base['params'] = utils.serialization.convert_to_dict(self._message_params)
+            message_base['params'] = self._message_params
             return message_base
 
         if self._message_type is JSONRPCMessageType.ResponseError:
-            message_base['error'] = utils.serialization.convert_to_dict(self._message_error)
+            message_base['error'] = self._message_error
             message_base['id'] = self._message_id
             return message_base
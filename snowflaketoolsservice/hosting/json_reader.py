@@ -5,6 +5,7 @@
 
 from enum import Enum
 import json
+import threading
 
 from snowflaketoolsservice.hosting.json_message import JSONRPCMessage
 
@@ -17,9 +18,13 @@ class JSONRPCReader:
     # CONSTANTS ############################################################
     CR = 13
     LF = 10
+    HEADER_DELIMITER = b'\r\n\r\n'
     BUFFER_RESIZE_TRIGGER = 0.25
     DEFAULT_BUFFER_SIZE = 8192
 
+    # Buffers that grew beyond this size to hold a large message are released once it is read
+    MAX_RETAINED_BUFFER_SIZE = 1024 * 1024
+
     class ReadState(Enum):
         Header = 1,
         Content = 2
@@ -35,15 +40,22 @@ class JSONRPCReader:
         self.stream = stream
         self.encoding = encoding or 'UTF-8'
         self._logger = logger
+        self.statistics = ReaderStatistics()
+
+        # Optional tap that is given the content of every message read, see TrafficRecorder
+        self.tap = None
 
         self._buffer = bytearray(self.DEFAULT_BUFFER_SIZE)
         # Pointer to end of buffer content
         self._buffer_end_offset = 0
         # Pointer to where we have read up to
         self._read_offset = 0
+        # Pointer to where the search for the end of the headers resumes after a partial read
+        self._header_scan_offset = 0
 
         # Setup message reading state
         self._expected_content_length = 0
+        self._header_length = 0
         self._headers = {}
         self._read_state = self.ReadState.Header
         self._needs_more_data = True
@@ -88,6 +100,10 @@ class JSONRPCReader:
                 # We have the content
                 break
 
+            self.statistics.record_message(self._header_length + self._expected_content_length)
+            if self.tap is not None:
+                self.tap.record_incoming(content[0])
+
             # Uncomment for verbose logging
             # if self._logger is not None:
             #     self._logger.debug(f'{content[0]}')
@@ -111,13 +127,10 @@ class JSONRPCReader:
         :raises ValueError: Stream was closed externally
         :return: True on successful read of a message chunk
         """
-        # Check if we need to resize the buffer
+        # Check if we need to make room at the end of the buffer
         current_buffer_size = len(self._buffer)
         if (current_buffer_size - self._buffer_end_offset) / current_buffer_size < self.BUFFER_RESIZE_TRIGGER:
-            # Resize the buffer, copy the old contents, and point to the new buffer
-            resized_buffer = bytearray(current_buffer_size * 2)
-            resized_buffer[0:current_buffer_size] = self._buffer
-            self._buffer = resized_buffer
+            self._compact_or_resize_buffer()
 
         # Memory view is required in order to read into a subset of a byte array
         try:
@@ -137,6 +150,37 @@ class JSONRPCReader:
                 self._logger.warn('JSON RPC Reader on read_next_chunk encountered exception: {}'.format(ex))
             raise
 
+    def _compact_or_resize_buffer(self):
+        """
+        Makes room for the next chunk by moving unread bytes to the start of the buffer in place. If
+        that does not free enough space, the buffer is doubled, or grown to fit the rest of the
+        message being read if its content length is known. Either way, the bytes that have already
+        been read are never copied
+        """
+        current_buffer_size = len(self._buffer)
+        unread_length = self._buffer_end_offset - self._read_offset
+
+        required_size = unread_length
+        if self._read_state is self.ReadState.Content:
+            required_size = max(required_size, self._expected_content_length)
+
+        if (current_buffer_size - unread_length) / current_buffer_size >= self.BUFFER_RESIZE_TRIGGER \
+                and required_size <= current_buffer_size:
+            # Shift the unread bytes to the start of the buffer, memoryview assignment handles the overlap
+            if self._read_offset > 0:
+                view = memoryview(self._buffer)
+                view[:unread_length] = view[self._read_offset:self._buffer_end_offset]
+                del view
+        else:
+            # Copy the unread bytes into a larger buffer and point to the new buffer
+            resized_buffer = bytearray(max(current_buffer_size * 2, required_size))
+            resized_buffer[:unread_length] = memoryview(self._buffer)[self._read_offset:self._buffer_end_offset]
+            self._buffer = resized_buffer
+
+        self._header_scan_offset -= self._read_offset
+        self._read_offset = 0
+        self._buffer_end_offset = unread_length
+
     def _try_read_headers(self):
         """
         Try to read the header information from the internal buffer expecting the last header to contain '\r\n\r\n'
@@ -145,23 +189,23 @@ class JSONRPCReader:
         :raises KeyError: The header block was malformed by not having a key:value format
         :return: True on successful read of headers, False on failure to find headers
         """
-        # Scan the buffer up until right before the \r\n\r\n
-        scan_offset = self._read_offset
-        while scan_offset + 3 < self._buffer_end_offset and (
-            self._buffer[scan_offset] != self.CR or
-            self._buffer[scan_offset + 1] != self.LF or
-            self._buffer[scan_offset + 2] != self.CR or
-            self._buffer[scan_offset + 3] != self.LF
-        ):
-            scan_offset += 1
-
-        # If we reached the end of the buffer and haven't found the control sequence, we haven't found the headers
-        if scan_offset + 3 >= self._buffer_end_offset:
+        # Search the buffer for the \r\n\r\n, skipping the bytes that were already searched by
+        # previous attempts to read this header block
+        scan_offset = self._buffer.find(
+            self.HEADER_DELIMITER,
+            max(self._read_offset, self._header_scan_offset),
+            self._buffer_end_offset
+        )
+
+        # If we haven't found the control sequence, we haven't found the headers. The last bytes
+        # may be the start of the control sequence, so they are searched again after the next read
+        if scan_offset == -1:
+            self._header_scan_offset = max(self._read_offset, self._buffer_end_offset - len(self.HEADER_DELIMITER) + 1)
             return False
 
         # Split the headers by newline
         try:
-            headers_read = self._buffer[self._read_offset:scan_offset].decode('ascii')
+            headers_read = str(memoryview(self._buffer)[self._read_offset:scan_offset], 'ascii')
             for header in headers_read.split('\n'):
                 colon_index = header.find(':')
 
@@ -192,6 +236,7 @@ class JSONRPCReader:
             raise
 
         # Pushing read pointer past the newline character
+        self._header_length = scan_offset + 4 - self._read_offset
         self._read_offset = scan_offset + 4
         self._read_state = self.ReadState.Content
 
@@ -209,8 +254,8 @@ class JSONRPCReader:
             # We buffered less than the expected content length
             return False
 
-        content[0] = self._buffer[self._read_offset:self._read_offset + self._expected_content_length]\
-            .decode(self.encoding)
+        # Decode straight from the buffer, without copying the content into an intermediate bytes object
+        content[0] = str(memoryview(self._buffer)[self._read_offset:self._read_offset + self._expected_content_length], self.encoding)
         self._read_offset += self._expected_content_length
 
         self._read_state = self.ReadState.Header
@@ -219,26 +264,62 @@ class JSONRPCReader:
 
     def _trim_buffer_and_resize(self, bytes_to_remove):
         """
-        Trim the buffer by the passed in bytes_to_remove by creating a new buffer that is at a minimum the
-        default max size
+        Trim the buffer by the passed in bytes_to_remove. Unread bytes are left in place and only
+        moved when room is needed for the next chunk. The buffer is only replaced if it is smaller
+        than the default size, or if it grew beyond the max retained size and the unread bytes fit
+        in a default sized buffer
         :param bytes_to_remove: Number of bytes to remove from the current buffer
         """
         current_buffer_size = len(self._buffer)
+        bytes_to_remove = min(bytes_to_remove, self._buffer_end_offset)
+        unread_length = self._buffer_end_offset - bytes_to_remove
+
+        if current_buffer_size < self.DEFAULT_BUFFER_SIZE or \
+                (current_buffer_size > self.MAX_RETAINED_BUFFER_SIZE and unread_length <= self.DEFAULT_BUFFER_SIZE):
+            # Create a new buffer with either minimum size of leftover size, and copy the portion we
+            # did not read to the new buffer
+            new_buffer = bytearray(max(unread_length, self.DEFAULT_BUFFER_SIZE))
+            new_buffer[:unread_length] = memoryview(self._buffer)[bytes_to_remove:self._buffer_end_offset]
+            self._buffer = new_buffer
+            self._read_offset = 0
+            self._buffer_end_offset = unread_length
+        elif unread_length == 0:
+            # Everything was read, so the next chunk can go at the start of the buffer
+            self._read_offset = 0
+            self._buffer_end_offset = 0
+        else:
+            self._read_offset = bytes_to_remove
+
+        self._header_scan_offset = self._read_offset
 
-        # Create a new buffer with either minimum size of leftover size
-        new_buffer = bytearray(max(current_buffer_size - bytes_to_remove, self.DEFAULT_BUFFER_SIZE))
+        # Reset the headers
+        self._headers = {}
 
-        # If we have content we did not read, copy that portion to the new buffer
-        if bytes_to_remove <= current_buffer_size:
-            new_buffer[:self._buffer_end_offset - bytes_to_remove] = \
-                self._buffer[bytes_to_remove:self._buffer_end_offset]
 
-        # Point to the new buffer
-        self._buffer = new_buffer
+class ReaderStatistics:
+    """
+    Counters describing the messages read from the input stream
+    """
 
-        # Reset pointers after the shift
-        self._read_offset = 0
-        self._buffer_end_offset -= bytes_to_remove
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages_received: int = 0
+        self.bytes_received: int = 0
 
-        # Reset the headers
-        self._headers = {}
+    # METHODS ##############################################################
+    def record_message(self, byte_count: int):
+        """
+        Records that a message was read
+        :param byte_count: Number of bytes of the headers and content of the message
+        """
+        with self._lock:
+            self.messages_received += 1
+            self.bytes_received += byte_count
+
+    def to_dict(self) -> dict:
+        """Snapshot of the counters"""
+        with self._lock:
+            return {
+                'messagesReceived': self.messages_received,
+                'bytesReceived': self.bytes_received
+            }
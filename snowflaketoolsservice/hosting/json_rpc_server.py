@@ -3,13 +3,21 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from queue import Queue
+from queue import Empty
 import threading
+import time
 import uuid
+import weakref
 
+from snowflaketoolsservice.hosting.async_dispatcher import AsyncioDispatcher
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency, RequestDispatcher, get_owner_key
 from snowflaketoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
 from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
 from snowflaketoolsservice.hosting.json_writer import JSONRPCWriter
+from snowflaketoolsservice.hosting.metrics import ServerMetrics
+from snowflaketoolsservice.hosting.output_queue import OutputPriority, PriorityOutputQueue
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+from snowflaketoolsservice.utils.thread import set_background_executor
 
 
 class JSONRPCServer:
@@ -19,42 +27,79 @@ class JSONRPCServer:
     # CONSTANTS ############################################################
     OUTPUT_THREAD_NAME = u"JSON_RPC_Output_Thread"
     INPUT_THREAD_NAME = u"JSON_RPC_Input_Thread"
+    CANCEL_REQUEST_METHOD = '$/cancelRequest'
+    METRICS_REQUEST_METHOD = 'debug/metrics'
+
+    # Error code of the response to a request that stopped because the client canceled it
+    REQUEST_CANCELED_ERROR_CODE = -32800
 
     class Handler:
-        def __init__(self, class_, handler):
+        def __init__(self, class_, handler, concurrency=DispatchConcurrency.EXCLUSIVE, priority=None):
             self.class_ = class_
             self.handler = handler
+            self.concurrency = concurrency
+            self.priority = priority
 
-    def __init__(self, in_stream, out_stream, logger=None, version='0'):
+    def __init__(self, in_stream, out_stream, logger=None, version='0', max_dispatch_workers=0,
+                 max_output_batch_size=1, max_output_batch_latency=0.0, max_notification_backlog=0,
+                 use_asyncio=False, max_background_workers=0):
         """
         Initializes internal state of the server and sets up a few useful built-in request handlers
         :param in_stream: Input stream that will provide messages from the client
         :param out_stream: Output stream that will send message to the client
         :param logger: Optional logger
         :param version: Protocol version. Defaults to 0
+        :param max_dispatch_workers: Number of worker threads handlers are dispatched to. Defaults
+            to 0, which runs every handler on the input thread
+        :param max_output_batch_size: Maximum number of queued outgoing messages coalesced into a
+            single write and flush. Defaults to 1, which flushes every message on its own
+        :param max_output_batch_latency: Seconds the output thread may wait for more messages to
+            fill a batch after the first one arrives. Defaults to 0, which only batches messages
+            that are already queued
+        :param max_notification_backlog: Maximum number of notifications waiting to be sent before
+            their producers block. Defaults to 0, which does not bound the backlog
+        :param use_asyncio: Whether handlers are scheduled on an asyncio event loop that bridges
+            them onto max_dispatch_workers threads, with short background work that services start
+            bounded to max_background_workers threads. Defaults to False, which dispatches on a
+            thread pool and starts a thread for each piece of background work
+        :param max_background_workers: Number of threads background work runs on in asyncio mode
         """
         self.writer = JSONRPCWriter(out_stream, logger=logger)
         self.reader = JSONRPCReader(in_stream, logger=logger)
         self._logger = logger
         self._version = version
         self._stop_requested = False
+        if use_asyncio:
+            self._dispatcher = AsyncioDispatcher(max_dispatch_workers, max_background_workers, logger=logger)
+        else:
+            self._dispatcher = RequestDispatcher(max_dispatch_workers, logger=logger)
+        self._max_output_batch_size = max(1, max_output_batch_size)
+        self._max_output_batch_latency = max(0.0, max_output_batch_latency)
 
-        self._output_queue = Queue()
+        self._output_queue = PriorityOutputQueue(max_notification_backlog)
+        self.metrics = ServerMetrics()
 
         self._request_handlers = {}
         self._notification_handlers = {}
         self._shutdown_handlers = []
+        self._handler_resolver = None
+        self._metrics_providers = {}
+
+        # Cancellation tokens of requests that may still be running, by request id. Entries are
+        # dropped once the request context that owns the token is gone
+        self._cancellation_tokens = weakref.WeakValueDictionary()
+        self._cancellation_tokens_lock = threading.Lock()
 
         self._output_consumer = None
         self._input_consumer = None
 
         # Register built-in handlers
         # 1) Echo
-        echo_config = IncomingMessageConfiguration('echo', None)
+        echo_config = IncomingMessageConfiguration('echo', None, DispatchConcurrency.PARALLEL)
         self.set_request_handler(echo_config, self._handle_echo_request)
 
         # 2) Protocol version
-        version_config = IncomingMessageConfiguration('version', None)
+        version_config = IncomingMessageConfiguration('version', None, DispatchConcurrency.PARALLEL)
         self.set_request_handler(version_config, self._handle_version_request)
 
         # 3) Shutdown/exit
@@ -63,6 +108,26 @@ class JSONRPCServer:
         exit_config = IncomingMessageConfiguration('exit', None)
         self.set_request_handler(exit_config, self._handle_shutdown_request)
 
+        # 4) Request cancellation. Runs immediately so it is not stuck behind the request it cancels
+        cancel_config = IncomingMessageConfiguration(self.CANCEL_REQUEST_METHOD, None, DispatchConcurrency.IMMEDIATE)
+        self.set_notification_handler(cancel_config, self._handle_cancel_request)
+
+        # 5) Metrics. Runs immediately so it can report on a server whose workers are all busy
+        metrics_config = IncomingMessageConfiguration(self.METRICS_REQUEST_METHOD, None, DispatchConcurrency.IMMEDIATE)
+        self.set_request_handler(metrics_config, self._handle_metrics_request)
+
+    # PROPERTIES #########################################################
+
+    @property
+    def output_statistics(self):
+        """Counters describing how outgoing messages have been batched into writes"""
+        return self.writer.statistics
+
+    @property
+    def output_queue_statistics(self):
+        """Queue depth metrics of each priority lane of the output queue"""
+        return self._output_queue.get_statistics()
+
     # METHODS ##############################################################
 
     def add_shutdown_handler(self, handler):
@@ -72,6 +137,14 @@ class JSONRPCServer:
         """
         self._shutdown_handlers.append(handler)
 
+    def add_metrics_provider(self, name: str, provider):
+        """
+        Adds a section to the metrics returned by get_metrics, such as the statistics of a service
+        :param name: Key of the section in the metrics
+        :param provider: Callable that returns a JSON-ready snapshot for the section
+        """
+        self._metrics_providers[name] = provider
+
     def count_shutdown_handlers(self) -> int:
         """
         Returns the number of shutdown handlers registered
@@ -86,6 +159,10 @@ class JSONRPCServer:
         if self._logger is not None:
             self._logger.info("JSON RPC server starting...")
 
+        if isinstance(self._dispatcher, AsyncioDispatcher):
+            # Background work started by the services goes to the dispatcher's bounded pool
+            set_background_executor(self._dispatcher.background_executor)
+
         self._output_consumer = threading.Thread(
             target=self._consume_output,
             name=self.OUTPUT_THREAD_NAME
@@ -140,13 +217,39 @@ class JSONRPCServer:
         # Add the message to the output queue
         self._output_queue.put(message)
 
+    def get_metrics(self) -> dict:
+        """
+        Gets a snapshot of the instrumentation of the server: latency histograms of handlers and
+        responses by method, time messages spent waiting to be dispatched and to be written, bytes
+        and messages in and out, the state of the worker pool, and the sections added by services
+        :return: JSON-ready dictionary of the metrics
+        """
+        metrics = self.metrics.to_dict()
+        metrics['dispatch'] = self._dispatcher.get_statistics()
+        metrics['input'] = self.reader.statistics.to_dict()
+        metrics['output'] = self.writer.statistics.to_dict()
+        metrics['outputQueues'] = self._output_queue.get_statistics()
+        metrics['outputQueueWait'] = self._output_queue.get_wait_statistics()
+        for name, provider in self._metrics_providers.items():
+            metrics[name] = provider()
+        return metrics
+
+    def set_traffic_recorder(self, recorder):
+        """
+        Taps the reader and writer so every message read or written is recorded, for example to
+        replay the session later
+        :param recorder: TrafficRecorder to give the messages to, or None to stop recording
+        """
+        self.reader.tap = recorder
+        self.writer.tap = recorder
+
     def set_request_handler(self, config, handler):
         """
         Sets the handler for a request with a given configuration
         :param config: Configuration of the request to listen for
         :param handler: Handler to call when the server receives a request that matches the config
         """
-        self._request_handlers[config.method] = self.Handler(config.parameter_class, handler)
+        self._request_handlers[config.method] = self.Handler(config.parameter_class, handler, config.concurrency, config.priority)
 
     def set_notification_handler(self, config, handler):
         """
@@ -154,7 +257,26 @@ class JSONRPCServer:
         :param config: Configuration of the notification to listen for
         :param handler: Handler to call when the server receives a notification that matches the config
         """
-        self._notification_handlers[config.method] = self.Handler(config.parameter_class, handler)
+        self._notification_handlers[config.method] = self.Handler(config.parameter_class, handler, config.concurrency, config.priority)
+
+    def set_handler_resolver(self, resolver):
+        """
+        Sets the callable that is given a chance to register a handler for a message whose method
+        has no handler, such as by loading the service that handles it
+        :param resolver: Callable that takes the method and returns True if it registered handlers
+        """
+        self._handler_resolver = resolver
+
+    def set_coalescing_policy(self, method, policy):
+        """
+        Sets the policy that merges an outgoing notification into the previous notification for the
+        same method while both are waiting to be sent
+        :param method: String name of the method of the notifications to coalesce
+        :param policy: Callable that takes the params of the queued notification and the params of
+            the new notification, and returns the params of the merged notification, or None if the
+            notifications cannot be merged
+        """
+        self._output_queue.set_coalescing_policy(method, policy)
 
     def wait_for_exit(self):
         """
@@ -162,6 +284,9 @@ class JSONRPCServer:
         """
         self._input_consumer.join()
         self._output_consumer.join()
+        self._dispatcher.shutdown()
+        if isinstance(self._dispatcher, AsyncioDispatcher):
+            set_background_executor(None)
         if self._logger is not None:
             self._logger.info('Input and output threads have completed')
 
@@ -191,6 +316,24 @@ class JSONRPCServer:
 
         self.stop()
 
+    def _handle_metrics_request(self, request_context, params):
+        request_context.send_response(self.get_metrics())
+
+    def _handle_cancel_request(self, notification_context, params):
+        request_id = params.get('id') if isinstance(params, dict) else None
+        with self._cancellation_tokens_lock:
+            token = self._cancellation_tokens.get(request_id)
+
+        if token is None:
+            # The request already completed or was never received
+            if self._logger is not None:
+                self._logger.info('Ignoring cancellation of request id=%s that is not running', request_id)
+            return
+
+        if self._logger is not None:
+            self._logger.info('Canceling request id=%s', request_id)
+        token.cancel()
+
     # IMPLEMENTATION DETAILS ###############################################
 
     def _consume_input(self):
@@ -232,12 +375,11 @@ class JSONRPCServer:
 
         while not self._stop_requested:
             try:
-                # Block until queue contains a message to send
-                message = self._output_queue.get()
-                if message is not None:
-                    # It is necessary to check for None here b/c unblock the queue get by adding
-                    # None when we want to stop the service
-                    self.writer.send_message(message)
+                # Block until queue contains a message to send, then gather whatever else can
+                # go out with the same write
+                batch = self._get_output_batch()
+                if batch:
+                    self.writer.send_messages(batch)
 
             except ValueError as error:
                 # Stream is closed, break out of the loop
@@ -247,6 +389,36 @@ class JSONRPCServer:
                 # Catch generic exceptions without breaking out of loop
                 self._log_exception(error, self.OUTPUT_THREAD_NAME)
 
+        # Nothing will drain the queue anymore, so producers must not wait for room in it
+        self._output_queue.close()
+
+    def _get_output_batch(self):
+        """
+        Blocks until a message is queued for output, then drains up to the max batch size of
+        messages, waiting no longer than the max batch latency for the batch to fill
+        :return: List of messages to send in order. May be empty if the server is stopping
+        """
+        batch = []
+        message = self._output_queue.get()
+        deadline = time.monotonic() + self._max_output_batch_latency
+        while message is not None:
+            # It is necessary to check for None here b/c unblock the queue get by adding
+            # None when we want to stop the service
+            batch.append(message)
+            if len(batch) >= self._max_output_batch_size:
+                break
+
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    message = self._output_queue.get(timeout=remaining)
+                else:
+                    message = self._output_queue.get_nowait()
+            except Empty:
+                break
+
+        return batch
+
     def _dispatch_message(self, message):
         """
         Dispatches a message that was received to the necessary handler
@@ -258,11 +430,19 @@ class JSONRPCServer:
             return
 
         # Figure out which handler will execute the request/notification
+        received_time = time.monotonic()
         if message.message_type is JSONRPCMessageType.Request:
             if self._logger is not None:
                 self._logger.info('Received request id=%s method=%s', message.message_id, message.message_method)
-            handler = self._request_handlers.get(message.message_method)
-            request_context = RequestContext(message, self._output_queue)
+            handler = self._get_handler(self._request_handlers, message.message_method)
+            cancellation_token = CancellationToken(self._logger)
+            request_context = RequestContext(
+                message,
+                self._output_queue,
+                handler.priority if handler is not None else None,
+                cancellation_token,
+                self.metrics
+            )
 
             # Make sure we got a handler for the request
             if handler is None:
@@ -279,17 +459,30 @@ class JSONRPCServer:
             else:
                 # Use the complex deserializer
                 deserialized_object = handler.class_.from_dict(message.message_params)
-            try:
-                handler.handler(request_context, deserialized_object)
-            except Exception as e:
-                error_message = f'Unhandled exception while handling request method {message.message_method}: "{e}"'  # TODO: Localize
-                if self._logger is not None:
-                    self._logger.exception(error_message)
-                request_context.send_error(error_message, code=-32603)
+
+            with self._cancellation_tokens_lock:
+                self._cancellation_tokens[message.message_id] = cancellation_token
+
+            def invoke_request_handler():
+                start_time = time.monotonic()
+                self.metrics.dispatch_wait.record(start_time - received_time)
+                try:
+                    handler.handler(request_context, deserialized_object)
+                except OperationCanceledError:
+                    request_context.send_canceled_error()
+                except Exception as e:
+                    error_message = f'Unhandled exception while handling request method {message.message_method}: "{e}"'  # TODO: Localize
+                    if self._logger is not None:
+                        self._logger.exception(error_message)
+                    request_context.send_error(error_message, code=-32603)
+                finally:
+                    self.metrics.record_handler(message.message_method, time.monotonic() - start_time)
+
+            self._dispatcher.dispatch(handler.concurrency, get_owner_key(deserialized_object), invoke_request_handler)
         elif message.message_type is JSONRPCMessageType.Notification:
             if self._logger is not None:
                 self._logger.info('Received notification method=%s', message.message_method)
-            handler = self._notification_handlers.get(message.message_method)
+            handler = self._get_handler(self._notification_handlers, message.message_method)
 
             if handler is None:
                 # Ignore the notification
@@ -306,18 +499,38 @@ class JSONRPCServer:
             else:
                 # Use the complex deserializer
                 deserialized_object = handler.class_.from_dict(message.message_params)
-            try:
-                handler.handler(notification_context, deserialized_object)
-            except Exception:
-                error_message = f'Unhandled exception while handling notification method {message.message_method}'
-                if self._logger is not None:
-                    self._logger.exception(error_message)
+
+            def invoke_notification_handler():
+                start_time = time.monotonic()
+                self.metrics.dispatch_wait.record(start_time - received_time)
+                try:
+                    handler.handler(notification_context, deserialized_object)
+                except Exception:
+                    error_message = f'Unhandled exception while handling notification method {message.message_method}'
+                    if self._logger is not None:
+                        self._logger.exception(error_message)
+                finally:
+                    self.metrics.record_handler(message.message_method, time.monotonic() - start_time)
+
+            self._dispatcher.dispatch(handler.concurrency, get_owner_key(deserialized_object), invoke_notification_handler)
         else:
             # If this happens we have a serious issue with the JSON RPC reader
             if self._logger is not None:
                 self._logger.warn('Received unsupported message type %s', message.message_type)
             return
 
+    def _get_handler(self, handlers, method):
+        """
+        Looks up the handler for a method, asking the handler resolver to register one if there is none
+        :param handlers: Request or notification handlers, by method
+        :param method: Method of the message that was received
+        :return: The handler, or None if the method is unsupported
+        """
+        handler = handlers.get(method)
+        if handler is None and self._handler_resolver is not None and self._handler_resolver(method):
+            handler = handlers.get(method)
+        return handler
+
     def _log_exception(self, ex, thread_name):
         """
         Logs an exception if the logger is defined
@@ -331,14 +544,20 @@ class JSONRPCServer:
 class IncomingMessageConfiguration:
     """Object that stores the info for registering a request"""
 
-    def __init__(self, method, parameter_class):
+    def __init__(self, method, parameter_class, concurrency=DispatchConcurrency.EXCLUSIVE, priority=None):
         """
         Constructor for request configuration
         :param method: String name of the method to respond to
         :param parameter_class: Class to deserialize the request parameters into
+        :param concurrency: How the handler may run relative to other handlers when the server
+            dispatches to worker threads. Defaults to exclusive
+        :param priority: Output queue lane for messages sent while handling a request. Defaults to
+            None, which sends each message in the default lane for its type
         """
         self.method = method
         self.parameter_class = parameter_class
+        self.concurrency = concurrency
+        self.priority = priority
 
 
 class RequestContext:
@@ -346,14 +565,28 @@ class RequestContext:
     Context for a received message
     """
 
-    def __init__(self, message, queue):
+    def __init__(self, message, queue, priority: OutputPriority = None, cancellation_token: CancellationToken = None,
+                 metrics: ServerMetrics = None):
         """
         Initializes a new request context
         :param message: The raw request message
         :param queue: Output queue that any outgoing messages will be added to
+        :param priority: Optional output queue lane for every message sent from this context
+        :param cancellation_token: Token canceled when the client cancels the request. A new token
+            is created if one is not provided
+        :param metrics: Optional metrics that the time taken to respond to the request is recorded in
         """
         self._message = message
         self._queue = queue
+        self._priority = priority
+        self._cancellation_token = cancellation_token if cancellation_token is not None else CancellationToken()
+        self._metrics = metrics
+        self._received_time = time.monotonic()
+
+    @property
+    def cancellation_token(self) -> CancellationToken:
+        """Token that is canceled when the client sends a cancel request for this request"""
+        return self._cancellation_token
 
     def send_response(self, params):
         """
@@ -361,7 +594,8 @@ class RequestContext:
         :param params: Data to send back with the response
         """
         message = JSONRPCMessage.create_response(self._message.message_id, params)
-        self._queue.put(message)
+        self._record_response()
+        self._enqueue(message)
 
     def send_notification(self, method, params):
         """
@@ -370,7 +604,7 @@ class RequestContext:
         :param params: Data to send with the notification
         """
         message = JSONRPCMessage.create_notification(method, params)
-        self._queue.put(message)
+        self._enqueue(message)
 
     def send_error(self, message, data=None, code=0):
         """
@@ -381,12 +615,26 @@ class RequestContext:
         """
 
         message = JSONRPCMessage.create_error(self._message.message_id, code, message, data)
-        self._queue.put(message)
+        self._record_response()
+        self._enqueue(message)
 
     def send_unhandled_error_response(self, ex: Exception):
         """Send response for any unhandled exceptions"""
         self.send_error('Unhandled exception: {}'.format(str(ex)))  # TODO: Localize
 
+    def send_canceled_error(self):
+        """Sends the failure response for a request that stopped because the client canceled it"""
+        self.send_error('Request was canceled', code=JSONRPCServer.REQUEST_CANCELED_ERROR_CODE)  # TODO: Localize
+
+    def _record_response(self):
+        if self._metrics is not None:
+            self._metrics.record_response(self._message.message_method, time.monotonic() - self._received_time)
+
+    def _enqueue(self, message):
+        if self._priority is not None:
+            message.priority = self._priority
+        self._queue.put(message)
+
 
 class NotificationContext:
     """
@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import json
+import threading
 
 
 class JSONRPCWriter:
@@ -23,6 +23,10 @@ class JSONRPCWriter:
         self.stream = stream
         self.encoding = encoding or 'UTF-8'
         self._logger = logger
+        self.statistics = WriterStatistics()
+
+        # Optional tap that is given the content of every message written, see TrafficRecorder
+        self.tap = None
 
     # METHODS ##############################################################
     def close(self):
@@ -35,26 +39,106 @@ class JSONRPCWriter:
             if self._logger is not None:
                 self._logger.exception(f'Exception raised when writer stream closed: {e}')
 
+    def encode_message(self, message) -> bytes:
+        """
+        Encodes a JSON RPC message, including its header, into the bytes sent over the stream
+        :param message: Message to encode
+        :return: Header and content of the message
+        """
+        json_content = message.to_json().encode(self.encoding)
+        header = self.HEADER.format(str(len(json_content)))
+        return header.encode(u"ascii") + json_content
+
     def send_message(self, message):
         """
         Sends JSON RPC message as defined by message object
         :param message: Message to send
         """
-        # Generate the message string and header string
-        json_content = json.dumps(message.dictionary, sort_keys=True)
-        header = self.HEADER.format(str(len(json_content)))
+        self.send_messages([message])
 
-        # Write the message to the stream
-        self.stream.write(header.encode(u"ascii"))
-        self.stream.write(json_content.encode(self.encoding))
+    def send_messages(self, messages):
+        """
+        Sends a batch of JSON RPC messages with a single write and flush of the stream
+        :param messages: List of messages to send, in order
+        """
+        # Encode the whole batch into one buffer before touching the stream. A message that can't be
+        # encoded is logged and dropped on its own, so the rest of the batch is still sent
+        sent_messages = []
+        encoded_messages = []
+        for message in messages:
+            try:
+                encoded_messages.append(self.encode_message(message))
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.exception(f'Exception raised when encoding message id={message.message_id} method={message.message_method}: {e}')
+                continue
+            sent_messages.append(message)
+
+        if not sent_messages:
+            return
+        messages = sent_messages
+        buffer = b''.join(encoded_messages)
+
+        # Write the messages to the stream
+        self.stream.write(buffer)
         self.stream.flush()
+        self.statistics.record_flush(len(messages), len(buffer))
+
+        if self.tap is not None:
+            for encoded_message in encoded_messages:
+                self.tap.record_outgoing(encoded_message.partition(b'\r\n\r\n')[2].decode(self.encoding))
 
         if self._logger is not None:
-            self._logger.info("{} message sent id={} method={}".format(
-                message.message_type.name,
-                message.message_id,
-                message.message_method
-            ))
+            for message in messages:
+                self._logger.info("{} message sent id={} method={}".format(
+                    message.message_type.name,
+                    message.message_id,
+                    message.message_method
+                ))
 
             # Uncomment for verbose logging
-            # self._logger.debug(f'{json_content}')
+            # self._logger.debug(f'{buffer}')
+
+
+class WriterStatistics:
+    """
+    Counters describing how messages have been coalesced into writes on the output stream
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages_sent: int = 0
+        self.bytes_sent: int = 0
+        self.flush_count: int = 0
+        self.max_messages_per_flush: int = 0
+
+    # PROPERTIES ###########################################################
+    @property
+    def messages_per_flush(self) -> float:
+        """Average number of messages sent with each flush of the stream"""
+        with self._lock:
+            return self.messages_sent / self.flush_count if self.flush_count else 0.0
+
+    # METHODS ##############################################################
+    def record_flush(self, message_count: int, byte_count: int):
+        """
+        Records that a batch of messages was written and flushed
+        :param message_count: Number of messages in the batch
+        :param byte_count: Number of bytes written for the batch
+        """
+        with self._lock:
+            self.messages_sent += message_count
+            self.bytes_sent += byte_count
+            self.flush_count += 1
+            self.max_messages_per_flush = max(self.max_messages_per_flush, message_count)
+
+    def to_dict(self) -> dict:
+        """Snapshot of the counters"""
+        with self._lock:
+            return {
+                'messagesSent': self.messages_sent,
+                'bytesSent': self.bytes_sent,
+                'flushCount': self.flush_count,
+                'maxMessagesPerFlush': self.max_messages_per_flush,
+                'messagesPerFlush': self.messages_sent / self.flush_count if self.flush_count else 0.0
+            }
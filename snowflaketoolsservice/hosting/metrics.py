@@ -0,0 +1,205 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the instrumentation that records where time goes inside the server"""
+
+import bisect
+import json
+import threading
+import time
+from typing import Callable, Dict, List  # noqa
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations with fixed, roughly logarithmic bucket bounds. Recording a duration is a
+    bisect and a few increments, so it is cheap enough to do for every message
+    """
+
+    # CONSTANTS ############################################################
+    BUCKET_BOUNDS_MS: List[float] = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bucket_counts: List[int] = [0] * (len(self.BUCKET_BOUNDS_MS) + 1)
+        self._count: int = 0
+        self._total_ms: float = 0.0
+        self._max_ms: float = 0.0
+
+    # PROPERTIES ###########################################################
+    @property
+    def count(self) -> int:
+        """Number of durations recorded"""
+        return self._count
+
+    # METHODS ##############################################################
+    def record(self, seconds: float):
+        """
+        Records a duration
+        :param seconds: Duration to record, in seconds
+        """
+        milliseconds = seconds * 1000
+        bucket = bisect.bisect_left(self.BUCKET_BOUNDS_MS, milliseconds)
+        with self._lock:
+            self._bucket_counts[bucket] += 1
+            self._count += 1
+            self._total_ms += milliseconds
+            if milliseconds > self._max_ms:
+                self._max_ms = milliseconds
+
+    def get_percentile(self, percentile: float) -> float:
+        """
+        Estimates a percentile of the recorded durations as the upper bound of the bucket it falls in
+        :param percentile: Percentile to estimate, between 0 and 100
+        :return: Estimated duration in milliseconds, or 0 if nothing was recorded
+        """
+        with self._lock:
+            return self._get_percentile(percentile)
+
+    def to_dict(self) -> dict:
+        """Snapshot of the histogram, with durations in milliseconds"""
+        with self._lock:
+            buckets = {}
+            for index, bucket_count in enumerate(self._bucket_counts):
+                if bucket_count:
+                    bound = self.BUCKET_BOUNDS_MS[index] if index < len(self.BUCKET_BOUNDS_MS) else None
+                    buckets['le' + str(bound) if bound is not None else 'inf'] = bucket_count
+
+            return {
+                'count': self._count,
+                'meanMs': self._total_ms / self._count if self._count else 0.0,
+                'maxMs': self._max_ms,
+                'p50Ms': self._get_percentile(50),
+                'p99Ms': self._get_percentile(99),
+                'buckets': buckets
+            }
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_percentile(self, percentile: float) -> float:
+        if not self._count:
+            return 0.0
+
+        rank = percentile / 100 * self._count
+        seen = 0
+        for index, bucket_count in enumerate(self._bucket_counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                # The overflow bucket has no upper bound, so the largest duration stands in for it
+                return min(self.BUCKET_BOUNDS_MS[index], self._max_ms) if index < len(self.BUCKET_BOUNDS_MS) else self._max_ms
+        return self._max_ms
+
+
+class ServerMetrics:
+    """
+    Latency histograms collected by the JSON RPC server. Histograms are keyed by method, and are
+    created the first time a method is seen
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_time: float = time.monotonic()
+        self._handler_latencies: Dict[str, LatencyHistogram] = {}
+        self._response_latencies: Dict[str, LatencyHistogram] = {}
+        self.dispatch_wait: LatencyHistogram = LatencyHistogram()
+
+    # PROPERTIES ###########################################################
+    @property
+    def uptime(self) -> float:
+        """Seconds since the metrics started being collected"""
+        return time.monotonic() - self._start_time
+
+    # METHODS ##############################################################
+    def record_handler(self, method: str, seconds: float):
+        """
+        Records how long a handler ran on its dispatch thread
+        :param method: Method of the message that was handled
+        :param seconds: Time between the handler being called and it returning
+        """
+        self._get_histogram(self._handler_latencies, method).record(seconds)
+
+    def record_response(self, method: str, seconds: float):
+        """
+        Records how long the client waited for the response to a request
+        :param method: Method of the request
+        :param seconds: Time between the request being received and its response being queued
+        """
+        self._get_histogram(self._response_latencies, method).record(seconds)
+
+    def to_dict(self) -> dict:
+        """Snapshot of every histogram"""
+        with self._lock:
+            handler_latencies = dict(self._handler_latencies)
+            response_latencies = dict(self._response_latencies)
+
+        return {
+            'uptimeSeconds': self.uptime,
+            'handlers': {method: histogram.to_dict() for method, histogram in sorted(handler_latencies.items())},
+            'responses': {method: histogram.to_dict() for method, histogram in sorted(response_latencies.items())},
+            'dispatchWait': self.dispatch_wait.to_dict()
+        }
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_histogram(self, histograms: Dict[str, LatencyHistogram], method: str) -> LatencyHistogram:
+        histogram = histograms.get(method)
+        if histogram is None:
+            with self._lock:
+                histogram = histograms.setdefault(method, LatencyHistogram())
+        return histogram
+
+
+class MetricsDumper:
+    """
+    Background thread that periodically appends a snapshot of the server metrics to a file, one JSON
+    document per line
+    """
+
+    # CONSTANTS ############################################################
+    THREAD_NAME = u"Metrics_Dump_Thread"
+
+    def __init__(self, get_metrics: Callable[[], dict], file_path: str, interval: float, logger=None):
+        """
+        Initializes the dumper
+        :param get_metrics: Callable that returns the snapshot to write
+        :param file_path: Path of the file the snapshots are appended to
+        :param interval: Seconds between snapshots
+        :param logger: Optional destination for logging
+        """
+        self._get_metrics = get_metrics
+        self._file_path = file_path
+        self._interval = interval
+        self._logger = logger
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # METHODS ##############################################################
+    def start(self):
+        """Starts writing snapshots in the background"""
+        self._thread = threading.Thread(target=self._run, name=self.THREAD_NAME)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread after writing a final snapshot"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump(self):
+        """Appends a snapshot of the metrics to the file"""
+        snapshot = self._get_metrics()
+        snapshot['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        with open(self._file_path, 'a') as metrics_file:
+            metrics_file.write(json.dumps(snapshot, sort_keys=True) + '\n')
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _run(self):
+        stopped = False
+        while not stopped:
+            stopped = self._stop_event.wait(self._interval)
+            try:
+                self.dump()
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.exception(f'Failed to write metrics to {self._file_path}: {e}')
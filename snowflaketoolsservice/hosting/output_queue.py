@@ -0,0 +1,220 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the queue that orders outgoing messages by priority"""
+
+from collections import deque
+from enum import Enum
+from queue import Full, Queue
+import time
+from typing import Any, Callable, Deque, Dict, Optional  # noqa
+
+from snowflaketoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
+from snowflaketoolsservice.hosting.metrics import LatencyHistogram
+
+
+class OutputPriority(Enum):
+    """
+    Lanes of the output queue, in the order they are served.
+
+    Interactive: Messages sent while handling latency-sensitive requests, such as completions
+    Normal: Responses and outgoing requests
+    Bulk: Notifications, such as query messages and task status updates
+    """
+    INTERACTIVE = 1
+    NORMAL = 2
+    BULK = 3
+
+
+def get_output_priority(item: Any) -> OutputPriority:
+    """
+    Determines the lane of the output queue an item belongs in
+    :param item: Message to send, or None to unblock the output thread
+    :return: The priority assigned to the message, or the default priority for its type
+    """
+    priority = getattr(item, 'priority', None)
+    if priority is not None:
+        return priority
+
+    # The None sentinel that stops the output thread goes behind everything already queued
+    if item is None or item.message_type is JSONRPCMessageType.Notification:
+        return OutputPriority.BULK
+    return OutputPriority.NORMAL
+
+
+class PriorityOutputQueue(Queue):
+    """
+    Output queue that serves messages from higher priority lanes first. Messages in the same lane
+    are served in the order they were put. A waiting lane that has been passed over for
+    starvation_limit consecutive gets is served next, so bulk traffic always makes progress.
+
+    Notifications can be coalesced with the notification at the tail of their lane by registering a
+    coalescing policy for their method. The bulk lane can be bounded, in which case producers of
+    notifications block until the output thread catches up. Responses are never blocked
+    """
+
+    # CONSTANTS ############################################################
+    DEFAULT_STARVATION_LIMIT = 32
+
+    def __init__(self, max_bulk_depth: int = 0, starvation_limit: int = DEFAULT_STARVATION_LIMIT):
+        """
+        Initializes the queue
+        :param max_bulk_depth: Maximum number of notifications waiting in the bulk lane before
+            producers block. 0 does not bound the lane
+        :param starvation_limit: Number of times a waiting lane may be passed over before it is served
+        """
+        self._max_bulk_depth: int = max_bulk_depth
+        self._starvation_limit: int = max(1, starvation_limit)
+        self._coalescing_policies: Dict[str, Callable[[Any, Any], Optional[Any]]] = {}
+        self._closed: bool = False
+        super().__init__()
+
+    # METHODS ##############################################################
+    def set_coalescing_policy(self, method: str, policy: Callable[[Any, Any], Optional[Any]]):
+        """
+        Sets the policy that merges a notification into the previous notification for the same method
+        :param method: Method of the notifications the policy applies to
+        :param policy: Callable that takes the params of the queued notification and the params of
+            the new notification, and returns the params of the merged notification, or None if the
+            notifications cannot be merged
+        """
+        with self.mutex:
+            self._coalescing_policies[method] = policy
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Puts a message into its lane, coalescing it with the tail of the lane if a policy allows.
+        Blocks producers of notifications while the bulk lane is full
+        :param item: Message to send, or None to unblock the output thread
+        :param block: Whether to wait for room in the bulk lane
+        :param timeout: Optional number of seconds to wait for room in the bulk lane
+        :raises Full: The bulk lane remained full
+        """
+        priority = get_output_priority(item)
+        with self.not_full:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._coalesce(priority, item):
+                if not self._is_lane_full(priority, item):
+                    self._put(item)
+                    self.unfinished_tasks += 1
+                    self.not_empty.notify()
+                    return
+
+                if not block:
+                    raise Full
+                if deadline is None:
+                    self.not_full.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Full
+                    self.not_full.wait(remaining)
+
+    def close(self):
+        """
+        Stops bounding the bulk lane, releasing any blocked producers. Used once nothing will
+        consume the queue anymore
+        """
+        with self.mutex:
+            self._closed = True
+            self.not_full.notify_all()
+
+    def get_statistics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Gets a snapshot of the queue depth metrics of each lane
+        :return: Dictionary of lane name to the current depth, maximum depth, number of messages put,
+            number of messages coalesced, and number of times the lane was served to prevent starvation
+        """
+        with self.mutex:
+            return {
+                priority.name.lower(): {
+                    'depth': len(self._lanes[priority]),
+                    'maxDepth': self._max_depths[priority],
+                    'enqueued': self._enqueued[priority],
+                    'coalesced': self._coalesced[priority],
+                    'starvationPromotions': self._promotions[priority]
+                }
+                for priority in OutputPriority
+            }
+
+    def get_wait_statistics(self) -> Dict[str, dict]:
+        """
+        Gets a snapshot of how long messages waited in each lane before the output thread took them
+        :return: Dictionary of lane name to a latency histogram snapshot
+        """
+        return {priority.name.lower(): self._waits[priority].to_dict() for priority in OutputPriority}
+
+    # IMPLEMENTATION DETAILS ###############################################
+    # The following override the storage hooks of Queue and are always called with the mutex held
+    def _init(self, maxsize):
+        self._lanes: Dict[OutputPriority, Deque[Any]] = {priority: deque() for priority in OutputPriority}
+        self._passed_over: Dict[OutputPriority, int] = {priority: 0 for priority in OutputPriority}
+        self._max_depths: Dict[OutputPriority, int] = {priority: 0 for priority in OutputPriority}
+        self._enqueued: Dict[OutputPriority, int] = {priority: 0 for priority in OutputPriority}
+        self._coalesced: Dict[OutputPriority, int] = {priority: 0 for priority in OutputPriority}
+        self._promotions: Dict[OutputPriority, int] = {priority: 0 for priority in OutputPriority}
+
+        # Times the messages in each lane were put, a coalesced message keeps the time of the first one
+        self._put_times: Dict[OutputPriority, Deque[float]] = {priority: deque() for priority in OutputPriority}
+        self._waits: Dict[OutputPriority, LatencyHistogram] = {priority: LatencyHistogram() for priority in OutputPriority}
+
+    def _coalesce(self, priority: OutputPriority, item) -> bool:
+        if item is None or item.message_type is not JSONRPCMessageType.Notification:
+            return False
+        policy = self._coalescing_policies.get(item.message_method)
+        lane = self._lanes[priority]
+        if policy is None or not lane:
+            return False
+
+        previous = lane[-1]
+        if previous is None or previous.message_type is not JSONRPCMessageType.Notification \
+                or previous.message_method != item.message_method:
+            return False
+
+        merged_params = policy(previous.message_params, item.message_params)
+        if merged_params is None:
+            return False
+
+        merged = JSONRPCMessage.create_notification(item.message_method, merged_params)
+        merged.priority = item.priority
+        lane[-1] = merged
+        self._coalesced[priority] += 1
+        return True
+
+    def _is_lane_full(self, priority: OutputPriority, item) -> bool:
+        # The stop sentinel must always get through, even when the lane is full
+        return priority is OutputPriority.BULK and item is not None and not self._closed \
+            and 0 < self._max_bulk_depth <= len(self._lanes[priority])
+
+    def _qsize(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _put(self, item):
+        priority = get_output_priority(item)
+        lane = self._lanes[priority]
+        lane.append(item)
+        self._put_times[priority].append(time.monotonic())
+        self._enqueued[priority] += 1
+        if len(lane) > self._max_depths[priority]:
+            self._max_depths[priority] = len(lane)
+
+    def _get(self):
+        waiting = [priority for priority, lane in self._lanes.items() if lane]
+        served = waiting[0]
+        for priority in waiting[1:]:
+            if self._passed_over[priority] >= self._starvation_limit:
+                served = priority
+                self._promotions[priority] += 1
+                break
+
+        # Lower priority lanes that are still waiting have been passed over once more
+        for priority in waiting:
+            if priority is served:
+                self._passed_over[priority] = 0
+            elif priority.value > served.value:
+                self._passed_over[priority] += 1
+
+        self._waits[served].record(time.monotonic() - self._put_times[served].popleft())
+        return self._lanes[served].popleft()
@@ -3,18 +3,53 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import importlib
 from logging import Logger
-from typing import Optional
+import threading
+from typing import Optional, Tuple  # noqa
 
 from snowflaketoolsservice.hosting import JSONRPCServer
 
 
+class LazyService:
+    """
+    Describes a service whose module is not imported until the service is first needed, either
+    because the server received a message for one of its methods or because another service
+    looked it up. Only suitable for services that do nothing but register handlers, since the
+    service does not exist until then
+    """
+
+    def __init__(self, module_name: str, class_name: str, method_prefixes: Tuple[str, ...]):
+        """
+        Initializes the description of a lazily loaded service
+        :param module_name: Dotted name of the module that defines the service
+        :param class_name: Name of the service class within the module
+        :param method_prefixes: Prefixes of the methods of the messages the service handles, eg 'query/'
+        """
+        self.module_name: str = module_name
+        self.class_name: str = class_name
+        self.method_prefixes: Tuple[str, ...] = method_prefixes
+
+    def load(self):
+        """Imports the module of the service and creates the service"""
+        service_class = getattr(importlib.import_module(self.module_name), self.class_name)
+        return service_class()
+
+
 class ServiceProvider:
     def __init__(self, json_rpc_server: JSONRPCServer, services: dict, logger: Optional[Logger] = None):
         self._is_initialized = False
         self._logger = logger
         self._server = json_rpc_server
-        self._services = {service_name: service_class() for (service_name, service_class) in services.items()}
+        self._lazy_services = {
+            service_name: service_class for (service_name, service_class) in services.items() if isinstance(service_class, LazyService)
+        }
+        self._services = {
+            service_name: service_class() for (service_name, service_class) in services.items() if service_name not in self._lazy_services
+        }
+
+        # Reentrant since registering a lazy service may look up another lazy service
+        self._lazy_services_lock = threading.RLock()
 
     # PROPERTIES ###########################################################
     @property
@@ -27,7 +62,7 @@ class ServiceProvider:
 
     def __getitem__(self, item: str):
         """
-        If the service exists, it is returned by its lookup key
+        If the service exists, it is returned by its lookup key. Lazy services are loaded on first lookup
         :param item: Key for looking up the service
         :raises RuntimeError: Service provider has not been initialized
         :return: The requested service
@@ -35,13 +70,19 @@ class ServiceProvider:
         if not self._is_initialized:
             raise RuntimeError('Service provider must be initialized before retrieving services')
 
-        return self._services[item]
+        service = self._services.get(item)
+        if service is None and item in self._lazy_services:
+            service = self._load_lazy_service(item)
+        if service is None:
+            raise KeyError(item)
+        return service
 
     # METHODS ##############################################################
 
     def initialize(self) -> None:
         """
-        Iterates over the services and initializes them with the server
+        Iterates over the services and initializes them with the server. Lazy services are
+        initialized when they are loaded
         :raises RuntimeError: Service provider has been initialized already
         """
         if self._is_initialized:
@@ -51,5 +92,42 @@ class ServiceProvider:
         # other up. This is important since services can register callbacks with each other
         self._is_initialized = True
 
-        for service_key in self._services:
+        for service_key in list(self._services):
             self._services[service_key].register(self)
+
+        if self._lazy_services:
+            self._server.set_handler_resolver(self._resolve_handler)
+
+    # IMPLEMENTATION DETAILS ###############################################
+
+    def _resolve_handler(self, method: str) -> bool:
+        """
+        Loads the lazy service that handles a method the server has no handler for
+        :param method: Method of the message that was received
+        :return: True if a service was loaded, so the server should look the handler up again
+        """
+        for service_name, lazy_service in list(self._lazy_services.items()):
+            if method.startswith(lazy_service.method_prefixes):
+                try:
+                    self._load_lazy_service(service_name)
+                except Exception:
+                    if self._logger is not None:
+                        self._logger.exception(f'Failed to load service {service_name} for method {method}')
+                    return False
+                return True
+        return False
+
+    def _load_lazy_service(self, service_name: str):
+        with self._lazy_services_lock:
+            service = self._services.get(service_name)
+            if service is not None:
+                # Another thread loaded the service while this one waited for the lock
+                return service
+
+            if self._logger is not None:
+                self._logger.info(f'Loading service {service_name}')
+            service = self._lazy_services[service_name].load()
+            service.register(self)
+            self._services[service_name] = service
+            del self._lazy_services[service_name]
+            return service
@@ -0,0 +1,113 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module containing the tap that records the JSON RPC traffic of a session for later replay"""
+
+import json
+import threading
+import time
+from typing import Any, List, TextIO  # noqa
+
+
+class RecordedMessage:
+    """A message read or written by the server during a recorded session"""
+
+    # CONSTANTS ############################################################
+    INCOMING = 'in'
+    OUTGOING = 'out'
+
+    def __init__(self, offset: float, direction: str, message: dict):
+        """
+        Initializes a recorded message
+        :param offset: Seconds between the start of the recording and the message being read or written
+        :param direction: INCOMING for messages from the client, OUTGOING for messages to the client
+        :param message: JSON RPC message as a dictionary
+        """
+        self.offset: float = offset
+        self.direction: str = direction
+        self.message: dict = message
+
+
+class TrafficRecorder:
+    """
+    Tap for JSONRPCReader and JSONRPCWriter that appends every message to a stream as one JSON
+    document per line, along with its direction and the time it was read or written. Credentials,
+    such as the password of a connection/connect request, are redacted before they are written
+    """
+
+    # CONSTANTS ############################################################
+    # Connection options whose values are credentials, wherever they appear in a message
+    REDACTED_OPTIONS = frozenset(['password', 'passcode', 'private_key', 'private_key_passphrase', 'token'])
+    REDACTED_VALUE = '<redacted>'
+
+    def __init__(self, stream: TextIO):
+        """
+        Initializes the recorder
+        :param stream: Text stream the recording is written to
+        """
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+
+    # METHODS ##############################################################
+    def record_incoming(self, content: str):
+        """
+        Records a message read from the client
+        :param content: JSON content of the message
+        """
+        self._record(RecordedMessage.INCOMING, content)
+
+    def record_outgoing(self, content: str):
+        """
+        Records a message written to the client
+        :param content: JSON content of the message
+        """
+        self._record(RecordedMessage.OUTGOING, content)
+
+    def close(self):
+        """Closes the stream the recording is written to"""
+        with self._lock:
+            self._stream.close()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _record(self, direction: str, content: str):
+        offset = time.monotonic() - self._start_time
+        # The content is already JSON, so it is embedded as is instead of being parsed and re-encoded, unless it
+        # names a credential that has to be redacted
+        if any('"{}"'.format(option) in content for option in self.REDACTED_OPTIONS):
+            content = json.dumps(self._redact(json.loads(content)))
+        line = '{{"direction": "{}", "offset": {:.6f}, "message": {}}}\n'.format(direction, offset, content)
+        with self._lock:
+            # Messages written after the server starts shutting down are not recorded
+            if self._stream.closed:
+                return
+            self._stream.write(line)
+            self._stream.flush()
+
+    @classmethod
+    def _redact(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: cls.REDACTED_VALUE if key in cls.REDACTED_OPTIONS and item is not None else cls._redact(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [cls._redact(item) for item in value]
+        return value
+
+
+def read_recording(stream: TextIO) -> List[RecordedMessage]:
+    """
+    Reads the messages of a recorded session
+    :param stream: Text stream that a TrafficRecorder wrote to
+    :return: Recorded messages in the order they were recorded
+    """
+    recording = []
+    for line in stream:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        recording.append(RecordedMessage(entry['offset'], entry['direction'], entry['message']))
+    return recording
@@ -9,11 +9,15 @@ import threading
 from logging import Logger  # noqa
 import os
 from collections import OrderedDict
+from typing import TYPE_CHECKING
 
-from snow import Server
-
+from snowflaketoolsservice.connection.connection_metadata import get_connection_metadata
 from snowflaketoolsservice.language.completion import PGCompleter
-from snowflaketoolsservice.language.metadata_executor import MetadataExecutor
+from snowflaketoolsservice.utils.thread import run_in_daemon_thread
+
+if TYPE_CHECKING:
+    # Only for annotations, the executor is imported on the background thread since it loads the snow object model
+    from snowflaketoolsservice.language.metadata_executor import MetadataExecutor  # noqa
 
 
 class CompletionRefresher:
@@ -27,7 +31,7 @@ class CompletionRefresher:
     def __init__(self, connection: 'psycopg2.extensions.connection', logger: Logger = None):
         self.connection = connection
         self.logger: Logger = logger
-        self.server: Server = None
+        self.server = None
         self._completer_thread: threading.Thread = None
         self._restart_refresh: threading.Event = threading.Event()
 
@@ -42,19 +46,16 @@ class CompletionRefresher:
                     object will be passed in as an argument to each callback.
         """
         if self.server is None:
-            # Delay server creation until on background thread
-            self.server = Server(self.connection)
+            # Delay server creation until on background thread. Imported here so that the snow object
+            # model is only loaded once a connection needs completions
+            from snow import Server
+            self.server = Server(self.connection, metadata=get_connection_metadata(self.connection))
 
         if self.is_refreshing():
             self._restart_refresh.set()
             return 'Auto-completion refresh restarted.'
         else:
-            self._completer_thread = threading.Thread(
-                target=self._bg_refresh,
-                args=(callbacks, history, settings),
-                name='completion_refresh')
-            self._completer_thread.daemon = True
-            self._completer_thread.start()
+            self._completer_thread = run_in_daemon_thread(self._bg_refresh, callbacks, history, settings)
             return 'Auto-completion refresh started in the background.'     # TODO localize
 
     def is_refreshing(self):
@@ -64,6 +65,7 @@ class CompletionRefresher:
         settings = settings or {}
         completer = PGCompleter(smart_completion=True, settings=settings)
 
+        from snowflaketoolsservice.language.metadata_executor import MetadataExecutor
         self.server.refresh()
         metadata_executor = MetadataExecutor(self.server)
 
@@ -115,36 +117,36 @@ def refresher(name, refreshers=CompletionRefresher.refreshers):
 
 
 @refresher('schemata')
-def refresh_schemata(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_schemata(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     completer.set_search_path(metadata_executor.search_path())
     completer.extend_schemata(metadata_executor.schemata())
 
 
 @refresher('tables')
-def refresh_tables(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_tables(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     completer.extend_relations(metadata_executor.tables(), kind='tables')
     completer.extend_columns(metadata_executor.table_columns(), kind='tables')
     completer.extend_foreignkeys(metadata_executor.foreignkeys())
 
 
 @refresher('views')
-def refresh_views(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_views(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     completer.extend_relations(metadata_executor.views(), kind='views')
     completer.extend_columns(metadata_executor.view_columns(), kind='views')
 
 
 @refresher('types')
-def refresh_types(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_types(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     completer.extend_datatypes(metadata_executor.datatypes())
 
 
 @refresher('databases')
-def refresh_databases(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_databases(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     completer.extend_database_names(metadata_executor.databases())
 
 
 @refresher('casing')
-def refresh_casing(completer: PGCompleter, metadata_executor: MetadataExecutor):
+def refresh_casing(completer: PGCompleter, metadata_executor: 'MetadataExecutor'):
     casing_file = completer.casing_file
     if not casing_file:
         return
@@ -159,5 +161,5 @@ def refresh_casing(completer: PGCompleter, metadata_executor: MetadataExecutor):
 
 
 @refresher('functions')
-def refresh_functions(completer, metadata_executor: MetadataExecutor):
+def refresh_functions(completer, metadata_executor: 'MetadataExecutor'):
     completer.extend_functions(metadata_executor.functions())
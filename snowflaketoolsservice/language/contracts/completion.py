@@ -7,7 +7,7 @@
 
 import enum
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration, OutputPriority
 from snowflaketoolsservice.workspace.contracts import TextDocumentPosition
 from snowflaketoolsservice.language.contracts import TextEdit   # noqa
 from snowflaketoolsservice.serialization import Serializable
@@ -59,6 +59,16 @@ class CompletionItem(Serializable):
         self.data: any = None
 
 
-COMPLETION_REQUEST = IncomingMessageConfiguration('textDocument/completion', TextDocumentPosition)
+COMPLETION_REQUEST = IncomingMessageConfiguration(
+    'textDocument/completion',
+    TextDocumentPosition,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI,
+    OutputPriority.INTERACTIVE
+)
 
-COMPLETION_RESOLVE_REQUEST = IncomingMessageConfiguration('completionItem/resolve', CompletionItem)
+COMPLETION_RESOLVE_REQUEST = IncomingMessageConfiguration(
+    'completionItem/resolve',
+    CompletionItem,
+    DispatchConcurrency.PARALLEL,
+    OutputPriority.INTERACTIVE
+)
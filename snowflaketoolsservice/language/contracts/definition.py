@@ -5,7 +5,7 @@
 
 """This module holds contracts for the definition service calls"""
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration, OutputPriority
 from snowflaketoolsservice.serialization import Serializable
 from snowflaketoolsservice.workspace.contracts import TextDocumentPosition, Position, TextDocumentIdentifier
 
@@ -16,4 +16,9 @@ class TextDocumentPositionParams(Serializable):
         self.position = position
 
 
-DEFINITION_REQUEST = IncomingMessageConfiguration('textDocument/definition', TextDocumentPosition)
+DEFINITION_REQUEST = IncomingMessageConfiguration(
+    'textDocument/definition',
+    TextDocumentPosition,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI,
+    OutputPriority.INTERACTIVE
+)
@@ -5,7 +5,7 @@
 
 """This module holds contracts for the language service formatter calls"""
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.workspace.contracts import Range, TextDocumentIdentifier
 from snowflaketoolsservice.serialization import Serializable
 
@@ -50,7 +50,11 @@ class DocumentRangeFormattingParams(DocumentFormattingParams):
         self.range: Range = None
 
 
-DOCUMENT_FORMATTING_REQUEST = IncomingMessageConfiguration('textDocument/formatting', DocumentFormattingParams)
+DOCUMENT_FORMATTING_REQUEST = IncomingMessageConfiguration('textDocument/formatting', DocumentFormattingParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 
-DOCUMENT_RANGE_FORMATTING_REQUEST = IncomingMessageConfiguration('textDocument/rangeFormatting', DocumentRangeFormattingParams)
+DOCUMENT_RANGE_FORMATTING_REQUEST = IncomingMessageConfiguration(
+    'textDocument/rangeFormatting',
+    DocumentRangeFormattingParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
+)
@@ -8,7 +8,7 @@
 import functools
 from logging import Logger          # noqa
 import threading
-from typing import Any, Dict, Set, List  # noqa
+from typing import Any, Dict, Set, List, Union  # noqa
 
 from prompt_toolkit.completion import Completion    # noqa
 from prompt_toolkit.document import Document    # noqa
@@ -38,7 +38,6 @@ from snowflaketoolsservice.language.peek_definition_result import DefinitionResu
 from snowflaketoolsservice.scripting.contracts import ScriptOperation
 import snowflaketoolsservice.utils as utils
 from snowflaketoolsservice.metadata.contracts import ObjectMetadata
-import snowflaketoolsservice.scripting.scripter as scripter
 import tempfile
 
 # Map of meta or display_meta values to completion items. Based on SqlToolsService definitions
@@ -236,9 +235,9 @@ class LanguageService:
         do_send_default_empty_response()
 
     # SERVICE NOTIFICATION HANDLERS #####################################################
-    def on_connect(self, conn_info: ConnectionInfo) -> threading.Thread:
+    def on_connect(self, conn_info: ConnectionInfo) -> Union[threading.Thread, utils.thread.BackgroundTask]:
         """Set up intellisense cache on connection to a new database"""
-        return utils.thread.run_as_thread(self._build_intellisense_cache_thread, conn_info)
+        return utils.thread.run_in_background(self._build_intellisense_cache_thread, conn_info)
 
     # PROPERTIES ###########################################################
     @property
@@ -278,12 +277,17 @@ class LanguageService:
         if scriptparseinfo is not None:
             # This is a connection for an actual script in the workspace. Build the intellisense cache for it
             connection_context: ConnectionContext = self.operations_queue.add_connection_context(conn_info, False)
-            # Wait until the intellisense is completed before sending back the message and caching the key
-            connection_context.intellisense_complete.wait()
-            scriptparseinfo.connection_key = connection_context.key
-            response = IntelliSenseReadyParams.from_data(conn_info.owner_uri)
-            self._server.send_notification(INTELLISENSE_READY_NOTIFICATION, response)
-            # TODO Ideally would support connected diagnostics for missing references
+            # Once the intellisense is completed, send back the message and cache the key. The refresh may be queued
+            # for the same background workers as this thread, so it must not be waited on here
+            connection_context.add_intellisense_complete_callback(
+                functools.partial(self._on_intellisense_complete, conn_info.owner_uri, scriptparseinfo)
+            )
+
+    def _on_intellisense_complete(self, owner_uri: str, scriptparseinfo: ScriptParseInfo, connection_context: ConnectionContext) -> None:
+        scriptparseinfo.connection_key = connection_context.key
+        response = IntelliSenseReadyParams.from_data(owner_uri)
+        self._server.send_notification(INTELLISENSE_READY_NOTIFICATION, response)
+        # TODO Ideally would support connected diagnostics for missing references
 
     def _get_sqlparse_options(self, options: FormattingOptions) -> Dict[str, Any]:
         sqlparse_options = {}
@@ -358,13 +362,14 @@ class LanguageService:
             word_under_cursor = scriptparseinfo.document.get_word_under_cursor()
             matching_completion = next(completion for completion in completions if completion.display == word_under_cursor)
             if matching_completion:
-                connection = self._connection_service.get_connection(params.text_document.uri,
-                                                                     ConnectionType.QUERY)
-                scripter_instance = scripter.Scripter(connection)
-                object_metadata = ObjectMetadata(None, None, matching_completion.display_meta,
-                                                 matching_completion.display,
-                                                 matching_completion.schema)
-                create_script = scripter_instance.script(ScriptOperation.CREATE, object_metadata)
+                # Imported on first use since the scripter pulls in the snow object model
+                import snowflaketoolsservice.scripting.scripter as scripter
+                with self._connection_service.use_connection(params.text_document.uri, ConnectionType.QUERY) as connection:
+                    scripter_instance = scripter.Scripter(connection)
+                    object_metadata = ObjectMetadata(None, None, matching_completion.display_meta,
+                                                     matching_completion.display,
+                                                     matching_completion.schema)
+                    create_script = scripter_instance.script(ScriptOperation.CREATE, object_metadata)
 
                 if create_script:
                     with tempfile.NamedTemporaryFile(mode='wt', delete=False, encoding='utf-8', suffix='.sql', newline=None) as namedfile:
@@ -27,17 +27,37 @@ class ConnectionContext:
         self.intellisense_complete: threading.Event = threading.Event()
         self.pgcompleter: PGCompleter = None
         self.is_connected: bool = False
+        self._lock: threading.Lock = threading.Lock()
+        self._intellisense_complete_callbacks: List[Callable[['ConnectionContext'], None]] = []
 
     def refresh_metadata(self, connection: 'psycopg2.extensions.connection'):
         # Start metadata refresh so operations can be completed
         completion_refresher = CompletionRefresher(connection)
         completion_refresher.refresh(self._on_completions_refreshed)
 
+    def add_intellisense_complete_callback(self, callback: Callable[['ConnectionContext'], None]):
+        """
+        Registers a callback that is called with the context once the metadata refresh completes. If it has already
+        completed, the callback is called immediately. Unlike waiting on intellisense_complete, this doesn't hold a
+        thread that the refresh itself may be queued behind
+        :param callback: Callable that takes the connection context
+        """
+        with self._lock:
+            if not self.intellisense_complete.is_set():
+                self._intellisense_complete_callbacks.append(callback)
+                return
+        callback(self)
+
     # IMPLEMENTATION DETAILS ###############################################
     def _on_completions_refreshed(self, new_completer: PGCompleter):
         self.pgcompleter = new_completer
         self.is_connected = True
-        self.intellisense_complete.set()
+        with self._lock:
+            self.intellisense_complete.set()
+            callbacks, self._intellisense_complete_callbacks = self._intellisense_complete_callbacks, []
+
+        for callback in callbacks:
+            callback(self)
 
 
 class QueuedOperation:
@@ -132,6 +152,9 @@ class OperationsQueue:
             # Create the context and start refresh
             context = ConnectionContext(key)
             conn = self._create_connection(key, conn_info)
+            # The connection is in use while the metadata is refreshed in the background
+            self._connection_service.mark_in_use(conn)
+            context.add_intellisense_complete_callback(lambda completed_context: self._connection_service.mark_idle(conn))
             context.refresh_metadata(conn)
             self._context_map[key] = context
             return context
@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.metadata.contracts.object_metadata import ObjectMetadata  # noqa
 from typing import List  # noqa
 from snowflaketoolsservice.serialization import Serializable
@@ -20,4 +20,4 @@ class MetadataListResponse:
         self.metadata: List[ObjectMetadata] = metadata
 
 
-METADATA_LIST_REQUEST = IncomingMessageConfiguration('metadata/list', MetadataListParameters)
+METADATA_LIST_REQUEST = IncomingMessageConfiguration('metadata/list', MetadataListParameters, DispatchConcurrency.SERIAL_PER_OWNER_URI)
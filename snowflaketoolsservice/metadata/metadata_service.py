@@ -3,14 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import threading
-from typing import List
+from typing import List, Optional
 
 from snowflaketoolsservice.connection.contracts import ConnectionType
 from snowflaketoolsservice.hosting import RequestContext, ServiceProvider
 from snowflaketoolsservice.metadata.contracts import (
     MetadataListParameters, MetadataListResponse, METADATA_LIST_REQUEST, MetadataType, ObjectMetadata)
 from snowflaketoolsservice.utils import constants
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+from snowflaketoolsservice.utils.thread import run_in_background, run_in_daemon_thread
 
 
 class MetadataService:
@@ -33,23 +34,27 @@ class MetadataService:
     # REQUEST HANDLERS #####################################################
 
     def _handle_metadata_list_request(self, request_context: RequestContext, params: MetadataListParameters) -> None:
-        thread = threading.Thread(
-            target=self._metadata_list_worker,
-            args=(request_context, params)
-        )
-        thread.daemon = True
-        thread.start()
+        run_in_background(self._metadata_list_worker, request_context, params)
 
     def _metadata_list_worker(self, request_context: RequestContext, params: MetadataListParameters) -> None:
         try:
-            metadata = self._list_metadata(params.owner_uri)
+            metadata = self._list_metadata(params.owner_uri, request_context.cancellation_token)
             request_context.send_response(MetadataListResponse(metadata))
+        except OperationCanceledError:
+            request_context.send_canceled_error()
         except Exception:
             if self._service_provider.logger is not None:
                 self._service_provider.logger.exception('Unhandled exception while executing the metadata list worker thread')
             request_context.send_error('Unhandled exception while listing metadata')  # TODO: Localize
 
-    def _list_metadata(self, owner_uri: str) -> List[ObjectMetadata]:
+    def _list_metadata(self, owner_uri: str, cancellation_token: Optional[CancellationToken] = None) -> List[ObjectMetadata]:
+        """
+        Lists the functions, tables and views of the database an owner URI is connected to
+        :param owner_uri: Owner URI of the connection to query
+        :param cancellation_token: Optional token that aborts the query on the server when canceled
+        :raises OperationCanceledError: The token was canceled before the results were retrieved
+        :return: Metadata of every object that was found
+        """
         object_query = """SELECT s.nspname AS schema_name,
         p.proname || '(' || COALESCE(pg_catalog.pg_get_function_identity_arguments(p.oid), '') || ')' AS object_name, 'f' as type FROM pg_proc p
     INNER JOIN pg_namespace s ON s.oid = p.pronamespace
@@ -58,10 +63,29 @@ UNION SELECT schemaname AS schema_name, tablename AS object_name, 't' as type FR
     WHERE schemaname NOT ILIKE 'pg_%' AND schemaname != 'information_schema'
 UNION SELECT schemaname AS schema_name, viewname AS object_name, 'v' as type from pg_views
     WHERE schemaname NOT ILIKE 'pg_%' AND schemaname != 'information_schema'"""
-        connection = self._service_provider[constants.CONNECTION_SERVICE_NAME].get_connection(owner_uri, ConnectionType.DEFAULT)
-        with connection.cursor() as cursor:
-            cursor.execute(object_query)
-            results = cursor.fetchall()
+        if cancellation_token is None:
+            cancellation_token = CancellationToken()
+
+        cancellation_token.raise_if_canceled()
+        with self._service_provider[constants.CONNECTION_SERVICE_NAME].use_connection(owner_uri, ConnectionType.DEFAULT) as connection:
+
+            # Canceling while the query runs aborts it on the server, which makes execute raise. Aborting the query is a
+            # round trip to the server, so it runs on a thread of its own rather than on the thread that cancels the
+            # token, or on a background worker that may be busy with the very work being canceled
+            def cancel_query():
+                run_in_daemon_thread(connection.cancel)
+            cancellation_token.register(cancel_query)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(object_query)
+                    results = cursor.fetchall()
+            except Exception:
+                cancellation_token.raise_if_canceled()
+                raise
+            finally:
+                cancellation_token.unregister(cancel_query)
+
+        cancellation_token.raise_if_canceled()
         metadata_list = []
         for row in results:
             schema_name = row[0]
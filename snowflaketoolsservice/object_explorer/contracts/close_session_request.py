@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -19,4 +19,4 @@ class CloseSessionParameters(Serializable):
         self.user_name: str = None
 
 
-CLOSE_SESSION_REQUEST = IncomingMessageConfiguration('objectexplorer/closesession', CloseSessionParameters)
+CLOSE_SESSION_REQUEST = IncomingMessageConfiguration('objectexplorer/closesession', CloseSessionParameters, DispatchConcurrency.SERIAL_PER_OWNER_URI)
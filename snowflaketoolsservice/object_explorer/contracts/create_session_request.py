@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.connection.contracts import ConnectionDetails
 from snowflaketoolsservice.serialization import Serializable
 
@@ -14,4 +14,4 @@ class CreateSessionResponse(Serializable):
         self.session_id: str = session_id
 
 
-CREATE_SESSION_REQUEST = IncomingMessageConfiguration('objectexplorer/createsession', ConnectionDetails)
+CREATE_SESSION_REQUEST = IncomingMessageConfiguration('objectexplorer/createsession', ConnectionDetails, DispatchConcurrency.PARALLEL)
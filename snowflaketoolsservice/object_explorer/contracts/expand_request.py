@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration, OutputPriority
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -14,4 +14,9 @@ class ExpandParameters(Serializable):
         self.node_path: str = None
 
 
-EXPAND_REQUEST = IncomingMessageConfiguration('objectexplorer/expand', ExpandParameters)
+EXPAND_REQUEST = IncomingMessageConfiguration(
+    'objectexplorer/expand',
+    ExpandParameters,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI,
+    OutputPriority.INTERACTIVE
+)
@@ -3,7 +3,12 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration, OutputPriority
 from snowflaketoolsservice.object_explorer.contracts.expand_request import ExpandParameters
 
-REFRESH_REQUEST = IncomingMessageConfiguration('objectexplorer/refresh', ExpandParameters)
+REFRESH_REQUEST = IncomingMessageConfiguration(
+    'objectexplorer/refresh',
+    ExpandParameters,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI,
+    OutputPriority.INTERACTIVE
+)
@@ -12,6 +12,7 @@ import psycopg2
 import psycopg2.extensions
 
 from snow import Server
+from snowflaketoolsservice.connection.connection_metadata import get_connection_metadata
 from snowflaketoolsservice.connection.contracts import ConnectRequestParams, ConnectionDetails, ConnectionType
 from snowflaketoolsservice.hosting import RequestContext, ServiceProvider
 from snowflaketoolsservice.object_explorer.contracts import (
@@ -25,6 +26,7 @@ from snowflaketoolsservice.object_explorer.contracts import (
 from snowflaketoolsservice.object_explorer.routing import route_request
 from snowflaketoolsservice.object_explorer.session import ObjectExplorerSession
 from snowflaketoolsservice.metadata.contracts import ObjectMetadata
+from snowflaketoolsservice.utils.cancellation import OperationCanceledError
 import snowflaketoolsservice.utils as utils
 
 
@@ -89,9 +91,7 @@ class ObjectExplorerService(object):
 
         # Step 2: Connect the session and lookup the root node asynchronously
         try:
-            session.init_task = threading.Thread(target=self._initialize_session, args=(request_context, session))
-            session.init_task.daemon = True
-            session.init_task.start()
+            session.init_task = utils.thread.run_in_background(self._initialize_session, request_context, session)
         except Exception as e:
             # TODO: Localize
             self._session_created_error(request_context, session, f'Failed to start OE init task: {str(e)}')
@@ -169,12 +169,10 @@ class ObjectExplorerService(object):
             else:
                 task = session.expand_tasks.get(key)
 
-            if task is not None and task.isAlive():
+            if task is not None and task.is_alive():
                 return
 
-            new_task = threading.Thread(target=self._expand_node_thread, args=(is_refresh, request_context, params, session))
-            new_task.daemon = True
-            new_task.start()
+            new_task = utils.thread.run_in_background(self._expand_node_thread, is_refresh, request_context, params, session)
 
             if is_refresh:
                 session.refresh_tasks[key] = new_task
@@ -185,13 +183,23 @@ class ObjectExplorerService(object):
             self._expand_node_error(request_context, params, str(e))
 
     def _expand_node_thread(self, is_refresh: bool, request_context: RequestContext, params: ExpandParameters, session: ObjectExplorerSession):
+        # Mark the session's connections in use while the nodes are queried, so that checking connections leaves them alone
+        connections = list(session.connections)
+        conn_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME] if connections else None
+        for connection in connections:
+            conn_service.mark_in_use(connection)
         try:
             response = ExpandCompletedParameters(session.id, params.node_path)
-            response.nodes = route_request(is_refresh, session, params.node_path)
+            response.nodes = route_request(is_refresh, session, params.node_path, request_context.cancellation_token)
 
             request_context.send_notification(EXPAND_COMPLETED_METHOD, response)
+        except OperationCanceledError:
+            self._expand_node_error(request_context, params, 'Expand request was canceled')    # TODO: Localize
         except Exception as e:
             self._expand_node_error(request_context, params, str(e))
+        finally:
+            for connection in connections:
+                conn_service.mark_idle(connection)
 
     def _expand_node_error(self, request_context: RequestContext, params: ExpandParameters, message: str):
         if self._service_provider.logger is not None:
@@ -238,6 +246,7 @@ class ObjectExplorerService(object):
             raise RuntimeError(connect_result.error_message)
 
         connection = conn_service.get_connection(key_uri, ConnectionType.OBJECT_EXLPORER)
+        session.connections.append(connection)
         return connection
 
     def _initialize_session(self, request_context: RequestContext, session: ObjectExplorerSession):
@@ -259,9 +268,14 @@ class ObjectExplorerService(object):
 
             # Step 2: Get the connection to use for object explorer
             connection = conn_service.get_connection(session.id, ConnectionType.OBJECT_EXLPORER)
+            session.connections.append(connection)
 
             # Step 3: Create the snow Server object for the session and create the root node for the server
-            session.server = Server(connection, functools.partial(self._create_connection, session))
+            conn_service.mark_in_use(connection)
+            try:
+                session.server = Server(connection, functools.partial(self._create_connection, session), get_connection_metadata(connection))
+            finally:
+                conn_service.mark_idle(connection)
             metadata = ObjectMetadata(session.server.urn_base, None, 'Database', session.server.maintenance_db_name)
             node = NodeInfo()
             node.label = session.connection_details.options['dbname']
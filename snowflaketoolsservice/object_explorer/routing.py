@@ -11,6 +11,7 @@ from snow import NodeObject, Schema, Table, View
 from snowflaketoolsservice.metadata.contracts import ObjectMetadata
 from snowflaketoolsservice.object_explorer.session import ObjectExplorerSession
 from snowflaketoolsservice.object_explorer.contracts import NodeInfo
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 
 
 class Folder:
@@ -59,13 +60,22 @@ class RoutingTarget:
         self.folders: List[Folder] = folders or []
         self.node_generator = node_generator
 
-    def get_nodes(self, is_refresh: bool, current_path: str, session: ObjectExplorerSession, match_params: dict) -> List[NodeInfo]:
+    def get_nodes(
+            self,
+            is_refresh: bool,
+            current_path: str,
+            session: ObjectExplorerSession,
+            match_params: dict,
+            cancellation_token: Optional[CancellationToken] = None
+    ) -> List[NodeInfo]:
         """
         Builds a list of NodeInfo that should be displayed under the current routing path
         :param is_refresh: Whether or not the nodes should be refreshed before retrieval
         :param current_path: The requested node path
         :param session: OE Session that the lookup will be performed from
         :param match_params: The captures from the regex that this routing target is mapped from
+        :param cancellation_token: Optional token checked before each generated node is retrieved
+        :raises OperationCanceledError: The token was canceled while the nodes were being generated
         :return: A list of NodeInfo
         """
         # Start by adding the static folders
@@ -73,9 +83,16 @@ class RoutingTarget:
 
         # Execute the node generator to generate the non-static nodes and add them after the folders
         if self.node_generator is not None:
+            if cancellation_token is not None:
+                cancellation_token.raise_if_canceled()
+
             nodes = self.node_generator(is_refresh, current_path, session, match_params)
             if nodes:
-                folder_nodes.extend(nodes)
+                # Node generators are lazy, so stopping between nodes stops querying the server
+                for node in nodes:
+                    if cancellation_token is not None:
+                        cancellation_token.raise_if_canceled()
+                    folder_nodes.append(node)
 
         return folder_nodes
 
@@ -561,12 +578,19 @@ ROUTING_TABLE = {
 # PUBLIC FUNCTIONS #########################################################
 
 
-def route_request(is_refresh: bool, session: ObjectExplorerSession, path: str) -> List[NodeInfo]:
+def route_request(
+        is_refresh: bool,
+        session: ObjectExplorerSession,
+        path: str,
+        cancellation_token: Optional[CancellationToken] = None
+) -> List[NodeInfo]:
     """
     Performs a lookup for a given expand request
     :param is_refresh: Whether or not the request is a request to refresh or just expand
     :param session: Session that the expand is being performed on
     :param path: Path of the object to expand
+    :param cancellation_token: Optional token that stops the expansion when canceled
+    :raises OperationCanceledError: The token was canceled before the expansion completed
     :return: List of nodes that result from the expansion
     """
     # Figure out what the path we're looking at is
@@ -577,7 +601,7 @@ def route_request(is_refresh: bool, session: ObjectExplorerSession, path: str) -
         match = route.match(path)
         if match is not None:
             # We have a match!
-            return target.get_nodes(is_refresh, path, session, match.groupdict())
+            return target.get_nodes(is_refresh, path, session, match.groupdict(), cancellation_token)
 
     # If we make it to here, there isn't a route that matches the path
     raise ValueError(f'Path {path} does not have a matching OE route')  # TODO: Localize
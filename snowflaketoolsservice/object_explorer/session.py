@@ -16,6 +16,8 @@ class ObjectExplorerSession:
         self.id: str = session_id
         self.is_ready: bool = False
         self.server: Optional[Server] = None
+        # Connections the session's server queries, to the server and to each database that has been expanded
+        self.connections: List['psycopg2.extensions.connection'] = []
 
         self.init_task: Optional[threading.Thread] = None
         self.expand_tasks: Dict[str, threading.Thread] = {}
@@ -0,0 +1,183 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module for running statements without holding a thread for each of them while they run"""
+
+import logging  # noqa
+import threading
+import time
+from typing import Callable, Dict, Optional  # noqa
+
+import psycopg2.extensions
+from snowflake.connector.connection import SnowflakeConnection
+
+
+CANCEL_QUERY_TEMPLATE = 'SELECT SYSTEM$CANCEL_QUERY(%s)'
+
+
+def supports_async_execution(connection) -> bool:
+    """
+    Whether a connection can submit statements without waiting for them to finish, as Snowflake
+    connections can. psycopg2 connections can't, and keep running statements on a blocking cursor
+    :param connection: Connection that will run the statements
+    """
+    return isinstance(connection, SnowflakeConnection)
+
+
+class _TrackedQuery:
+    """A submitted query and when to ask about it next"""
+
+    def __init__(self, connection, query_id: str, on_done: Callable[[Optional[Exception]], None], interval: float):
+        self.connection = connection
+        self.query_id = query_id
+        self.on_done = on_done
+        self.interval = interval
+        self.next_poll_time = time.monotonic() + interval
+
+
+class QueryStatusPoller:
+    """
+    Tracks submitted queries by query ID and polls their status from a single thread, backing off
+    while they run, so that one thread drives any number of long running statements
+    """
+
+    POLLER_THREAD_NAME = 'Query_Status_Poller'
+
+    def __init__(
+            self,
+            initial_interval: float = 0.05,
+            max_interval: float = 2,
+            backoff_factor: float = 2,
+            logger: Optional[logging.Logger] = None
+    ):
+        """
+        Initializes a poller. The polling thread starts with the first tracked query
+        :param initial_interval: Seconds to wait before first asking about a query
+        :param max_interval: Most seconds to wait between asking about a query
+        :param backoff_factor: What to multiply the wait by each time a query is still running
+        :param logger: Optional logger
+        """
+        self.initial_interval: float = initial_interval
+        self.max_interval: float = max_interval
+        self.backoff_factor: float = backoff_factor
+        self.logger: Optional[logging.Logger] = logger
+
+        self._tracked: Dict[str, _TrackedQuery] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._wake_event: threading.Event = threading.Event()
+        self._stopped: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+    # PROPERTIES ###########################################################
+    @property
+    def tracked_count(self) -> int:
+        """Number of queries that haven't finished yet"""
+        return len(self._tracked)
+
+    # METHODS ##############################################################
+    def track(self, connection, query_id: str, on_done: Callable[[Optional[Exception]], None]) -> None:
+        """
+        Starts polling the status of a submitted query
+        :param connection: Connection the query was submitted on
+        :param query_id: ID the server returned for the query
+        :param on_done: Called on the polling thread once the query finishes, with None if it
+                        succeeded or the error it failed with. Must not block
+        """
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError('Query status poller has been stopped')  # TODO: Localize
+            self._tracked[query_id] = _TrackedQuery(connection, query_id, on_done, self.initial_interval)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_until_stopped, name=self.POLLER_THREAD_NAME)
+                self._thread.daemon = True
+                self._thread.start()
+        self._wake_event.set()
+
+    def is_tracked(self, query_id: str) -> bool:
+        """Whether a query is being polled"""
+        return query_id in self._tracked
+
+    def cancel(self, query_id: str) -> bool:
+        """
+        Cancels a tracked query on the server by its query ID, and reports it canceled right away
+        :param query_id: ID of the query to cancel
+        :return: False if the query wasn't being tracked, such as if it already finished
+        """
+        with self._lock:
+            tracked = self._tracked.pop(query_id, None)
+        if tracked is None:
+            return False
+
+        try:
+            cursor = tracked.connection.cursor()
+            try:
+                cursor.execute(CANCEL_QUERY_TEMPLATE, (query_id,))
+            finally:
+                cursor.close()
+        except Exception:
+            # The query is abandoned either way, so a failed cancel only leaves it running on the server
+            if self.logger is not None:
+                self.logger.exception(f'Could not cancel query {query_id} on the server')
+
+        self._complete(tracked, psycopg2.extensions.QueryCanceledError('Query was canceled by user'))  # TODO: Localize
+        return True
+
+    def poll(self) -> Optional[float]:
+        """
+        Asks about every query that is due to be polled, reporting the ones that finished
+        :return: Seconds until the next query is due, or None if there aren't any queries left
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [tracked for tracked in self._tracked.values() if tracked.next_poll_time <= now]
+
+        for tracked in due:
+            try:
+                status = tracked.connection.get_query_status_throw_if_error(tracked.query_id)
+                if tracked.connection.is_still_running(status):
+                    tracked.interval = min(tracked.interval * self.backoff_factor, self.max_interval)
+                    tracked.next_poll_time = time.monotonic() + tracked.interval
+                    continue
+                error = None
+            except Exception as status_error:
+                error = status_error
+
+            with self._lock:
+                # The query may have been canceled while it was being polled
+                if self._tracked.get(tracked.query_id) is not tracked:
+                    continue
+                del self._tracked[tracked.query_id]
+            self._complete(tracked, error)
+
+        with self._lock:
+            if not self._tracked:
+                return None
+            return max(0, min(tracked.next_poll_time for tracked in self._tracked.values()) - time.monotonic())
+
+    def stop(self) -> None:
+        """Stops polling. Queries that are still being tracked are left running on the server"""
+        with self._lock:
+            self._stopped = True
+        self._wake_event.set()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _complete(self, tracked: _TrackedQuery, error: Optional[Exception]) -> None:
+        try:
+            tracked.on_done(error)
+        except Exception:
+            if self.logger is not None:
+                self.logger.exception(f'Unhandled exception while completing query {tracked.query_id}')
+
+    def _poll_until_stopped(self) -> None:
+        while not self._stopped:
+            try:
+                timeout = self.poll()
+            except Exception:
+                timeout = self.max_interval
+                if self.logger is not None:
+                    self.logger.exception('Unhandled exception while polling query status')
+
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
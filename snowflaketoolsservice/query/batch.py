@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from enum import Enum
-from typing import List  # noqa
+from typing import Callable, List, Optional  # noqa
 from datetime import datetime
 
 import psycopg2
@@ -13,10 +13,13 @@ import sqlparse
 
 from snowflaketoolsservice.utils.time import get_time_str, get_elapsed_time_str
 from snowflaketoolsservice.query.contracts import BatchSummary, SaveResultsRequestParams, SelectionData
-from snowflaketoolsservice.query.result_set import ResultSet  # noqa
+from snowflaketoolsservice.query.result_set import ResultSet, ResultSetEvents  # noqa
 from snowflaketoolsservice.query.file_storage_result_set import FileStorageResultSet
 from snowflaketoolsservice.query.in_memory_result_set import InMemoryResultSet
-from snowflaketoolsservice.query.data_storage import FileStreamFactory
+from snowflaketoolsservice.query.data_storage import DEFAULT_DOWNLOAD_PARALLELISM, FileStreamFactory
+from snowflaketoolsservice.query.async_execution import QueryStatusPoller
+from snowflaketoolsservice.utils.cancellation import CancellationToken
+from snowflaketoolsservice.utils.thread import run_in_daemon_thread
 
 
 class ResultSetStorageType(Enum):
@@ -26,10 +29,14 @@ class ResultSetStorageType(Enum):
 
 class BatchEvents:
 
-    def __init__(self, on_execution_started=None, on_execution_completed=None, on_result_set_completed=None):
+    def __init__(self, on_execution_started=None, on_execution_completed=None, on_result_set_completed=None,
+                 on_result_set_available=None, on_result_set_updated=None):
         self._on_execution_started = on_execution_started
         self._on_execution_completed = on_execution_completed
         self._on_result_set_completed = on_result_set_completed
+        # Fired while a result set is read, once its first rows can be fetched and then as more rows are read
+        self._on_result_set_available = on_result_set_available
+        self._on_result_set_updated = on_result_set_updated
 
 
 class SelectBatchEvents(BatchEvents):
@@ -47,7 +54,8 @@ class Batch:
             ordinal: int,
             selection: SelectionData,
             batch_events: BatchEvents = None,
-            storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE
+            storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE,
+            download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM
     ) -> None:
         self.id = ordinal
         self.selection = selection
@@ -61,6 +69,8 @@ class Batch:
         self._notices: List[str] = []
         self._batch_events = batch_events
         self._storage_type = storage_type
+        self._download_parallelism = download_parallelism
+        self._query_id: Optional[str] = None
 
     @property
     def batch_summary(self) -> BatchSummary:
@@ -104,6 +114,11 @@ class Batch:
     def notices(self) -> List[str]:
         return self._notices
 
+    @property
+    def query_id(self) -> Optional[str]:
+        """ID the server gave the batch's statement, if the batch was submitted asynchronously"""
+        return self._query_id
+
     def get_cursor(self, connection: 'psycopg2.extensions.connection'):
         return connection.cursor()
 
@@ -142,30 +157,106 @@ class Batch:
             if self._batch_events and self._batch_events._on_execution_completed:
                 self._batch_events._on_execution_completed(self)
 
+    def execute_async(self, connection, poller: QueryStatusPoller, on_done: Callable[[Optional[Exception]], None]) -> None:
+        """
+        Submits the batch without waiting for it to run. The poller tracks the statement by its query ID,
+        and once it finishes the results are fetched in the background
+
+        :param connection: Connection that supports asynchronous execution, such as a Snowflake connection
+        :param poller: Poller that tracks the statement until it finishes
+        :param on_done: Called once the batch has completed, with None or the error the batch failed with
+        """
+        self._execution_start_time = datetime.now()
+
+        if self._batch_events and self._batch_events._on_execution_started:
+            self._batch_events._on_execution_started(self)
+
+        cursor = connection.cursor()
+        try:
+            cursor.execute_async(self.batch_text)
+            self._query_id = cursor.sfqid
+        except Exception as error:
+            self._complete_async(cursor, error, on_done)
+            return
+
+        # Fetching the results can take as long as running the query, so it gets a thread of its own
+        poller.track(connection, self._query_id, lambda error: run_in_daemon_thread(self._complete_async, cursor, error, on_done))
+
     def after_execute(self, cursor) -> None:
         if cursor.description is not None:
             self.create_result_set(cursor)
 
     def create_result_set(self, cursor):
-        result_set = create_result_set(self._storage_type, 0, self.id)
-        result_set.read_result_to_end(cursor)
+        events = None
+        if self._batch_events is not None:
+            events = ResultSetEvents(
+                on_result_set_partially_loaded=self._batch_events._on_result_set_updated,
+                on_result_set_available=self._batch_events._on_result_set_available
+            )
+        result_set = create_result_set(self._storage_type, 0, self.id, self._download_parallelism, events)
+        # The result set is set before it is read so that subsets of the rows read so far can be served
         self._result_set = result_set
+        result_set.read_result_to_end(cursor)
 
     def get_subset(self, start_index: int, end_index: int):
         return self._result_set.get_subset(start_index, end_index)
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def save_as(
+            self,
+            params: SaveResultsRequestParams,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ) -> None:
 
         if params.result_set_index != 0:
             raise IndexError('Result set index should be always 0')
 
-        self._result_set.save_as(params, file_factory, on_success, on_failure)
+        self._result_set.save_as(params, file_factory, on_success, on_failure, cancellation_token)
+
+    def dispose(self) -> None:
+        if self._result_set is not None:
+            self._result_set.dispose()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _complete_async(self, cursor, error: Optional[Exception], on_done: Callable[[Optional[Exception]], None]) -> None:
+        try:
+            if error is None:
+                cursor.get_results_from_sfqid(self._query_id)
+                Batch.after_execute(self, cursor)
+        except Exception as fetch_error:
+            error = fetch_error
+        finally:
+            cursor.close()
+            if error is not None and not isinstance(error, psycopg2.DatabaseError):
+                # Surface the error the same way as errors of batches that ran on a blocking cursor
+                database_error = psycopg2.DatabaseError(str(error))
+                database_error.__cause__ = error
+                error = database_error
+
+            self._has_error = error is not None
+            self._has_executed = True
+            self._execution_end_time = datetime.now()
+
+            if self._batch_events and self._batch_events._on_execution_completed:
+                self._batch_events._on_execution_completed(self)
+
+        on_done(error)
 
 
 class SelectBatch(Batch):
 
-    def __init__(self, batch_text: str, ordinal: int, selection: SelectionData, batch_events: SelectBatchEvents, storage_type: ResultSetStorageType) -> None:
-        Batch.__init__(self, batch_text, ordinal, selection, batch_events, storage_type)
+    def __init__(
+            self,
+            batch_text: str,
+            ordinal: int,
+            selection: SelectionData,
+            batch_events: SelectBatchEvents,
+            storage_type: ResultSetStorageType,
+            download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM
+    ) -> None:
+        Batch.__init__(self, batch_text, ordinal, selection, batch_events, storage_type, download_parallelism)
 
     def get_cursor(self, connection: 'psycopg2.extensions.connection'):
         cursor_name = str(uuid.uuid4())
@@ -178,15 +269,28 @@ class SelectBatch(Batch):
         super().create_result_set(cursor)
 
 
-def create_result_set(storage_type: ResultSetStorageType, result_set_id: int, batch_id: int) -> ResultSet:
+def create_result_set(
+        storage_type: ResultSetStorageType,
+        result_set_id: int,
+        batch_id: int,
+        download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM,
+        events: ResultSetEvents = None
+) -> ResultSet:
 
     if storage_type is ResultSetStorageType.FILE_STORAGE:
-        return FileStorageResultSet(result_set_id, batch_id)
+        return FileStorageResultSet(result_set_id, batch_id, events, download_parallelism)
 
-    return InMemoryResultSet(result_set_id, batch_id)
+    return InMemoryResultSet(result_set_id, batch_id, events)
 
 
-def create_batch(batch_text: str, ordinal: int, selection: SelectionData, batch_events: BatchEvents, storage_type: ResultSetStorageType) -> Batch:
+def create_batch(
+        batch_text: str,
+        ordinal: int,
+        selection: SelectionData,
+        batch_events: BatchEvents,
+        storage_type: ResultSetStorageType,
+        download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM
+) -> Batch:
     sql = sqlparse.parse(batch_text)
     statement = sql[0]
 
@@ -195,6 +299,6 @@ def create_batch(batch_text: str, ordinal: int, selection: SelectionData, batch_
         second_token = statement.token_next(index)
 
         if second_token[1].value.lower() != 'into':
-            return SelectBatch(batch_text, ordinal, selection, batch_events, storage_type)
+            return SelectBatch(batch_text, ordinal, selection, batch_events, storage_type, download_parallelism)
 
-    return Batch(batch_text, ordinal, selection, batch_events, storage_type)
+    return Batch(batch_text, ordinal, selection, batch_events, storage_type, download_parallelism)
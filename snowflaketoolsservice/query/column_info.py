@@ -5,10 +5,35 @@
 
 from typing import List
 from psycopg2 import sql
+from snowflake.connector.connection import SnowflakeConnection
+from snowflake.connector.constants import FIELD_TYPES
 
+from snowflaketoolsservice.parsers import datatypes
 from snowflaketoolsservice.query.contracts import DbColumn
 
 
+# Data type of the values of each Snowflake column type, by the name of the type
+SNOWFLAKE_DATA_TYPES = {
+    'FIXED': datatypes.DATATYPE_NUMERIC,
+    'REAL': datatypes.DATATYPE_DOUBLE,
+    'TEXT': datatypes.DATATYPE_TEXT,
+    'DATE': datatypes.DATATYPE_DATE,
+    'TIMESTAMP': datatypes.DATATYPE_TIMESTAMP,
+    'TIMESTAMP_NTZ': datatypes.DATATYPE_TIMESTAMP,
+    'TIMESTAMP_LTZ': datatypes.DATATYPE_TIMESTAMP_WITH_TIMEZONE,
+    'TIMESTAMP_TZ': datatypes.DATATYPE_TIMESTAMP_WITH_TIMEZONE,
+    'TIME': datatypes.DATATYPE_TIME,
+    'BOOLEAN': datatypes.DATATYPE_BOOL,
+    'BINARY': datatypes.DATATYPE_BYTEA,
+    # Semi-structured and geospatial values are returned as their JSON text
+    'VARIANT': datatypes.DATATYPE_TEXT,
+    'OBJECT': datatypes.DATATYPE_TEXT,
+    'ARRAY': datatypes.DATATYPE_TEXT,
+    'GEOGRAPHY': datatypes.DATATYPE_TEXT,
+    'GEOMETRY': datatypes.DATATYPE_TEXT
+}
+
+
 def get_columns_info(description, connection) -> List[DbColumn]:
 
     if description is None:
@@ -18,6 +43,10 @@ def get_columns_info(description, connection) -> List[DbColumn]:
         # if no connection is provided, just return basic column info constructed from the cursor description
         return [DbColumn.from_cursor_description(index, column) for index, column in enumerate(description)]
 
+    if isinstance(connection, SnowflakeConnection):
+        # Snowflake type codes aren't type OIDs, the description names the type of each column itself
+        return get_snowflake_columns_info(description)
+
     column_type_oids = [column_info[1] for column_info in description]
 
     query_template = sql.SQL('SELECT {}, {} FROM {} WHERE {} IN ({})').format(
@@ -40,3 +69,19 @@ def get_columns_info(description, connection) -> List[DbColumn]:
             columns_info.append(db_column)
 
     return columns_info
+
+
+def get_snowflake_columns_info(description) -> List[DbColumn]:
+    """
+    Builds column info from the description of a Snowflake cursor without querying the server
+    :param description: Description of the cursor, whose type codes index the Snowflake field types
+    """
+    columns_info = []
+    for index, column in enumerate(description):
+        db_column = DbColumn.from_cursor_description(index, column)
+        type_code = column[1]
+        if 0 <= type_code < len(FIELD_TYPES):
+            db_column.data_type = SNOWFLAKE_DATA_TYPES.get(FIELD_TYPES[type_code].name)
+        columns_info.append(db_column)
+
+    return columns_info
@@ -4,8 +4,14 @@
 # --------------------------------------------------------------------------------------------
 
 from snowflaketoolsservice.query.data_storage.storage_data_reader import StorageDataReader
+from snowflaketoolsservice.query.data_storage.result_batch_download import (
+    DEFAULT_DOWNLOAD_PARALLELISM, download_result_batches, get_result_batches
+)
+from snowflaketoolsservice.query.data_storage.service_buffer_block_index import ServiceBufferBlockIndex
+from snowflaketoolsservice.query.data_storage.service_buffer_row_index import ServiceBufferRowIndex
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
+from snowflaketoolsservice.query.data_storage.service_buffer_memory_mapped_reader import ServiceBufferMemoryMappedReader
 from snowflaketoolsservice.query.data_storage.file_stream_factory import FileStreamFactory
 from snowflaketoolsservice.query.data_storage.save_as_csv_writer import SaveAsCsvWriter
 from snowflaketoolsservice.query.data_storage.save_as_csv_file_stream_factory import SaveAsCsvFileStreamFactory
@@ -17,5 +23,6 @@ from snowflaketoolsservice.query.data_storage.save_as_excel_writer_factory impor
 __all__ = [
     'FileStreamFactory', 'SaveAsCsvWriter', 'SaveAsJsonWriter', 'SaveAsExcelWriter', 'SaveAsExcelFileStreamFactory',
     'SaveAsJsonFileStreamFactory', 'SaveAsCsvFileStreamFactory', 'ServiceBufferFileStreamWriter',
-    'ServiceBufferFileStreamReader', 'StorageDataReader'
+    'ServiceBufferFileStreamReader', 'ServiceBufferMemoryMappedReader', 'ServiceBufferBlockIndex', 'ServiceBufferRowIndex',
+    'StorageDataReader', 'DEFAULT_DOWNLOAD_PARALLELISM', 'download_result_batches', 'get_result_batches'
 ]
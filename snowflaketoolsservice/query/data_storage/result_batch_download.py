@@ -0,0 +1,62 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Module for downloading the batches of a result set concurrently"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor  # noqa
+from typing import Deque, Iterable, Iterator, List, Optional  # noqa
+
+from snowflake.connector.cursor import SnowflakeCursor
+
+
+DEFAULT_DOWNLOAD_PARALLELISM = 4
+DOWNLOAD_THREAD_NAME_PREFIX = 'Result_Batch_Download'
+
+
+def get_result_batches(cursor) -> Optional[list]:
+    """
+    Splits the results of a cursor into batches that can be downloaded independently, as the chunks
+    of a Snowflake result set can. Other cursors, such as psycopg2 cursors, can't be split
+    :param cursor: Cursor that ran the statement
+    :return: The batches of the result in order, or None if the cursor can't split its results
+    """
+    if not isinstance(cursor, SnowflakeCursor):
+        return None
+    return cursor.get_result_batches()
+
+
+def download_result_batches(batches: Iterable, parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM) -> Iterator[List[tuple]]:
+    """
+    Downloads and decodes result batches on a pool of workers, yielding the rows of each batch in
+    the order of the batches. No more than the degree of parallelism are downloaded ahead of the
+    batch being consumed, so a slow consumer doesn't hold the whole result in memory
+    :param batches: Result batches, each of which yields its rows when iterated
+    :param parallelism: Number of batches to download at once. 1 downloads them one at a time on the calling thread
+    """
+    if parallelism <= 1:
+        for batch in batches:
+            yield list(batch)
+        return
+
+    batch_iterator = iter(batches)
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix=DOWNLOAD_THREAD_NAME_PREFIX) as executor:
+        downloads: Deque[Future] = deque()
+        try:
+            for batch in batch_iterator:
+                downloads.append(executor.submit(list, batch))
+                if len(downloads) == parallelism:
+                    break
+
+            while downloads:
+                rows = downloads.popleft().result()
+                next_batch = next(batch_iterator, None)
+                if next_batch is not None:
+                    downloads.append(executor.submit(list, next_batch))
+                yield rows
+        finally:
+            # Stop downloads that haven't started if the consumer gave up or a download failed
+            for download in downloads:
+                download.cancel()
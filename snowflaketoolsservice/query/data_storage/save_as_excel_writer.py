@@ -5,7 +5,6 @@
 
 import io
 from typing import List
-import xlsxwriter
 import string
 
 from snowflaketoolsservice.query.data_storage.save_as_writer import SaveAsWriter
@@ -17,6 +16,9 @@ class SaveAsExcelWriter(SaveAsWriter):
     def __init__(self, stream: io.BufferedWriter, params: SaveResultsRequestParams) -> None:
         SaveAsWriter.__init__(self, stream, params)
 
+        # Imported here since only saving as Excel needs it and it is slow to import
+        import xlsxwriter
+
         self._header_written = False
         self._workbook = xlsxwriter.Workbook(self._file_stream.name)
         self._worksheet = self._workbook.add_worksheet()
@@ -4,6 +4,22 @@
 # --------------------------------------------------------------------------------------------
 
 import io
+import struct
+
+
+# Version of the block format written by write_block. Readers reject blocks of any other version
+BLOCK_FORMAT_VERSION = 2
+BLOCK_MARKER = b'SB'
+
+# A block is a header, then the lengths of the values of each column in turn, then the bytes of the
+# values of each column in turn. The header holds the marker, the version, a reserved byte, the
+# number of rows, the number of columns and the number of bytes of values
+BLOCK_HEADER = struct.Struct('=2sBxIII')
+# Type code of the arrays of value lengths
+BLOCK_LENGTH_TYPECODE = 'i'
+BLOCK_LENGTH_SIZE = struct.calcsize(BLOCK_LENGTH_TYPECODE)
+# Length of a NULL value, so that NULL can be told apart from an empty value
+BLOCK_NULL_LENGTH = -1
 
 
 class ServiceBufferFileStream:
@@ -0,0 +1,58 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from bisect import bisect_right
+from typing import List, Tuple  # noqa
+
+
+class ServiceBufferBlockIndex:
+    """
+    Sparse index of the blocks of a service buffer file, holding one entry per block rather than
+    one per row. Rows are identified by their position in the file, in the order they were written
+    """
+
+    ROW_POSITION_OUT_OF_RANGE_ERROR = 'Row position out of range'
+
+    def __init__(self) -> None:
+        self._block_offsets: List[int] = []
+        self._first_rows: List[int] = []
+        self._row_count = 0
+
+    # PROPERTIES ###########################################################
+    @property
+    def block_count(self) -> int:
+        return len(self._block_offsets)
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows in the blocks that have been added"""
+        return self._row_count
+
+    # METHODS ##############################################################
+    def add_block(self, block_offset: int, row_count: int) -> int:
+        """
+        Adds a block that has been written to the file
+        :param block_offset: Offset of the block in the file
+        :param row_count: Number of rows in the block
+        :return: The position of the first row of the block
+        """
+        first_row = self._row_count
+        # The offset is added before the first row, so a concurrent lookup never finds a row without its block
+        self._block_offsets.append(block_offset)
+        self._first_rows.append(first_row)
+        self._row_count += row_count
+        return first_row
+
+    def locate(self, row_position: int) -> Tuple[int, int]:
+        """
+        Locates a row in the file
+        :param row_position: Position of the row in the file
+        :return: The offset of the block that holds the row, and the index of the row in the block
+        """
+        if row_position < 0 or row_position >= self._row_count:
+            raise IndexError(ServiceBufferBlockIndex.ROW_POSITION_OUT_OF_RANGE_ERROR)
+
+        block = bisect_right(self._first_rows, row_position) - 1
+        return self._block_offsets[block], row_position - self._first_rows[block]
@@ -9,6 +9,7 @@ import os
 
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
+from snowflaketoolsservice.query.data_storage.service_buffer_memory_mapped_reader import ServiceBufferMemoryMappedReader
 
 
 def create_file() -> str:
@@ -19,8 +20,12 @@ def get_reader(file_name: str):
     return ServiceBufferFileStreamReader(io.open(file_name, 'rb'))
 
 
-def get_writer(file_name: str):
-    return ServiceBufferFileStreamWriter(io.open(file_name, 'wb'))
+def get_memory_mapped_reader(file_name: str):
+    return ServiceBufferMemoryMappedReader(io.open(file_name, 'rb'))
+
+
+def get_writer(file_name: str, append: bool = False):
+    return ServiceBufferFileStreamWriter(io.open(file_name, 'ab' if append else 'wb'))
 
 
 def delete_file(file_name: str):
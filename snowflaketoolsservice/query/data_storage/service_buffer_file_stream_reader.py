@@ -3,15 +3,18 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import io
-from typing import List, Callable, Any  # noqa
-import struct
+import itertools
+from typing import List, Callable, Any, Sequence, Tuple  # noqa
 
 from snowflaketoolsservice.parsers import datatypes
 from snowflaketoolsservice.query.contracts.column import DbColumn, DbCellValue
 from snowflaketoolsservice.converters.bytes_to_any_converters import get_bytes_to_any_converter
 
-from snowflaketoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
+from snowflaketoolsservice.query.data_storage.service_buffer import (
+    BLOCK_FORMAT_VERSION, BLOCK_HEADER, BLOCK_LENGTH_SIZE, BLOCK_LENGTH_TYPECODE, BLOCK_MARKER, BLOCK_NULL_LENGTH, ServiceBufferFileStream
+)
 
 
 class ServiceBufferFileStreamReader(ServiceBufferFileStream):
@@ -20,6 +23,7 @@ class ServiceBufferFileStreamReader(ServiceBufferFileStream):
     READER_STREAM_NONE_ERROR = "Stream argument is None"
     READER_STREAM_NOT_SUPPORT_READING_ERROR = "Stream argument doesn't support reading"
     READER_DATA_READ_ERROR = "Data read error"
+    READER_BLOCK_FORMAT_ERROR = "Unsupported block format"
 
     def __init__(self, stream: io.BufferedReader) -> None:
 
@@ -31,6 +35,10 @@ class ServiceBufferFileStreamReader(ServiceBufferFileStream):
 
         ServiceBufferFileStream.__init__(self, stream)
 
+        # The offset of the last block read and the block, which serves the rows that follow without reading the
+        # file again. They're kept together so that a reader shared between threads never mixes up two blocks
+        self._last_block: Tuple[int, ServiceBufferBlock] = None
+
     def _read_bytes_from_file(self, stream, file_offset, length_to_read) -> bytes:
         try:
             # locate the offset position before read
@@ -41,45 +49,69 @@ class ServiceBufferFileStreamReader(ServiceBufferFileStream):
             raise IOError(ServiceBufferFileStreamReader.READER_DATA_READ_ERROR) from exc
         return read_bytes_result
 
-    def read_row(self, file_offset, row_id, columns_info: List[DbColumn]) -> List[DbCellValue]:
-        """   Read a row from a file   """
-        self._file_stream.seek(file_offset)
-
-        len_columns_info = len(columns_info)
-        current_file_offset = file_offset
+    def read_block(self, block_offset, columns_info: List[DbColumn]) -> 'ServiceBufferBlock':
+        """   Read a block of rows from a file with two reads, one for its header and one for the rest   """
+        header_bytes = self._read_bytes_from_file(self._file_stream, block_offset, BLOCK_HEADER.size)
+        if len(header_bytes) != BLOCK_HEADER.size:
+            raise IOError(ServiceBufferFileStreamReader.READER_DATA_READ_ERROR)
+
+        marker, version, row_count, column_count, payload_length = BLOCK_HEADER.unpack(header_bytes)
+        if marker != BLOCK_MARKER or version != BLOCK_FORMAT_VERSION or column_count != len(columns_info):
+            raise IOError(ServiceBufferFileStreamReader.READER_BLOCK_FORMAT_ERROR)
+
+        lengths_size = row_count * column_count * BLOCK_LENGTH_SIZE
+        body = self._read_bytes_from_file(self._file_stream, block_offset + BLOCK_HEADER.size, lengths_size + payload_length)
+        if len(body) != lengths_size + payload_length:
+            raise IOError(ServiceBufferFileStreamReader.READER_DATA_READ_ERROR)
+        lengths = array(BLOCK_LENGTH_TYPECODE)
+        lengths.frombytes(body[:lengths_size])
+
+        return ServiceBufferBlock(row_count, lengths, body, lengths_size, columns_info)
+
+    def read_block_row(self, block_offset, row_index, row_id, columns_info: List[DbColumn]) -> List[DbCellValue]:
+        """   Read a row of a block from a file, reading the block only if it isn't the last block read   """
+        last_block = self._last_block
+        if last_block is None or last_block[0] != block_offset:
+            last_block = (block_offset, self.read_block(block_offset, columns_info))
+            self._last_block = last_block
+
+        return last_block[1].get_row(row_index, row_id)
+
+
+class ServiceBufferBlock:
+    """ Block of rows read from a service buffer formatted file stream, whose values are converted as rows are read """
+
+    def __init__(self, row_count: int, lengths: Sequence[int], body: bytes, payload_offset: int, columns_info: List[DbColumn]) -> None:
+        self.row_count = row_count
+        self._lengths = lengths
+        self._body = body
+        self._converters: List[Callable[[bytes], Any]] = [
+            None if column.data_type == datatypes.DATATYPE_NULL else get_bytes_to_any_converter(column.data_type)
+            for column in columns_info
+        ]
+
+        # Offset in the body of each value, in the order of the lengths. NULL values take no bytes
+        self._value_offsets = list(itertools.accumulate(
+            itertools.chain((payload_offset,), (length if length > 0 else 0 for length in lengths))
+        ))
+
+    def get_row(self, row_index, row_id) -> List[DbCellValue]:
         results = []  # list of DbCellValue as return
 
-        for index in range(0, len_columns_info):
-
-            type_value = columns_info[index].data_type
-
-            # Read the object from the temp file
-            if type_value == datatypes.DATATYPE_NULL:
-                # wrap the NULL value as a DbCellValue
+        # The lengths of each column follow those of the column before, so a row's values are a block's row count apart
+        value_index = row_index
+        for object_converter in self._converters:
+            length = self._lengths[value_index]
+            if object_converter is None:
                 value = DbCellValue(display_value=None, is_null=True, raw_object=None, row_id=row_id)
+            elif length == BLOCK_NULL_LENGTH:
+                value = DbCellValue(display_value=str("NULL"), is_null=True, raw_object=None, row_id=row_id)
             else:
-                # read the length of data, then update the offset by plus 4, since the int holds 4 bytes
-                raw_bytes_length_to_read = self._read_bytes_from_file(self._file_stream, current_file_offset, 4)
-                if raw_bytes_length_to_read == b'\x00\x00\x00\x00':
-                    # if byte length to read is 0, then it's a NULL value.
-                    current_file_offset += 4
-                    value = DbCellValue(display_value=str("NULL"), is_null=True, raw_object=None, row_id=row_id)
-                else:
-                    bytes_length_to_read = struct.unpack('i', raw_bytes_length_to_read)[0]
-                    current_file_offset += 4
-
-                    # read the data content based on the length of data
-                    read_bytes_result = self._read_bytes_from_file(self._file_stream, current_file_offset, bytes_length_to_read)
-                    read_bytes_length = len(read_bytes_result)
-                    current_file_offset += read_bytes_length
-
-                    # convert data_bytes to data_obj
-                    object_converter: Callable[[bytes], Any] = get_bytes_to_any_converter(type_value)
-                    result_object = object_converter(read_bytes_result)
-
-                    # wrap the result_object as a DbCellValue
-                    value = DbCellValue(display_value=str(result_object), is_null=False, raw_object=result_object, row_id=row_id)
+                value_offset = self._value_offsets[value_index]
+                result_object = object_converter(self._body[value_offset:value_offset + length])
+                value = DbCellValue(display_value=str(result_object), is_null=False, raw_object=result_object, row_id=row_id)
 
             results.append(value)
+            value_index += self.row_count
 
         return results
@@ -3,13 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import io
-from typing import Callable, Any  # noqa
-import struct
+from typing import List  # noqa
 
 from snowflaketoolsservice.converters.bytes_converter import get_bytes_converter
-from snowflaketoolsservice.query.data_storage.service_buffer import ServiceBufferFileStream
-from snowflaketoolsservice.query.data_storage import StorageDataReader
+from snowflaketoolsservice.query.data_storage.service_buffer import (
+    BLOCK_FORMAT_VERSION, BLOCK_HEADER, BLOCK_LENGTH_TYPECODE, BLOCK_MARKER, BLOCK_NULL_LENGTH, ServiceBufferFileStream
+)
+from snowflaketoolsservice.query.contracts import DbColumn  # noqa
 
 
 class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
@@ -30,10 +32,6 @@ class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
 
         ServiceBufferFileStream.__init__(self, stream)
 
-    def _write_null(self):
-        val_byte_array = bytearray([])
-        return self._write_to_file(self._file_stream, val_byte_array)
-
     def _write_to_file(self, stream, byte_array):
         try:
             written_byte_number = stream.write(byte_array)
@@ -42,36 +40,29 @@ class ServiceBufferFileStreamWriter(ServiceBufferFileStream):
 
         return written_byte_number
 
-    def write_row(self, reader: StorageDataReader):
-        """   Write a row to a file   """
-        # Define a object list to store multiple columns in a row
-        len_columns_info = len(reader.columns_info)
-        values = []
-
-        # Loop over all the columns and write the values to the temp file
-        row_bytes = 0
-        for index in range(0, len_columns_info):
-
-            column = reader.columns_info[index]
-
-            values.append(reader.get_value(index))
-            type_value = column.data_type
-
-            # Write the object into the temp file
-            if reader.is_none(index):
-                # if it's a NULL value, the bytes length to write is 0
-                row_bytes += self._write_to_file(self._file_stream, bytearray(struct.pack("i", 0)))
-                row_bytes += self._write_null()
-            else:
-                bytes_converter: Callable[[str], bytearray] = get_bytes_converter(type_value)
-                value_to_write = bytes_converter(values[index])
-
-                bytes_length_to_write = len(value_to_write)
-
-                row_bytes += self._write_to_file(self._file_stream, bytearray(struct.pack("i", bytes_length_to_write)))
-                row_bytes += self._write_to_file(self._file_stream, value_to_write)
-
-        return row_bytes
+    def write_block(self, rows: List[tuple], columns_info: List[DbColumn]) -> int:
+        """   Write a block of rows to a file with a single write, returning the number of bytes written   """
+        converters = [get_bytes_converter(column.data_type) for column in columns_info]
+
+        # Each column's lengths and values are laid out together, so a reader decodes the lengths with one copy
+        lengths = array(BLOCK_LENGTH_TYPECODE)
+        payload = bytearray()
+        for index, converter in enumerate(converters):
+            for row in rows:
+                value = row[index]
+                if value is None:
+                    lengths.append(BLOCK_NULL_LENGTH)
+                else:
+                    value_to_write = converter(value)
+                    lengths.append(len(value_to_write))
+                    payload += value_to_write
+
+        header = BLOCK_HEADER.pack(BLOCK_MARKER, BLOCK_FORMAT_VERSION, len(rows), len(converters), len(payload))
+        return self._write_to_file(self._file_stream, b''.join((header, lengths.tobytes(), payload)))
+
+    def flush(self):
+        """   Flush the rows written so far, so that readers of the file can read them   """
+        self._file_stream.flush()
 
     def seek(self, offset):
         self._file_stream.seek(offset, io.SEEK_SET)
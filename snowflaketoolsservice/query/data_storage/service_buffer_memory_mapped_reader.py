@@ -0,0 +1,85 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import mmap
+import os
+import threading
+from typing import List, Optional  # noqa
+
+from snowflaketoolsservice.query.contracts.column import DbColumn
+from snowflaketoolsservice.query.data_storage.service_buffer import (
+    BLOCK_FORMAT_VERSION, BLOCK_HEADER, BLOCK_LENGTH_SIZE, BLOCK_LENGTH_TYPECODE, BLOCK_MARKER
+)
+from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferBlock, ServiceBufferFileStreamReader
+
+
+class ServiceBufferMemoryMappedReader(ServiceBufferFileStreamReader):
+    """
+    Reader for the blocks of service buffer formatted files that maps the file into memory, so that
+    it can stay open while the file is written and decode rows without seeking or copying the file.
+    The file is mapped again when a block is read past the end of the mapping, once the writer has
+    flushed it. Mappings that are replaced stay alive for as long as rows decoded from them need them
+    """
+
+    def __init__(self, stream: io.BufferedReader) -> None:
+        ServiceBufferFileStreamReader.__init__(self, stream)
+
+        self._mapping: Optional[mmap.mmap] = None
+        self._mapping_lock = threading.Lock()
+
+    # METHODS ##############################################################
+    def read_block(self, block_offset, columns_info: List[DbColumn]) -> ServiceBufferBlock:
+        """   Read a block of rows from the mapped file, whose lengths and values are views of the mapping   """
+        lengths_offset = block_offset + BLOCK_HEADER.size
+        mapping = self._get_mapping(lengths_offset)
+
+        marker, version, row_count, column_count, payload_length = BLOCK_HEADER.unpack_from(mapping, block_offset)
+        if marker != BLOCK_MARKER or version != BLOCK_FORMAT_VERSION or column_count != len(columns_info):
+            raise IOError(ServiceBufferFileStreamReader.READER_BLOCK_FORMAT_ERROR)
+
+        lengths_size = row_count * column_count * BLOCK_LENGTH_SIZE
+        block_end = lengths_offset + lengths_size + payload_length
+        body = memoryview(self._get_mapping(block_end))[lengths_offset:block_end]
+
+        return ServiceBufferBlock(row_count, body[:lengths_size].cast(BLOCK_LENGTH_TYPECODE), body, lengths_size, columns_info)
+
+    def close(self) -> None:
+        """   Release the mapping of the file and close the file   """
+        with self._mapping_lock:
+            mapping = self._mapping
+            self._mapping = None
+            # The last block read holds views of the mapping, which have to be released before it can be closed
+            self._last_block = None
+
+        try:
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            # Rows are still being decoded from the mapping, so it's released once they no longer need it
+            pass
+        finally:
+            self._file_stream.close()
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_mapping(self, end_offset: int) -> mmap.mmap:
+        mapping = self._mapping
+        if mapping is not None and len(mapping) >= end_offset:
+            return mapping
+
+        with self._mapping_lock:
+            mapping = self._mapping
+            if mapping is None or len(mapping) < end_offset:
+                # Map everything the writer has flushed so far, so that the file isn't mapped again for each block
+                file_size = os.fstat(self._file_stream.fileno()).st_size
+                if file_size < end_offset:
+                    raise IOError(ServiceBufferFileStreamReader.READER_DATA_READ_ERROR)
+                mapping = mmap.mmap(self._file_stream.fileno(), file_size, access=mmap.ACCESS_READ)
+                self._mapping = mapping
+
+        return mapping
@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from array import array
+from typing import Dict, Iterator, Optional  # noqa
+
+
+class ServiceBufferRowIndex:
+    """
+    Index of the position in a service buffer file of each row of a result set. Rows that are read
+    in order are at the position of their index, so they cost nothing to index. The positions of
+    rows that are added or updated are kept in an overlay, and once a row is removed the positions
+    are kept in a typed array of 8 bytes per row. Lookups are O(1) in either form
+    """
+
+    POSITION_TYPECODE = 'q'
+    ROW_INDEX_OUT_OF_RANGE_ERROR = 'Row index out of range'
+
+    def __init__(self) -> None:
+        self._row_count = 0
+        # Positions of rows that aren't at the position of their index, while the rows aren't held in an array
+        self._overlay: Dict[int, int] = {}
+        # Positions of every row, once a row has been removed
+        self._positions: Optional[array] = None
+
+    # PROPERTIES ###########################################################
+    @property
+    def is_compact(self) -> bool:
+        """Whether the positions are computed from the row indexes rather than held in an array"""
+        return self._positions is None
+
+    # METHODS ##############################################################
+    def append(self, position: int) -> None:
+        """
+        Adds a row to the end of the index
+        :param position: Position of the row in the file
+        """
+        if self._positions is not None:
+            self._positions.append(position)
+            return
+
+        if position != self._row_count:
+            self._overlay[self._row_count] = position
+        self._row_count += 1
+
+    def extend_range(self, first_position: int, row_count: int) -> None:
+        """
+        Adds rows at consecutive positions to the end of the index, as rows read in order are
+        :param first_position: Position in the file of the first row
+        :param row_count: Number of rows to add
+        """
+        if self._positions is None and first_position == self._row_count:
+            self._row_count += row_count
+            return
+
+        for position in range(first_position, first_position + row_count):
+            self.append(position)
+
+    def __len__(self) -> int:
+        return self._row_count if self._positions is None else len(self._positions)
+
+    def __getitem__(self, row_id: int) -> int:
+        if self._positions is not None:
+            return self._positions[row_id]
+
+        # The range check is inlined, as lookups are made for every row read
+        if 0 <= row_id < self._row_count:
+            return self._overlay.get(row_id, row_id)
+        raise IndexError(ServiceBufferRowIndex.ROW_INDEX_OUT_OF_RANGE_ERROR)
+
+    def __setitem__(self, row_id: int, position: int) -> None:
+        if self._positions is not None:
+            self._positions[row_id] = position
+            return
+
+        self._check_row_id(row_id)
+        if position == row_id:
+            self._overlay.pop(row_id, None)
+        else:
+            self._overlay[row_id] = position
+
+    def __delitem__(self, row_id: int) -> None:
+        # Removing a row moves every row after it, so the positions are held in an array from then on
+        if self._positions is None:
+            self._check_row_id(row_id)
+            positions = array(ServiceBufferRowIndex.POSITION_TYPECODE, range(self._row_count))
+            for overlay_row_id, position in self._overlay.items():
+                positions[overlay_row_id] = position
+            self._positions = positions
+            self._overlay = {}
+
+        del self._positions[row_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return (self[row_id] for row_id in range(len(self)))
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _check_row_id(self, row_id: int) -> None:
+        if row_id < 0 or row_id >= self._row_count:
+            raise IndexError(ServiceBufferRowIndex.ROW_INDEX_OUT_OF_RANGE_ERROR)
@@ -3,7 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from typing import List
+import itertools
+from typing import Iterable, List, Optional  # noqa
 
 from snowflaketoolsservice.query.contracts import DbColumn
 from snowflaketoolsservice.query.column_info import get_columns_info
@@ -11,8 +12,30 @@ from snowflaketoolsservice.query.column_info import get_columns_info
 
 class StorageDataReader:
 
-    def __init__(self, cursor) -> None:
+    # Rows fetched by the first fetch, which is kept small so that the first rows arrive quickly
+    INITIAL_FETCH_SIZE = 100
+    # Bounds of the number of rows fetched at once after the first fetch, which is adapted to the width of the rows
+    MIN_FETCH_SIZE = 100
+    MAX_FETCH_SIZE = 10000
+    # Bytes of row data that each fetch after the first aims for
+    TARGET_FETCH_BYTES = 1024 * 1024
+    # Assumed size of values that aren't strings or bytes, such as numbers and dates
+    FIXED_VALUE_SIZE = 8
+
+    def __init__(self, cursor, rows: Optional[Iterable[tuple]] = None, fetch_size: Optional[int] = None) -> None:
+        '''
+        :param cursor: Cursor that ran the statement, which describes the columns
+        :param rows: Rows to read instead of iterating over the cursor, such as rows downloaded in result batches
+        :param fetch_size: Number of rows to fetch at once, or None to adapt it to the width of the rows
+        '''
         self._cursor = cursor
+        self._rows = iter(rows) if rows is not None else None
+        self._fetch_size: int = fetch_size or self.INITIAL_FETCH_SIZE
+        self._is_fetch_size_adaptive: bool = fetch_size is None
+        # DB-API cursors fetch blocks with fetchmany, other row sources are iterated a block at a time
+        self._can_fetch_many: bool = callable(getattr(type(cursor), 'fetchmany', None))
+        self._block: List[tuple] = []
+        self._block_index = 0
         self._current_row: tuple = None
         self._columns_info = []
 
@@ -20,23 +43,46 @@ class StorageDataReader:
     def columns_info(self) -> List[DbColumn]:
         return self._columns_info
 
+    @property
+    def fetch_size(self) -> int:
+        '''Number of rows the next fetch will ask for'''
+        return self._fetch_size
+
     def read_row(self) -> bool:
         '''
-        read_row uses the cursor to iterate over. It iterates over the cursor one at a time
-        and returns True if it finds the row and False if it doesn’t
+        read_row moves to the next row, fetching the next block of rows from the cursor once the
+        current block has been read. Returns True if it finds the row and False if it doesn’t
         '''
-        row_found = False
-
-        for row in self._cursor:
-            self._current_row = row
-            row_found = True
-            break
+        if self._block_index >= len(self._block):
+            self._block = self._fetch_block()
+            self._block_index = 0
 
-        if self._current_row is None or len(self._columns_info) == 0:
-            self._columns_info = get_columns_info(self._cursor.description, self._cursor.connection)
+        row_found = self._block_index < len(self._block)
+        if row_found:
+            self._current_row = self._block[self._block_index]
+            self._block_index += 1
 
+        self._read_columns_info()
         return row_found
 
+    def read_rows(self) -> List[tuple]:
+        '''
+        read_rows returns the next block of rows, so that they can be written together, or an empty
+        list once every row has been read. The last row of the block becomes the current row
+        '''
+        if self._block_index < len(self._block):
+            rows = self._block[self._block_index:]
+        else:
+            rows = self._fetch_block()
+        self._block = []
+        self._block_index = 0
+
+        if rows:
+            self._current_row = rows[-1]
+
+        self._read_columns_info()
+        return rows
+
     def get_value(self, column_index: int):
         return self._current_row[column_index]
 
@@ -76,3 +122,44 @@ class StorageDataReader:
         column_value = self._current_row[column_index]
 
         return column_value[0: max_chars_to_return]
+
+    def _fetch_block(self) -> List[tuple]:
+        if self._rows is not None:
+            rows = list(itertools.islice(self._rows, self._fetch_size))
+        elif self._can_fetch_many:
+            rows = self._cursor.fetchmany(self._fetch_size)
+        else:
+            rows = list(itertools.islice(self._cursor, self._fetch_size))
+
+        # Size the fetches after the first one from the width of the first rows
+        if self._is_fetch_size_adaptive and rows:
+            self._is_fetch_size_adaptive = False
+            self._fetch_size = get_fetch_size(rows, self.TARGET_FETCH_BYTES, self.MIN_FETCH_SIZE, self.MAX_FETCH_SIZE, self.FIXED_VALUE_SIZE)
+
+            # Named cursors fetch this many rows from the server per round trip when they are iterated over
+            if hasattr(type(self._cursor), 'itersize') and getattr(self._cursor, 'name', None) is not None:
+                self._cursor.itersize = self._fetch_size
+
+        return rows
+
+    def _read_columns_info(self) -> None:
+        if self._current_row is None or len(self._columns_info) == 0:
+            self._columns_info = get_columns_info(self._cursor.description, self._cursor.connection)
+
+
+def get_fetch_size(rows: List[tuple], target_bytes: int, min_size: int, max_size: int, fixed_value_size: int = 8) -> int:
+    '''
+    Gets the number of rows to fetch at once so that each fetch holds roughly the target number of bytes
+    :param rows: Sample of the rows, whose strings and bytes are measured
+    :param target_bytes: Bytes of row data each fetch should hold
+    :param min_size: Fewest rows to fetch at once
+    :param max_size: Most rows to fetch at once
+    :param fixed_value_size: Size to assume for values that aren't strings or bytes
+    '''
+    sample = rows[:min_size]
+    sample_bytes = sum(
+        len(value) if isinstance(value, (str, bytes, bytearray, memoryview)) else fixed_value_size
+        for row in sample for value in row
+    )
+    row_bytes = max(sample_bytes // len(sample), 1)
+    return max(min_size, min(max_size, target_bytes // row_bytes))
@@ -3,11 +3,18 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import itertools
+import threading
+import time
 from typing import List
 
 from snowflaketoolsservice.query.result_set import ResultSet, ResultSetEvents
-from snowflaketoolsservice.query.data_storage import service_buffer_file_stream as file_stream, FileStreamFactory, StorageDataReader
+from snowflaketoolsservice.query.data_storage import (
+    service_buffer_file_stream as file_stream, DEFAULT_DOWNLOAD_PARALLELISM, download_result_batches, FileStreamFactory,
+    get_result_batches, ServiceBufferBlockIndex, ServiceBufferRowIndex, StorageDataReader
+)
 from snowflaketoolsservice.query.contracts import DbColumn, DbCellValue, ResultSetSubset, SaveResultsRequestParams  # noqa
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 import snowflaketoolsservice.utils as utils
 
 
@@ -17,16 +24,28 @@ class FileStorageResultSet(ResultSet):
     RESULT_SET_START_OUT_OF_RANGE_ERROR = 'Result set start row out of range'
     RESULT_SET_ROW_COUNT_OF_RANGE_ERROR = 'Result set row count out of range'
 
-    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None) -> None:
+    # Seconds between publishing the rows spilled so far while a result set is read
+    PARTIAL_LOAD_INTERVAL = 1
+
+    def __init__(self, result_set_id: int, batch_id: int, events: ResultSetEvents = None, download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM) -> None:
         ResultSet.__init__(self, result_set_id, batch_id, events)
 
+        # Number of result batches to download at once when the cursor splits its results into batches
+        self.download_parallelism = download_parallelism
+
         self._total_bytes_written = 0
         self._output_file_name = file_stream.create_file()
-        self._file_offsets: List[int] = []
+        # Rows are written to the file in blocks, which are located through a sparse index of the blocks
+        self._block_index = ServiceBufferBlockIndex()
+        # Position in the file of each row of the result set, which differs from the row's index once rows are edited
+        self._row_positions = ServiceBufferRowIndex()
+        # Reader of the file that stays open for the lifetime of the result set, opened when rows are first read
+        self._reader = None
+        self._reader_lock = threading.Lock()
 
     @property
     def row_count(self) -> int:
-        return len(self._file_offsets)
+        return len(self._row_positions)
 
     def get_subset(self, start_index: int, end_index: int):
         if not self._has_been_read:
@@ -38,11 +57,9 @@ class FileStorageResultSet(ResultSet):
         if end_index < 0:
             raise KeyError(FileStorageResultSet.RESULT_SET_ROW_COUNT_OF_RANGE_ERROR)
 
-        rows = []
-
-        with file_stream.get_reader(self._output_file_name) as reader:
-            rows_offsets = [self._file_offsets[index] for index in range(start_index, end_index)]
-            rows = [reader.read_row(offset, index, self.columns_info) for index, offset in enumerate(rows_offsets)]
+        reader = self._get_reader()
+        rows_positions = [self._row_positions[index] for index in range(start_index, end_index)]
+        rows = [self._read_row(reader, position, index) for index, position in enumerate(rows_positions)]
 
         subset = ResultSetSubset()
 
@@ -52,18 +69,18 @@ class FileStorageResultSet(ResultSet):
         return subset
 
     def add_row(self, cursor):
-        new_offset = self._append_row_to_buffer(cursor)
-        self._file_offsets.append(new_offset)
+        new_position = self._append_row_to_buffer(cursor)
+        self._row_positions.append(new_position)
 
     def remove_row(self, row_id: int):
         if not self._has_been_read:
             raise ValueError(FileStorageResultSet.RESULT_SET_NOT_READ_ERROR)
 
-        del self._file_offsets[row_id]
+        del self._row_positions[row_id]
 
     def update_row(self, row_id: int, cursor):
-        new_offset = self._append_row_to_buffer(cursor)
-        self._file_offsets[row_id] = new_offset
+        new_position = self._append_row_to_buffer(cursor)
+        self._row_positions[row_id] = new_position
 
     def get_row(self, row_id: int) -> List[DbCellValue]:
 
@@ -73,29 +90,72 @@ class FileStorageResultSet(ResultSet):
         if row_id >= self.row_count:
             raise KeyError(FileStorageResultSet.RESULT_SET_START_OUT_OF_RANGE_ERROR)
 
-        with file_stream.get_reader(self._output_file_name) as reader:
-            return reader.read_row(self._file_offsets[row_id], row_id, self.columns_info)
+        return self._read_row(self._get_reader(), self._row_positions[row_id], row_id)
 
     def read_result_to_end(self, cursor):
         utils.validate.is_not_none('cursor', cursor)
 
         self._has_been_read = True
-        storage_data_reader = StorageDataReader(cursor)
-
-        with file_stream.get_writer(self._output_file_name) as writer:
-
-            while storage_data_reader.read_row():
-                self._file_offsets.append(self._total_bytes_written)
-                self._total_bytes_written += writer.write_row(storage_data_reader)
-
-            self.columns_info = storage_data_reader.columns_info
-
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+        self._is_reading = True
+
+        # Results that are split into batches, like Snowflake results, are downloaded concurrently and written in order
+        downloaded_rows = None
+        result_batches = get_result_batches(cursor)
+        if result_batches is not None:
+            downloaded_rows = itertools.chain.from_iterable(download_result_batches(result_batches, self.download_parallelism))
+        storage_data_reader = StorageDataReader(cursor, downloaded_rows)
+
+        # Rows are published in groups, once they have been flushed to the file, so that subsets of the rows
+        # read so far can be served while the rest are fetched
+        first_pending_position = self._block_index.row_count
+        next_publish_time = None
+        try:
+            with file_stream.get_writer(self._output_file_name) as writer:
+
+                # Rows are fetched and written a block at a time rather than one at a time
+                rows = storage_data_reader.read_rows()
+                while rows:
+                    self._block_index.add_block(self._total_bytes_written, len(rows))
+                    self._total_bytes_written += writer.write_block(rows, storage_data_reader.columns_info)
+
+                    if next_publish_time is None or time.monotonic() >= next_publish_time:
+                        is_first_publish = next_publish_time is None
+                        self.columns_info = storage_data_reader.columns_info
+                        first_pending_position = self._publish_rows(writer, first_pending_position)
+                        next_publish_time = time.monotonic() + self.PARTIAL_LOAD_INTERVAL
+                        self._fire_partial_load_event(is_first_publish)
+
+                    rows = storage_data_reader.read_rows()
+
+                self.columns_info = storage_data_reader.columns_info
+                self._publish_rows(writer, first_pending_position)
+        finally:
+            self._is_reading = False
+
+    def dispose(self) -> None:
+        with self._reader_lock:
+            reader = self._reader
+            self._reader = None
+        if reader is not None:
+            reader.close()
+
+    def do_save_as(
+            self,
+            file_path: str,
+            row_start_index: int,
+            row_end_index: int,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ) -> None:
 
         with file_factory.get_writer(file_path) as writer:
             with file_factory.get_reader(self._output_file_name) as reader:
                 for row_index in range(row_start_index, row_end_index):
-                    row = reader.read_row(self._file_offsets[row_index], row_index, self.columns_info)
+                    if cancellation_token is not None:
+                        cancellation_token.raise_if_canceled()
+                    row = self._read_row(reader, self._row_positions[row_index], row_index)
                     writer.write_row(row, self.columns_info)
 
                 writer.complete_write()
@@ -111,9 +171,36 @@ class FileStorageResultSet(ResultSet):
             raise ValueError(FileStorageResultSet.RESULT_SET_NOT_READ_ERROR)
 
         storage_data_reader = StorageDataReader(cursor)
-
-        with file_stream.get_writer(self._output_file_name) as writer:
-            current_file_offset = self._total_bytes_written
-            writer.seek(current_file_offset)
-            self._total_bytes_written += writer.write_row(storage_data_reader)
-            return current_file_offset
+        storage_data_reader.read_row()
+
+        # The row is appended to the file as a block of its own
+        with file_stream.get_writer(self._output_file_name, append=True) as writer:
+            block_offset = self._total_bytes_written
+            self._total_bytes_written += writer.write_block([storage_data_reader.get_values()], self.columns_info)
+            return self._block_index.add_block(block_offset, 1)
+
+    def _get_reader(self):
+        reader = self._reader
+        if reader is None:
+            with self._reader_lock:
+                if self._reader is None:
+                    self._reader = file_stream.get_memory_mapped_reader(self._output_file_name)
+                reader = self._reader
+        return reader
+
+    def _read_row(self, reader, row_position: int, row_id: int) -> List[DbCellValue]:
+        block_offset, row_index = self._block_index.locate(row_position)
+        return reader.read_block_row(block_offset, row_index, row_id, self.columns_info)
+
+    def _publish_rows(self, writer, first_pending_position: int) -> int:
+        writer.flush()
+        # The rows written since the last publish are the rows of the file after the rows published so far
+        self._row_positions.extend_range(first_pending_position, self._block_index.row_count - first_pending_position)
+        return self._block_index.row_count
+
+    def _fire_partial_load_event(self, is_first_publish: bool) -> None:
+        if self.events is None:
+            return
+        event = self.events._on_result_set_available if is_first_publish else self.events._on_result_set_partially_loaded
+        if event is not None:
+            event(self)
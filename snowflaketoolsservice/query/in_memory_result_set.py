@@ -9,6 +9,7 @@ from snowflaketoolsservice.query.result_set import ResultSet, ResultSetEvents
 from snowflaketoolsservice.query.contracts import DbColumn, DbCellValue, ResultSetSubset, SaveResultsRequestParams  # noqa
 from snowflaketoolsservice.query.column_info import get_columns_info
 from snowflaketoolsservice.query.data_storage import FileStreamFactory
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 
 
 class InMemoryResultSet(ResultSet):
@@ -45,10 +46,21 @@ class InMemoryResultSet(ResultSet):
 
         self._has_been_read = True
 
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def do_save_as(
+            self,
+            file_path: str,
+            row_start_index: int,
+            row_end_index: int,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ) -> None:
 
         with file_factory.get_writer(file_path) as writer:
             for index in range(row_start_index, row_end_index):
+                if cancellation_token is not None:
+                    cancellation_token.raise_if_canceled()
                 row = self.get_row(index)
                 writer.write_row(row, self.columns_info)
 
@@ -9,8 +9,10 @@ from typing import Callable, Dict, List, Optional  # noqa
 import sqlparse
 
 from snowflaketoolsservice.query import Batch, BatchEvents, create_batch, ResultSetStorageType
+from snowflaketoolsservice.query.async_execution import QueryStatusPoller
 from snowflaketoolsservice.query.contracts import SaveResultsRequestParams, SelectionData
-from snowflaketoolsservice.query.data_storage import FileStreamFactory
+from snowflaketoolsservice.query.data_storage import DEFAULT_DOWNLOAD_PARALLELISM, FileStreamFactory
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 
 
 class QueryEvents:
@@ -30,11 +32,13 @@ class QueryExecutionSettings:
 
     def __init__(
             self, execution_plan_options,
-            result_set_storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE
+            result_set_storage_type: ResultSetStorageType = ResultSetStorageType.FILE_STORAGE,
+            result_download_parallelism: int = DEFAULT_DOWNLOAD_PARALLELISM
     ) -> None:
 
         self._execution_plan_options = execution_plan_options
         self._result_set_storage_type = result_set_storage_type
+        self._result_download_parallelism = result_download_parallelism
 
     @property
     def execution_plan_options(self):
@@ -44,6 +48,10 @@ class QueryExecutionSettings:
     def result_set_storage_type(self):
         return self._result_set_storage_type
 
+    @property
+    def result_download_parallelism(self) -> int:
+        return self._result_download_parallelism
+
 
 class Query:
     """Object representing a single query, consisting of one or more batches"""
@@ -84,7 +92,8 @@ class Query:
                 len(self.batches),
                 selection_data[index],
                 query_events.batch_events,
-                query_execution_settings.result_set_storage_type)
+                query_execution_settings.result_set_storage_type,
+                query_execution_settings.result_download_parallelism)
 
             self._batches.append(batch)
 
@@ -141,17 +150,89 @@ class Query:
             connection.autocommit = current_auto_commit_status
             self._execution_state = ExecutionState.EXECUTED
 
+    def execute_async(self, connection, poller: QueryStatusPoller, on_complete: Callable[[Optional[Exception]], None]) -> None:
+        """
+        Execute the query on a connection that supports asynchronous execution, submitting each batch
+        once the previous one has completed. No thread waits on the batches while they run
+
+        :param connection: The connection to use when executing the query, such as a Snowflake connection
+        :param poller: Poller that tracks each batch's statement until it finishes
+        :param on_complete: Called once the query has executed, with None or the error that stopped it
+        :raises RuntimeError: If the query was already executed
+        """
+        if self._execution_state is ExecutionState.EXECUTED:
+            raise RuntimeError('Cannot execute a query multiple times')
+
+        # When Analyze Explain is used we have to disable auto commit until the query completes, as execute does
+        if self._disable_auto_commit:
+            connection.autocommit(False)
+
+        self._execution_state = ExecutionState.EXECUTING
+        self._execute_batch_async(connection, poller, on_complete, 0, None)
+
+    def cancel_async(self, poller: QueryStatusPoller) -> bool:
+        """
+        Cancels a query that is running asynchronously. No further batches are submitted once the query
+        is canceled, and the batch whose statement is running is canceled by its query ID
+        :return: False if no batch's statement was being tracked by the poller, such as between batches
+        """
+        self.is_canceled = True
+        query_id = self._batches[self._current_batch_index].query_id if self._batches else None
+        return query_id is not None and poller.cancel(query_id)
+
+    def dispose(self) -> None:
+        """Releases the result sets of the query's batches"""
+        for batch in self._batches:
+            batch.dispose()
+
     def get_subset(self, batch_index: int, start_index: int, end_index: int):
         if batch_index < 0 or batch_index >= len(self._batches):
             raise IndexError('Batch index cannot be less than 0 or greater than the number of batches')
 
         return self._batches[batch_index].get_subset(start_index, end_index)
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure):
+    def save_as(
+            self,
+            params: SaveResultsRequestParams,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ):
         if params.batch_index < 0 or params.batch_index >= len(self.batches):
             raise IndexError('Batch index cannot be less than 0 or greater than the number of batches')
 
-        self.batches[params.batch_index].save_as(params, file_factory, on_success, on_failure)
+        self.batches[params.batch_index].save_as(params, file_factory, on_success, on_failure, cancellation_token)
+
+    def _execute_batch_async(self, connection, poller: QueryStatusPoller, on_complete, batch_index: int, error: Optional[Exception]) -> None:
+        # Like the blocking path, an error in one batch stops the rest of the batches from running
+        if error is not None or self.is_canceled or batch_index >= len(self._batches):
+            self._complete_async(connection, on_complete, error)
+            return
+
+        self._current_batch_index = batch_index
+        try:
+            self._batches[batch_index].execute_async(
+                connection, poller, lambda batch_error: self._execute_batch_async(connection, poller, on_complete, batch_index + 1, batch_error)
+            )
+        except Exception as submit_error:
+            self._complete_async(connection, on_complete, submit_error)
+            return
+
+        # A cancel that came in while the batch was being submitted didn't see its query ID, so cancel it now
+        if self.is_canceled:
+            poller.cancel(self._batches[batch_index].query_id)
+
+    def _complete_async(self, connection, on_complete, error: Optional[Exception]) -> None:
+        try:
+            # Connections are kept in autocommit mode, so it is turned back on if it was disabled for the query
+            if self._disable_auto_commit:
+                connection.autocommit(True)
+        except Exception as autocommit_error:
+            error = error or autocommit_error
+        finally:
+            self._execution_state = ExecutionState.EXECUTED
+        on_complete(error)
 
 
 def compute_selection_data_for_batches(batches: List[str], full_text: str) -> List[SelectionData]:
@@ -9,13 +9,15 @@ import threading
 
 from snowflaketoolsservice.query.contracts import DbColumn, DbCellValue, ResultSetSummary, SaveResultsRequestParams  # noqa
 from snowflaketoolsservice.query.data_storage import FileStreamFactory
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
 
 
 class ResultSetEvents:
 
-    def __init__(self, on_result_set_completed=None, on_result_set_partially_loaded=None) -> None:
+    def __init__(self, on_result_set_completed=None, on_result_set_partially_loaded=None, on_result_set_available=None) -> None:
         self._on_result_set_completed = on_result_set_completed
         self._on_result_set_partially_loaded = on_result_set_partially_loaded
+        self._on_result_set_available = on_result_set_available
 
 
 class ResultSet(metaclass=ABCMeta):
@@ -26,6 +28,8 @@ class ResultSet(metaclass=ABCMeta):
         self.events = events
 
         self._has_been_read = False
+        # Whether rows are still being fetched into the result set, while the rows fetched so far can be read
+        self._is_reading = False
         self._columns_info: List[DbColumn] = []
         self._save_as_threads: Dict[str, threading.Thread] = {}
 
@@ -39,7 +43,7 @@ class ResultSet(metaclass=ABCMeta):
 
     @property
     def result_set_summary(self) -> ResultSetSummary:
-        return ResultSetSummary(self.id, self.batch_id, self.row_count, self._has_been_read, self.columns_info)
+        return ResultSetSummary(self.id, self.batch_id, self.row_count, self._has_been_read and not self._is_reading, self.columns_info)
 
     @abstractproperty
     def row_count(self) -> int:
@@ -72,12 +76,32 @@ class ResultSet(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def do_save_as(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def do_save_as(
+            self,
+            file_path: str,
+            row_start_index: int,
+            row_end_index: int,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ) -> None:
         pass
 
-    def save_as(self, params: SaveResultsRequestParams, file_factory: FileStreamFactory, on_success, on_failure) -> None:
+    def dispose(self) -> None:
+        ''' Release what the result set holds open, such as a reader of the file its rows are stored in '''
+        pass
+
+    def save_as(
+            self,
+            params: SaveResultsRequestParams,
+            file_factory: FileStreamFactory,
+            on_success,
+            on_failure,
+            cancellation_token: CancellationToken = None
+    ) -> None:
 
-        if self._has_been_read is False:
+        if self._has_been_read is False or self._is_reading:
             raise RuntimeError('Result cannot be saved until query execution has completed')
 
         save_as_thread = self._save_as_threads.get(params.file_path)
@@ -96,8 +120,16 @@ class ResultSet(metaclass=ABCMeta):
             row_start_index = params.row_start_index
 
         new_save_as_thread = threading.Thread(
-            target=self.do_save_as,
-            args=(params.file_path, row_start_index, row_end_index, file_factory, on_success, on_failure),
+            target=self._save_as_worker,
+            args=(params.file_path, row_start_index, row_end_index, file_factory, on_success, on_failure, cancellation_token),
             daemon=True)
         self._save_as_threads[params.file_path] = new_save_as_thread
         new_save_as_thread.start()
+
+    def _save_as_worker(self, file_path: str, row_start_index: int, row_end_index: int, file_factory: FileStreamFactory, on_success, on_failure,
+                        cancellation_token: CancellationToken) -> None:
+        try:
+            self.do_save_as(file_path, row_start_index, row_end_index, file_factory, on_success, on_failure, cancellation_token)
+        except OperationCanceledError:
+            if on_failure is not None:
+                on_failure('Save request was canceled')  # TODO: Localize
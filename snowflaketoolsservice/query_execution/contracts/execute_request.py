@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.query.contracts import SelectionData
 from snowflaketoolsservice.serialization import Serializable
 
@@ -33,7 +33,8 @@ class ExecuteStringParams(ExecuteRequestParamsBase):
 
 EXECUTE_STRING_REQUEST = IncomingMessageConfiguration(
     'query/executeString',
-    ExecuteStringParams
+    ExecuteStringParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 
@@ -49,7 +50,8 @@ class ExecuteDocumentSelectionParams(ExecuteRequestParamsBase):
 
 EXECUTE_DOCUMENT_SELECTION_REQUEST = IncomingMessageConfiguration(
     'query/executeDocumentSelection',
-    ExecuteDocumentSelectionParams
+    ExecuteDocumentSelectionParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 
@@ -62,7 +64,8 @@ class ExecuteDocumentStatementParams(ExecuteRequestParamsBase):
 
 EXECUTE_DOCUMENT_STATEMENT_REQUEST = IncomingMessageConfiguration(
     'query/executedocumentstatement',
-    ExecuteDocumentStatementParams
+    ExecuteDocumentStatementParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 
@@ -1,5 +1,5 @@
 from snowflaketoolsservice.serialization import Serializable
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 
 
 class QueryExecutionPlanRequest(Serializable):
@@ -16,4 +16,4 @@ class QueryExecutionResponse:
         self.execution_plan = None
 
 
-QUERY_EXECUTION_PLAN_REQUEST = IncomingMessageConfiguration('query/executionPlan', QueryExecutionPlanRequest)
+QUERY_EXECUTION_PLAN_REQUEST = IncomingMessageConfiguration('query/executionPlan', QueryExecutionPlanRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
 
 
@@ -18,7 +18,7 @@ class SubsetParams(Serializable):
         self.rows_count: int = None
 
 
-SUBSET_REQUEST = IncomingMessageConfiguration('query/subset', SubsetParams)
+SUBSET_REQUEST = IncomingMessageConfiguration('query/subset', SubsetParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 
 class QueryCancelParams(Serializable):
@@ -27,7 +27,7 @@ class QueryCancelParams(Serializable):
         self.owner_uri = None
 
 
-CANCEL_REQUEST = IncomingMessageConfiguration('query/cancel', QueryCancelParams)
+CANCEL_REQUEST = IncomingMessageConfiguration('query/cancel', QueryCancelParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 
 class QueryDisposeParams(Serializable):
@@ -36,7 +36,7 @@ class QueryDisposeParams(Serializable):
         self.owner_uri = None
 
 
-DISPOSE_REQUEST = IncomingMessageConfiguration('query/dispose', QueryDisposeParams)
+DISPOSE_REQUEST = IncomingMessageConfiguration('query/dispose', QueryDisposeParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
 
 class QueryCancelResult:
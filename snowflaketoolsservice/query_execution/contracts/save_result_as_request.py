@@ -4,7 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from snowflaketoolsservice.query.contracts import SaveResultsRequestParams
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.capabilities.contracts import FeatureMetadataProvider
 
 
@@ -36,17 +36,20 @@ class SaveResultsAsExcelRequestParams(SaveResultsRequestParams):
 
 SAVE_AS_CSV_REQUEST = IncomingMessageConfiguration(
     'query/saveCsv',
-    SaveResultsAsCsvRequestParams
+    SaveResultsAsCsvRequestParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 SAVE_AS_JSON_REQUEST = IncomingMessageConfiguration(
     'query/saveJson',
-    SaveResultsAsJsonRequestParams
+    SaveResultsAsJsonRequestParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 SAVE_AS_EXCEL_REQUEST = IncomingMessageConfiguration(
     'query/saveExcel',
-    SaveResultsAsExcelRequestParams
+    SaveResultsAsExcelRequestParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
 
 SERIALIZATION_OPTIONS = FeatureMetadataProvider(
@@ -5,7 +5,7 @@
 
 from typing import List
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.query.contracts import DbColumn, DbCellValue
 from snowflaketoolsservice.serialization import Serializable
 
@@ -25,4 +25,4 @@ class SimpleExecuteResponse:
         self.column_info = column_info
 
 
-SIMPLE_EXECUTE_REQUEST = IncomingMessageConfiguration('query/simpleexecute', SimpleExecuteRequest)
+SIMPLE_EXECUTE_REQUEST = IncomingMessageConfiguration('query/simpleexecute', SimpleExecuteRequest, DispatchConcurrency.SERIAL_PER_OWNER_URI)
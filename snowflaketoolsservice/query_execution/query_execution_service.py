@@ -4,7 +4,6 @@
 # --------------------------------------------------------------------------------------------
 
 from datetime import datetime
-import threading
 import uuid
 from typing import Callable, Dict, List, Optional  # noqa
 import sqlparse
@@ -15,16 +14,18 @@ import psycopg2.errorcodes
 
 from snowflaketoolsservice.hosting import RequestContext, ServiceProvider
 from snowflaketoolsservice.query import (
-    Batch, BatchEvents, ExecutionState, QueryExecutionSettings, Query, QueryEvents,
+    Batch, BatchEvents, ExecutionState, QueryExecutionSettings, Query, QueryEvents, ResultSet,
     compute_selection_data_for_batches as compute_batches
 )
 from snowflaketoolsservice.query.contracts import BatchSummary, ResultSetSubset, SelectionData, SaveResultsRequestParams, SubsetResult  # noqa
 from snowflaketoolsservice.query import ResultSetStorageType
+from snowflaketoolsservice.query.async_execution import QueryStatusPoller, supports_async_execution
 from snowflaketoolsservice.query_execution.contracts import (
     EXECUTE_STRING_REQUEST, EXECUTE_DOCUMENT_SELECTION_REQUEST, ExecuteRequestParamsBase,
     BATCH_START_NOTIFICATION, BATCH_COMPLETE_NOTIFICATION, EXECUTE_DOCUMENT_STATEMENT_REQUEST,
     ExecuteDocumentStatementParams, ExecutionPlanOptions, ResultSetNotificationParams,
-    MESSAGE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION, MessageNotificationParams,
+    MESSAGE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION,
+    MessageNotificationParams,
     QUERY_COMPLETE_NOTIFICATION, QUERY_EXECUTION_PLAN_REQUEST, QueryCancelResult, QueryExecutionPlanRequest,
     SUBSET_REQUEST, ExecuteDocumentSelectionParams, CANCEL_REQUEST, QueryCancelParams, ResultMessage, SubsetParams,
     BatchNotificationParams, QueryCompleteNotificationParams, QueryDisposeParams,
@@ -35,6 +36,7 @@ from snowflaketoolsservice.query_execution.contracts import (
 )
 from snowflaketoolsservice.connection.contracts import ConnectRequestParams
 from snowflaketoolsservice.connection.contracts import ConnectionType
+from snowflaketoolsservice.workspace.contracts import QueryConfiguration
 import snowflaketoolsservice.utils as utils
 from snowflaketoolsservice.query.data_storage import (
     FileStreamFactory, SaveAsCsvFileStreamFactory, SaveAsJsonFileStreamFactory, SaveAsExcelFileStreamFactory
@@ -49,7 +51,8 @@ class ExecuteRequestWorkerArgs():
 
     def __init__(self, owner_uri: str, connection: 'psycopg2.extensions.connection', request_context: RequestContext, result_set_storage_type,
                  before_query_initialize: Callable = None, on_batch_start: Callable = None, on_message_notification: Callable = None,
-                 on_resultset_complete: Callable = None, on_batch_complete: Callable = None, on_query_complete: Callable = None):
+                 on_resultset_complete: Callable = None, on_batch_complete: Callable = None, on_query_complete: Callable = None,
+                 on_resultset_available: Callable = None, on_resultset_updated: Callable = None):
 
         self.owner_uri = owner_uri
         self.connection = connection
@@ -61,6 +64,8 @@ class ExecuteRequestWorkerArgs():
         self.on_resultset_complete = on_resultset_complete
         self.on_batch_complete = on_batch_complete
         self.on_query_complete = on_query_complete
+        self.on_resultset_available = on_resultset_available
+        self.on_resultset_updated = on_resultset_updated
 
 
 class QueryExecutionService(object):
@@ -71,6 +76,7 @@ class QueryExecutionService(object):
         # Dictionary mapping uri to a list of batches
         self.query_results: Dict[str, Query] = {}
         self.owner_to_thread_map: dict = {}  # Only used for testing
+        self._query_status_poller: QueryStatusPoller = QueryStatusPoller()
 
         self._service_action_mapping: dict = {
             EXECUTE_STRING_REQUEST: self._handle_execute_query_request,
@@ -88,11 +94,16 @@ class QueryExecutionService(object):
 
     def register(self, service_provider: ServiceProvider):
         self._service_provider = service_provider
+        self._query_status_poller.logger = service_provider.logger
+        self._service_provider.server.add_shutdown_handler(self._query_status_poller.stop)
         # Register the request handlers with the server
 
         for action in self._service_action_mapping:
             self._service_provider.server.set_request_handler(action, self._service_action_mapping[action])
 
+        # Merge query messages that pile up behind a busy output stream
+        self._service_provider.server.set_coalescing_policy(MESSAGE_NOTIFICATION, _coalesce_message_notifications)
+
         if self._service_provider.logger is not None:
             self._service_provider.logger.info('Query execution service successfully initialized')
 
@@ -127,20 +138,27 @@ class QueryExecutionService(object):
         execute_params.owner_uri = new_owner_uri
 
         def on_query_complete(query_complete_params):
-            subset_params = SubsetParams()
-            subset_params.owner_uri = new_owner_uri
-            subset_params.batch_index = 0
-            subset_params.result_set_index = 0
-            subset_params.rows_start_index = 0
+            try:
+                subset_params = SubsetParams()
+                subset_params.owner_uri = new_owner_uri
+                subset_params.batch_index = 0
+                subset_params.result_set_index = 0
+                subset_params.rows_start_index = 0
 
-            resultset_summary = query_complete_params.batch_summaries[0].result_set_summaries[0]
+                resultset_summary = query_complete_params.batch_summaries[0].result_set_summaries[0]
 
-            subset_params.rows_count = resultset_summary.row_count
+                subset_params.rows_count = resultset_summary.row_count
 
-            subset = self._get_result_subset(request_context, subset_params)
+                subset = self._get_result_subset(request_context, subset_params)
 
-            simple_execute_response = SimpleExecuteResponse(subset.result_subset.rows, subset.result_subset.row_count, resultset_summary.column_info)
-            request_context.send_response(simple_execute_response)
+                simple_execute_response = SimpleExecuteResponse(subset.result_subset.rows, subset.result_subset.row_count, resultset_summary.column_info)
+                request_context.send_response(simple_execute_response)
+            finally:
+                # The owner URI only exists for this request, so release its results and return its connection to the pool
+                self._dispose_query(new_owner_uri)
+                self.owner_to_thread_map.pop(new_owner_uri, None)
+                connection_service.disconnect(new_owner_uri, None)
+                connection_service.owner_to_connection_map.pop(new_owner_uri, None)
 
         worker_args = ExecuteRequestWorkerArgs(new_owner_uri, new_connection, request_context, ResultSetStorageType.FILE_STORAGE,
                                                on_query_complete=on_query_complete)
@@ -162,8 +180,13 @@ class QueryExecutionService(object):
         def on_message_notification(notice_message_params):
             request_context.send_notification(MESSAGE_NOTIFICATION, notice_message_params)
 
-        def on_resultset_complete(result_set_params):
+        def on_resultset_available(result_set_params):
             request_context.send_notification(RESULT_SET_AVAILABLE_NOTIFICATION, result_set_params)
+
+        def on_resultset_updated(result_set_params):
+            request_context.send_notification(RESULT_SET_UPDATED_NOTIFICATION, result_set_params)
+
+        def on_resultset_complete(result_set_params):
             request_context.send_notification(RESULT_SET_COMPLETE_NOTIFICATION, result_set_params)
 
         def on_batch_complete(batch_event_params):
@@ -184,11 +207,13 @@ class QueryExecutionService(object):
 
         worker_args = ExecuteRequestWorkerArgs(params.owner_uri, conn, request_context, ResultSetStorageType.FILE_STORAGE, before_query_initialize,
                                                on_batch_start, on_message_notification, on_resultset_complete,
-                                               on_batch_complete, on_query_complete)
+                                               on_batch_complete, on_query_complete, on_resultset_available, on_resultset_updated)
 
         self._start_query_execution_thread(request_context, params, worker_args)
 
     def _start_query_execution_thread(self, request_context: RequestContext, params: ExecuteRequestParamsBase, worker_args: ExecuteRequestWorkerArgs = None):
+        # IDs of the batches whose result sets were announced as available while they were being read
+        available_batch_ids = set()
 
         # Set up batch execution callback methods for sending notifications
         def _batch_execution_started_callback(batch: Batch) -> None:
@@ -204,8 +229,10 @@ class QueryExecutionService(object):
 
             batch_summary = batch.batch_summary
 
-            # send query/resultSetComplete response
+            # send query/resultSetAvailable, unless the result set was announced while it was read, and query/resultSetComplete
             result_set_params = self.build_result_set_complete_params(batch_summary, worker_args.owner_uri)
+            if batch.id not in available_batch_ids:
+                _check_and_fire(worker_args.on_resultset_available, result_set_params)
             _check_and_fire(worker_args.on_resultset_complete, result_set_params)
 
             # If the batch was successful, send a message to the client
@@ -218,24 +245,37 @@ class QueryExecutionService(object):
             batch_event_params = BatchNotificationParams(batch_summary, worker_args.owner_uri)
             _check_and_fire(worker_args.on_batch_complete, batch_event_params)
 
+        # Set up result set callbacks for sending notifications while rows are still being read
+        def _result_set_available_callback(result_set: ResultSet) -> None:
+            available_batch_ids.add(result_set.batch_id)
+            result_set_params = ResultSetNotificationParams(worker_args.owner_uri, result_set.result_set_summary)
+            _check_and_fire(worker_args.on_resultset_available, result_set_params)
+
+        def _result_set_updated_callback(result_set: ResultSet) -> None:
+            result_set_params = ResultSetNotificationParams(worker_args.owner_uri, result_set.result_set_summary)
+            _check_and_fire(worker_args.on_resultset_updated, result_set_params)
+
         # Create a new query if one does not already exist or we already executed the previous one
         if params.owner_uri not in self.query_results or self.query_results[params.owner_uri].execution_state is ExecutionState.EXECUTED:
             query_text = self._get_query_text_from_execute_params(params)
 
-            execution_settings = QueryExecutionSettings(params.execution_plan_options, worker_args.result_set_storage_type)
-            query_events = QueryEvents(None, None, BatchEvents(_batch_execution_started_callback, _batch_execution_finished_callback))
+            execution_settings = QueryExecutionSettings(
+                params.execution_plan_options, worker_args.result_set_storage_type, self._get_query_configuration().result_download_parallelism
+            )
+            query_events = QueryEvents(None, None, BatchEvents(
+                _batch_execution_started_callback,
+                _batch_execution_finished_callback,
+                on_result_set_available=_result_set_available_callback,
+                on_result_set_updated=_result_set_updated_callback
+            ))
+            self._dispose_query(params.owner_uri)
             self.query_results[params.owner_uri] = Query(params.owner_uri, query_text, execution_settings, query_events)
         elif self.query_results[params.owner_uri].execution_state is ExecutionState.EXECUTING:
             request_context.send_error('Another query is currently executing.')  # TODO: Localize
             return
 
-        thread = threading.Thread(
-            target=self._execute_query_request_worker,
-            args=(worker_args,)
-        )
-        self.owner_to_thread_map[params.owner_uri] = thread
-        thread.daemon = True
-        thread.start()
+        # Queries can run for minutes, so they get a thread of their own rather than a background worker
+        self.owner_to_thread_map[params.owner_uri] = utils.thread.run_in_daemon_thread(self._execute_query_request_worker, worker_args)
 
     def _handle_subset_request(self, request_context: RequestContext, params: SubsetParams):
         """Sends a response back to the query/subset request"""
@@ -288,17 +328,29 @@ class QueryExecutionService(object):
             # that we stop it
             if self.query_results[params.owner_uri].execution_state is not ExecutionState.EXECUTED:
                 self.cancel_query(params.owner_uri)
-            del self.query_results[params.owner_uri]
+            self._dispose_query(params.owner_uri)
             request_context.send_response({})
         except Exception as e:
             request_context.send_unhandled_error_response(e)
 
     def cancel_query(self, owner_uri: str):
         conn = self._get_connection(owner_uri, ConnectionType.QUERY)
+
+        # Queries on connections that submit statements asynchronously are canceled by their query ID instead of their
+        # backend. Once they're marked canceled no further batches are submitted, even if the query hasn't started
+        # yet or no statement is running to cancel right now
+        if conn is not None and supports_async_execution(conn):
+            query = self.query_results.get(owner_uri)
+            if query is not None:
+                query.cancel_async(self._query_status_poller)
+            return
+
         cancel_conn = self._get_connection(owner_uri, ConnectionType.QUERY_CANCEL)
         if conn is None or cancel_conn is None:
             raise LookupError('Could not find associated connection')  # TODO: Localize
         backend_pid = conn.get_backend_pid()
+        connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
+        connection_service.mark_in_use(cancel_conn)
         cur = cancel_conn.cursor()
         try:
             cur.execute(CANCELATION_QUERY, (backend_pid,))
@@ -306,6 +358,8 @@ class QueryExecutionService(object):
         # a query that's currently executing
         except BaseException:
             raise
+        finally:
+            connection_service.mark_idle(cancel_conn)
 
     def _execute_query_request_worker(self, worker_args: ExecuteRequestWorkerArgs):
         """Worker method for 'handle execute query request' thread"""
@@ -314,16 +368,35 @@ class QueryExecutionService(object):
 
         query: Query = self.query_results[worker_args.owner_uri]
 
+        # The connection is marked in use until the query completes, so that the connection service doesn't probe it meanwhile
+        self._service_provider[utils.constants.CONNECTION_SERVICE_NAME].mark_in_use(worker_args.connection)
+
+        # Connections that can submit statements asynchronously hand the query off to the poller, so this
+        # thread doesn't wait on it while it runs
+        if supports_async_execution(worker_args.connection):
+            query.execute_async(worker_args.connection, self._query_status_poller, lambda error: self._complete_query(worker_args, query, error))
+            return
+
         # Wrap execution in a try/except block so that we can send an error if it fails
+        error = None
         try:
             query.execute(worker_args.connection)
         except Exception as e:
-            self._resolve_query_exception(e, query, worker_args.request_context, worker_args.connection)
+            error = e
+        finally:
+            self._complete_query(worker_args, query, error)
+
+    def _complete_query(self, worker_args: ExecuteRequestWorkerArgs, query: Query, error: Optional[Exception]) -> None:
+        """Reports the error a query failed with, if any, and sends its query complete notification"""
+        try:
+            if error is not None:
+                self._resolve_query_exception(error, query, worker_args.request_context, worker_args.connection)
         finally:
             # Send a query complete notification
             batch_summaries = [batch.batch_summary for batch in query.batches]
 
             query_complete_params = QueryCompleteNotificationParams(worker_args.owner_uri, batch_summaries)
+            self._service_provider[utils.constants.CONNECTION_SERVICE_NAME].mark_idle(worker_args.connection)
             _check_and_fire(worker_args.on_query_complete, query_complete_params)
 
     def _get_connection(self, owner_uri: str, connection_type: ConnectionType) -> 'psycopg2.connection':
@@ -339,6 +412,19 @@ class QueryExecutionService(object):
         connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
         return connection_service.get_connection(owner_uri, connection_type)
 
+    def _dispose_query(self, owner_uri: str) -> None:
+        """Removes the query for the given owner URI, if there is one, and releases its result sets"""
+        query = self.query_results.pop(owner_uri, None)
+        if query is not None:
+            query.dispose()
+
+    def _get_query_configuration(self) -> QueryConfiguration:
+        """Gets the query settings of the workspace, or the default settings if there is no workspace service"""
+        try:
+            return self._service_provider[utils.constants.WORKSPACE_SERVICE_NAME].configuration.pgsql.query
+        except KeyError:
+            return QueryConfiguration()
+
     def build_result_set_complete_params(self, summary: BatchSummary, owner_uri: str) -> ResultSetNotificationParams:
         summaries = summary.result_set_summaries
         result_set_summary = None
@@ -394,8 +480,9 @@ class QueryExecutionService(object):
         request_context.send_notification(MESSAGE_NOTIFICATION, result_message_params)
 
         # If there was a failure in the middle of a transaction, roll it back.
-        # Note that conn.rollback() won't work since the connection is in autocommit mode
-        if not is_rollback_error and conn.get_transaction_status() is psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        # Note that conn.rollback() won't work since the connection is in autocommit mode.
+        # Connections that run statements asynchronously don't report a transaction status
+        if not is_rollback_error and not supports_async_execution(conn) and conn.get_transaction_status() is psycopg2.extensions.TRANSACTION_STATUS_INERROR:
             rollback_query = Query(query.owner_uri, 'ROLLBACK', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
             try:
                 rollback_query.execute(conn)
@@ -414,7 +501,7 @@ class QueryExecutionService(object):
             request_context.send_error(message)
 
         try:
-            query.save_as(params, file_factory, on_success, on_error)
+            query.save_as(params, file_factory, on_success, on_error, request_context.cancellation_token)
 
         except Exception as error:
             on_error(str(error))
@@ -430,6 +517,17 @@ def _create_rows_affected_message(batch: Batch) -> str:
         return 'Commands completed successfully'  # TODO: Localize
 
 
+def _coalesce_message_notifications(queued_params: MessageNotificationParams, params: MessageNotificationParams) -> Optional[MessageNotificationParams]:
+    # Messages are only merged within a batch, and errors are never merged with other messages so they keep their coloring
+    queued_message: ResultMessage = queued_params.message
+    message: ResultMessage = params.message
+    if queued_params.owner_uri != params.owner_uri or queued_message.batch_id != message.batch_id or queued_message.is_error != message.is_error:
+        return None
+
+    merged_message = ResultMessage(message.batch_id, message.is_error, queued_message.time, f'{queued_message.message}\n{message.message}')
+    return MessageNotificationParams(params.owner_uri, merged_message)
+
+
 def _check_and_fire(action, params=None):
     if action is not None:
         action(params)
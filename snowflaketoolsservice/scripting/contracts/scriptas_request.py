@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.metadata.contracts import ObjectMetadata
 import enum
 from snowflaketoolsservice.serialization import Serializable
@@ -41,4 +41,4 @@ class ScriptAsResponse(Serializable):
         self.script: str = script
 
 
-SCRIPTAS_REQUEST = IncomingMessageConfiguration('scripting/script', ScriptAsParameters)
+SCRIPTAS_REQUEST = IncomingMessageConfiguration('scripting/script', ScriptAsParameters, DispatchConcurrency.SERIAL_PER_OWNER_URI)
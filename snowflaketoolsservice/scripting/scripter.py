@@ -3,12 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from typing import Callable, Dict, Tuple, TypeVar
+from typing import Callable, Dict, Optional, Tuple, TypeVar
 
 from snow import NodeObject, ScriptableCreate, ScriptableDelete, ScriptableUpdate, ScriptableSelect, Server
+from snowflaketoolsservice.connection.connection_metadata import get_connection_metadata
 from snowflaketoolsservice.scripting.contracts import ScriptOperation
 from snowflaketoolsservice.metadata.contracts.object_metadata import ObjectMetadata
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 import snowflaketoolsservice.utils as utils
+import snowflaketoolsservice.utils.object_finder  # noqa
 
 
 class Scripter(object):
@@ -23,17 +26,22 @@ class Scripter(object):
 
     def __init__(self, conn):
         # get server from psycopg2 connection
-        self.server: Server = Server(conn)
+        self.server: Server = Server(conn, metadata=get_connection_metadata(conn))
 
     # SCRIPTING METHODS ############################
-    def script(self, operation: ScriptOperation, metadata: ObjectMetadata) -> str:
+    def script(self, operation: ScriptOperation, metadata: ObjectMetadata, cancellation_token: Optional[CancellationToken] = None) -> str:
         """
         Finds an object based on its URN (provided by metadata) and attempts the requested
         scripting operation on it.
         :param operation: Scripting operation to perform
         :param metadata: Metadata of the object to script, including a URN
+        :param cancellation_token: Optional token checked before each step that queries the server
+        :raises OperationCanceledError: The token was canceled before the script was generated
         :return: SQL for the requested scripting operation
         """
+        if cancellation_token is None:
+            cancellation_token = CancellationToken()
+
         # Make sure we have the handler
         handler: Tuple[type, self.SCRIPT_OPERATION] = self.SCRIPT_HANDLERS.get(operation)
         if handler is None:
@@ -42,6 +50,7 @@ class Scripter(object):
         utils.validate.is_not_none('metadata', metadata)
 
         # Get the object and make sure it supports the operation
+        cancellation_token.raise_if_canceled()
         if metadata.urn:
             obj: NodeObject = self.server.get_object_by_urn(metadata.urn)
         else:
@@ -50,4 +59,6 @@ class Scripter(object):
             # TODO: Localize
             raise TypeError(f'Object of type {obj.__class__.__name__} does not support script operation {operation}')
 
+        # Generating the script loads the properties of the object from the server
+        cancellation_token.raise_if_canceled()
         return handler[1](obj)
@@ -12,6 +12,7 @@ from snowflaketoolsservice.scripting.contracts import (
     ScriptAsParameters, ScriptAsResponse, SCRIPTAS_REQUEST
 )
 from snowflaketoolsservice.connection.contracts import ConnectionType
+from snowflaketoolsservice.utils.cancellation import OperationCanceledError
 import snowflaketoolsservice.utils as utils
 
 
@@ -46,12 +47,14 @@ class ScriptingService(object):
 
             scripting_operation = params.operation
             connection_service = self._service_provider[utils.constants.CONNECTION_SERVICE_NAME]
-            connection = connection_service.get_connection(params.owner_uri, ConnectionType.QUERY)
-            object_metadata = self.create_metadata(params)
-            scripter = Scripter(connection)
+            with connection_service.use_connection(params.owner_uri, ConnectionType.QUERY) as connection:
+                object_metadata = self.create_metadata(params)
+                scripter = Scripter(connection)
 
-            script = scripter.script(scripting_operation, object_metadata)
+                script = scripter.script(scripting_operation, object_metadata, request_context.cancellation_token)
             request_context.send_response(ScriptAsResponse(params.owner_uri, script))
+        except OperationCanceledError:
+            request_context.send_canceled_error()
         except Exception as e:
             if self._service_provider.logger is not None:
                 self._service_provider.logger.exception('Scripting operation failed')
@@ -1,4 +1,3 @@
-
 # --------------------------------------------------------------------------------------------
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
@@ -12,10 +11,7 @@ import enum
 class Serializable(metaclass=ABCMeta):
     @classmethod
     def from_dict(cls, dictionary: dict):
-        kwargs = cls.get_child_serializable_types()
-        ignore_extra_attributes = cls.ignore_extra_attributes()
-
-        return convert_from_dict(cls, dictionary, ignore_extra_attributes, **kwargs)
+        return get_deserializer(cls).deserialize(dictionary)
 
     @classmethod
     def get_child_serializable_types(cls):
@@ -26,6 +22,92 @@ class Serializable(metaclass=ABCMeta):
         return False
 
 
+def get_deserializer(class_) -> 'Deserializer':
+    """
+    Gets the deserializer for a Serializable class, building and caching it on first use
+    :param class_: Serializable class to get the deserializer for
+    :return: Deserializer that creates instances of the class
+    """
+    deserializer = _DESERIALIZERS.get(class_)
+    if deserializer is None:
+        deserializer = Deserializer(class_, class_.ignore_extra_attributes(), **class_.get_child_serializable_types())
+        _DESERIALIZERS[class_] = deserializer
+    return deserializer
+
+
+class Deserializer:
+    """
+    Converts json-derived dictionaries into instances of a class. The attribute names of the class,
+    the mapping of dictionary keys to attribute names, and the converters for child types are
+    computed once, so that deserializing a field is a dictionary lookup
+    """
+
+    def __init__(self, class_, ignore_extra_attributes=False, **kwargs):
+        """
+        Initializes the deserializer for a class
+        :param class_: Class to create instances of
+        :param ignore_extra_attributes: Whether to ignore extra attributes when converting instead of raising an error
+        :param kwargs: Class to call .from_dict on when the argument key is found in the dictionary
+        """
+        self._class = class_
+        self._ignore_extra_attributes = ignore_extra_attributes
+        self._child_types = kwargs
+        self._instance_attributes = frozenset(dir(class_()))
+
+        # Map of dictionary keys to a tuple of the pythonic attribute name and the child converter,
+        # or None for keys that are not attributes of the class
+        self._fields = {}
+
+    def deserialize(self, dictionary):
+        """
+        Creates an instance of the class with attributes assigned from a dictionary
+        :param dictionary: Dictionary of values to assign attributes with
+        :raises AttributeError: When the class does not contain an attribute in the dictionary
+        :return: An instance of the class, or None if the dictionary is None
+        """
+        if dictionary is None:
+            return None
+
+        instance = self._class()
+        fields = self._fields
+        for attr, value in dictionary.items():
+            field = fields.get(attr)
+            if field is None:
+                field = self._get_field(attr)
+                if field is None:
+                    continue
+
+            pythonic_attr, convert = field
+            if convert is not None and value is not None:
+                value = convert(value)
+
+            # Store the value in the instance of the object
+            setattr(instance, pythonic_attr, value)
+
+        return instance
+
+    # IMPLEMENTATION DETAILS ###############################################
+    def _get_field(self, attr):
+        if attr in self._fields:
+            # Key is known to be an extra attribute that is ignored
+            return None
+
+        # Convert the attribute name to a snake-cased, pythonic attribute name
+        pythonic_attr = _underscore(attr)
+
+        # If an unknown attribute is provided, raise an error unless set to ignore it
+        if pythonic_attr not in self._instance_attributes:
+            if self._ignore_extra_attributes:
+                self._fields[attr] = None
+                return None
+            raise AttributeError('Could not deserialize to class {}, {} is not defined as an attribute'
+                                 .format(self._class, pythonic_attr))
+
+        field = (pythonic_attr, _get_child_converter(self._child_types.get(pythonic_attr)))
+        self._fields[attr] = field
+        return field
+
+
 def convert_from_dict(class_, dictionary, ignore_extra_attributes=False, **kwargs):
     """
     Converts a class from a json-derived dictionary using attribute name normalization.
@@ -38,42 +120,39 @@ def convert_from_dict(class_, dictionary, ignore_extra_attributes=False, **kwarg
     :raises AttributeError: When the class does not contain an attribute in the dictionary
     :return: An instance of class_ with attributes assigned
     """
-    # Create an instance of the class
-    instance = class_()
-    instance_attributes = dir(instance)
+    return Deserializer(class_, ignore_extra_attributes, **kwargs).deserialize(dictionary)
+
 
-    if dictionary is None:
+def _get_child_converter(child_type):
+    """Builds the callable that deserializes the value of an attribute with a declared child type"""
+    if child_type is None:
+        # Object can be assigned directly
         return None
 
-    for attr in dictionary:
-        # Convert the attribute name to a snake-cased, pythonic attribute name
-        pythonic_attr = inflection.underscore(attr)
+    if isinstance(child_type, type) and issubclass(child_type, enum.Enum):
+        def convert_enum(value):
+            if isinstance(value, list):
+                return [child_type.from_dict(x) for x in value]
+            # Value is an enum. Convert it from a string
+            return child_type(value)
+        return convert_enum
 
-        # If an unknown attribute is provided, raise an error unless set to ignore it
-        if pythonic_attr not in instance_attributes:
-            if ignore_extra_attributes:
-                continue
-            raise AttributeError('Could not deserialize to class {}, {} is not defined as an attribute'
-                                 .format(class_, pythonic_attr))
+    def convert_object(value):
+        if isinstance(value, list):
+            # Value is a list. Use a list comprehension to deserialize all instances
+            return [child_type.from_dict(x) for x in value]
+        # Value is a singlar object. Use the class to deserialize
+        return child_type.from_dict(value)
+    return convert_object
 
-        value = dictionary[attr]
 
-        if pythonic_attr in kwargs and value is not None:
-            # Caller provided a class to deserialize to. Use that
-            if isinstance(value, list):
-                # Value is a list. Use a list comprehension to deserialize all instances
-                deserialized_value = [kwargs[pythonic_attr].from_dict(x) for x in dictionary[attr]]
-            elif issubclass(kwargs[pythonic_attr], enum.Enum):
-                # Value is an enum. Convert it from a string
-                deserialized_value = kwargs[pythonic_attr](value)
-            else:
-                # Value is a singlar object. Use the class to deserialize
-                deserialized_value = kwargs[pythonic_attr].from_dict(dictionary[attr])
-        else:
-            # Object can be assigned directly
-            deserialized_value = value
-
-        # Store the value in the instance of the object
-        setattr(instance, pythonic_attr, deserialized_value)
-
-    return instance
+_DESERIALIZERS = {}
+_UNDERSCORED_NAMES = {}
+
+
+def _underscore(attr: str) -> str:
+    pythonic_attr = _UNDERSCORED_NAMES.get(attr)
+    if pythonic_attr is None:
+        pythonic_attr = inflection.underscore(attr)
+        _UNDERSCORED_NAMES[attr] = pythonic_attr
+    return pythonic_attr
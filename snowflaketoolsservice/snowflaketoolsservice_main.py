@@ -8,44 +8,77 @@ import logging
 import os
 import sys
 
-import ptvsd
-
-from snowflaketoolsservice.admin import AdminService
 from snowflaketoolsservice.capabilities.capabilities_service import CapabilitiesService
 from snowflaketoolsservice.connection import ConnectionService
-from snowflaketoolsservice.disaster_recovery.disaster_recovery_service import DisasterRecoveryService
-from snowflaketoolsservice.hosting import JSONRPCServer, ServiceProvider
+from snowflaketoolsservice.hosting import JSONRPCServer, LazyService, MetricsDumper, ServiceProvider, TrafficRecorder
 from snowflaketoolsservice.language import LanguageService
-from snowflaketoolsservice.metadata import MetadataService
-from snowflaketoolsservice.object_explorer import ObjectExplorerService
-from snowflaketoolsservice.query_execution import QueryExecutionService
-from snowflaketoolsservice.scripting.scripting_service import ScriptingService
-from snowflaketoolsservice.edit_data.edit_data_service import EditDataService
-from snowflaketoolsservice.tasks import TaskService
 from snowflaketoolsservice.utils import constants
 from snowflaketoolsservice.workspace import WorkspaceService
 
+# Number of worker threads incoming requests are dispatched to, unless overridden by --dispatch-workers
+DEFAULT_DISPATCH_WORKERS = 8
 
-def _create_server(input_stream, output_stream, server_logger):
-    # Create the server, but don't start it yet
-    rpc_server = JSONRPCServer(input_stream, output_stream, server_logger)
+# Maximum number of queued outgoing messages written with a single flush, unless overridden by --output-batch-size
+DEFAULT_OUTPUT_BATCH_SIZE = 64
 
-    # Create the service provider and add the providers to it
-    services = {
-        constants.ADMIN_SERVICE_NAME: AdminService,
+# Milliseconds the output thread waits for a batch to fill, unless overridden by --output-batch-latency-ms
+DEFAULT_OUTPUT_BATCH_LATENCY_MS = 0
+
+# Maximum number of notifications waiting to be sent before producers block, unless overridden by --notification-backlog
+DEFAULT_NOTIFICATION_BACKLOG = 1000
+
+# Seconds between snapshots of the server metrics appended to the log directory, unless overridden by
+# --metrics-interval-seconds. 0 disables the snapshots, the metrics are still available via debug/metrics
+DEFAULT_METRICS_INTERVAL_SECONDS = 0
+
+# Number of threads that short work started in the background by requests, such as connecting, runs on when
+# the server runs on an asyncio event loop (--asyncio), unless overridden by --background-workers. Work that
+# can run for minutes, such as executing a query, runs on a thread of its own
+DEFAULT_BACKGROUND_WORKERS = 16
+
+
+def _get_services() -> dict:
+    """Gets the services the server is created with, by name"""
+    # Services that only answer their own requests are loaded when the first of those arrives, so
+    # their imports don't delay initialize. The language service stays eager since it hooks into
+    # connection and workspace events
+    return {
+        constants.ADMIN_SERVICE_NAME: LazyService('snowflaketoolsservice.admin', 'AdminService', ('admin/',)),
         constants.CAPABILITIES_SERVICE_NAME: CapabilitiesService,
         constants.CONNECTION_SERVICE_NAME: ConnectionService,
-        constants.DISASTER_RECOVERY_SERVICE_NAME: DisasterRecoveryService,
+        constants.DISASTER_RECOVERY_SERVICE_NAME: LazyService(
+            'snowflaketoolsservice.disaster_recovery.disaster_recovery_service', 'DisasterRecoveryService', ('backup/', 'restore/')
+        ),
         constants.LANGUAGE_SERVICE_NAME: LanguageService,
-        constants.METADATA_SERVICE_NAME: MetadataService,
-        constants.OBJECT_EXPLORER_NAME: ObjectExplorerService,
-        constants.QUERY_EXECUTION_SERVICE_NAME: QueryExecutionService,
-        constants.SCRIPTING_SERVICE_NAME: ScriptingService,
+        constants.METADATA_SERVICE_NAME: LazyService('snowflaketoolsservice.metadata', 'MetadataService', ('metadata/',)),
+        constants.OBJECT_EXPLORER_NAME: LazyService('snowflaketoolsservice.object_explorer', 'ObjectExplorerService', ('objectexplorer/',)),
+        constants.QUERY_EXECUTION_SERVICE_NAME: LazyService('snowflaketoolsservice.query_execution', 'QueryExecutionService', ('query/',)),
+        constants.SCRIPTING_SERVICE_NAME: LazyService('snowflaketoolsservice.scripting.scripting_service', 'ScriptingService', ('scripting/',)),
         constants.WORKSPACE_SERVICE_NAME: WorkspaceService,
-        constants.EDIT_DATA_SERVICE_NAME: EditDataService,
-        constants.TASK_SERVICE_NAME: TaskService
+        constants.EDIT_DATA_SERVICE_NAME: LazyService('snowflaketoolsservice.edit_data.edit_data_service', 'EditDataService', ('edit/',)),
+        constants.TASK_SERVICE_NAME: LazyService('snowflaketoolsservice.tasks', 'TaskService', ('tasks/',))
     }
-    service_box = ServiceProvider(rpc_server, services, server_logger)
+
+
+def _create_server(input_stream, output_stream, server_logger, max_dispatch_workers=DEFAULT_DISPATCH_WORKERS,
+                   max_output_batch_size=DEFAULT_OUTPUT_BATCH_SIZE, output_batch_latency_ms=DEFAULT_OUTPUT_BATCH_LATENCY_MS,
+                   max_notification_backlog=DEFAULT_NOTIFICATION_BACKLOG, use_asyncio=False,
+                   max_background_workers=DEFAULT_BACKGROUND_WORKERS):
+    # Create the server, but don't start it yet
+    rpc_server = JSONRPCServer(
+        input_stream,
+        output_stream,
+        server_logger,
+        max_dispatch_workers=max_dispatch_workers,
+        max_output_batch_size=max_output_batch_size,
+        max_output_batch_latency=output_batch_latency_ms / 1000,
+        max_notification_backlog=max_notification_backlog,
+        use_asyncio=use_asyncio,
+        max_background_workers=max_background_workers
+    )
+
+    # Create the service provider and add the providers to it
+    service_box = ServiceProvider(rpc_server, _get_services(), server_logger)
     service_box.initialize()
     return rpc_server
 
@@ -55,6 +88,14 @@ if __name__ == '__main__':
     wait_for_debugger = False
     log_dir = None
     stdin = None
+    dispatch_workers = DEFAULT_DISPATCH_WORKERS
+    output_batch_size = DEFAULT_OUTPUT_BATCH_SIZE
+    output_batch_latency_ms = DEFAULT_OUTPUT_BATCH_LATENCY_MS
+    notification_backlog = DEFAULT_NOTIFICATION_BACKLOG
+    metrics_interval_seconds = DEFAULT_METRICS_INTERVAL_SECONDS
+    traffic_recording_path = None
+    use_asyncio = False
+    background_workers = DEFAULT_BACKGROUND_WORKERS
     if len(sys.argv) > 1:
         for arg in sys.argv:
             arg_parts = arg.split('=')
@@ -66,11 +107,29 @@ if __name__ == '__main__':
                     port = int(arg_parts[1])
                 except IndexError:
                     pass
+                # Only imported when debugging since importing it is a noticeable part of startup
+                import ptvsd
                 ptvsd.enable_attach('', address=('0.0.0.0', port))
                 if arg_parts[0] == '--enable-remote-debugging-wait':
                     wait_for_debugger = True
             elif arg_parts[0] == '--log-dir':
                 log_dir = arg_parts[1]
+            elif arg_parts[0] == '--dispatch-workers':
+                dispatch_workers = int(arg_parts[1])
+            elif arg_parts[0] == '--output-batch-size':
+                output_batch_size = int(arg_parts[1])
+            elif arg_parts[0] == '--output-batch-latency-ms':
+                output_batch_latency_ms = int(arg_parts[1])
+            elif arg_parts[0] == '--notification-backlog':
+                notification_backlog = int(arg_parts[1])
+            elif arg_parts[0] == '--metrics-interval-seconds':
+                metrics_interval_seconds = float(arg_parts[1])
+            elif arg_parts[0] == '--record-traffic':
+                traffic_recording_path = arg_parts[1]
+            elif arg_parts[0] == '--asyncio':
+                use_asyncio = True
+            elif arg_parts[0] == '--background-workers':
+                background_workers = int(arg_parts[1])
 
     # Create the output logger
     logger = logging.getLogger('snowflaketoolsservice')
@@ -100,7 +159,26 @@ if __name__ == '__main__':
     logger.info('Snowflake Tools Service is starting up...')
 
     # Create the server, but don't start it yet
-    server = _create_server(stdin, std_out_wrapped, logger)
+    server = _create_server(stdin, std_out_wrapped, logger, dispatch_workers, output_batch_size, output_batch_latency_ms, notification_backlog,
+                            use_asyncio, background_workers)
+
+    # Periodically write the metrics next to the log, if requested
+    if metrics_interval_seconds > 0:
+        metrics_dumper = MetricsDumper(
+            server.get_metrics,
+            os.path.join(log_dir, 'snowflaketoolsservice_metrics.log'),
+            metrics_interval_seconds,
+            logger
+        )
+        metrics_dumper.start()
+        server.add_shutdown_handler(metrics_dumper.stop)
+
+    # Record the session for replay by tests/benchmarks/benchmark_replay.py, if requested
+    if traffic_recording_path:
+        logger.info(f'Recording JSON RPC traffic to {traffic_recording_path}')
+        traffic_recorder = TrafficRecorder(io.open(traffic_recording_path, 'w', encoding='utf-8'))
+        server.set_traffic_recorder(traffic_recorder)
+        server.add_shutdown_handler(traffic_recorder.close)
 
     # Start the server
     server.start()
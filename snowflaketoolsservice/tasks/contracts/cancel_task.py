@@ -3,19 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
-from snowflaketoolsservice.serialization.serializable import convert_from_dict
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
+from snowflaketoolsservice.serialization import Serializable
 
 
-class CancelTaskParameters:
+class CancelTaskParameters(Serializable):
     """Parameters for the tasks/canceltask request"""
 
-    @classmethod
-    def from_dict(cls, dictionary: dict):
-        return convert_from_dict(cls, dictionary)
-
     def __init__(self):
         self.task_id: str = None
 
 
-CANCEL_TASK_REQUEST = IncomingMessageConfiguration('tasks/canceltask', CancelTaskParameters)
+CANCEL_TASK_REQUEST = IncomingMessageConfiguration('tasks/canceltask', CancelTaskParameters, DispatchConcurrency.PARALLEL)
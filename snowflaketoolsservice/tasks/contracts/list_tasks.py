@@ -3,19 +3,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
-import snowflaketoolsservice.utils as utils
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
+from snowflaketoolsservice.serialization import Serializable
 
 
-class ListTasksParameters:
+class ListTasksParameters(Serializable):
     """Parameters for the tasks/listtasks request"""
 
-    @classmethod
-    def from_dict(cls, dictionary: dict):
-        return utils.serialization.convert_from_dict(cls, dictionary)
-
     def __init__(self):
         self.list_active_tasks_only: bool = None
 
 
-LIST_TASKS_REQUEST = IncomingMessageConfiguration('tasks/listtasks', ListTasksParameters)
+LIST_TASKS_REQUEST = IncomingMessageConfiguration('tasks/listtasks', ListTasksParameters, DispatchConcurrency.PARALLEL)
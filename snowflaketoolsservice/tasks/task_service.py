@@ -9,6 +9,7 @@ from typing import Dict  # noqa
 
 from snowflaketoolsservice.hosting import RequestContext, ServiceProvider  # noqa
 from snowflaketoolsservice.tasks import Task, TaskStatus  # noqa
+from snowflaketoolsservice.tasks.tasks import STATUS_CHANGED_NOTIFICATION, coalesce_status_changed_notifications
 from snowflaketoolsservice.tasks.contracts import CANCEL_TASK_REQUEST, CancelTaskParameters, LIST_TASKS_REQUEST, ListTasksParameters  # noqa
 
 
@@ -25,6 +26,7 @@ class TaskService:
         # Register the handlers for the service
         self._service_provider.server.set_request_handler(CANCEL_TASK_REQUEST, self.handle_cancel_request)
         self._service_provider.server.set_request_handler(LIST_TASKS_REQUEST, self.handle_list_request)
+        self._service_provider.server.set_coalescing_policy(STATUS_CHANGED_NOTIFICATION, coalesce_status_changed_notifications)
 
     def handle_cancel_request(self, request_context: RequestContext, params: CancelTaskParameters) -> None:
         """Respond to tasks/canceltask requests by canceling the requested task"""
@@ -8,11 +8,15 @@
 import enum
 import threading
 import time
-from typing import Callable, Dict  # noqa
+from typing import Callable, Dict, Optional  # noqa
 import uuid
 
 from snowflaketoolsservice.hosting import RequestContext
 from snowflaketoolsservice.tasks.contracts import TaskInfo
+from snowflaketoolsservice.utils.thread import run_in_daemon_thread
+
+
+STATUS_CHANGED_NOTIFICATION = 'tasks/statuschanged'
 
 
 class TaskStatus(enum.Enum):
@@ -63,9 +67,7 @@ class Task:
     def start(self) -> None:
         """Start the task by running it in a new thread"""
         self._start_time = time.clock()
-        self._thread = threading.Thread(target=self._run)
-        self._thread.daemon = True
-        self._thread.start()
+        self._thread = run_in_daemon_thread(self._run)
 
     def cancel(self) -> bool:
         """Cancel the task if it is running and return true, or return false if the task is not running"""
@@ -102,7 +104,7 @@ class Task:
         self._request_context.send_notification('tasks/newtaskcreated', self.task_info)
 
     def _notify_status_changed(self) -> None:
-        self._request_context.send_notification('tasks/statuschanged', {
+        self._request_context.send_notification(STATUS_CHANGED_NOTIFICATION, {
             'taskId': self.id,
             'status': self.status,
             'message': self.status_message or '',
@@ -112,3 +114,13 @@ class Task:
     @property
     def _is_completed(self) -> bool:
         return self.status in [TaskStatus.CANCELED, TaskStatus.FAILED, TaskStatus.SUCCEEDED, TaskStatus.SUCCEEDED_WITH_WARNING]
+
+
+def coalesce_status_changed_notifications(queued_params: dict, params: dict) -> Optional[dict]:
+    """
+    Coalescing policy for status changed notifications that keeps only the latest status of a task
+    :param queued_params: Params of the notification that is waiting to be sent
+    :param params: Params of the new notification
+    :return: The params of the new notification if both are for the same task, otherwise None
+    """
+    return params if queued_params['taskId'] == params['taskId'] else None
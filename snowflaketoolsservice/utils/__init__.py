@@ -11,7 +11,6 @@ import snowflaketoolsservice.utils.log
 import snowflaketoolsservice.utils.serialization
 import snowflaketoolsservice.utils.thread
 import snowflaketoolsservice.utils.time
-import snowflaketoolsservice.utils.object_finder
 import snowflaketoolsservice.utils.validate         # noqa
 
 __all__ = [
@@ -21,7 +20,5 @@ __all__ = [
     'serialization',
     'thread',
     'time',
-    'validate',
-    'object_finder'
-
+    'validate'
 ]
@@ -5,13 +5,75 @@
 
 """Module containing utilities for cancelling requests"""
 
+import logging  # noqa
+import threading
+from typing import Callable, List, Optional  # noqa
+
+
+class OperationCanceledError(Exception):
+    """Raised by an operation that stops because its cancellation token was canceled"""
+
 
 class CancellationToken:
     """Token used to indicate if an operation has been canceled"""
 
-    def __init__(self):
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        """
+        Initializes a token that hasn't been canceled
+        :param logger: Optional logger that callbacks that fail are logged to
+        """
         self.canceled = False
+        self.logger: Optional[logging.Logger] = logger
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
 
     def cancel(self):
-        """Mark the cancellation token as canceled"""
-        self.canceled = True
+        """
+        Mark the cancellation token as canceled and run the registered callbacks on the calling thread.
+        A callback that fails is logged, and doesn't stop the callbacks after it from running
+        """
+        with self._lock:
+            if self.canceled:
+                return
+            self.canceled = True
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            self._run_callback(callback)
+
+    def raise_if_canceled(self):
+        """
+        Stops the calling operation if the token has been canceled
+        :raises OperationCanceledError: The token has been canceled
+        """
+        if self.canceled:
+            raise OperationCanceledError()
+
+    def register(self, callback: Callable[[], None]):
+        """
+        Registers a callback that aborts work in progress, such as a running query, when the token is
+        canceled. If the token is already canceled, the callback is run immediately. Callbacks run on the
+        thread that cancels the token, which may be the server's input thread, so they must not block
+        :param callback: Callable that takes no arguments
+        """
+        with self._lock:
+            if not self.canceled:
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def unregister(self, callback: Callable[[], None]):
+        """
+        Removes a callback once the work it aborts has finished
+        :param callback: Callable that was previously registered
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def _run_callback(self, callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception:
+            if self.logger is not None:
+                self.logger.exception('Unhandled exception while running a cancellation callback')
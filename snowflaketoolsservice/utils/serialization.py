@@ -7,6 +7,7 @@
 
 import enum
 import json
+from typing import Any, Callable, Dict  # noqa
 
 import inflection
 
@@ -18,22 +19,85 @@ def convert_to_dict(obj):
     :param obj: The object to convert to a jsonic dictionary
     :return: A json-ready dictionary representation of the object
     """
-    return json.loads(json.dumps(obj, default=_get_serializable_value))
+    return json.loads(to_json(obj))
 
 
-def _get_serializable_value(obj):
-    """Gets a serializable representation of an object, for use as the default argument to json.dumps"""
+def to_json(obj, sort_keys: bool = False) -> str:
+    """
+    Serializes an object directly to a JSON string using attribute name normalization. Objects that
+    are not natively serializable are converted by the serializer registered for their class
+    :param obj: The object to serialize
+    :param sort_keys: Whether the keys of every JSON object should be emitted in sorted order
+    :return: JSON representation of the object
+    """
+    encoder = _SORTED_ENCODER if sort_keys else _ENCODER
+    return encoder.encode(obj)
+
+
+def get_serializer(class_: type) -> Callable[[Any], Any]:
+    """
+    Gets the serializer for a class, building and caching it on first use. A serializer returns a
+    JSON-ready representation of an instance, which may itself contain objects that need serializers
+    :param class_: Class to get the serializer for
+    :return: Callable that converts an instance of the class
+    """
+    serializer = _SERIALIZERS.get(class_)
+    if serializer is None:
+        serializer = _build_serializer(class_)
+        _SERIALIZERS[class_] = serializer
+    return serializer
+
+
+def register_serializer(class_: type, serializer: Callable[[Any], Any]):
+    """
+    Registers a custom serializer for a class, replacing the one that would otherwise be generated
+    :param class_: Class to register the serializer for
+    :param serializer: Callable that converts an instance of the class into a JSON-ready value
+    """
+    _SERIALIZERS[class_] = serializer
+
+
+class _CamelCaseKeys(dict):
+    """Table of attribute names to camelCased JSON keys that computes each key once, on first use"""
+
+    def __missing__(self, key):
+        camel_key = inflection.camelize(key, False)
+        self[key] = camel_key
+        return camel_key
+
+
+def _build_serializer(class_: type) -> Callable[[Any], Any]:
+    """Generates the serializer for a class that the JSON encoder cannot handle natively"""
     # If the object is an Enum, use its value
-    if isinstance(obj, enum.Enum):
-        return _get_serializable_value(obj.value)
-    # Try to use the object's dictionary representation if available
-    try:
-        return {inflection.camelize(key, False): value for key, value in obj.__dict__.items()}
-    except AttributeError:
-        pass
-    # Assume the object can be serialized normally
-    try:
-        json.dumps(obj)
-        return obj
-    except BaseException:
-        return None
+    if issubclass(class_, enum.Enum):
+        return _serialize_enum
+
+    # Use the object's dictionary representation if available
+    if getattr(class_, '__dictoffset__', 0) == 0:
+        return _serialize_unsupported
+
+    keys = _CamelCaseKeys()
+
+    def serialize_object(obj):
+        return {keys[key]: value for key, value in obj.__dict__.items()}
+
+    return serialize_object
+
+
+def _serialize_enum(obj: enum.Enum):
+    return obj.value
+
+
+def _serialize_unsupported(obj):
+    # Objects without attributes that JSON cannot represent are serialized as null
+    return None
+
+
+def _get_serializable_value(obj):
+    """Gets a serializable representation of an object, for use as the default argument to the JSON encoder"""
+    return get_serializer(type(obj))(obj)
+
+
+_SERIALIZERS: Dict[type, Callable[[Any], Any]] = {}
+_ENCODER = json.JSONEncoder(default=_get_serializable_value)
+_SORTED_ENCODER = json.JSONEncoder(default=_get_serializable_value, sort_keys=True)
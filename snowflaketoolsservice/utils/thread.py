@@ -5,8 +5,32 @@
 
 """Utility functions for operating with threads"""
 
+from concurrent.futures import Executor, Future, wait  # noqa
 import threading  # noqa
-from typing import Callable     # noqa
+from typing import Callable, Optional, Union     # noqa
+
+
+# Executor that run_in_background submits to instead of starting a thread per call, if one is set
+_background_executor: Optional[Executor] = None
+
+
+class BackgroundTask:
+    """Handle to a function submitted to the background executor, with the parts of the Thread API services use"""
+
+    def __init__(self, future: Future):
+        self._future = future
+        self.daemon = True
+
+    def is_alive(self) -> bool:
+        """Whether the function is queued or running"""
+        return not self._future.done()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Blocks until the function returns
+        :param timeout: Optional number of seconds to wait
+        """
+        wait([self._future], timeout)
 
 
 def run_as_thread(function: Callable, *args) -> threading.Thread:
@@ -15,3 +39,40 @@ def run_as_thread(function: Callable, *args) -> threading.Thread:
     task.setDaemon(False)
     task.start()
     return task
+
+
+def run_in_daemon_thread(function: Callable, *args) -> threading.Thread:
+    """
+    Runs a function in a daemon thread of its own, even if a background executor is set. Used for work that can
+    run for minutes, such as executing a query, which would otherwise hold a worker of the background executor
+    and keep short tasks like connecting waiting behind it
+    :return: The daemon thread running the function
+    """
+    task = threading.Thread(target=function, args=args)
+    task.daemon = True
+    task.start()
+    return task
+
+
+def set_background_executor(executor: Optional[Executor]) -> None:
+    """
+    Sets the executor that run_in_background submits to. The asyncio server mode sets a bounded
+    executor here so that requests which hand short blocking work off to the background queue for
+    a worker instead of each starting a thread
+    :param executor: Executor to submit to, or None to start a daemon thread per call
+    """
+    global _background_executor
+    _background_executor = executor
+
+
+def run_in_background(function: Callable, *args) -> Union[threading.Thread, BackgroundTask]:
+    """
+    Runs a function in the background, passing in the specified args as its arguments. Work that can run for
+    minutes should use run_in_daemon_thread instead
+    :return: The daemon thread running the function, or a BackgroundTask if a background executor is set
+    """
+    executor = _background_executor
+    if executor is not None:
+        return BackgroundTask(executor.submit(function, *args))
+
+    return run_in_daemon_thread(function, *args)
@@ -5,13 +5,13 @@
 
 from snowflaketoolsservice.workspace.contracts import (
     Configuration, PGSQLConfiguration, SQLConfiguration, IntellisenseConfiguration,
-    FormatterConfiguration, TextDocumentIdentifier
+    FormatterConfiguration, ConnectionConfiguration, QueryConfiguration, TextDocumentIdentifier
 )
 from snowflaketoolsservice.workspace.script_file import ScriptFile
 from snowflaketoolsservice.workspace.workspace_service import WorkspaceService
 from snowflaketoolsservice.workspace.workspace import Workspace
 
 __all__ = [
-    'Configuration', 'PGSQLConfiguration', 'SQLConfiguration', 'IntellisenseConfiguration', 'FormatterConfiguration',
-    'ScriptFile', 'WorkspaceService', 'Workspace', 'TextDocumentIdentifier'
+    'Configuration', 'PGSQLConfiguration', 'SQLConfiguration', 'IntellisenseConfiguration', 'FormatterConfiguration', 'ConnectionConfiguration',
+    'QueryConfiguration', 'ScriptFile', 'WorkspaceService', 'Workspace', 'TextDocumentIdentifier'
 ]
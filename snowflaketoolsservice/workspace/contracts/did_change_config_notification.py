@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 from enum import Enum
+from typing import List
 
 from snowflaketoolsservice.hosting import IncomingMessageConfiguration
 from snowflaketoolsservice.serialization import Serializable
@@ -31,7 +32,7 @@ class PGSQLConfiguration(Serializable):
     """
     @classmethod
     def get_child_serializable_types(cls):
-        return {'format': FormatterConfiguration}
+        return {'format': FormatterConfiguration, 'connection': ConnectionConfiguration, 'query': QueryConfiguration}
 
     @classmethod
     def ignore_extra_attributes(cls):
@@ -40,6 +41,8 @@ class PGSQLConfiguration(Serializable):
     def __init__(self):
         self.default_database: str = 'postgres'
         self.format: FormatterConfiguration = FormatterConfiguration()
+        self.connection: ConnectionConfiguration = ConnectionConfiguration()
+        self.query: QueryConfiguration = QueryConfiguration()
 
 
 class Case(Enum):
@@ -64,6 +67,34 @@ class FormatterConfiguration(Serializable):
         self.reindent: bool = True
 
 
+class ConnectionConfiguration(Serializable):
+    """
+    Configuration for connection settings
+    """
+    @classmethod
+    def ignore_extra_attributes(cls):
+        return True
+
+    def __init__(self):
+        # Connection types, such as 'Query', to open in parallel as soon as an editor connects
+        self.prewarm_connection_types: List[str] = []
+        # Seconds between checks that idle connections are still alive, or 0 to disable the checks
+        self.health_check_interval: int = 30
+
+
+class QueryConfiguration(Serializable):
+    """
+    Configuration for query execution settings
+    """
+    @classmethod
+    def ignore_extra_attributes(cls):
+        return True
+
+    def __init__(self):
+        # Number of result batches of a Snowflake result set to download at once, or 1 to read them one at a time
+        self.result_download_parallelism: int = 4
+
+
 class IntellisenseConfiguration(Serializable):
     """
     Configuration for Intellisense settings
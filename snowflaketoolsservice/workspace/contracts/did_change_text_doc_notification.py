@@ -5,7 +5,7 @@
 
 from typing import List, Optional     # noqa
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.workspace.contracts.common import Range
 from snowflaketoolsservice.serialization import Serializable
 
@@ -61,5 +61,6 @@ class DidChangeTextDocumentParams(Serializable):
 
 DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION = IncomingMessageConfiguration(
     'textDocument/didChange',
-    DidChangeTextDocumentParams
+    DidChangeTextDocumentParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
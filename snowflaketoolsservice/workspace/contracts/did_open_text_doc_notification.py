@@ -3,7 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from snowflaketoolsservice.hosting import IncomingMessageConfiguration
+from snowflaketoolsservice.hosting import DispatchConcurrency, IncomingMessageConfiguration
 from snowflaketoolsservice.workspace.contracts.common import TextDocumentItem
 from snowflaketoolsservice.serialization import Serializable
 
@@ -24,5 +24,6 @@ class DidOpenTextDocumentParams(Serializable):
 
 DID_OPEN_TEXT_DOCUMENT_NOTIFICATION = IncomingMessageConfiguration(
     'textDocument/didOpen',
-    DidOpenTextDocumentParams
+    DidOpenTextDocumentParams,
+    DispatchConcurrency.SERIAL_PER_OWNER_URI
 )
@@ -0,0 +1,95 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Micro-benchmark of decoding the parameters of incoming requests and notifications.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_deserialization
+"""
+
+import enum
+import timeit
+
+import inflection
+
+from snowflaketoolsservice.connection.contracts import CONNECT_REQUEST
+from snowflaketoolsservice.language.contracts import COMPLETION_REQUEST
+from snowflaketoolsservice.query_execution.contracts import SUBSET_REQUEST
+from snowflaketoolsservice.workspace.contracts import DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION
+
+
+# Parameters as recorded from a client session
+PAYLOADS = [
+    (COMPLETION_REQUEST, {
+        'textDocument': {'uri': 'untitled:Untitled-1'},
+        'position': {'line': 12, 'character': 27}
+    }),
+    (DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION, {
+        'textDocument': {'uri': 'untitled:Untitled-1', 'version': 42},
+        'contentChanges': [{
+            'range': {'start': {'line': 12, 'character': 26}, 'end': {'line': 12, 'character': 26}},
+            'rangeLength': 0,
+            'text': 'e'
+        }]
+    }),
+    (SUBSET_REQUEST, {
+        'ownerUri': 'untitled:Untitled-1',
+        'batchIndex': 0,
+        'resultSetIndex': 0,
+        'rowsStartIndex': 0,
+        'rowsCount': 500
+    }),
+    (CONNECT_REQUEST, {
+        'ownerUri': 'untitled:Untitled-1',
+        'type': 'Default',
+        'connection': {'options': {'host': 'account.snowflakecomputing.com', 'user': 'user', 'dbname': 'db'}}
+    })
+]
+
+
+def _legacy_convert_from_dict(class_, dictionary, ignore_extra_attributes=False, **kwargs):
+    """convert_from_dict as it was before deserializers were cached per class"""
+    instance = class_()
+    instance_attributes = dir(instance)
+
+    if dictionary is None:
+        return None
+
+    for attr in dictionary:
+        pythonic_attr = inflection.underscore(attr)
+        if pythonic_attr not in instance_attributes:
+            if ignore_extra_attributes:
+                continue
+            raise AttributeError(f'Could not deserialize to class {class_}, {pythonic_attr} is not defined as an attribute')
+
+        value = dictionary[attr]
+        if pythonic_attr in kwargs and value is not None:
+            child_type = kwargs[pythonic_attr]
+            if isinstance(value, list):
+                value = [_legacy_from_dict(child_type, x) for x in value]
+            elif issubclass(child_type, enum.Enum):
+                value = child_type(value)
+            else:
+                value = _legacy_from_dict(child_type, value)
+        setattr(instance, pythonic_attr, value)
+
+    return instance
+
+
+def _legacy_from_dict(class_, dictionary):
+    return _legacy_convert_from_dict(class_, dictionary, class_.ignore_extra_attributes(), **class_.get_child_serializable_types())
+
+
+def run(repeat: int = 5, number: int = 10000):
+    print(f'Decoding request parameters, best of {repeat} x {number}')
+    for config, params in PAYLOADS:
+        legacy = min(timeit.repeat(lambda: _legacy_from_dict(config.parameter_class, params), repeat=repeat, number=number))
+        cached = min(timeit.repeat(lambda: config.parameter_class.from_dict(params), repeat=repeat, number=number))
+        print(f'  {config.method:<28} {legacy / number * 1e6:8.2f} us -> {cached / number * 1e6:8.2f} us ({legacy / cached:5.2f}x)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,127 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark of reading a result set into the spill file a row at a time, writing each row as a block
+of its own, versus a block at a time, from a stub cursor that serves rows from memory.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_fetch [row count]
+"""
+
+import os
+import sys
+import time
+
+from snowflaketoolsservice.parsers import datatypes
+from snowflaketoolsservice.query.data_storage import service_buffer_file_stream as file_stream, StorageDataReader
+from snowflaketoolsservice.query.file_storage_result_set import FileStorageResultSet
+
+
+COLUMN_TYPES = (datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_BOOL, datatypes.DATATYPE_TEXT)
+
+
+class _StubTypeCursor:
+    """Cursor that answers the pg_type lookup of the column types"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, params):
+        pass
+
+    def fetchall(self):
+        return [(type_oid, type_name) for type_oid, type_name in enumerate(COLUMN_TYPES)]
+
+
+class _StubConnection:
+    def cursor(self):
+        return _StubTypeCursor()
+
+
+class _StubCursor:
+    """Cursor over rows held in memory that supports both iteration and fetchmany, like a psycopg2 cursor"""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._position = 0
+        self.connection = _StubConnection()
+        self.description = [(f'column{index}', index, None, -1, None, None, None) for index in range(len(COLUMN_TYPES))]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._position >= len(self._rows):
+            raise StopIteration
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    def fetchmany(self, size):
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+
+class _LegacyStorageDataReader(StorageDataReader):
+    """StorageDataReader as it was before it fetched blocks of rows"""
+
+    def read_row(self) -> bool:
+        row_found = False
+
+        for row in self._cursor:
+            self._current_row = row
+            row_found = True
+            break
+
+        if self._current_row is None or len(self._columns_info) == 0:
+            self._read_columns_info()
+
+        return row_found
+
+
+def _read_row_by_row(rows) -> float:
+    file_name = file_stream.create_file()
+    try:
+        start = time.perf_counter()
+        storage_data_reader = _LegacyStorageDataReader(_StubCursor(rows))
+        file_offsets = []
+        total_bytes_written = 0
+        with file_stream.get_writer(file_name) as writer:
+            while storage_data_reader.read_row():
+                file_offsets.append(total_bytes_written)
+                total_bytes_written += writer.write_block([storage_data_reader.get_values()], storage_data_reader.columns_info)
+        return time.perf_counter() - start
+    finally:
+        os.remove(file_name)
+
+
+def _read_by_block(rows) -> float:
+    result_set = FileStorageResultSet(0, 0)
+    try:
+        start = time.perf_counter()
+        result_set.read_result_to_end(_StubCursor(rows))
+        return time.perf_counter() - start
+    finally:
+        os.remove(result_set._output_file_name)
+
+
+def run(row_count: int = 1000000):
+    rows = [(index, f'name {index}', index / 7, index % 2 == 0, None if index % 10 == 0 else 'some longer description text') for index in range(row_count)]
+
+    print(f'Reading {row_count} rows of {len(COLUMN_TYPES)} columns into the spill file')
+    row_by_row = _read_row_by_row(rows)
+    print(f'  row by row           {row_by_row:8.3f} s {row_count / row_by_row:10.0f} rows/s')
+    by_block = _read_by_block(rows)
+    print(f'  fetchmany + blocks   {by_block:8.3f} s {row_count / by_block:10.0f} rows/s')
+    print(f'  speedup              {row_by_row / by_block:8.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,136 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Throughput benchmark of framing and decoding messages from the input stream.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_reader [message count] [didOpen size in MB]
+"""
+
+import io
+import json
+import sys
+import time
+
+from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
+
+
+class _PipeStream(io.BytesIO):
+    """In-memory stream that returns at most one pipe buffer per read, like stdin does"""
+    PIPE_BUFFER_SIZE = 65536
+
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:self.PIPE_BUFFER_SIZE])
+
+
+class _LegacyJSONRPCReader(JSONRPCReader):
+    """JSONRPCReader as it was before it searched with bytes.find and compacted its buffer in place"""
+
+    def _read_next_chunk(self):
+        current_buffer_size = len(self._buffer)
+        if (current_buffer_size - self._buffer_end_offset) / current_buffer_size < self.BUFFER_RESIZE_TRIGGER:
+            resized_buffer = bytearray(current_buffer_size * 2)
+            resized_buffer[0:current_buffer_size] = self._buffer
+            self._buffer = resized_buffer
+
+        length_read = self.stream.readinto(memoryview(self._buffer)[self._buffer_end_offset:])
+        if not length_read:
+            raise EOFError('End of stream reached, no output.')
+        self._buffer_end_offset += length_read
+        return True
+
+    def _try_read_headers(self):
+        scan_offset = self._read_offset
+        while scan_offset + 3 < self._buffer_end_offset and (
+            self._buffer[scan_offset] != self.CR or
+            self._buffer[scan_offset + 1] != self.LF or
+            self._buffer[scan_offset + 2] != self.CR or
+            self._buffer[scan_offset + 3] != self.LF
+        ):
+            scan_offset += 1
+        if scan_offset + 3 >= self._buffer_end_offset:
+            return False
+
+        for header in self._buffer[self._read_offset:scan_offset].decode('ascii').split('\n'):
+            colon_index = header.find(':')
+            self._headers[header[:colon_index].strip().lower()] = header[colon_index + 1:].strip()
+        self._expected_content_length = int(self._headers['content-length'])
+        self._read_offset = scan_offset + 4
+        self._read_state = self.ReadState.Content
+        return True
+
+    def _try_read_content(self, content):
+        if self._buffer_end_offset - self._read_offset < self._expected_content_length:
+            return False
+        content[0] = self._buffer[self._read_offset:self._read_offset + self._expected_content_length].decode(self.encoding)
+        self._read_offset += self._expected_content_length
+        self._read_state = self.ReadState.Header
+        return True
+
+    def _trim_buffer_and_resize(self, bytes_to_remove):
+        current_buffer_size = len(self._buffer)
+        new_buffer = bytearray(max(current_buffer_size - bytes_to_remove, self.DEFAULT_BUFFER_SIZE))
+        if bytes_to_remove <= current_buffer_size:
+            new_buffer[:self._buffer_end_offset - bytes_to_remove] = self._buffer[bytes_to_remove:self._buffer_end_offset]
+        self._buffer = new_buffer
+        self._read_offset = 0
+        self._buffer_end_offset -= bytes_to_remove
+        self._headers = {}
+
+
+def _frame(message: dict) -> bytes:
+    content = json.dumps(message).encode('utf-8')
+    return b'Content-Length: ' + str(len(content)).encode('ascii') + b'\r\n\r\n' + content
+
+
+def _create_completion_stream(message_count: int) -> bytes:
+    return b''.join(
+        _frame({
+            'jsonrpc': '2.0',
+            'id': str(message_id),
+            'method': 'textDocument/completion',
+            'params': {'textDocument': {'uri': 'untitled:Untitled-1'}, 'position': {'line': 12, 'character': 27}}
+        })
+        for message_id in range(message_count)
+    )
+
+
+def _create_did_open_stream(size_mb: int) -> bytes:
+    line = 'SELECT c_custkey, c_name, c_address FROM customer WHERE c_nationkey = 12 ORDER BY c_acctbal DESC;\n'
+    text = line * (size_mb * 1024 * 1024 // len(line))
+    return _frame({
+        'jsonrpc': '2.0',
+        'method': 'textDocument/didOpen',
+        'params': {'textDocument': {'uri': 'file:///big.sql', 'languageId': 'sql', 'version': 1, 'text': text}}
+    })
+
+
+def _time_reads(reader_class, data: bytes, message_count: int) -> float:
+    reader = reader_class(_PipeStream(data))
+    start = time.perf_counter()
+    for _ in range(message_count):
+        reader.read_message()
+    return time.perf_counter() - start
+
+
+def run(message_count: int = 20000, did_open_mb: int = 4):
+    scenarios = (
+        (f'{message_count} completion requests', _create_completion_stream(message_count), message_count),
+        (f'{did_open_mb} MB didOpen', _create_did_open_stream(did_open_mb), 1)
+    )
+
+    print(f'Reading messages from a stream that returns {_PipeStream.PIPE_BUFFER_SIZE} bytes per read, best of 3')
+    for name, data, count in scenarios:
+        results = {}
+        for label, reader_class in (('byte scan + copy', _LegacyJSONRPCReader), ('find + compaction', JSONRPCReader)):
+            elapsed = min(_time_reads(reader_class, data, count) for _ in range(3))
+            results[label] = elapsed
+            print(f'  {name:<28} {label:<18} {len(data) / elapsed / 1e6:8.2f} MB/s {count / elapsed:10.0f} msg/s')
+        print(f'  {name:<28} speedup            {results["byte scan + copy"] / results["find + compaction"]:8.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
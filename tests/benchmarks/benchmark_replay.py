@@ -0,0 +1,364 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Load test that replays a recorded session against an in-process server. The database is replaced
+by a stand-in connection that answers every query with a small canned result, so the replay runs
+offline and measures the server rather than the database.
+
+Record a session by starting the service with --record-traffic=<path>, then run from the root of
+the repo:
+    python -m tests.benchmarks.benchmark_replay [recording] [--speed=1] [--concurrency=1] [--timeout=60] [--asyncio]
+
+--speed scales the recorded think time, so 2 replays twice as fast. With --speed=0 each session
+sends a message as soon as the responses and notifications recorded before it have arrived.
+--concurrency replays that many copies of the session at once, each with its own document and
+owner URIs. --asyncio runs the server on its asyncio event loop instead of its thread pool.
+Without a recording, the bundled sample session is replayed.
+"""
+
+import collections
+import io
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional  # noqa
+from unittest import mock
+
+import psycopg2.extensions
+
+from snowflaketoolsservice.hosting import LatencyHistogram
+from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
+from snowflaketoolsservice.hosting.traffic_recorder import read_recording, RecordedMessage
+from snowflaketoolsservice.snowflaketoolsservice_main import _create_server
+
+try:
+    import resource
+except ImportError:
+    # Peak memory is only reported where the resource module is available
+    resource = None
+
+
+SAMPLE_RECORDING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings', 'sample_session.jsonl')
+URI_KEYS = ('ownerUri', 'uri')
+
+
+class _StandInCursor:
+    """Cursor that answers catalog lookups from a tiny catalog and returns the same rows for any other query"""
+    COLUMNS = (('id', 23), ('name', 25))
+    TYPE_NAMES = [(23, 'int4'), (25, 'text')]
+    OBJECTS = [('public', 'customer', 't'), ('public', 'orders', 't'), ('public', 'active_customers', 'v')]
+    ROWS = [(row_id, f'row {row_id}') for row_id in range(50)]
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._rows: List[tuple] = []
+        self._index = 0
+
+    def execute(self, query, params=None):
+        text = query if isinstance(query, str) else repr(query)
+        if 'pg_type' in text:
+            self._rows = self.TYPE_NAMES
+        elif 'pg_tables' in text:
+            self._rows = self.OBJECTS
+        else:
+            self._rows = self.ROWS
+        self.description = [(name, type_code, None, None, None, None, None) for name, type_code in self.COLUMNS]
+        self.rowcount = len(self._rows)
+        self._index = 0
+
+    def mogrify(self, query, params=None):
+        return query.encode('utf-8') if isinstance(query, str) else b''
+
+    def fetchone(self):
+        if self._index >= len(self._rows):
+            return None
+        self._index += 1
+        return self._rows[self._index - 1]
+
+    def fetchall(self):
+        rows = self._rows[self._index:]
+        self._index = len(self._rows)
+        return rows
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class _StandInConnection:
+    """In-process replacement for a psycopg2 connection"""
+
+    def __init__(self, **connection_options):
+        self.autocommit = False
+        self.notices = []
+        self.closed = False
+        self.server_version = 100000
+        self._dsn_parameters = {
+            'host': connection_options.get('host', 'localhost'),
+            'port': str(connection_options.get('port', 5432)),
+            'dbname': connection_options.get('dbname', 'postgres'),
+            'user': connection_options.get('user', 'replay')
+        }
+
+    def cursor(self, name=None, withhold=False):
+        return _StandInCursor(self)
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def get_dsn_parameters(self):
+        return self._dsn_parameters
+
+    def get_parameter_status(self, parameter):
+        return str(self.server_version) if parameter == 'server_version' else None
+
+    def get_backend_pid(self):
+        return 0
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class _Session:
+    """One copy of the recorded session, with ids and URIs made unique to it"""
+
+    def __init__(self, index: int, recording: List[RecordedMessage]):
+        self.index = index
+        self.tag = f'replay{index}'
+        self.steps: List[tuple] = []
+        self.received = collections.Counter()
+        self.condition = threading.Condition()
+
+        # Each incoming message waits for the outgoing messages recorded before it in closed-loop mode
+        expected = collections.Counter()
+        for recorded in recording:
+            if recorded.direction == RecordedMessage.INCOMING:
+                self.steps.append((recorded.offset, self._rewrite(recorded.message), collections.Counter(expected)))
+            else:
+                expected[self._get_label(recorded.message)] += 1
+
+    def record_received(self, message: dict):
+        with self.condition:
+            self.received[self._get_label(message)] += 1
+            self.condition.notify_all()
+
+    def wait_for(self, expected: collections.Counter, timeout: float) -> bool:
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: all(self.received[label] >= count for label, count in expected.items()),
+                timeout
+            )
+
+    def _rewrite(self, message: dict) -> dict:
+        message = json.loads(json.dumps(message))
+        if 'id' in message:
+            message['id'] = f'{self.tag}-{message["id"]}'
+        _tag_uris(message.get('params'), self.tag)
+        return message
+
+    @staticmethod
+    def _get_label(message: dict) -> str:
+        # Responses are counted together since their ids are unique, notifications are counted per method
+        return message.get('method') or 'response'
+
+
+def _tag_uris(value, tag: str):
+    """Appends the session tag to every URI in the params, so sessions do not share documents or connections"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in URI_KEYS and isinstance(item, str):
+                value[key] = f'{item}#{tag}'
+            else:
+                _tag_uris(item, tag)
+    elif isinstance(value, list):
+        for item in value:
+            _tag_uris(item, tag)
+
+
+def _find_session(message: dict, sessions: List[_Session]) -> Optional[_Session]:
+    message_id = message.get('id')
+    if isinstance(message_id, str) and message_id.startswith('replay'):
+        return sessions[int(message_id[len('replay'):message_id.index('-')])]
+    content = json.dumps(message.get('params'))
+    for session in sessions:
+        if f'#{session.tag}"' in content:
+            return session
+    return None
+
+
+class _Replay:
+    """Replays sessions against a server over a pair of pipes and times the responses"""
+    THREAD_PREFIX = 'Replay'
+
+    def __init__(self, recording: List[RecordedMessage], speed: float, concurrency: int, timeout: float, use_asyncio: bool):
+        self._speed = speed
+        self._use_asyncio = use_asyncio
+        self._timeout = timeout
+        self._sessions = [_Session(index, recording) for index in range(concurrency)]
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}
+        self._all_responded = threading.Event()
+        self._sent_all = False
+        self.latencies: Dict[str, LatencyHistogram] = collections.defaultdict(LatencyHistogram)
+        self.errors = collections.Counter()
+        self.request_count = 0
+        self.notification_count = 0
+        self.peak_thread_count = 0
+
+    def run(self) -> float:
+        server_input_read, server_input_write = os.pipe()
+        server_output_read, server_output_write = os.pipe()
+        self._input = io.open(server_input_write, 'wb', buffering=0, closefd=True)
+        server = _create_server(
+            io.open(server_input_read, 'rb', buffering=0),
+            io.open(server_output_write, 'wb', buffering=0),
+            None,
+            use_asyncio=self._use_asyncio
+        )
+        server.start()
+        response_thread = threading.Thread(
+            target=self._read_responses,
+            args=(io.open(server_output_read, 'rb', buffering=0),),
+            name=f'{self.THREAD_PREFIX}_Responses'
+        )
+        response_thread.daemon = True
+        response_thread.start()
+
+        start = time.perf_counter()
+        session_threads = [
+            threading.Thread(target=self._send_session, args=(session, start), name=f'{self.THREAD_PREFIX}_Session_{session.index}')
+            for session in self._sessions
+        ]
+        for thread in session_threads:
+            thread.daemon = True
+            thread.start()
+        for thread in session_threads:
+            thread.join()
+
+        with self._pending_lock:
+            self._sent_all = True
+            if not self._pending:
+                self._all_responded.set()
+        self._all_responded.wait(self._timeout)
+        elapsed = time.perf_counter() - start
+
+        with self._pending_lock:
+            for session_id, method, _ in self._pending.values():
+                self.errors[method] += 1
+        self._send({'jsonrpc': '2.0', 'id': 'replay-shutdown', 'method': 'shutdown', 'params': None})
+        self._input.close()
+        server.wait_for_exit()
+        response_thread.join(self._timeout)
+        return elapsed
+
+    def _send_session(self, session: _Session, start: float):
+        for offset, message, expected in session.steps:
+            if self._speed:
+                delay = start + offset / self._speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif not session.wait_for(expected, self._timeout):
+                print(f'  session {session.index} timed out waiting for {message.get("method")}', file=sys.stderr)
+
+            if 'id' in message:
+                with self._pending_lock:
+                    self._pending[message['id']] = (session.index, message['method'], time.perf_counter())
+                    self.request_count += 1
+            else:
+                with self._pending_lock:
+                    self.notification_count += 1
+            self._send(message)
+
+    def _send(self, message: dict):
+        content = json.dumps(message).encode('utf-8')
+        with self._write_lock:
+            self._input.write(b'Content-Length: ' + str(len(content)).encode('ascii') + b'\r\n\r\n' + content)
+
+    def _read_responses(self, stream):
+        reader = JSONRPCReader(stream)
+        while True:
+            try:
+                message = reader.read_message()
+            except (EOFError, ValueError):
+                return
+            received = time.perf_counter()
+            server_threads = sum(1 for thread in threading.enumerate() if not thread.name.startswith(self.THREAD_PREFIX))
+            self.peak_thread_count = max(self.peak_thread_count, server_threads - 1)
+            payload = message.dictionary
+            message_id = payload.get('id')
+            if message_id is not None and payload.get('method') is None:
+                with self._pending_lock:
+                    pending = self._pending.pop(message_id, None)
+                    if self._sent_all and not self._pending:
+                        self._all_responded.set()
+                if pending is not None:
+                    session_index, method, sent = pending
+                    self.latencies[method].record(received - sent)
+                    if 'error' in payload:
+                        self.errors[method] += 1
+
+            session = _find_session(payload, self._sessions)
+            if session is not None:
+                session.record_received(payload)
+
+
+def run(recording_path: str = SAMPLE_RECORDING_PATH, speed: float = 1.0, concurrency: int = 1, timeout: float = 60.0,
+        use_asyncio: bool = False):
+    with open(recording_path, encoding='utf-8') as recording_file:
+        recording = read_recording(recording_file)
+
+    replay = _Replay(recording, speed, concurrency, timeout, use_asyncio)
+    with mock.patch('psycopg2.connect', new=_StandInConnection):
+        elapsed = replay.run()
+
+    mode = 'asyncio event loop' if use_asyncio else 'thread pool'
+    print(f'Replayed {concurrency} x {os.path.basename(recording_path)} at speed {speed or "unpaced"} on the {mode} in {elapsed:.2f} s')
+    print(f'  {replay.request_count} requests, {replay.notification_count} notifications, '
+          f'{replay.request_count / elapsed:.0f} requests/s, peak {replay.peak_thread_count} server threads')
+    print(f'  {"method":<36} {"count":>7} {"errors":>7} {"p50 ms":>8} {"p99 ms":>8} {"max ms":>9}')
+    for method, histogram in sorted(replay.latencies.items()):
+        print(f'  {method:<36} {histogram.count:>7} {replay.errors[method]:>7} '
+              f'{histogram.get_percentile(50):>8.0f} {histogram.get_percentile(99):>8.0f} {histogram.get_percentile(100):>9.1f}')
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        print(f'  peak RSS {peak_rss_mb:.1f} MB')
+    return replay
+
+
+if __name__ == '__main__':
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    run(
+        positional[0] if positional else SAMPLE_RECORDING_PATH,
+        float(options.get('speed', 1)),
+        int(options.get('concurrency', 1)),
+        float(options.get('timeout', 60)),
+        '--asyncio' in sys.argv[1:]
+    )
@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark of reading a result set that arrives in batches into the spill file, downloading the
+batches one at a time versus concurrently. The batches come from a local fake chunk source that
+waits to simulate the download and then decodes a JSON payload, as Snowflake result chunks do.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_result_download [batch count] [rows per batch] [download ms]
+"""
+
+import json
+import os
+import sys
+import time
+
+from snowflake.connector.cursor import SnowflakeCursor
+
+from snowflaketoolsservice.query.file_storage_result_set import FileStorageResultSet
+
+
+COLUMN_COUNT = 4
+
+
+class _FakeChunk:
+    """Result batch that takes a fixed time to download and then decodes its rows from JSON"""
+
+    def __init__(self, payload: bytes, download_seconds: float):
+        self._payload = payload
+        self._download_seconds = download_seconds
+
+    def __iter__(self):
+        time.sleep(self._download_seconds)
+        return iter([tuple(row) for row in json.loads(self._payload)])
+
+
+class _FakeChunkCursor(SnowflakeCursor):
+    """Snowflake cursor over a result set split into fake chunks"""
+
+    # The base cursor isn't initialized, so the properties it reads its state from are replaced with attributes
+    connection = None
+    description = None
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.connection = None
+        self.description = [(f'column{index}', 25, None, -1, None, None, None) for index in range(COLUMN_COUNT)]
+
+    def get_result_batches(self):
+        return self._chunks
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def close(self):
+        pass
+
+
+def _create_chunks(batch_count: int, rows_per_batch: int, download_seconds: float):
+    return [
+        _FakeChunk(
+            json.dumps([[f'{batch}-{row}-{column}' for column in range(COLUMN_COUNT)] for row in range(rows_per_batch)]).encode('utf-8'),
+            download_seconds
+        )
+        for batch in range(batch_count)
+    ]
+
+
+def _time_read(chunks, parallelism: int) -> float:
+    result_set = FileStorageResultSet(0, 0, download_parallelism=parallelism)
+    try:
+        start = time.perf_counter()
+        result_set.read_result_to_end(_FakeChunkCursor(chunks))
+        return time.perf_counter() - start
+    finally:
+        os.remove(result_set._output_file_name)
+
+
+def run(batch_count: int = 32, rows_per_batch: int = 2000, download_ms: int = 50):
+    chunks = _create_chunks(batch_count, rows_per_batch, download_ms / 1000)
+    total_rows = batch_count * rows_per_batch
+
+    print(f'Reading {batch_count} batches of {rows_per_batch} rows that each take {download_ms} ms to download, best of 3')
+    baseline = None
+    for parallelism in (1, 2, 4, 8):
+        elapsed = min(_time_read(chunks, parallelism) for _ in range(3))
+        baseline = baseline or elapsed
+        print(f'  parallelism {parallelism:<3} {elapsed:8.3f} s {total_rows / elapsed:10.0f} rows/s {baseline / elapsed:6.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:4]])
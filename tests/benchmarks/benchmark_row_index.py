@@ -0,0 +1,81 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark of the memory and lookup time of indexing the rows of a spilled result set with a list
+of file offsets, as the result set did before, versus the block and row indexes.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_row_index [row count] [rows per block]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from snowflaketoolsservice.query.data_storage import ServiceBufferBlockIndex, ServiceBufferRowIndex
+
+
+# Bytes each row takes in the file, which spaces the offsets of the list as a real result set would
+ROW_SIZE = 60
+LOOKUP_COUNT = 1000000
+
+
+def _measure(build):
+    """Builds an index, returning it along with the bytes it holds on to"""
+    tracemalloc.start()
+    try:
+        index = build()
+        return index, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def _time_lookups(lookup, row_count: int) -> float:
+    step = max(row_count // LOOKUP_COUNT, 1)
+    start = time.perf_counter()
+    for row_id in range(0, row_count, step):
+        lookup(row_id)
+    return (time.perf_counter() - start) / len(range(0, row_count, step)) * 1000000000
+
+
+def _build_block_and_row_index(row_count: int, block_size: int):
+    block_index = ServiceBufferBlockIndex()
+    row_index = ServiceBufferRowIndex()
+    for first_row in range(0, row_count, block_size):
+        rows_in_block = min(block_size, row_count - first_row)
+        first_position = block_index.add_block(first_row * ROW_SIZE, rows_in_block)
+        row_index.extend_range(first_position, rows_in_block)
+    return block_index, row_index
+
+
+def _report(name: str, memory: int, row_count: int, lookup_ns: float):
+    print(f'  {name:<30} {memory / 1024 / 1024:9.2f} MB {memory / row_count:7.2f} bytes/row {lookup_ns:8.0f} ns/lookup')
+
+
+def run(row_count: int = 2000000, block_size: int = 10000):
+    print(f'Indexing {row_count} rows written in blocks of {block_size}')
+
+    offsets, memory = _measure(lambda: [row_id * ROW_SIZE for row_id in range(row_count)])
+    _report('list of file offsets', memory, row_count, _time_lookups(offsets.__getitem__, row_count))
+    del offsets
+
+    (block_index, row_index), memory = _measure(lambda: _build_block_and_row_index(row_count, block_size))
+    _report('block and row index', memory, row_count, _time_lookups(lambda row_id: block_index.locate(row_index[row_id]), row_count))
+
+    # Updating rows keeps the row index compact, removing a row moves it into an array of positions
+    tracemalloc.start()
+    for row_id in range(0, row_count, 1000):
+        row_index[row_id] = row_count + row_id
+    row_index_updated = tracemalloc.get_traced_memory()[0]
+    del row_index[0]
+    row_index_removed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    _report('  + update every 1000th row', memory + row_index_updated, row_count, _time_lookups(row_index.__getitem__, row_count - 1))
+    _report('  + remove a row', memory + row_index_removed, row_count, _time_lookups(row_index.__getitem__, row_count - 1))
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,81 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Micro-benchmark of encoding a subset response for the output stream.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_serialization [rows] [columns]
+"""
+
+import datetime
+import enum
+import json
+import sys
+import timeit
+
+import inflection
+
+from snowflaketoolsservice.hosting.json_message import JSONRPCMessage
+from snowflaketoolsservice.hosting.json_writer import JSONRPCWriter
+from snowflaketoolsservice.query.contracts import DbCellValue, ResultSetSubset, SubsetResult
+
+
+def _legacy_get_serializable_value(obj):
+    """The default function convert_to_dict used before serializers were cached per class"""
+    if isinstance(obj, enum.Enum):
+        return _legacy_get_serializable_value(obj.value)
+    try:
+        return {inflection.camelize(key, False): value for key, value in obj.__dict__.items()}
+    except AttributeError:
+        pass
+    try:
+        json.dumps(obj)
+        return obj
+    except BaseException:
+        return None
+
+
+def _legacy_encode(message: JSONRPCMessage) -> bytes:
+    """Encodes a response the way the writer did before serializers were cached per class"""
+    message_base = {
+        'jsonrpc': '2.0',
+        'result': json.loads(json.dumps(message.message_result, default=_legacy_get_serializable_value)),
+        'id': message.message_id
+    }
+    json_content = json.dumps(message_base, sort_keys=True)
+    return JSONRPCWriter.HEADER.format(len(json_content)).encode('ascii') + json_content.encode('UTF-8')
+
+
+def _create_subset_response(row_count: int, column_count: int) -> JSONRPCMessage:
+    timestamp = datetime.datetime(2020, 1, 1)
+    subset = ResultSetSubset()
+    subset.rows = [
+        [DbCellValue(f'value {row_id}-{column}', False, timestamp, row_id) for column in range(column_count)]
+        for row_id in range(row_count)
+    ]
+    subset.row_count = row_count
+    return JSONRPCMessage.create_response('1', SubsetResult(subset))
+
+
+def run(row_count: int = 500, column_count: int = 10, repeat: int = 5, number: int = 10):
+    message = _create_subset_response(row_count, column_count)
+    writer = JSONRPCWriter(None)
+    assert json.loads(_legacy_encode(message).partition(b'\r\n\r\n')[2]) == \
+        json.loads(writer.encode_message(message).partition(b'\r\n\r\n')[2])
+
+    print(f'Encoding a subset response of {row_count} rows x {column_count} columns, best of {repeat} x {number}')
+    results = {}
+    for name, encode in (('convert_to_dict round trip', _legacy_encode), ('cached serializers', writer.encode_message)):
+        best = min(timeit.repeat(lambda: encode(message), repeat=repeat, number=number)) / number
+        results[name] = best
+        print(f'  {name:<28} {best * 1000:8.2f} ms/response')
+
+    baseline = results['convert_to_dict round trip']
+    print(f'  speedup                      {baseline / results["cached serializers"]:8.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,65 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark of writing rows to the spill file and reading them back a block of one row at a time,
+as rows are when they're spilled one by one, versus in larger blocks.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_spill_format [row count] [rows per block]
+"""
+
+import os
+import sys
+import time
+
+from snowflaketoolsservice.parsers import datatypes
+from snowflaketoolsservice.query.contracts import DbColumn
+from snowflaketoolsservice.query.data_storage import service_buffer_file_stream as file_stream, ServiceBufferBlockIndex
+
+
+COLUMN_TYPES = (datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_DOUBLE, datatypes.DATATYPE_BOOL, datatypes.DATATYPE_TEXT)
+
+
+def _time_block_format(rows, columns_info, block_size):
+    file_name = file_stream.create_file()
+    try:
+        start = time.perf_counter()
+        block_index = ServiceBufferBlockIndex()
+        total_bytes_written = 0
+        with file_stream.get_writer(file_name) as writer:
+            for block_start in range(0, len(rows), block_size):
+                block = rows[block_start:block_start + block_size]
+                block_index.add_block(total_bytes_written, len(block))
+                total_bytes_written += writer.write_block(block, columns_info)
+        written = time.perf_counter()
+
+        with file_stream.get_reader(file_name) as reader:
+            for row_id in range(block_index.row_count):
+                block_offset, row_index = block_index.locate(row_id)
+                reader.read_block_row(block_offset, row_index, row_id, columns_info)
+        return written - start, time.perf_counter() - written, os.path.getsize(file_name)
+    finally:
+        os.remove(file_name)
+
+
+def run(row_count: int = 200000, block_size: int = 5000):
+    rows = [(index, f'name {index}', index / 7, index % 2 == 0, None if index % 10 == 0 else 'some longer description text') for index in range(row_count)]
+    columns_info = []
+    for data_type in COLUMN_TYPES:
+        column = DbColumn()
+        column.data_type = data_type
+        columns_info.append(column)
+
+    print(f'Writing and reading back {row_count} rows of {len(COLUMN_TYPES)} columns')
+    row_write, row_read, row_size = _time_block_format(rows, columns_info, 1)
+    print(f'  blocks of 1      rows   write {row_write:8.3f} s  read {row_read:8.3f} s  {row_size / 1024 / 1024:8.2f} MB')
+    block_write, block_read, block_size_bytes = _time_block_format(rows, columns_info, block_size)
+    print(f'  blocks of {block_size:<6} rows   write {block_write:8.3f} s  read {block_read:8.3f} s  {block_size_bytes / 1024 / 1024:8.2f} MB')
+    print(f'  speedup                 write {row_write / block_write:7.2f}x   read {row_read / block_read:7.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
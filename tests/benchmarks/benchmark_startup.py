@@ -0,0 +1,148 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Startup benchmark of the service. Starts the service as a separate process the way the client does
+and measures the time until the initialize request is answered, and until the first request to a
+lazily loaded service is answered. Then breaks down the time spent importing at startup by package,
+and reports how long importing each lazily loaded service takes when its first request arrives.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_startup [--runs=5]
+"""
+
+import collections
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple  # noqa
+
+from snowflaketoolsservice.hosting import LazyService
+from snowflaketoolsservice.hosting.json_message import JSONRPCMessage
+from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
+from snowflaketoolsservice.hosting.json_writer import JSONRPCWriter
+from snowflaketoolsservice.snowflaketoolsservice_main import _get_services
+
+
+MAIN_MODULE = 'snowflaketoolsservice.snowflaketoolsservice_main'
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _measure_first_responses(log_dir: str) -> Tuple[float, float]:
+    """
+    Starts the service and times its first responses
+    :return: Seconds from starting the process until initialize was answered, and until a request to
+        a lazily loaded service was answered after that
+    """
+    start_time = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', MAIN_MODULE, f'--log-dir={log_dir}'],
+        bufsize=0,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        cwd=REPO_ROOT
+    )
+    try:
+        writer = JSONRPCWriter(process.stdin)
+        reader = JSONRPCReader(process.stdout)
+
+        writer.send_message(JSONRPCMessage.create_request('1', 'initialize', {'capabilities': {}}))
+        reader.read_message()
+        initialize_time = time.perf_counter() - start_time
+
+        writer.send_message(JSONRPCMessage.create_request('2', 'tasks/listtasks', {'listActiveTasksOnly': True}))
+        reader.read_message()
+        lazy_request_time = time.perf_counter() - start_time
+
+        # The server stops without answering the shutdown request
+        writer.send_message(JSONRPCMessage.create_request('3', 'shutdown', None))
+        process.wait(10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return initialize_time, lazy_request_time
+
+
+def _import_times(modules: List[str]) -> List[Tuple[int, str]]:
+    """
+    Imports modules in a new process with -X importtime
+    :param modules: Modules to import, in order
+    :return: Microseconds each import took by itself, and the imported module, in the order imported
+    """
+    statement = ';'.join(f'import {module}' for module in modules)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE,
+        cwd=REPO_ROOT,
+        universal_newlines=True,
+        check=True
+    )
+
+    times = []
+    for line in process.stderr.splitlines():
+        # Each line looks like "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times.append((int(self_time), name.strip()))
+    return times
+
+
+def _startup_import_breakdown() -> Dict[str, int]:
+    """Gets the microseconds spent importing at startup, by top level package"""
+    baseline = {name for _, name in _import_times([])}
+    breakdown = collections.Counter()
+    for self_time, name in _import_times([MAIN_MODULE]):
+        if name not in baseline:
+            breakdown[name.split('.')[0]] += self_time
+    return breakdown
+
+
+def _deferred_import_times() -> Dict[str, int]:
+    """Gets the microseconds spent importing each lazily loaded service after the service has started"""
+    lazy_modules = [service.module_name for service in _get_services().values() if isinstance(service, LazyService)]
+    loaded = {name for _, name in _import_times([MAIN_MODULE])}
+
+    deferred_times = {}
+    for module in lazy_modules:
+        # Imports that startup or an earlier service already paid for are free
+        module_times = _import_times([MAIN_MODULE, module])
+        deferred_times[module] = sum(self_time for self_time, name in module_times if name not in loaded)
+    return deferred_times
+
+
+def run(runs: int) -> None:
+    with tempfile.TemporaryDirectory() as log_dir:
+        timings = [_measure_first_responses(log_dir) for _ in range(runs)]
+    initialize_times = [initialize_time for initialize_time, _ in timings]
+    lazy_request_times = [lazy_request_time for _, lazy_request_time in timings]
+
+    print(f'Started the service {runs} times')
+    print(f'  {"first response":<40} {"median ms":>10} {"min ms":>10}')
+    for label, times in (('initialize', initialize_times), ('tasks/listtasks after initialize', lazy_request_times)):
+        print(f'  {label:<40} {statistics.median(times) * 1000:>10.0f} {min(times) * 1000:>10.0f}')
+
+    breakdown = _startup_import_breakdown()
+    print(f'Imported at startup: {sum(breakdown.values()) / 1000:.0f} ms')
+    print(f'  {"package":<40} {"ms":>10}')
+    for package, package_time in breakdown.most_common(10):
+        print(f'  {package:<40} {package_time / 1000:>10.1f}')
+
+    print('Imported on first request to a lazily loaded service')
+    print(f'  {"module":<64} {"ms":>10}')
+    for module, module_time in _deferred_import_times().items():
+        print(f'  {module:<64} {module_time / 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    run_count = 5
+    for arg in sys.argv[1:]:
+        arg_parts = arg.split('=')
+        if arg_parts[0] == '--runs':
+            run_count = int(arg_parts[1])
+    run(run_count)
@@ -0,0 +1,56 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark of scrolling through a spilled result set a page at a time, opening the file for every
+page versus reading it through the memory mapped reader that stays open.
+
+Run from the root of the repo:
+    python -m tests.benchmarks.benchmark_subset [row count] [rows per page]
+"""
+
+import os
+import sys
+import time
+
+from snowflaketoolsservice.query.data_storage import service_buffer_file_stream as file_stream
+from snowflaketoolsservice.query.file_storage_result_set import FileStorageResultSet
+from tests.benchmarks.benchmark_fetch import _StubCursor
+
+
+class _ReopeningResultSet(FileStorageResultSet):
+    """Result set that opens the file for every page, as it did before the reader stayed open"""
+
+    def _get_reader(self):
+        return file_stream.get_reader(self._output_file_name)
+
+
+def _time_scroll(result_set: FileStorageResultSet, page_size: int) -> float:
+    start = time.perf_counter()
+    for page_start in range(0, result_set.row_count, page_size):
+        result_set.get_subset(page_start, min(page_start + page_size, result_set.row_count))
+    return time.perf_counter() - start
+
+
+def run(row_count: int = 20000, page_size: int = 50):
+    rows = [(index, f'name {index}', index / 7, index % 2 == 0, None if index % 10 == 0 else 'some longer description text') for index in range(row_count)]
+
+    print(f'Scrolling through {row_count} rows in pages of {page_size}')
+    timings = []
+    for name, result_set_class in (('open file per page', _ReopeningResultSet), ('memory mapped reader', FileStorageResultSet)):
+        result_set = result_set_class(0, 0)
+        try:
+            result_set.read_result_to_end(_StubCursor(rows))
+            elapsed = _time_scroll(result_set, page_size)
+            timings.append(elapsed)
+            print(f'  {name:<22} {elapsed:8.3f} s {row_count / page_size / elapsed:10.0f} pages/s')
+        finally:
+            result_set._reader = None
+            os.remove(result_set._output_file_name)
+    print(f'  speedup                {timings[0] / timings[1]:8.2f}x')
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,68 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test connection.connection_metadata"""
+
+import gc
+import unittest
+from unittest import mock
+
+from snowflaketoolsservice.connection.connection_metadata import _cache, get_connection_metadata, parse_server_version
+from tests.utils import MockConnection
+
+
+class TestConnectionMetadata(unittest.TestCase):
+    """Methods for testing the connection metadata cache"""
+
+    def test_metadata_read_once_per_connection(self):
+        # Setup: Create a connection to a cloud server
+        connection = MockConnection(dsn_parameters={'host': 'myserver.database.azure.com', 'dbname': 'postgres', 'user': 'postgres'})
+        connection.get_dsn_parameters = mock.Mock(wraps=connection.get_dsn_parameters)
+        connection.get_parameter_status = mock.Mock(return_value='9.6.2')
+
+        # If: I get the metadata of the connection several times
+        metadata = get_connection_metadata(connection)
+        server_versions = [get_connection_metadata(connection).server_version for _ in range(3)]
+
+        # Then:
+        # ... The metadata should have been read from the connection once, and shared
+        self.assertIs(get_connection_metadata(connection), metadata)
+        connection.get_dsn_parameters.assert_called_once()
+        connection.get_parameter_status.assert_called_once_with('server_version')
+
+        # ... The metadata should describe the connection
+        self.assertListEqual(server_versions, ['9.6.2'] * 3)
+        self.assertEqual(metadata.dsn_parameters['dbname'], 'postgres')
+        self.assertTupleEqual(metadata.version, (9, 6, 2))
+        self.assertTrue(metadata.is_cloud)
+
+        # ... Other connections should get metadata of their own
+        other_connection = MockConnection(dsn_parameters={'host': 'localhost'})
+        self.assertIsNot(get_connection_metadata(other_connection), metadata)
+        self.assertFalse(get_connection_metadata(other_connection).is_cloud)
+
+    def test_metadata_dropped_with_connection(self):
+        # Setup: Get the metadata of a connection
+        connection = MockConnection(dsn_parameters={'host': 'localhost'})
+        get_connection_metadata(connection)
+        self.assertIn(connection, _cache)
+        cache_size = len(_cache)
+
+        # If: The connection is released
+        del connection
+        gc.collect()
+
+        # Then: Its metadata should have been dropped from the cache
+        self.assertEqual(len(_cache), cache_size - 1)
+
+    def test_parse_server_version(self):
+        # If: I parse server version numbers
+        # Then: They should be split into major, minor and patch versions
+        self.assertTupleEqual(parse_server_version(90602), (9, 6, 2))
+        self.assertTupleEqual(parse_server_version('100216'), (10, 2, 16))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test connection.ConnectionPool"""
+
+import threading
+import unittest
+from unittest import mock
+
+import psycopg2.extensions
+
+from snowflaketoolsservice.connection.connection_pool import ConnectionPool, ConnectionPoolExhaustedError, ConnectTimeoutError
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+import tests.utils as utils
+
+
+OPTIONS = {'host': 'myserver', 'dbname': 'postgres', 'user': 'postgres', 'password': 'password'}
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Methods for testing the connection pool"""
+
+    def setUp(self):
+        self.connect_mock = mock.Mock(side_effect=lambda **kwargs: _get_mock_connection())
+        self.patcher = mock.patch('psycopg2.connect', new=self.connect_mock)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_checkin_and_reuse(self):
+        # Setup: Check out a connection and check it back in
+        pool = ConnectionPool()
+        connection = pool.checkout(OPTIONS, 'uri1')
+        pool.checkin(connection)
+
+        # If: I check out a connection with equivalent options for another owner
+        equivalent_options = {'user': 'postgres', 'password': 'password', 'host': 'MyServer', 'dbname': 'postgres', 'port': ''}
+        reused_connection = pool.checkout(equivalent_options, 'uri2')
+
+        # Then:
+        # ... The connection should have been reset and reused instead of opening another one
+        self.assertIs(reused_connection, connection)
+        connection.reset.assert_called_once()
+        self.connect_mock.assert_called_once_with(connect_timeout=30, **OPTIONS)
+        self.assertDictEqual(pool.get_statistics(), {
+            'partitions': 1, 'idle': 0, 'checkedOut': 1, 'created': 1, 'reused': 1, 'evicted': 0, 'suspectedLeaks': 0,
+            'abandonedConnects': 0
+        })
+
+        # ... Different options should get a connection of their own
+        other_connection = pool.checkout(dict(OPTIONS, dbname='other'), 'uri3')
+        self.assertIsNot(other_connection, connection)
+        self.assertEqual(self.connect_mock.call_count, 2)
+
+    def test_checkin_closes_unusable_connections(self):
+        # Setup: Check out connections that are busy, can't be reset, or were not opened by the pool
+        pool = ConnectionPool()
+        busy_connection = pool.checkout(OPTIONS, 'uri1')
+        busy_connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+        broken_connection = pool.checkout(OPTIONS, 'uri2')
+        broken_connection.reset.side_effect = psycopg2.OperationalError()
+        foreign_connection = _get_mock_connection()
+
+        # If: I check the connections in
+        for connection in (busy_connection, broken_connection, foreign_connection):
+            pool.checkin(connection)
+
+        # Then: Each connection should have been closed instead of pooled
+        for connection in (busy_connection, broken_connection, foreign_connection):
+            connection.close.assert_called_once()
+        statistics = pool.get_statistics()
+        self.assertEqual(statistics['partitions'], 0)
+        self.assertEqual(statistics['idle'], 0)
+
+    def test_checkout_skips_closed_idle_connections(self):
+        # Setup: Pool a connection that the server closes while it is idle
+        pool = ConnectionPool()
+        connection = pool.checkout(OPTIONS)
+        pool.checkin(connection)
+        connection.closed = 1
+
+        # If: I check out a connection with the same options
+        new_connection = pool.checkout(OPTIONS)
+
+        # Then: A new connection should have been opened
+        self.assertIsNot(new_connection, connection)
+        self.assertEqual(self.connect_mock.call_count, 2)
+        self.assertEqual(pool.get_statistics()['checkedOut'], 1)
+
+    def test_checkout_exhausted(self):
+        # Setup: Create a pool that allows a single connection and check it out
+        pool = ConnectionPool(max_size=1, checkout_timeout=0.1)
+        pool.checkout(OPTIONS, 'uri1')
+
+        # If: I check out another connection with the same options
+        # Then: The checkout should time out
+        with self.assertRaises(ConnectionPoolExhaustedError):
+            pool.checkout(OPTIONS, 'uri2')
+
+    def test_checkout_waits_for_checkin(self):
+        # Setup: Create a pool that allows a single connection and check it out
+        pool = ConnectionPool(max_size=1, checkout_timeout=5)
+        connection = pool.checkout(OPTIONS, 'uri1')
+
+        # If: Another owner checks out a connection while the first is checked back in
+        threading.Timer(0.1, pool.checkin, (connection,)).start()
+        reused_connection = pool.checkout(OPTIONS, 'uri2')
+
+        # Then: The waiting checkout should have gotten the returned connection
+        self.assertIs(reused_connection, connection)
+        self.connect_mock.assert_called_once()
+
+    def test_checkout_canceled_while_waiting(self):
+        # Setup: Create a pool that allows a single connection and check it out
+        pool = ConnectionPool(max_size=1, checkout_timeout=5)
+        pool.checkout(OPTIONS, 'uri1')
+
+        # If: A checkout waiting for a connection is canceled
+        cancellation_token = CancellationToken()
+        threading.Timer(0.1, cancellation_token.cancel).start()
+
+        # Then: The checkout should stop waiting
+        with self.assertRaises(OperationCanceledError):
+            pool.checkout(OPTIONS, 'uri2', cancellation_token)
+
+    def test_connect_timeout(self):
+        # Setup: Create a pool with a short connect timeout, and make connecting hang
+        pool = ConnectionPool(max_size=1, connect_timeout=0.1)
+        connect_event = threading.Event()
+        hung_connection = _get_mock_connection()
+
+        def hanging_connect(**kwargs):
+            connect_event.wait(5)
+            return hung_connection
+        self.connect_mock.side_effect = hanging_connect
+
+        # If: I check out a connection
+        # Then: The checkout should give up at the deadline, with libpq told to give up too
+        with self.assertRaises(ConnectTimeoutError):
+            pool.checkout(OPTIONS)
+        self.assertEqual(self.connect_mock.call_args[1]['connect_timeout'], ConnectionPool.MIN_LIBPQ_CONNECT_TIMEOUT)
+
+        # If: The abandoned connect completes after all
+        connect_event.set()
+        pool._connect_executor.shutdown(wait=True)
+
+        # Then: Its connection should have been closed, and its slot released
+        hung_connection.close.assert_called_once()
+        self.assertEqual(pool.get_statistics()['abandonedConnects'], 1)
+        self.assertEqual(pool._sizes, {})
+
+    def test_connect_canceled(self):
+        # Setup: Make connecting hang
+        pool = ConnectionPool(checkout_timeout=5, connect_timeout=5)
+        connect_event = threading.Event()
+        self.connect_mock.side_effect = lambda **kwargs: connect_event.wait(5) and _get_mock_connection()
+
+        # If: The checkout is canceled while connecting
+        cancellation_token = CancellationToken()
+        threading.Timer(0.1, cancellation_token.cancel).start()
+
+        # Then: The checkout should stop right away instead of waiting for the connect
+        with self.assertRaises(OperationCanceledError):
+            pool.checkout(OPTIONS, 'uri1', cancellation_token)
+        self.assertFalse(connect_event.is_set())
+        connect_event.set()
+
+    def test_failed_connect_releases_slot(self):
+        # Setup: Create a pool that allows a single connection, whose first connection attempt fails
+        pool = ConnectionPool(max_size=1, checkout_timeout=0.1)
+        self.connect_mock.side_effect = [psycopg2.OperationalError(), _get_mock_connection()]
+
+        # If: I check out a connection after the failed attempt
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.checkout(OPTIONS)
+        connection = pool.checkout(OPTIONS)
+
+        # Then: The failed attempt should not count towards the size of the pool
+        self.assertIsNotNone(connection)
+
+    def test_evict_idle(self):
+        # Setup: Pool three idle connections with a minimum size of one, and make two of them stale
+        pool = ConnectionPool(min_size=1, idle_timeout=60)
+        connections = [pool.checkout(OPTIONS) for _ in range(3)]
+        for connection in connections:
+            pool.checkin(connection)
+        for pooled in pool._idle[ConnectionPool.get_key(OPTIONS)]:
+            pooled.last_used_time -= 120
+
+        # If: I evict idle connections
+        evicted = pool.evict_idle()
+
+        # Then: All but the minimum number of connections should have been closed, oldest first
+        self.assertEqual(evicted, 2)
+        connections[0].close.assert_called_once()
+        connections[1].close.assert_called_once()
+        connections[2].close.assert_not_called()
+        self.assertEqual(pool.get_statistics()['idle'], 1)
+
+    def test_find_leaks(self):
+        # Setup: Check out a connection from a pool that reports every checked out connection
+        logger = utils.get_mock_logger()
+        pool = ConnectionPool(leak_threshold=-1, logger=logger)
+        pool.checkout(OPTIONS, 'uri1 (Query)')
+
+        # If: I look for leaks twice
+        leaks = pool.find_leaks()
+        pool.find_leaks()
+
+        # Then: The connection should have been reported, but only logged once
+        self.assertEqual(len(leaks), 1)
+        self.assertEqual(leaks[0].owner, 'uri1 (Query)')
+        logger.warn.assert_called_once()
+        self.assertEqual(pool.get_statistics()['suspectedLeaks'], 1)
+
+    def test_prewarm(self):
+        # Setup: Create a pool that allows two connections
+        pool = ConnectionPool(max_size=2)
+
+        # If: I prewarm two connections, and then a third
+        prewarmed = [pool.prewarm(OPTIONS), pool.prewarm(OPTIONS)]
+        full_prewarmed = pool.prewarm(OPTIONS)
+
+        # Then:
+        # ... The first two connections should have been left idle and the third skipped
+        self.assertListEqual(prewarmed, [True, True])
+        self.assertFalse(full_prewarmed)
+        self.assertEqual(self.connect_mock.call_count, 2)
+        self.assertEqual(pool.get_statistics()['idle'], 2)
+
+        # ... Checking out a connection should reuse a prewarmed connection
+        pool.checkout(OPTIONS)
+        self.assertEqual(self.connect_mock.call_count, 2)
+        self.assertEqual(pool.get_statistics()['reused'], 1)
+
+    def test_close(self):
+        # Setup: Create a pool with an idle and a checked out connection
+        pool = ConnectionPool()
+        idle_connection = pool.checkout(OPTIONS)
+        checked_out_connection = pool.checkout(OPTIONS)
+        pool.checkin(idle_connection)
+
+        # If: I close the pool and then check in the other connection
+        pool.close()
+        pool.checkin(checked_out_connection)
+
+        # Then: Both connections should have been closed and new checkouts should fail
+        idle_connection.close.assert_called_once()
+        checked_out_connection.close.assert_called_once()
+        with self.assertRaises(RuntimeError):
+            pool.checkout(OPTIONS)
+
+
+def _get_mock_connection():
+    connection = mock.Mock()
+    connection.closed = 0
+    connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    return connection
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,8 @@
 
 """Test connection.ConnectionService"""
 
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import Mock, MagicMock
@@ -16,7 +18,8 @@ from snowflaketoolsservice.connection.contracts import (
     DisconnectRequestParams, ListDatabasesParams, ConnectionCompleteParams, CancelConnectParams,
     ChangeDatabaseRequestParams
 )
-from snowflaketoolsservice.connection import ConnectionInfo, ConnectionService
+from snowflaketoolsservice.connection import ConnectionInfo, ConnectionRegistry, ConnectionService
+from snowflaketoolsservice.connection.connection_service import KEEPALIVE_OPTIONS
 import snowflaketoolsservice.connection.connection_service
 from snowflaketoolsservice.utils import constants
 from snowflaketoolsservice.utils.cancellation import CancellationToken
@@ -336,6 +339,30 @@ class TestConnectionService(unittest.TestCase):
         mock_connection_1.close.assert_not_called()
         self.assertFalse(response)
 
+    def test_disconnect_returns_connection_to_pool(self):
+        """Test that a disconnected connection is reused by the next owner URI that connects with the same options"""
+        # Set up the parameters for two owner URIs with the same connection details
+        connection_details = ConnectionDetails.from_data({
+            'host': 'myserver',
+            'dbname': 'postgres',
+            'user': 'postgres'
+        })
+        mock_connection = MockConnection(dsn_parameters=connection_details.options)
+        mock_connection.reset = Mock()
+
+        with mock.patch('psycopg2.connect', new=mock.Mock(return_value=mock_connection)) as mock_psycopg2_connect:
+            # If: I connect one owner URI, disconnect it, and connect another
+            self.connection_service.connect(ConnectRequestParams(connection_details, 'uri1', ConnectionType.QUERY))
+            self.assertTrue(self.connection_service.disconnect('uri1', None))
+            response = self.connection_service.connect(ConnectRequestParams(connection_details, 'uri2', ConnectionType.QUERY))
+
+            # Then: The second owner URI should have reused the reset connection instead of opening another
+            mock_psycopg2_connect.assert_called_once()
+        mock_connection.reset.assert_called_once()
+        mock_connection.close.assert_not_called()
+        self.assertIs(self.connection_service.get_connection('uri2', ConnectionType.QUERY), mock_connection)
+        self.assertIsNotNone(response.connection_id)
+
     def test_handle_disconnect_request_unknown_uri(self):
         """Test that the handle_disconnect_request method returns false when the given URI is unknown"""
         # Setup: Create a mock request context
@@ -392,6 +419,64 @@ class TestConnectionService(unittest.TestCase):
         # ... An error should not have been called
         rc.send_error.assert_not_called()
 
+    def test_prewarm_connections(self):
+        """Test that a successful editor connection opens the connection types of the prewarm policy"""
+        # Setup: Configure a prewarm policy, and mock connecting and the pool
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection.prewarm_connection_types = ['Query', 'Intellisense', 'Default', 'Unknown']
+        connect_response = ConnectionCompleteParams()
+        self.connection_service.connect = Mock(return_value=connect_response)
+        self.connection_service._pool.prewarm = Mock(return_value=True)
+        params: ConnectRequestParams = ConnectRequestParams.from_dict({
+            'ownerUri': 'someUri',
+            'type': ConnectionType.DEFAULT,
+            'connection': {'options': {'host': 'myserver', 'dbname': 'somedb', 'user': 'someuser'}}
+        })
+
+        # If: I connect the editor
+        self.connection_service._connect_and_respond(utils.MockRequestContext(), params)
+
+        # Then:
+        # ... The query connection should have been opened for the same owner URI
+        self.assertEqual(self.connection_service.connect.call_count, 2)
+        query_params = self.connection_service.connect.call_args_list[1][0][0]
+        self.assertEqual(query_params.owner_uri, 'someUri')
+        self.assertIs(query_params.type, ConnectionType.QUERY)
+        self.assertIs(query_params.connection, params.connection)
+
+        # ... An idle connection should have been left in the pool for intellisense, and the other types ignored
+        self.connection_service._pool.prewarm.assert_called_once_with(
+            dict(KEEPALIVE_OPTIONS, host='myserver', dbname='somedb', user='someuser'))
+
+    def test_prewarm_connections_skipped(self):
+        """Test that connections are not prewarmed without a policy, or when the editor failed to connect"""
+        # Setup: Mock connecting and the pool
+        self.connection_service.connect = Mock(return_value=ConnectionCompleteParams())
+        self.connection_service._pool.prewarm = Mock(return_value=True)
+        params: ConnectRequestParams = ConnectRequestParams.from_dict({
+            'ownerUri': 'someUri',
+            'type': ConnectionType.DEFAULT,
+            'connection': {'options': {'host': 'myserver'}}
+        })
+
+        # If: I connect the editor without a prewarm policy
+        self.connection_service._connect_and_respond(utils.MockRequestContext(), params)
+
+        # Then: Only the editor connection should have been opened
+        self.connection_service.connect.assert_called_once()
+
+        # If: I configure a prewarm policy, but the editor fails to connect
+        configuration = self.connection_service._service_provider[constants.WORKSPACE_SERVICE_NAME].configuration
+        configuration.pgsql.connection.prewarm_connection_types = ['Query', 'Intellisense']
+        failed_response = ConnectionCompleteParams()
+        failed_response.error_message = 'error'
+        self.connection_service.connect = Mock(return_value=failed_response)
+        self.connection_service._connect_and_respond(utils.MockRequestContext(), params)
+
+        # Then: No other connections should have been opened
+        self.connection_service.connect.assert_called_once()
+        self.connection_service._pool.prewarm.assert_not_called()
+
     def test_handle_database_change_request_with_empty_connection_info_for_false(self):
         """Test that the handle_connect_request method kicks off a new thread to do the connection"""
         # Setup: Create a mock request context to handle output
@@ -514,6 +599,167 @@ class TestConnectionService(unittest.TestCase):
             self.assertEqual(connection, mock_connection)
             mock_psycopg2_connect.assert_called_once()
 
+    def test_get_connection_replaces_lost_connection(self):
+        """Test that get_connection replaces a connection that was lost instead of returning it"""
+        # Setup: Add a query connection that was lost, with a setting changed in its session
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'somedb'}))
+        lost_connection = MockConnection()
+        lost_connection.close()
+        connection_info.add_connection(ConnectionType.QUERY, lost_connection)
+        connection_info.set_session_settings(ConnectionType.QUERY, [('search_path', 'myschema')])
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+
+        # If: I get the connection
+        new_cursor = MockCursor(None)
+        new_connection = MockConnection(cursor=new_cursor)
+        with mock.patch('psycopg2.connect', new=mock.Mock(return_value=new_connection)) as mock_psycopg2_connect:
+            connection = self.connection_service.get_connection('someuri', ConnectionType.QUERY)
+
+        # Then:
+        # ... A new connection to the same database should have been returned in its place
+        self.assertIs(connection, new_connection)
+        self.assertIs(connection_info.get_connection(ConnectionType.QUERY), new_connection)
+        self.assertEqual(mock_psycopg2_connect.call_args[1]['dbname'], 'somedb')
+        self.assertEqual(self.connection_service.get_statistics()['reconnects'], 1)
+
+        # ... The session settings should have been restored
+        new_cursor.execute.assert_called_once_with('SELECT set_config(%s, %s, false)', ('search_path', 'myschema'))
+
+    def test_check_connections(self):
+        """Test that checking connections probes idle connections and replaces the lost ones"""
+        # Setup: Add a live idle connection, a busy connection and a connection whose server went away
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'somedb'}))
+        live_connection = MockConnection(cursor=MockCursor([('search_path', 'myschema')]))
+        busy_connection = MockConnection(cursor=MockCursor(None))
+        busy_connection.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+        lost_cursor = MockCursor(None)
+        lost_cursor.execute.side_effect = psycopg2.OperationalError('server closed the connection unexpectedly')
+        lost_connection = MockConnection(cursor=lost_cursor)
+        connection_info.add_connection(ConnectionType.DEFAULT, live_connection)
+        connection_info.add_connection(ConnectionType.QUERY, busy_connection)
+        connection_info.add_connection(ConnectionType.EDIT, lost_connection)
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+
+        # If: I check the connections
+        new_connection = MockConnection()
+        with mock.patch('psycopg2.connect', new=mock.Mock(return_value=new_connection)):
+            reconnect_count = self.connection_service.check_connections()
+
+        # Then:
+        # ... Only the lost connection should have been replaced
+        self.assertEqual(reconnect_count, 1)
+        self.assertIs(connection_info.get_connection(ConnectionType.DEFAULT), live_connection)
+        self.assertIs(connection_info.get_connection(ConnectionType.QUERY), busy_connection)
+        self.assertIs(connection_info.get_connection(ConnectionType.EDIT), new_connection)
+        lost_connection.close.assert_called_once()
+
+        # ... The busy connection should not have been probed, and the settings of the live connection remembered
+        busy_connection.cursor.assert_not_called()
+        self.assertListEqual(connection_info.get_session_settings(ConnectionType.DEFAULT), [('search_path', 'myschema')])
+
+    def test_check_connections_skips_connections_in_use(self):
+        """Test that checking connections leaves connections that are marked in use alone until they are idle"""
+        # Setup: Add an idle connection that is marked in use, as it is while a query runs on it
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver'}))
+        connection = MockConnection(cursor=MockCursor([('search_path', 'myschema')]))
+        connection_info.add_connection(ConnectionType.QUERY, connection)
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+        self.connection_service.mark_in_use(connection)
+
+        # If: I check the connections
+        self.connection_service.check_connections()
+
+        # Then: The connection should not have been probed
+        connection.get_transaction_status.assert_not_called()
+        connection.cursor.assert_not_called()
+
+        # If: The connection is marked idle and I check the connections again
+        self.connection_service.mark_idle(connection)
+        self.connection_service.check_connections()
+
+        # Then: The connection should have been probed
+        connection.cursor.assert_called_once()
+
+    def test_use_connection(self):
+        """Test that a connection used by a service is skipped by checking connections until the service is done with it"""
+        # Setup: Add an idle connection
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver'}))
+        connection = MockConnection(cursor=MockCursor([('search_path', 'myschema')]))
+        connection_info.add_connection(ConnectionType.DEFAULT, connection)
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+
+        # If: I check the connections while the connection is used
+        with self.connection_service.use_connection('someuri', ConnectionType.DEFAULT) as used_connection:
+            self.connection_service.check_connections()
+
+            # Then: The connection should have been handed out without being probed
+            self.assertIs(used_connection, connection)
+            connection.cursor.assert_not_called()
+
+        # If: I check the connections once the connection is no longer used
+        self.connection_service.check_connections()
+
+        # Then: The connection should have been probed
+        connection.cursor.assert_called_once()
+
+    def test_check_connections_races_query(self):
+        """Test that a query marking its connection in use waits for a probe of the connection that is already running"""
+        # Setup: Add a connection whose probe blocks until it is released
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver'}))
+        cursor = MockCursor([('search_path', 'myschema')])
+        connection = MockConnection(cursor=cursor)
+        connection_info.add_connection(ConnectionType.QUERY, connection)
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+        probe_started = threading.Event()
+        finish_probe = threading.Event()
+        events = []
+
+        def probe(*args):
+            probe_started.set()
+            finish_probe.wait(5)
+            events.append('probe')
+        cursor.execute.side_effect = probe
+
+        def run_query():
+            self.connection_service.mark_in_use(connection)
+            events.append('query')
+            self.connection_service.mark_idle(connection)
+
+        # If: A query starts on the connection while it is being probed
+        check_thread = threading.Thread(target=self.connection_service.check_connections)
+        check_thread.start()
+        self.assertTrue(probe_started.wait(5))
+        query_thread = threading.Thread(target=run_query)
+        query_thread.start()
+
+        # Then:
+        # ... The query should wait for the probe
+        query_thread.join(0.2)
+        self.assertTrue(query_thread.is_alive())
+
+        # ... And run once the probe is done
+        finish_probe.set()
+        check_thread.join(5)
+        query_thread.join(5)
+        self.assertListEqual(events, ['probe', 'query'])
+
+    def test_check_connections_reconnect_fails(self):
+        """Test that a lost connection that can't be replaced is removed, so it is reconnected on next use"""
+        # Setup: Add a connection that was lost
+        connection_info = ConnectionInfo('someuri', ConnectionDetails.from_data({'host': 'myserver'}))
+        lost_connection = MockConnection()
+        lost_connection.close()
+        connection_info.add_connection(ConnectionType.QUERY, lost_connection)
+        self.connection_service.owner_to_connection_map['someuri'] = connection_info
+
+        # If: I check the connections while the server can't be reached
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=psycopg2.OperationalError('could not connect'))):
+            reconnect_count = self.connection_service.check_connections()
+
+        # Then: The lost connection should have been removed
+        self.assertEqual(reconnect_count, 0)
+        self.assertFalse(connection_info.has_connection(ConnectionType.QUERY))
+
     def test_get_connection_for_invalid_uri(self):
         """Test that get_connection raises an error if the given URI is unknown"""
         with self.assertRaises(ValueError):
@@ -676,6 +922,72 @@ class TestConnectionService(unittest.TestCase):
         self.assertIsNone(actual_connection_info)
 
 
+class TestConnectionRegistry(unittest.TestCase):
+    """Methods for testing the registry of connections by owner URI"""
+
+    def test_get_or_create(self):
+        # Setup: Create a registry
+        registry = ConnectionRegistry()
+        details = ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'db1'})
+
+        # If: I get or create the connection info of an owner URI twice with the same options
+        connection_info, replaced = registry.get_or_create('uri1', details)
+        same_connection_info, same_replaced = registry.get_or_create('uri1', ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'db1'}))
+
+        # Then: The connection info should have been created once
+        self.assertIsNone(replaced)
+        self.assertIs(same_connection_info, connection_info)
+        self.assertIsNone(same_replaced)
+        self.assertIs(registry['uri1'], connection_info)
+
+        # If: I get or create it with other options
+        new_connection_info, replaced = registry.get_or_create('uri1', ConnectionDetails.from_data({'host': 'myserver', 'dbname': 'db2'}))
+
+        # Then: It should have been replaced, and the replaced connection info returned
+        self.assertIsNot(new_connection_info, connection_info)
+        self.assertIs(replaced, connection_info)
+        self.assertEqual(len(registry), 1)
+        self.assertListEqual(registry.values(), [new_connection_info])
+
+    def test_get_or_create_concurrently(self):
+        # Setup: Create a registry with a single stripe, so that every owner URI shares a lock
+        registry = ConnectionRegistry(stripe_count=1)
+        details = ConnectionDetails.from_data({'host': 'myserver'})
+        results = []
+
+        # If: Many threads get or create the connection info of the same owner URIs at once
+        threads = [threading.Thread(target=lambda uri: results.append(registry.get_or_create(uri, details)[0]), args=(f'uri{i % 2}',))
+                   for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then: Each owner URI should have gotten a single connection info
+        self.assertEqual(len({id(connection_info) for connection_info in results}), 2)
+        self.assertEqual(len(registry), 2)
+
+    def test_disconnect_concurrently(self):
+        # Setup: Create a connection service with a connection for an owner URI
+        connection_service = ConnectionService()
+        connection_service._pool.checkin = Mock()
+        connection_info, _ = connection_service.owner_to_connection_map.get_or_create('uri1', ConnectionDetails.from_data({}))
+        connection_info.add_connection(ConnectionType.DEFAULT, MockConnection())
+
+        # If: The owner URI is disconnected from several threads at once
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(connection_service.disconnect('uri1', ConnectionType.DEFAULT)))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then: The connection should have been returned to the pool once
+        connection_service._pool.checkin.assert_called_once()
+        self.assertEqual(results.count(True), 1)
+
+
 class TestConnectionCancellation(unittest.TestCase):
     """Methods for testing connection cancellation requests"""
 
@@ -729,10 +1041,20 @@ class TestConnectionCancellation(unittest.TestCase):
         self.assertFalse((self.owner_uri, self.connection_type) in self.connection_service._cancellation_map)
 
     def test_connecting_cancels_previous_connection(self):
-        """Test that opening a new connection while one is ongoing cancels the previous connection"""
+        """Test that opening a connection with other options while one is ongoing cancels the previous connection"""
         # Set up psycopg2's connection method to kick off a new connection. This simulates the case
         # where a call to psycopg2.connect is taking a long time and another connection request for
-        # the same URI and connection type comes in and finishes before the current connection
+        # the same URI and connection type, but to another database, comes in and finishes before the current connection
+        other_params: ConnectRequestParams = ConnectRequestParams.from_dict({
+            'ownerUri': self.owner_uri,
+            'type': self.connection_type,
+            'connection': {
+                'options': {
+                    'dbname': 'otherdb'
+                }
+            }
+        })
+        second_connect_done = threading.Event()
         with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=self._mock_connect)) as mock_psycopg2_connect:
             old_mock_connect = mock_psycopg2_connect.side_effect
 
@@ -740,7 +1062,8 @@ class TestConnectionCancellation(unittest.TestCase):
                 """Mock connection method to store the current cancellation token, and kick off another connection"""
                 mock_connection = self._mock_connect()
                 mock_psycopg2_connect.side_effect = old_mock_connect
-                self.connection_service.connect(self.connect_params)
+                self.connection_service.connect(other_params)
+                second_connect_done.set()
                 return mock_connection
 
             mock_psycopg2_connect.side_effect = first_mock_connect
@@ -748,6 +1071,9 @@ class TestConnectionCancellation(unittest.TestCase):
             # If I attempt to connect, and then kick off a new connection while connecting
             response = self.connection_service.connect(self.connect_params)
 
+            # The canceled connection returns without waiting for its connect to finish
+            self.assertTrue(second_connect_done.wait(5))
+
         # Then the connection should have been canceled and returned none
         self.assertIsNone(response)
 
@@ -756,6 +1082,31 @@ class TestConnectionCancellation(unittest.TestCase):
         self.assertTrue(self.token_store[0].canceled)
         self.assertFalse(self.token_store[1].canceled)
 
+    def test_duplicate_connects_collapsed(self):
+        """Test that connecting again while the same connection is being opened waits for that attempt instead of making another"""
+        # Set up psycopg2's connection method to kick off the same connection while connecting
+        duplicate_responses = []
+
+        def duplicate_mock_connect(**kwargs):
+            """Mock connection method that requests the same connection from another thread, and waits for it to be waiting"""
+            thread = threading.Thread(target=lambda: duplicate_responses.append(self.connection_service.connect(self.connect_params)))
+            thread.start()
+            thread.join(0.2)
+            return self._mock_connect()
+
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=duplicate_mock_connect)) as mock_psycopg2_connect:
+            # If I attempt to connect, and the same connection is requested while connecting
+            response = self.connection_service.connect(self.connect_params)
+            for _ in range(50):
+                if duplicate_responses:
+                    break
+                time.sleep(0.1)
+
+        # Then psycopg2 should only have been called once, and both requests should have gotten the same response
+        mock_psycopg2_connect.assert_called_once()
+        self.assertIsNone(response.error_message)
+        self.assertListEqual(duplicate_responses, [response])
+
     def test_newer_cancellation_token_not_removed(self):
         """Test that a newer connection's cancellation token is not removed after a connection completes"""
         # Set up psycopg2's connection method to simulate a new connection by overriding the
@@ -782,6 +1133,32 @@ class TestConnectionCancellation(unittest.TestCase):
         # And the current cancellation token should not have been removed
         self.assertIs(self.connection_service._cancellation_map[cancellation_key], cancellation_token)
 
+    def test_disconnect_cancels_connection_being_opened(self):
+        """Test that disconnecting while a connection is being opened, such as by a prewarm, returns the connection to the pool"""
+        # Set up the pool to disconnect the owner URI once it has checked out the connection
+        pool = self.connection_service._pool
+        checkout = pool.checkout
+
+        def disconnect_checkout(*args):
+            connection = checkout(*args)
+            self.connection_service.disconnect(self.owner_uri, None)
+            return connection
+
+        pool.checkout = mock.Mock(side_effect=disconnect_checkout)
+        pool.checkin = mock.Mock(wraps=pool.checkin)
+        with mock.patch('psycopg2.connect', new=mock.Mock(side_effect=self._mock_connect)):
+            # If I attempt to connect, and the owner URI disconnects while connecting
+            response = self.connection_service.connect(self.connect_params)
+
+        # Then the connection should have been canceled and returned none
+        self.assertIsNone(response)
+        self.assertTrue(self.token_store[0].canceled)
+
+        # ... And the connection should have been returned to the pool instead of being added to the owner URI
+        pool.checkin.assert_called_once_with(self.mock_connection)
+        connection_info = self.connection_service.get_connection_info(self.owner_uri)
+        self.assertFalse(connection_info.has_connection(self.connection_type))
+
     def test_handle_cancellation_request(self):
         """Test that handling a cancellation request modifies the cancellation token for a matched connection"""
         # Set up the connection service with a mock request handler and cancellation token
@@ -169,6 +169,7 @@ class TestEditDataService(unittest.TestCase):
         self._service_under_test._dispose(request_context, request)
 
         self.assertEqual(0, len(self._service_under_test._active_sessions))
+        edit_session.dispose.assert_called_once()
 
     def test_dispose_when_edit_session_is_not_available(self):
         request_context = utils.MockRequestContext()
@@ -0,0 +1,138 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+import unittest.mock as mock
+
+from snowflaketoolsservice.hosting.async_dispatcher import AsyncioDispatcher
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency
+import tests.utils as utils
+
+
+class TestAsyncioDispatcher(unittest.TestCase):
+
+    def tearDown(self):
+        if hasattr(self, 'dispatcher'):
+            self.dispatcher.shutdown(wait=True)
+
+    def test_parallel_dispatch_runs_on_workers(self):
+        # Setup: Create a dispatcher and an action that blocks until released
+        self.dispatcher = AsyncioDispatcher(2, 1)
+        release_event = threading.Event()
+        started_event = threading.Event()
+        thread_names = []
+
+        def blocking_action():
+            thread_names.append(threading.current_thread().name)
+            started_event.set()
+            release_event.wait(5)
+
+        # If: I dispatch a blocking action followed by another parallel action
+        second_action_event = threading.Event()
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', blocking_action)
+        self.assertTrue(started_event.wait(5))
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', second_action_event.set)
+
+        # Then:
+        # ... The second action should run while the first is still blocked
+        self.assertTrue(second_action_event.wait(5))
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+
+        # ... The actions should have been bridged onto the worker threads, not the loop thread
+        self.assertTrue(thread_names[0].startswith(AsyncioDispatcher.WORKER_THREAD_PREFIX))
+
+    def test_serial_dispatch_preserves_order_per_owner(self):
+        # Setup: Create a dispatcher and a first action that blocks until released
+        self.dispatcher = AsyncioDispatcher(4, 1)
+        release_event = threading.Event()
+        calls = []
+
+        def blocking_action():
+            release_event.wait(5)
+            calls.append('first')
+
+        # If: I dispatch several serial actions for the same owner and one for another owner
+        other_owner_event = threading.Event()
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', blocking_action)
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', lambda: calls.append('second'))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', lambda: calls.append('third'))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri2', other_owner_event.set)
+
+        # Then:
+        # ... The other owner's action should not be blocked by the first owner
+        self.assertTrue(other_owner_event.wait(5))
+        self.assertListEqual(calls, [])
+
+        # ... The first owner's actions should run in the order they were dispatched
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+        self.assertListEqual(calls, ['first', 'second', 'third'])
+        self.assertDictEqual(self.dispatcher._owner_waiters, {})
+
+    def test_concurrency_is_bounded(self):
+        # Setup: Create a dispatcher with a single worker that is blocked
+        self.dispatcher = AsyncioDispatcher(1, 1)
+        release_event = threading.Event()
+        started_event = threading.Event()
+
+        def blocking_action():
+            started_event.set()
+            release_event.wait(5)
+
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, None, blocking_action)
+        self.assertTrue(started_event.wait(5))
+
+        # If: I dispatch another parallel action
+        action = mock.MagicMock()
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, None, action)
+
+        # Then: The action should wait for the worker instead of starting another thread
+        self.assertFalse(self.dispatcher.wait_for_idle(0.2))
+        action.assert_not_called()
+        self.assertEqual(self.dispatcher.get_statistics()['inFlight'], 2)
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+        action.assert_called_once()
+
+    def test_exclusive_dispatch_waits_for_idle(self):
+        # Setup: Create a dispatcher with a running parallel action
+        self.dispatcher = AsyncioDispatcher(2, 1)
+        release_event = threading.Event()
+        calls = []
+
+        def blocking_action():
+            release_event.wait(5)
+            calls.append('parallel')
+
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, None, blocking_action)
+
+        # If: I dispatch an exclusive action while the parallel action is running
+        threading.Timer(0.2, release_event.set).start()
+        self.dispatcher.dispatch(DispatchConcurrency.EXCLUSIVE, None, lambda: calls.append('exclusive'))
+
+        # Then: The exclusive action should only run after the parallel action completed
+        self.assertListEqual(calls, ['parallel', 'exclusive'])
+
+    def test_dispatch_logs_unhandled_exception(self):
+        # Setup: Create a dispatcher with a mock logger
+        logger = utils.get_mock_logger()
+        self.dispatcher = AsyncioDispatcher(1, 1, logger=logger)
+
+        # If: I dispatch an action that raises, followed by another action for the same owner
+        second_action = mock.MagicMock()
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', mock.MagicMock(side_effect=ValueError()))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', second_action)
+
+        # Then: The exception should have been logged and the next action should still run
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+        logger.exception.assert_called_once()
+        second_action.assert_called_once()
+        self.assertEqual(self.dispatcher.active_workers, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
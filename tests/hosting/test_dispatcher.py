@@ -0,0 +1,180 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+import unittest.mock as mock
+
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency, RequestDispatcher, get_owner_key
+import tests.utils as utils
+
+
+class TestRequestDispatcher(unittest.TestCase):
+
+    def tearDown(self):
+        if hasattr(self, 'dispatcher'):
+            self.dispatcher.shutdown(wait=True)
+
+    def test_inline_dispatch(self):
+        # If: I dispatch an action on a dispatcher without workers
+        self.dispatcher = RequestDispatcher(0)
+        action = mock.MagicMock()
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', action)
+
+        # Then: The action should have been run synchronously on the calling thread
+        self.assertFalse(self.dispatcher.is_concurrent)
+        action.assert_called_once()
+
+    def test_parallel_dispatch_runs_concurrently(self):
+        # Setup: Create a dispatcher and an action that blocks until released
+        self.dispatcher = RequestDispatcher(2)
+        release_event = threading.Event()
+        started_event = threading.Event()
+
+        def blocking_action():
+            started_event.set()
+            release_event.wait(5)
+
+        # If: I dispatch a blocking action followed by another parallel action
+        second_action_event = threading.Event()
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', blocking_action)
+        self.assertTrue(started_event.wait(5))
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', second_action_event.set)
+
+        # Then: The second action should run while the first is still blocked
+        self.assertTrue(second_action_event.wait(5))
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+
+    def test_serial_dispatch_preserves_order_per_owner(self):
+        # Setup: Create a dispatcher and a first action that blocks until released
+        self.dispatcher = RequestDispatcher(4)
+        release_event = threading.Event()
+        calls = []
+
+        def blocking_action():
+            release_event.wait(5)
+            calls.append('first')
+
+        # If: I dispatch several serial actions for the same owner and one for another owner
+        other_owner_event = threading.Event()
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', blocking_action)
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', lambda: calls.append('second'))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri1', lambda: calls.append('third'))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri2', other_owner_event.set)
+
+        # Then:
+        # ... The other owner's action should not be blocked by the first owner
+        self.assertTrue(other_owner_event.wait(5))
+        self.assertListEqual(calls, [])
+
+        # ... The first owner's actions should run in the order they were dispatched
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+        self.assertListEqual(calls, ['first', 'second', 'third'])
+        self.assertDictEqual(self.dispatcher._owner_queues, {})
+
+    def test_exclusive_dispatch_waits_for_idle(self):
+        # Setup: Create a dispatcher with a running parallel action
+        self.dispatcher = RequestDispatcher(2)
+        release_event = threading.Event()
+        calls = []
+
+        def blocking_action():
+            release_event.wait(5)
+            calls.append('parallel')
+
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, None, blocking_action)
+
+        # If: I dispatch an exclusive action while the parallel action is running
+        threading.Timer(0.2, release_event.set).start()
+        self.dispatcher.dispatch(DispatchConcurrency.EXCLUSIVE, None, lambda: calls.append('exclusive'))
+
+        # Then: The exclusive action should only run after the parallel action completed
+        self.assertListEqual(calls, ['parallel', 'exclusive'])
+
+    def test_immediate_dispatch_does_not_wait(self):
+        # Setup: Create a dispatcher whose only worker is blocked
+        self.dispatcher = RequestDispatcher(1)
+        release_event = threading.Event()
+        started_event = threading.Event()
+
+        def blocking_action():
+            started_event.set()
+            release_event.wait(5)
+
+        self.dispatcher.dispatch(DispatchConcurrency.PARALLEL, 'uri', blocking_action)
+        self.assertTrue(started_event.wait(5))
+
+        # If: I dispatch an immediate action
+        action = mock.MagicMock()
+        self.dispatcher.dispatch(DispatchConcurrency.IMMEDIATE, 'uri', action)
+
+        # Then: The action should have run on the calling thread without waiting for the worker
+        action.assert_called_once()
+        self.assertFalse(release_event.is_set())
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+
+    def test_get_statistics(self):
+        # Setup: Create a dispatcher with a worker that is blocked and a handler queued behind it
+        self.dispatcher = RequestDispatcher(2)
+        release_event = threading.Event()
+        started_event = threading.Event()
+
+        def blocking_action():
+            started_event.set()
+            release_event.wait(5)
+
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', blocking_action)
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', mock.MagicMock())
+        self.assertTrue(started_event.wait(5))
+
+        # If: I get the statistics of the dispatcher
+        statistics = self.dispatcher.get_statistics()
+
+        # Then: The running and queued handlers should be counted
+        self.assertDictEqual(statistics, {'maxWorkers': 2, 'activeWorkers': 1, 'inFlight': 1, 'queuedPerOwner': 1})
+        release_event.set()
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+        self.assertEqual(self.dispatcher.active_workers, 0)
+
+    def test_dispatch_logs_unhandled_exception(self):
+        # Setup: Create a dispatcher with a mock logger
+        logger = utils.get_mock_logger()
+        self.dispatcher = RequestDispatcher(1, logger=logger)
+
+        # If: I dispatch an action that raises, followed by another action for the same owner
+        second_action = mock.MagicMock()
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', mock.MagicMock(side_effect=ValueError()))
+        self.dispatcher.dispatch(DispatchConcurrency.SERIAL_PER_OWNER_URI, 'uri', second_action)
+        self.assertTrue(self.dispatcher.wait_for_idle(5))
+
+        # Then: The exception should be logged and the next action should still run
+        logger.exception.assert_called_once()
+        second_action.assert_called_once()
+
+    def test_get_owner_key(self):
+        # Owner URI takes precedence
+        self.assertEqual(get_owner_key(_Params(owner_uri='uri', session_id='session')), 'uri')
+
+        # Object Explorer session IDs are used when there isn't an owner URI
+        self.assertEqual(get_owner_key(_Params(session_id='session')), 'session')
+
+        # Text document requests use the document URI
+        self.assertEqual(get_owner_key(_Params(text_document=_Params(uri='file:///doc.sql'))), 'file:///doc.sql')
+
+        # Params without an owner have no key
+        self.assertIsNone(get_owner_key({'ownerUri': 'uri'}))
+        self.assertIsNone(get_owner_key(None))
+
+
+class _Params:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
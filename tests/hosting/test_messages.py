@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
 import unittest
 
 from snowflaketoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
@@ -111,6 +112,16 @@ class JsonRpcMessageTests(unittest.TestCase):
         })
 
     # FROM DICTIONARY TESTS ################################################
+    def test_to_json(self):
+        # If: I serialize a message with complex parameters to JSON
+        params = _TestParams()
+        message = JSONRPCMessage.create_notification('test/test', params)
+        json_content = message.to_json()
+
+        # Then: The JSON should match the dictionary of the message, with camelCased keys
+        self.assertDictEqual(json.loads(json_content), message.dictionary)
+        self.assertDictEqual(json.loads(json_content)['params'], {'ownerUri': 'uri', 'rowCount': 3})
+
     def test_from_dict_notification(self):
         # If: I create a notification message from a dictionary
         message = JSONRPCMessage.from_dictionary({
@@ -260,5 +271,11 @@ class JsonRpcMessageTests(unittest.TestCase):
             })
 
 
+class _TestParams:
+    def __init__(self):
+        self.owner_uri = 'uri'
+        self.row_count = 3
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import tempfile
+import unittest
+
+from snowflaketoolsservice.hosting.metrics import LatencyHistogram, MetricsDumper, ServerMetrics
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        # If: I snapshot a histogram that has no durations
+        snapshot = LatencyHistogram().to_dict()
+
+        # Then: Every statistic should be zero
+        self.assertDictEqual(snapshot, {'count': 0, 'meanMs': 0.0, 'maxMs': 0.0, 'p50Ms': 0.0, 'p99Ms': 0.0, 'buckets': {}})
+
+    def test_record(self):
+        # If: I record durations that fall into different buckets
+        histogram = LatencyHistogram()
+        for seconds in [0.0005] * 98 + [0.02, 90]:
+            histogram.record(seconds)
+        snapshot = histogram.to_dict()
+
+        # Then:
+        # ... The durations should have been counted in their buckets
+        self.assertEqual(histogram.count, 100)
+        self.assertDictEqual(snapshot['buckets'], {'le1': 98, 'le25': 1, 'inf': 1})
+        self.assertEqual(snapshot['maxMs'], 90000)
+        self.assertAlmostEqual(snapshot['meanMs'], (98 * 0.5 + 20 + 90000) / 100)
+
+        # ... Percentiles should be estimated from the bucket bounds
+        self.assertEqual(snapshot['p50Ms'], 1)
+        self.assertEqual(snapshot['p99Ms'], 25)
+        self.assertEqual(histogram.get_percentile(100), 90000)
+
+
+class TestServerMetrics(unittest.TestCase):
+
+    def test_to_dict(self):
+        # If: I record handler and response durations for a few methods
+        metrics = ServerMetrics()
+        metrics.record_handler('b/method', 0.001)
+        metrics.record_handler('a/method', 0.001)
+        metrics.record_handler('a/method', 0.002)
+        metrics.record_response('a/method', 0.003)
+        metrics.dispatch_wait.record(0.0001)
+        snapshot = metrics.to_dict()
+
+        # Then: The snapshot should contain a histogram for each method
+        self.assertListEqual(list(snapshot['handlers']), ['a/method', 'b/method'])
+        self.assertEqual(snapshot['handlers']['a/method']['count'], 2)
+        self.assertEqual(snapshot['responses']['a/method']['count'], 1)
+        self.assertEqual(snapshot['dispatchWait']['count'], 1)
+        self.assertGreaterEqual(snapshot['uptimeSeconds'], 0)
+
+
+class TestMetricsDumper(unittest.TestCase):
+
+    def test_dump(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            # If: I dump the metrics twice
+            file_path = os.path.join(log_dir, 'metrics.log')
+            dumper = MetricsDumper(lambda: {'count': 1}, file_path, 60)
+            dumper.dump()
+            dumper.dump()
+
+            # Then: Each snapshot should have been appended as a line of JSON
+            with open(file_path) as metrics_file:
+                lines = metrics_file.readlines()
+            self.assertEqual(len(lines), 2)
+            snapshot = json.loads(lines[0])
+            self.assertEqual(snapshot['count'], 1)
+            self.assertIn('timestamp', snapshot)
+
+    def test_stop_writes_final_snapshot(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            # If: I start and immediately stop a dumper with a long interval
+            file_path = os.path.join(log_dir, 'metrics.log')
+            dumper = MetricsDumper(lambda: {}, file_path, 60)
+            dumper.start()
+            dumper.stop()
+
+            # Then: A snapshot should have been written when it stopped
+            with open(file_path) as metrics_file:
+                self.assertEqual(len(metrics_file.readlines()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
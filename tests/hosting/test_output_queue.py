@@ -0,0 +1,158 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from queue import Empty, Full
+import threading
+import unittest
+
+from snowflaketoolsservice.hosting.json_message import JSONRPCMessage
+from snowflaketoolsservice.hosting.output_queue import OutputPriority, PriorityOutputQueue, get_output_priority
+
+
+class TestPriorityOutputQueue(unittest.TestCase):
+
+    def test_default_priority(self):
+        # Notifications and the stop sentinel are bulk traffic
+        self.assertIs(get_output_priority(JSONRPCMessage.create_notification('test/test', {})), OutputPriority.BULK)
+        self.assertIs(get_output_priority(None), OutputPriority.BULK)
+
+        # Responses, errors and requests are normal traffic
+        self.assertIs(get_output_priority(JSONRPCMessage.create_response('1', {})), OutputPriority.NORMAL)
+        self.assertIs(get_output_priority(JSONRPCMessage.create_error('1', 0, 'error', None)), OutputPriority.NORMAL)
+        self.assertIs(get_output_priority(JSONRPCMessage.create_request('1', 'test/test', {})), OutputPriority.NORMAL)
+
+        # An assigned priority overrides the default
+        message = JSONRPCMessage.create_notification('test/test', {})
+        message.priority = OutputPriority.INTERACTIVE
+        self.assertIs(get_output_priority(message), OutputPriority.INTERACTIVE)
+
+    def test_higher_priority_served_first(self):
+        # If: I queue bulk notifications followed by a normal and an interactive response
+        queue = PriorityOutputQueue()
+        notifications = [JSONRPCMessage.create_notification('test/test', {'index': i}) for i in range(3)]
+        for notification in notifications:
+            queue.put(notification)
+        response = JSONRPCMessage.create_response('1', {})
+        queue.put(response)
+        interactive_response = _create_interactive_response('2')
+        queue.put(interactive_response)
+
+        # Then: The responses should be served first, then the notifications in the order they were queued
+        served = [queue.get_nowait() for _ in range(5)]
+        self.assertListEqual(served, [interactive_response, response] + notifications)
+        self.assertTrue(queue.empty())
+        with self.assertRaises(Empty):
+            queue.get_nowait()
+
+    def test_starvation_protection(self):
+        # Setup: Create a queue that serves a passed-over lane after two gets
+        queue = PriorityOutputQueue(starvation_limit=2)
+        notification = JSONRPCMessage.create_notification('test/test', {})
+        queue.put(notification)
+        responses = [_create_interactive_response(str(i)) for i in range(4)]
+        for response in responses:
+            queue.put(response)
+
+        # If: I get all of the messages
+        served = [queue.get_nowait() for _ in range(5)]
+
+        # Then: The notification should have been served once it was passed over twice
+        self.assertListEqual(served, responses[:2] + [notification] + responses[2:])
+        self.assertEqual(queue.get_statistics()['bulk']['starvationPromotions'], 1)
+
+    def test_statistics(self):
+        # If: I queue messages in different lanes and get one of them
+        queue = PriorityOutputQueue()
+        queue.put(JSONRPCMessage.create_notification('test/test', {}))
+        queue.put(JSONRPCMessage.create_notification('test/test', {}))
+        queue.put(JSONRPCMessage.create_response('1', {}))
+        queue.get_nowait()
+
+        # Then: The statistics should reflect the depth of each lane
+        statistics = queue.get_statistics()
+        self.assertDictEqual(statistics['interactive'], {'depth': 0, 'maxDepth': 0, 'enqueued': 0, 'coalesced': 0, 'starvationPromotions': 0})
+        self.assertDictEqual(statistics['normal'], {'depth': 0, 'maxDepth': 1, 'enqueued': 1, 'coalesced': 0, 'starvationPromotions': 0})
+        self.assertDictEqual(statistics['bulk'], {'depth': 2, 'maxDepth': 2, 'enqueued': 2, 'coalesced': 0, 'starvationPromotions': 0})
+        self.assertEqual(queue.qsize(), 2)
+
+        # ... The wait of the message that was taken should have been recorded in its lane
+        wait_statistics = queue.get_wait_statistics()
+        self.assertEqual(wait_statistics['normal']['count'], 1)
+        self.assertEqual(wait_statistics['bulk']['count'], 0)
+
+    def test_coalescing_policy(self):
+        # Setup: Create a queue with a policy that merges notifications with the same key
+        queue = PriorityOutputQueue()
+        queue.set_coalescing_policy('test/test', lambda queued, params: params if queued['key'] == params['key'] else None)
+
+        # If: I queue notifications, some of which can be merged with the one before them
+        queue.put(JSONRPCMessage.create_notification('test/test', {'key': 1, 'value': 'a'}))
+        queue.put(JSONRPCMessage.create_notification('test/test', {'key': 1, 'value': 'b'}))
+        queue.put(JSONRPCMessage.create_notification('test/test', {'key': 2, 'value': 'c'}))
+        queue.put(JSONRPCMessage.create_notification('test/other', {'key': 2, 'value': 'd'}))
+        queue.put(JSONRPCMessage.create_notification('test/test', {'key': 2, 'value': 'e'}))
+
+        # Then: Only consecutive notifications for the same method should have been merged
+        served = [queue.get_nowait() for _ in range(queue.qsize())]
+        self.assertListEqual([m.message_params['value'] for m in served], ['b', 'c', 'd', 'e'])
+        self.assertEqual(queue.get_statistics()['bulk']['coalesced'], 1)
+
+    def test_bounded_bulk_lane(self):
+        # Setup: Create a queue with a full bulk lane
+        queue = PriorityOutputQueue(max_bulk_depth=2)
+        queue.put(JSONRPCMessage.create_notification('test/test', {}))
+        queue.put(JSONRPCMessage.create_notification('test/test', {}))
+
+        # If: I put another notification without waiting, or with a timeout
+        # Then: The lane should be reported as full
+        with self.assertRaises(Full):
+            queue.put_nowait(JSONRPCMessage.create_notification('test/test', {}))
+        with self.assertRaises(Full):
+            queue.put(JSONRPCMessage.create_notification('test/test', {}), timeout=0.1)
+
+        # ... Responses and the stop sentinel should not be blocked
+        queue.put_nowait(JSONRPCMessage.create_response('1', {}))
+        queue.put_nowait(None)
+        self.assertEqual(queue.qsize(), 4)
+
+    def test_bounded_bulk_lane_blocks_until_served(self):
+        # Setup: Create a queue with a full bulk lane
+        queue = PriorityOutputQueue(max_bulk_depth=1)
+        queue.put(JSONRPCMessage.create_notification('test/first', {}))
+
+        # If: A producer puts a notification while the lane is full, and the output thread gets a message
+        put_completed = threading.Event()
+
+        def produce():
+            queue.put(JSONRPCMessage.create_notification('test/second', {}))
+            put_completed.set()
+
+        threading.Thread(target=produce, daemon=True).start()
+        self.assertFalse(put_completed.wait(0.2))
+        self.assertEqual(queue.get().message_method, 'test/first')
+
+        # Then: The producer should be unblocked
+        self.assertTrue(put_completed.wait(5))
+        self.assertEqual(queue.get_nowait().message_method, 'test/second')
+
+    def test_close_releases_producers(self):
+        # If: I close a queue with a full bulk lane
+        queue = PriorityOutputQueue(max_bulk_depth=1)
+        queue.put(JSONRPCMessage.create_notification('test/test', {}))
+        queue.close()
+
+        # Then: Notifications should no longer be blocked
+        queue.put_nowait(JSONRPCMessage.create_notification('test/test', {}))
+        self.assertEqual(queue.qsize(), 2)
+
+
+def _create_interactive_response(message_id: str) -> JSONRPCMessage:
+    message = JSONRPCMessage.create_response(message_id, {})
+    message.priority = OutputPriority.INTERACTIVE
+    return message
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -117,6 +117,48 @@ class JSONRPCReaderTests(unittest.TestCase):
             actual = reader._buffer[4:]
             self.assertEqual(actual, expected)
 
+    def test_read_next_chunk_compacts_in_place(self):
+        # Setup: Create a byte array for test input
+        test_bytes = bytearray(b'1234567890')
+
+        with io.BytesIO(test_bytes) as stream:
+            # If:
+            # ... I create a reader whose buffer is nearly full, but mostly with bytes that were read
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            buffer = reader._buffer
+            buffer[-4:] = b'abcd'
+            reader._read_offset = len(buffer) - 4
+            reader._buffer_end_offset = len(buffer)
+
+            # ... and I read a chunk from the stream
+            result = reader._read_next_chunk()
+
+            # Then:
+            # ... The read should have succeeded
+            self.assertTrue(result)
+
+            # ... The unread bytes should have been moved to the start of the same buffer
+            self.assertIs(reader._buffer, buffer)
+            self.assertEqual(reader._read_offset, 0)
+            self.assertEqual(reader._buffer_end_offset, 14)
+            self.assertEqual(reader._buffer[:14], b'abcd' + test_bytes)
+
+    def test_read_next_chunk_resize_to_content_length(self):
+        # Setup: Create a stream with a large message body
+        test_bytes = bytearray(b'x' * 100000)
+
+        with io.BytesIO(test_bytes) as stream:
+            # If: I read a chunk while the reader expects content larger than twice its buffer
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            reader._buffer_end_offset = len(reader._buffer)
+            reader._read_state = JSONRPCReader.ReadState.Content
+            reader._expected_content_length = 200000
+            reader._read_next_chunk()
+
+            # Then: The buffer should have been grown to fit the content in a single step
+            self.assertEqual(len(reader._buffer), 200000)
+            self.assertEqual(reader._buffer_end_offset, JSONRPCReader.DEFAULT_BUFFER_SIZE + len(test_bytes))
+
     def test_read_next_chunk_eof(self):
         with io.BytesIO() as stream:
             # If:
@@ -182,6 +224,25 @@ class JSONRPCReaderTests(unittest.TestCase):
         self.assertEqual(reader._read_offset, 0)
         self.assertEqual(reader._read_state, JSONRPCReader.ReadState.Header)
 
+    def test_read_headers_resumes_scan(self):
+        # Setup: Create a reader with a buffer that ends with part of the \r\n\r\n control
+        reader = JSONRPCReader(None, logger=utils.get_mock_logger())
+        reader._buffer = bytearray(b'Content-Length: 56\r\n\r' + bytes(10))
+        reader._buffer_end_offset = 21
+
+        # If: I look for a header block, then the rest of the control arrives
+        result = reader._try_read_headers()
+        self.assertFalse(result)
+        self.assertEqual(reader._header_scan_offset, 18)
+        reader._buffer[21] = JSONRPCReader.LF
+        reader._buffer_end_offset = 22
+        result = reader._try_read_headers()
+
+        # Then: The header should have been found without rescanning the header block
+        self.assertTrue(result)
+        self.assertEqual(reader._read_offset, 22)
+        self.assertEqual(reader._expected_content_length, 56)
+
     def test_read_headers_no_colon(self):
         # Setup: Create a reader with a buffer that contains the control sequence but does not
         #        match the header format
@@ -437,3 +498,59 @@ class JSONRPCReaderTests(unittest.TestCase):
 
             # Then: I should have a valid message
             self.assertIsNotNone(msg)
+
+    def test_read_messages_reuses_buffer(self):
+        test_string = b'Content-Length: 32\r\n\r\n{"method":"test", "params":null}'
+        with io.BytesIO(test_string * 1000) as stream:
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            buffer = reader._buffer
+
+            # If: I read more messages than fit in the buffer
+            messages = [reader.read_message() for _ in range(1000)]
+
+            # Then:
+            # ... Every message should have been read
+            self.assertTrue(all(message.message_method == 'test' for message in messages))
+
+            # ... The buffer should have been compacted instead of replaced
+            self.assertIs(reader._buffer, buffer)
+
+    def test_read_message_in_small_chunks(self):
+        test_string = b'Content-Length: 32\r\n\r\n{"method":"test", "params":null}'
+        stream = io.BytesIO(test_string * 3)
+        read_into = stream.readinto
+
+        # If: I read messages from a stream that returns a few bytes at a time
+        stream.readinto = lambda buffer: read_into(buffer[:3])
+        reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+        messages = [reader.read_message() for _ in range(3)]
+
+        # Then: Every message should have been read
+        self.assertTrue(all(message.message_method == 'test' for message in messages))
+
+    def test_read_large_message_releases_buffer(self):
+        params = 'x' * (2 * JSONRPCReader.MAX_RETAINED_BUFFER_SIZE)
+        content = ('{"method":"test", "params":"' + params + '"}').encode()
+        test_bytes = b'Content-Length: ' + str(len(content)).encode() + b'\r\n\r\n' + content
+        with io.BytesIO(test_bytes) as stream:
+            # If: I read a message larger than the max retained buffer size
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            message = reader.read_message()
+
+            # Then:
+            # ... The message should have been read
+            self.assertEqual(message.message_params, params)
+
+            # ... The buffer should have been released
+            self.assertEqual(len(reader._buffer), JSONRPCReader.DEFAULT_BUFFER_SIZE)
+
+    def test_read_message_statistics(self):
+        test_string = b'Content-Length: 32\r\n\r\n{"method":"test", "params":null}'
+        with io.BytesIO(test_string * 2) as stream:
+            # If: I read two messages
+            reader = JSONRPCReader(stream, logger=utils.get_mock_logger())
+            reader.read_message()
+            reader.read_message()
+
+            # Then: The statistics should count the messages and all of their bytes
+            self.assertDictEqual(reader.statistics.to_dict(), {'messagesReceived': 2, 'bytesReceived': 2 * len(test_string)})
@@ -5,10 +5,13 @@
 
 import io
 from queue import Queue
+import threading
 import time
 import unittest
 import unittest.mock as mock
 
+from snowflaketoolsservice.hosting.async_dispatcher import AsyncioDispatcher
+from snowflaketoolsservice.hosting.dispatcher import DispatchConcurrency
 from snowflaketoolsservice.hosting.json_rpc_server import (
     JSONRPCServer,
     IncomingMessageConfiguration,
@@ -17,6 +20,9 @@ from snowflaketoolsservice.hosting.json_rpc_server import (
 from snowflaketoolsservice.hosting.json_message import JSONRPCMessage, JSONRPCMessageType
 from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
 from snowflaketoolsservice.hosting.json_writer import JSONRPCWriter
+from snowflaketoolsservice.hosting.output_queue import OutputPriority, PriorityOutputQueue
+from snowflaketoolsservice.language.contracts import COMPLETION_REQUEST
+from snowflaketoolsservice.workspace.contracts import DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION
 import tests.utils as utils
 
 
@@ -29,6 +35,8 @@ class JSONRPCServerTests(unittest.TestCase):
         # Then: The values should be available
         self.assertEqual(handler.class_, 'class')
         self.assertEqual(handler.handler, 'handler')
+        self.assertIs(handler.concurrency, DispatchConcurrency.EXCLUSIVE)
+        self.assertIsNone(handler.priority)
 
     def test_server_init(self):
         # Setup: Create objects to init the server with
@@ -47,9 +55,9 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertFalse(server._stop_requested)
 
         # ... The output queue should be empty
-        self.assertIsInstance(server._output_queue, Queue)
+        self.assertIsInstance(server._output_queue, PriorityOutputQueue)
         self.assertTrue(server._output_queue.all_tasks_done)
-        self.assertDictEqual(server._notification_handlers, {})
+        self.assertListEqual(list(server._notification_handlers), [JSONRPCServer.CANCEL_REQUEST_METHOD])
         self.assertListEqual(server._shutdown_handlers, [])
 
         # ... The threads shouldn't be assigned yet
@@ -65,6 +73,7 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIsNotNone(server._request_handlers['shutdown'].handler)
         self.assertTrue('exit' in server._request_handlers)
         self.assertIsNotNone(server._request_handlers['exit'].handler)
+        self.assertIs(server._notification_handlers[JSONRPCServer.CANCEL_REQUEST_METHOD].concurrency, DispatchConcurrency.IMMEDIATE)
 
     def test_add_shutdown_handler(self):
         # If: I add a shutdown handler
@@ -87,6 +96,17 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIsNotNone(server._request_handlers[params.method])
         self.assertIs(server._request_handlers[params.method].class_, int)
         self.assertIs(server._request_handlers[params.method].handler, handler)
+        self.assertIs(server._request_handlers[params.method].concurrency, DispatchConcurrency.EXCLUSIVE)
+
+    def test_set_request_handler_with_concurrency(self):
+        # If: I add a request handler that declares its concurrency
+        params = IncomingMessageConfiguration('test/test', int, DispatchConcurrency.SERIAL_PER_OWNER_URI)
+        handler = mock.MagicMock()
+        server = JSONRPCServer(None, None)
+        server.set_request_handler(params, handler)
+
+        # Then: The request handler should carry the declared concurrency
+        self.assertIs(server._request_handlers[params.method].concurrency, DispatchConcurrency.SERIAL_PER_OWNER_URI)
 
     def test_set_notification_handler(self):
         # If: I add a notification handler
@@ -197,6 +217,21 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIsNone(out_message.message_id)
         self.assertEqual(out_message.message_params, params)
 
+    def test_request_context_priority(self):
+        # Setup: Create a request context for a latency-sensitive request
+        queue = Queue()
+        in_message = JSONRPCMessage.from_dictionary({'id': '123', 'method': 'test/text/', 'params': {}})
+        rc = RequestContext(in_message, queue, OutputPriority.INTERACTIVE)
+
+        # If: I send a notification, a response, and an error
+        rc.send_notification('test/test', {})
+        rc.send_response({})
+        rc.send_error('error')
+
+        # Then: Every message should be sent in the interactive lane
+        for _ in range(3):
+            self.assertIs(queue.get_nowait().priority, OutputPriority.INTERACTIVE)
+
     def test_request_context_send_error(self):
         # Setup: Create a request context
         queue = Queue()
@@ -264,6 +299,25 @@ class JSONRPCServerTests(unittest.TestCase):
         # ... A warning should have been logged
         logger.warn.assert_called_once()
 
+    def test_dispatch_request_handler_resolver(self):
+        # Setup: Create a server with a handler resolver that registers a handler for the method
+        config = IncomingMessageConfiguration('test/test', None)
+        handler = mock.MagicMock()
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        resolver = mock.MagicMock(side_effect=lambda method: server.set_request_handler(config, handler) or True)
+        server.set_handler_resolver(resolver)
+
+        # If: I dispatch a request for the method twice
+        server._dispatch_message(JSONRPCMessage.create_request('123', 'test/test', {}))
+        server._dispatch_message(JSONRPCMessage.create_request('124', 'test/test', {}))
+
+        # Then:
+        # ... The resolver should only have been asked the first time
+        resolver.assert_called_once_with('test/test')
+
+        # ... The handler it registered should have been called both times
+        self.assertEqual(handler.call_count, 2)
+
     def test_dispatch_request_none_class(self):
         # Setup: Create a server with a single handler that has none for the deserialization class
         config = IncomingMessageConfiguration('test/test', None)
@@ -308,6 +362,190 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertIs(handler.mock_calls[0][1][0]._message, message)
         self.assertIsInstance(handler.mock_calls[0][1][1], _TestParams)
 
+    def test_dispatch_request_with_priority(self):
+        # Setup: Create a server with a handler for a latency-sensitive request
+        config = IncomingMessageConfiguration('test/test', None, DispatchConcurrency.PARALLEL, OutputPriority.INTERACTIVE)
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        server.set_request_handler(config, lambda request_context, params: request_context.send_response(params))
+
+        # If: I dispatch a message after a notification has been queued
+        server.send_notification('test/notification', {})
+        server._dispatch_message(JSONRPCMessage.create_request('123', 'test/test', {}))
+
+        # Then: The response should be written ahead of the notification
+        self.assertEqual(server._output_queue.get_nowait().message_id, '123')
+        self.assertEqual(server._output_queue.get_nowait().message_method, 'test/notification')
+        self.assertEqual(server.output_queue_statistics['interactive']['enqueued'], 1)
+
+    def test_dispatch_request_concurrent(self):
+        # Setup: Create a server with worker threads and a serial handler that blocks until released
+        config = IncomingMessageConfiguration('test/test', _TestOwnerParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
+        release_event = threading.Event()
+        handled_uris = []
+
+        def handler(request_context, params):
+            if params.owner_uri == 'uri1':
+                release_event.wait(5)
+            handled_uris.append(params.owner_uri)
+
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger(), max_dispatch_workers=2)
+        server.set_request_handler(config, handler)
+
+        # If: I dispatch a request for a blocked owner, then a request for another owner
+        server._dispatch_message(JSONRPCMessage.create_request('1', 'test/test', {'ownerUri': 'uri1'}))
+        server._dispatch_message(JSONRPCMessage.create_request('2', 'test/test', {'ownerUri': 'uri2'}))
+
+        # Then: The second request should be handled while the first one is still blocked
+        for _ in range(50):
+            if handled_uris:
+                break
+            time.sleep(0.1)
+        self.assertListEqual(handled_uris, ['uri2'])
+
+        release_event.set()
+        self.assertTrue(server._dispatcher.wait_for_idle(5))
+        server._dispatcher.shutdown()
+        self.assertListEqual(handled_uris, ['uri2', 'uri1'])
+
+    def test_dispatch_text_document_notifications_per_document(self):
+        # Setup: Create a server with worker threads, whose completion handler blocks for one document
+        release_event = threading.Event()
+        handled = []
+
+        def completion_handler(request_context, params):
+            release_event.wait(5)
+            handled.append(('completion', params.text_document.uri))
+
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger(), max_dispatch_workers=2)
+        server.set_request_handler(COMPLETION_REQUEST, completion_handler)
+        server.set_notification_handler(
+            DID_CHANGE_TEXT_DOCUMENT_NOTIFICATION,
+            lambda notification_context, params: handled.append(('didChange', params.text_document.uri))
+        )
+
+        # If: I request completions for document B, then send changes to document A and document B
+        server._dispatch_message(JSONRPCMessage.create_request(
+            '1', 'textDocument/completion', {'textDocument': {'uri': 'B'}, 'position': {'line': 0, 'character': 0}}
+        ))
+        for uri in ('A', 'B'):
+            server._dispatch_message(JSONRPCMessage.create_notification(
+                'textDocument/didChange', {'textDocument': {'uri': uri, 'version': 1}, 'contentChanges': []}
+            ))
+
+        # Then:
+        # ... The change to document A should be handled without waiting for the completion of document B
+        for _ in range(50):
+            if handled:
+                break
+            time.sleep(0.1)
+        self.assertListEqual(handled, [('didChange', 'A')])
+        self.assertFalse(release_event.is_set())
+
+        # ... The change to document B should still be handled after the completion of document B
+        release_event.set()
+        self.assertTrue(server._dispatcher.wait_for_idle(5))
+        server._dispatcher.shutdown()
+        self.assertListEqual(handled, [('didChange', 'A'), ('completion', 'B'), ('didChange', 'B')])
+
+    def test_dispatch_request_asyncio(self):
+        # Setup: Create a server that dispatches on an event loop
+        config = IncomingMessageConfiguration('test/test', _TestOwnerParams, DispatchConcurrency.SERIAL_PER_OWNER_URI)
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger(), max_dispatch_workers=2, use_asyncio=True,
+                               max_background_workers=1)
+        server.set_request_handler(config, lambda request_context, params: request_context.send_response(params.owner_uri))
+
+        # If: I dispatch a request
+        server._dispatch_message(JSONRPCMessage.create_request('1', 'test/test', {'ownerUri': 'uri1'}))
+        self.assertTrue(server._dispatcher.wait_for_idle(5))
+        server._dispatcher.shutdown(wait=True)
+
+        # Then: The handler should have run and its response should have been queued
+        self.assertIsInstance(server._dispatcher, AsyncioDispatcher)
+        out_message = server._output_queue.get_nowait()
+        self.assertEqual(out_message.message_type, JSONRPCMessageType.ResponseSuccess)
+        self.assertEqual(out_message.message_result, 'uri1')
+
+    def test_dispatch_request_concurrent_handler_exception(self):
+        # Setup: Create a server with worker threads and a handler that raises
+        config = IncomingMessageConfiguration('test/test', None, DispatchConcurrency.PARALLEL)
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger(), max_dispatch_workers=1)
+        server.set_request_handler(config, mock.MagicMock(side_effect=ValueError('error')))
+
+        # If: I dispatch a request to the handler
+        server._dispatch_message(JSONRPCMessage.create_request('123', 'test/test', {}))
+        self.assertTrue(server._dispatcher.wait_for_idle(5))
+        server._dispatcher.shutdown()
+
+        # Then: An error response should have been queued
+        out_message = server._output_queue.get_nowait()
+        self.assertEqual(out_message.message_type, JSONRPCMessageType.ResponseError)
+        self.assertEqual(out_message.message_id, '123')
+        self.assertEqual(out_message.message_error['code'], -32603)
+
+    def test_cancel_request(self):
+        # Setup: Create a server with worker threads and a handler that runs until it is canceled
+        config = IncomingMessageConfiguration('test/test', None, DispatchConcurrency.PARALLEL)
+        started_event = threading.Event()
+
+        def handler(request_context, params):
+            started_event.set()
+            for _ in range(50):
+                request_context.cancellation_token.raise_if_canceled()
+                time.sleep(0.1)
+            request_context.send_response(params)
+
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger(), max_dispatch_workers=1)
+        server.set_request_handler(config, handler)
+
+        # If: I cancel a request while its handler is running
+        server._dispatch_message(JSONRPCMessage.create_request('123', 'test/test', {}))
+        self.assertTrue(started_event.wait(5))
+        server._dispatch_message(JSONRPCMessage.create_notification(JSONRPCServer.CANCEL_REQUEST_METHOD, {'id': '123'}))
+        self.assertTrue(server._dispatcher.wait_for_idle(5))
+        server._dispatcher.shutdown()
+
+        # Then: The request should have stopped with a request canceled error
+        out_message = server._output_queue.get_nowait()
+        self.assertEqual(out_message.message_type, JSONRPCMessageType.ResponseError)
+        self.assertEqual(out_message.message_id, '123')
+        self.assertEqual(out_message.message_error['code'], JSONRPCServer.REQUEST_CANCELED_ERROR_CODE)
+        self.assertTrue(server._output_queue.empty())
+
+    def test_metrics_request(self):
+        # Setup: Create a server with a handler that responds immediately
+        config = IncomingMessageConfiguration('test/test', None)
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+        server.set_request_handler(config, lambda request_context, params: request_context.send_response(params))
+        server.add_metrics_provider('test', lambda: {'value': 1})
+
+        # If: I send a request, then ask for the metrics
+        server._dispatch_message(JSONRPCMessage.create_request('1', 'test/test', {}))
+        server._output_queue.get_nowait()
+        server._dispatch_message(JSONRPCMessage.create_request('2', JSONRPCServer.METRICS_REQUEST_METHOD, None))
+
+        # Then: The metrics should have been sent back, including the latency of the first request
+        out_message = server._output_queue.get_nowait()
+        self.assertEqual(out_message.message_id, '2')
+        metrics = out_message.message_result
+        self.assertEqual(metrics['handlers']['test/test']['count'], 1)
+        self.assertEqual(metrics['responses']['test/test']['count'], 1)
+        self.assertEqual(metrics['dispatchWait']['count'], 2)
+        self.assertEqual(metrics['outputQueueWait']['normal']['count'], 1)
+        self.assertDictEqual(metrics['dispatch'], {'maxWorkers': 0, 'activeWorkers': 0, 'inFlight': 0, 'queuedPerOwner': 0})
+        self.assertDictEqual(metrics['test'], {'value': 1})
+        for key in ['uptimeSeconds', 'input', 'output', 'outputQueues']:
+            self.assertIn(key, metrics)
+
+    def test_cancel_request_not_running(self):
+        # Setup: Create a server
+        server = JSONRPCServer(None, None, logger=utils.get_mock_logger())
+
+        # If: I cancel a request that is not running
+        server._dispatch_message(JSONRPCMessage.create_notification(JSONRPCServer.CANCEL_REQUEST_METHOD, {'id': '123'}))
+
+        # Then: Nothing should have been sent
+        self.assertTrue(server._output_queue.empty())
+
     @staticmethod
     def test_dispatch_notification_no_handler():
         # If: I dispatch a message that has no handler
@@ -491,6 +729,78 @@ class JSONRPCServerTests(unittest.TestCase):
         self.assertFalse(server._input_consumer.isAlive())
         self.assertFalse(server._output_consumer.isAlive())
 
+    def test_output_batch_drains_queue(self):
+        # Setup: Create a server that batches up to three messages and queue five messages
+        server = JSONRPCServer(io.BytesIO(), io.BytesIO(), max_output_batch_size=3)
+        for i in range(5):
+            server.send_notification('test/test', {'index': i})
+
+        # If: I get the output batches
+        first_batch = server._get_output_batch()
+        second_batch = server._get_output_batch()
+
+        # Then: The queued messages should be split into batches of at most three, in order
+        self.assertListEqual([m.message_params['index'] for m in first_batch], [0, 1, 2])
+        self.assertListEqual([m.message_params['index'] for m in second_batch], [3, 4])
+
+    def test_output_batch_stops_at_sentinel(self):
+        # Setup: Create a batching server with a message queued ahead of the stop sentinel
+        server = JSONRPCServer(io.BytesIO(), io.BytesIO(), max_output_batch_size=10)
+        server.send_notification('test/test', {})
+        server.stop()
+        server.send_notification('test/after', {})
+
+        # If: I get the output batch
+        batch = server._get_output_batch()
+
+        # Then: Only the message queued before the sentinel should be in the batch
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch[0].message_method, 'test/test')
+
+    def test_output_batch_waits_for_latency(self):
+        # Setup: Create a server that waits for batches to fill
+        server = JSONRPCServer(io.BytesIO(), io.BytesIO(), max_output_batch_size=2, max_output_batch_latency=5)
+        server.send_notification('test/first', {})
+
+        # If: A second message is queued while the output thread is waiting for the batch to fill
+        threading.Timer(0.1, server.send_notification, ['test/second', {}]).start()
+        batch = server._get_output_batch()
+
+        # Then: Both messages should be sent in the same batch
+        self.assertListEqual([m.message_method for m in batch], ['test/first', 'test/second'])
+
+    def test_output_batch_default_sends_individually(self):
+        # Setup: Create a server with the default batch size and queue two messages
+        server = JSONRPCServer(io.BytesIO(), io.BytesIO())
+        server.send_notification('test/test', {})
+        server.send_notification('test/test', {})
+
+        # If: I get the output batch
+        batch = server._get_output_batch()
+
+        # Then: The batch should only contain one message
+        self.assertEqual(len(batch), 1)
+
+    def test_writes_batched_messages(self):
+        # Setup: Create a batching server with messages queued before it starts
+        output_stream = io.BytesIO()
+        server = JSONRPCServer(io.BytesIO(), output_stream, logger=utils.get_mock_logger(), max_output_batch_size=10)
+        for i in range(4):
+            server.send_notification('test/test', {'index': i})
+
+        # If: I start the server, run it for a bit, and stop it
+        server.writer.stream = mock.MagicMock(wraps=output_stream)
+        server.start()
+        time.sleep(1)
+        server.stop()
+        server.wait_for_exit()
+
+        # Then: All queued messages should have been sent with a single flush
+        server.writer.stream.flush.assert_called_once()
+        self.assertEqual(server.output_statistics.messages_sent, 4)
+        self.assertEqual(server.output_statistics.flush_count, 1)
+        self.assertEqual(server.output_statistics.max_messages_per_flush, 4)
+
 
 class _TestParams:
     @classmethod
@@ -501,5 +811,14 @@ class _TestParams:
         pass
 
 
+class _TestOwnerParams:
+    @classmethod
+    def from_dict(cls, dictionary):
+        return _TestOwnerParams(dictionary['ownerUri'])
+
+    def __init__(self, owner_uri):
+        self.owner_uri = owner_uri
+
+
 if __name__ == '__main__':
     unittest.main()
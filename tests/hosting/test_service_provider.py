@@ -6,8 +6,8 @@
 import unittest
 import unittest.mock as mock
 
-from snowflaketoolsservice.hosting.json_rpc_server import JSONRPCServer
-from snowflaketoolsservice.hosting.service_provider import ServiceProvider
+from snowflaketoolsservice.hosting.json_rpc_server import IncomingMessageConfiguration, JSONRPCServer
+from snowflaketoolsservice.hosting.service_provider import LazyService, ServiceProvider
 import tests.utils as utils
 
 
@@ -75,6 +75,64 @@ class TestServiceProvider(unittest.TestCase):
         # Then: I should get the service back
         self.assertIsInstance(service, TestServiceProvider._TestService)
 
+    def test_get_lazy_service(self):
+        # Setup: Create a service provider with a lazy service and initialize it
+        sp = self._get_service_provider(lazy_services=1)
+        sp.initialize()
+
+        # If: I get the lazy service
+        service = sp['lazy_service0']
+
+        # Then:
+        # ... The service should have been created and registered on first lookup
+        self.assertIsInstance(service, LazyTestService)
+        self.assertTrue(service.has_initialized)
+        self.assertIs(service.service_provider, sp)
+        self.assertDictEqual(sp._lazy_services, {})
+
+        # ... Later lookups should return the same service
+        self.assertIs(sp['lazy_service0'], service)
+
+    def test_get_unknown_service(self):
+        # Setup: Create a service provider that has been initialized
+        sp = self._get_service_provider(lazy_services=1)
+        sp.initialize()
+
+        # If: I attempt to get a service that doesn't exist
+        # Then: A KeyError should be raised
+        with self.assertRaises(KeyError):
+            sp['not_a_service']
+
+    def test_lazy_service_loaded_for_method(self):
+        # Setup: Create a service provider with a lazy service and initialize it
+        sp = self._get_service_provider(lazy_services=1)
+        sp.initialize()
+
+        # If: The server receives a message for a method of the lazy service
+        handler = sp.server._get_handler(sp.server._request_handlers, 'lazy/test')
+
+        # Then:
+        # ... The service should have been loaded and its handler returned
+        self.assertIn('lazy_service0', sp._services)
+        self.assertEqual(handler.handler, sp['lazy_service0'].handle_test_request)
+
+        # ... A method no service handles should not load anything
+        self.assertIsNone(sp.server._get_handler(sp.server._request_handlers, 'other/test'))
+
+    def test_lazy_service_load_failure(self):
+        # Setup: Create a service provider with a lazy service whose module doesn't exist
+        server = JSONRPCServer(None, None)
+        logger = utils.get_mock_logger()
+        sp = ServiceProvider(server, {'broken': LazyService('tests.hosting.not_a_module', 'Service', ('broken/',))}, logger)
+        sp.initialize()
+
+        # If: The server receives a message for a method of the lazy service
+        handler = server._get_handler(server._request_handlers, 'broken/test')
+
+        # Then: There should be no handler and the failure should have been logged
+        self.assertIsNone(handler)
+        logger.exception.assert_called_once()
+
     # IMPLEMENTATION DETAILS ###############################################
     class _TestService:
         def __init__(self):
@@ -86,11 +144,29 @@ class TestServiceProvider(unittest.TestCase):
             self.service_provider = service_provider
 
     @staticmethod
-    def _get_service_provider(services: int = 1) -> ServiceProvider:
+    def _get_service_provider(services: int = 1, lazy_services: int = 0) -> ServiceProvider:
         # If: I create a new service provider
         server = JSONRPCServer(None, None)
         logger = utils.get_mock_logger()
         services = {'service_name' + str(x): TestServiceProvider._TestService for x in range(0, services)}
+        for x in range(0, lazy_services):
+            services['lazy_service' + str(x)] = LazyService(__name__, 'LazyTestService', ('lazy/',))
         sp = ServiceProvider(server, services, logger)
 
         return sp
+
+
+class LazyTestService:
+    """Service that the lazy service tests load by name"""
+
+    def __init__(self):
+        self.has_initialized = False
+        self.service_provider = None
+
+    def register(self, service_provider):
+        self.has_initialized = True
+        self.service_provider = service_provider
+        service_provider.server.set_request_handler(IncomingMessageConfiguration('lazy/test', None), self.handle_test_request)
+
+    def handle_test_request(self, request_context, params):
+        request_context.send_response(None)
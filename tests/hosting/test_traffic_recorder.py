@@ -0,0 +1,94 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import unittest
+
+from snowflaketoolsservice.hosting.json_message import JSONRPCMessage
+from snowflaketoolsservice.hosting.json_reader import JSONRPCReader
+from snowflaketoolsservice.hosting.json_writer import JSONRPCWriter
+from snowflaketoolsservice.hosting.traffic_recorder import read_recording, RecordedMessage, TrafficRecorder
+
+
+class TrafficRecorderTests(unittest.TestCase):
+
+    def test_record_and_read(self):
+        # If: I record an incoming and an outgoing message
+        stream = io.StringIO()
+        recorder = TrafficRecorder(stream)
+        recorder.record_incoming('{"id": "1", "jsonrpc": "2.0", "method": "version", "params": null}')
+        recorder.record_outgoing('{"id": "1", "jsonrpc": "2.0", "result": "1.0"}')
+
+        # Then:
+        # ... Each message should have been written as a line of JSON
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['direction'], RecordedMessage.INCOMING)
+
+        # ... Reading the recording should return the messages in order
+        stream.seek(0)
+        recording = read_recording(stream)
+        self.assertListEqual([recorded.direction for recorded in recording], [RecordedMessage.INCOMING, RecordedMessage.OUTGOING])
+        self.assertEqual(recording[0].message['method'], 'version')
+        self.assertEqual(recording[1].message['result'], '1.0')
+        self.assertLessEqual(recording[0].offset, recording[1].offset)
+
+    def test_record_redacts_credentials(self):
+        # If: I record a connect request and its response that carry a password
+        stream = io.StringIO()
+        recorder = TrafficRecorder(stream)
+        recorder.record_incoming(json.dumps({
+            'id': '1', 'jsonrpc': '2.0', 'method': 'connection/connect',
+            'params': {'ownerUri': 'file://a.sql', 'connection': {'options': {'user': 'admin', 'password': 'hunter2'}}}
+        }))
+        recorder.record_outgoing(json.dumps({'id': '1', 'jsonrpc': '2.0', 'result': [{'options': {'password': 'hunter2'}}]}))
+
+        # Then:
+        # ... The password should not have been written
+        self.assertNotIn('hunter2', stream.getvalue())
+
+        # ... The rest of the messages should have been recorded as they were
+        stream.seek(0)
+        recording = read_recording(stream)
+        options = recording[0].message['params']['connection']['options']
+        self.assertDictEqual(options, {'user': 'admin', 'password': TrafficRecorder.REDACTED_VALUE})
+        self.assertEqual(recording[0].message['params']['ownerUri'], 'file://a.sql')
+        self.assertEqual(recording[1].message['result'][0]['options']['password'], TrafficRecorder.REDACTED_VALUE)
+
+    def test_record_after_close(self):
+        # If: I record a message after the recorder is closed
+        stream = io.StringIO()
+        recorder = TrafficRecorder(stream)
+        recorder.close()
+        recorder.record_outgoing('{}')
+
+        # Then: The message should be dropped without raising
+        self.assertTrue(stream.closed)
+
+    def test_reader_and_writer_taps(self):
+        # Setup: Create a reader and a writer that share a recorder
+        recording_stream = io.StringIO()
+        recorder = TrafficRecorder(recording_stream)
+        content = b'{"id": "1", "jsonrpc": "2.0", "method": "version", "params": null}'
+        reader = JSONRPCReader(io.BytesIO(b'Content-Length: ' + str(len(content)).encode('ascii') + b'\r\n\r\n' + content))
+        reader.tap = recorder
+        writer = JSONRPCWriter(io.BytesIO())
+        writer.tap = recorder
+
+        # If: I read a request and write its response
+        reader.read_message()
+        writer.send_message(JSONRPCMessage.create_response('1', '1.0'))
+
+        # Then: Both messages should have been recorded
+        recording_stream.seek(0)
+        recording = read_recording(recording_stream)
+        self.assertListEqual([recorded.direction for recorded in recording], [RecordedMessage.INCOMING, RecordedMessage.OUTGOING])
+        self.assertEqual(recording[0].message['method'], 'version')
+        self.assertEqual(recording[1].message['id'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -92,3 +92,82 @@ class JSONRPCWriterTests(unittest.TestCase):
             message_str = str.join(os.linesep, [x.decode('UTF-8') for x in stream.readlines()])
             message_dict = json.loads(message_str)
             self.assertDictEqual(message_dict, message.dictionary)
+
+    def test_send_messages_single_write(self):
+        # Setup: Create a writer over a stream that records writes and flushes
+        stream = io.BytesIO()
+        stream.write = mock.MagicMock(wraps=stream.write)
+        stream.flush = mock.MagicMock(wraps=stream.flush)
+        writer = JSONRPCWriter(stream, logger=utils.get_mock_logger())
+
+        # If: I send a batch of messages
+        messages = [JSONRPCMessage.create_notification('test/test', {'index': i, 'value': '\u00e9'}) for i in range(3)]
+        writer.send_messages(messages)
+
+        # Then:
+        # ... The batch should have been written and flushed once
+        stream.write.assert_called_once()
+        stream.flush.assert_called_once()
+
+        # ... Every message should be framed with the byte length of its content
+        output = stream.getvalue()
+        for message in messages:
+            header, _, output = output.partition(b'\r\n\r\n')
+            length = int(re.match(b'^Content-Length: ([0-9]+)$', header).group(1))
+            self.assertDictEqual(json.loads(output[:length].decode('UTF-8')), message.dictionary)
+            output = output[length:]
+        self.assertEqual(output, b'')
+
+        # ... The statistics should reflect a single flush of three messages
+        self.assertEqual(writer.statistics.messages_sent, 3)
+        self.assertEqual(writer.statistics.flush_count, 1)
+        self.assertEqual(writer.statistics.max_messages_per_flush, 3)
+        self.assertEqual(writer.statistics.messages_per_flush, 3.0)
+        self.assertEqual(writer.statistics.bytes_sent, len(stream.getvalue()))
+
+    def test_send_messages_encoding_failure(self):
+        # Setup: Create a writer, and a batch where one message can't be serialized
+        stream = io.BytesIO()
+        logger = utils.get_mock_logger()
+        writer = JSONRPCWriter(stream, logger=logger)
+        messages = [JSONRPCMessage.create_response(str(index), {'value': index}) for index in range(1, 4)]
+        messages[1].to_json = mock.MagicMock(side_effect=TypeError('Object of type bytes is not JSON serializable'))
+
+        # If: I send the batch
+        writer.send_messages(messages)
+
+        # Then:
+        # ... The other messages should have been sent, in order
+        output = stream.getvalue()
+        sent_ids = []
+        while output:
+            header, _, output = output.partition(b'\r\n\r\n')
+            length = int(re.match(b'^Content-Length: ([0-9]+)$', header).group(1))
+            sent_ids.append(json.loads(output[:length].decode('UTF-8'))['id'])
+            output = output[length:]
+        self.assertListEqual(sent_ids, ['1', '3'])
+        self.assertEqual(writer.statistics.messages_sent, 2)
+
+        # ... The message that couldn't be serialized should have been logged
+        logger.exception.assert_called_once()
+
+    def test_send_messages_empty(self):
+        # If: I send an empty batch of messages
+        stream = mock.MagicMock()
+        writer = JSONRPCWriter(stream)
+        writer.send_messages([])
+
+        # Then: Nothing should have been written and no flush should be counted
+        stream.write.assert_not_called()
+        stream.flush.assert_not_called()
+        self.assertDictEqual(writer.statistics.to_dict(), {
+            'messagesSent': 0,
+            'bytesSent': 0,
+            'flushCount': 0,
+            'maxMessagesPerFlush': 0,
+            'messagesPerFlush': 0.0
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
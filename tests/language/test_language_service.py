@@ -5,6 +5,7 @@
 
 """Test the language service"""
 
+from concurrent.futures import ThreadPoolExecutor
 import threading    # noqa
 from typing import List, Tuple, Optional
 import unittest
@@ -29,6 +30,7 @@ from snowflaketoolsservice.language.contracts import (      # noqa
     DocumentFormattingParams, DocumentRangeFormattingParams, FormattingOptions, TextEdit
 )
 from snowflaketoolsservice.utils import constants
+from snowflaketoolsservice.utils.thread import run_in_background, set_background_executor
 from snowflaketoolsservice.workspace import (       # noqa
     WorkspaceService, TextDocumentIdentifier, Configuration,
     PGSQLConfiguration, ScriptFile, Workspace
@@ -256,6 +258,45 @@ class TestLanguageService(unittest.TestCase):
         # ... and the info should have the connection key set
         self.assertEqual(info.connection_key, OperationsQueue.create_key(conn_info))
 
+    def test_on_connect_does_not_block_background_worker(self):
+        """
+        Test that building the intellisense cache doesn't hold a background worker while the metadata refresh
+        is queued for the same workers
+        """
+        # Setup: Create a language service and a background executor with a single worker
+        notified_event = threading.Event()
+        self.mock_server.send_notification = mock.Mock(side_effect=lambda method, params: notified_event.set())
+        service: LanguageService = self._init_service()
+        conn_info = ConnectionInfo('file://msuri.sql',
+                                   ConnectionDetails.from_data({'host': None, 'dbname': 'TEST_DBNAME', 'user': 'TEST_USER'}))
+
+        connect_result = mock.MagicMock()
+        connect_result.error_message = None
+        self.mock_connection_service.get_connection = mock.Mock(return_value=mock.MagicMock())
+        self.mock_connection_service.connect = mock.MagicMock(return_value=connect_result)
+
+        # ... The refresh completes on a background worker, like the completion refresher
+        refresher_mock = mock.MagicMock()
+        refresher_mock.refresh = mock.Mock(side_effect=lambda callback: run_in_background(callback, None))
+        patch_path = 'snowflaketoolsservice.language.operations_queue.CompletionRefresher'
+        executor = ThreadPoolExecutor(max_workers=1)
+        set_background_executor(executor)
+        try:
+            with mock.patch(patch_path, return_value=refresher_mock):
+                # If: I notify of a connection complete for a given URI
+                service.on_connect(conn_info)
+
+                # Then: The intellisense ready notification is sent once the refresh has run on the only worker
+                self.assertTrue(notified_event.wait(5))
+        finally:
+            set_background_executor(None)
+            executor.shutdown(wait=False)
+
+        self.mock_server.send_notification.assert_called_once()
+        self.assertEqual(self.mock_server.send_notification.call_args[0][0], INTELLISENSE_READY_NOTIFICATION)
+        info: ScriptParseInfo = service.get_script_parse_info(conn_info.owner_uri)
+        self.assertEqual(info.connection_key, OperationsQueue.create_key(conn_info))
+
     def test_format_doc_no_pgsql_format(self):
         """
         Test that the format codepath succeeds even if the configuration options aren't defined
@@ -241,6 +241,30 @@ class TestConnectionContextQueue(unittest.TestCase):
             self.assertTrue(connection_context.intellisense_complete.is_set())
         self._run_with_mock_refresher(do_test)
 
+    def test_intellisense_complete_callback(self):
+        connection = mock.Mock()
+
+        def do_test():
+            # Given a connection context that is refreshing its metadata
+            connection_context = ConnectionContext(self.expected_context_key)
+            connection_context.refresh_metadata(connection)
+
+            # When I register a callback before the refresh completes
+            callback = mock.Mock()
+            connection_context.add_intellisense_complete_callback(callback)
+
+            # Then it isn't called until the refresh completes
+            callback.assert_not_called()
+            self._complete_refresh(mock.Mock())
+            callback.assert_called_once_with(connection_context)
+
+            # ... and a callback registered after the refresh completed is called immediately
+            late_callback = mock.Mock()
+            connection_context.add_intellisense_complete_callback(late_callback)
+            late_callback.assert_called_once_with(connection_context)
+            callback.assert_called_once()
+        self._run_with_mock_refresher(do_test)
+
     def _complete_refresh(self, completer):
         callback = self.refresh_method_mock.call_args[0][0]
         self.assertIsNotNone(callback)
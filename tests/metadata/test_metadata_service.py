@@ -3,6 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import unittest
 import unittest.mock as mock
 
@@ -11,6 +13,8 @@ from snowflaketoolsservice.connection.contracts import ConnectionType
 from snowflaketoolsservice.metadata import MetadataService
 from snowflaketoolsservice.metadata.contracts import METADATA_LIST_REQUEST, MetadataListParameters, MetadataListResponse, MetadataType, ObjectMetadata
 from snowflaketoolsservice.utils import constants
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
+from snowflaketoolsservice.utils.thread import run_in_background, set_background_executor
 from tests.mocks.service_provider_mock import ServiceProviderMock
 from tests.utils import MockConnection, MockCursor, MockRequestContext, MockThread
 
@@ -80,6 +84,72 @@ class TestMetadataService(unittest.TestCase):
             self.assertEqual(actual_metadata.name, expected_metadata[index].name)
             self.assertEqual(actual_metadata.metadata_type, expected_metadata[index].metadata_type)
 
+    def test_metadata_list_request_canceled(self):
+        """Test that a canceled metadata list request does not query the server and responds with a canceled error"""
+        mock_cursor = MockCursor([])
+        mock_connection = MockConnection(cursor=mock_cursor)
+        self.connection_service.get_connection = mock.Mock(return_value=mock_connection)
+        request_context = MockRequestContext()
+        request_context.send_canceled_error = mock.Mock()
+        request_context.cancellation_token.cancel()
+        params = MetadataListParameters()
+        params.owner_uri = self.test_uri
+        mock_thread = MockThread()
+        with mock.patch('threading.Thread', new=mock.Mock(side_effect=mock_thread.initialize_target)):
+            # If I call the metadata list request handler after the request was canceled
+            self.metadata_service._handle_metadata_list_request(request_context, params)
+        # Then the query was not executed and a canceled error was sent
+        mock_cursor.execute.assert_not_called()
+        request_context.send_canceled_error.assert_called_once()
+        self.assertIsNone(request_context.last_response_params)
+
+    def test_list_metadata_cancels_query(self):
+        """Test that canceling the token while listing metadata cancels the query on the connection"""
+        cancellation_token = CancellationToken()
+        mock_cursor = MockCursor([])
+        mock_cursor.execute = mock.Mock(side_effect=lambda query: cancellation_token.cancel())
+        mock_connection = MockConnection(cursor=mock_cursor)
+        cancel_threads = []
+        canceled_event = threading.Event()
+        mock_connection.cancel = mock.Mock(side_effect=lambda: cancel_threads.append(threading.current_thread()) or canceled_event.set())
+        self.connection_service.get_connection = mock.Mock(return_value=mock_connection)
+
+        # ... The only background worker is busy
+        release_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            set_background_executor(executor)
+            try:
+                run_in_background(release_event.wait, 5)
+
+                # If I cancel the token while the query is running
+                # Then the query is canceled on the connection and the listing stops
+                with self.assertRaises(OperationCanceledError):
+                    self.metadata_service._list_metadata(self.test_uri, cancellation_token)
+                self.assertTrue(canceled_event.wait(5))
+                mock_connection.cancel.assert_called_once()
+            finally:
+                release_event.set()
+                set_background_executor(None)
+
+        # ... The query is canceled on a thread of its own rather than on the thread that canceled the token
+        self.assertIsNot(cancel_threads[0], threading.current_thread())
+
+    def test_list_metadata_marks_connection_in_use(self):
+        """Test that the connection is marked in use while the metadata is listed, so that it isn't probed meanwhile"""
+        mock_cursor = MockCursor([])
+        mock_connection = MockConnection(cursor=mock_cursor)
+        self.connection_service.get_connection = mock.Mock(return_value=mock_connection)
+        calls = []
+        self.connection_service.mark_in_use = mock.Mock(side_effect=lambda connection: calls.append(('mark_in_use', connection)))
+        self.connection_service.mark_idle = mock.Mock(side_effect=lambda connection: calls.append(('mark_idle', connection)))
+        mock_cursor.execute = mock.Mock(side_effect=lambda query: calls.append(('execute', None)))
+
+        # If I list the metadata
+        self.metadata_service._list_metadata(self.test_uri)
+
+        # Then the connection is marked in use before the query runs, and idle once it has run
+        self.assertListEqual(calls, [('mark_in_use', mock_connection), ('execute', None), ('mark_idle', mock_connection)])
+
     def test_metadata_list_request_error(self):
         """Test that the proper error response is sent if there is an error while handling a metadata list request"""
         request_context = MockRequestContext()
@@ -11,3 +11,4 @@ class ServerMock:
 
     def __init__(self):
         self.set_request_handler = mock.MagicMock()
+        self.set_coalescing_policy = mock.MagicMock()
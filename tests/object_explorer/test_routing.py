@@ -12,6 +12,7 @@ from snowflaketoolsservice.connection.contracts import ConnectionDetails
 from snowflaketoolsservice.object_explorer.contracts import NodeInfo
 import snowflaketoolsservice.object_explorer.routing as routing
 from snowflaketoolsservice.object_explorer.session import ObjectExplorerSession
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
 
 
 class TestObjectExplorerRouting(unittest.TestCase):
@@ -97,6 +98,25 @@ class TestObjectExplorerRouting(unittest.TestCase):
         # ... The node generator should have been called
         node_generator.assert_called_once_with(False, current_path, session, match_params)
 
+    def test_routing_target_get_nodes_canceled(self):
+        # Setup: Create a routing target with a lazy node generator and a token to cancel it with
+        cancellation_token = CancellationToken()
+        generated_nodes = []
+
+        def node_generator(is_refresh, current_path, session, match_params):
+            for _ in range(3):
+                node = NodeInfo()
+                generated_nodes.append(node)
+                yield node
+                cancellation_token.cancel()
+
+        # If: I ask for nodes and the token is canceled after the first node is generated
+        # Then: The operation should be canceled before the rest of the nodes are generated
+        rt = routing.RoutingTarget(None, node_generator)
+        with self.assertRaises(OperationCanceledError):
+            rt.get_nodes(False, '/', ObjectExplorerSession('session_id', ConnectionDetails()), {}, cancellation_token)
+        self.assertLess(len(generated_nodes), 3)
+
     # ROUTING TABLE TESTS ##################################################
     def test_routing_table(self):
         # Make sure that all keys in the routing table are regular expressions
@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 
 import unittest
+from unittest import mock
 
 import snow.utils as pgsmo_utils
 import tests.pgsmo_tests.utils as utils
@@ -26,6 +27,21 @@ class TestServerConnection(unittest.TestCase):
         self.assertDictEqual(server_conn.dsn_parameters, expected_dict)
         self.assertTupleEqual((10, 2, 16), server_conn.version)
 
+    def test_server_conn_init_metadata(self):
+        # Setup: Create a mock connection, and metadata already read from it
+        mock_conn = utils.MockConnection(None, version='100216')
+        metadata = mock.Mock(dsn_parameters={'dbname': 'otherdb'}, version=(11, 0, 1))
+        mock_conn.get_dsn_parameters.reset_mock()
+
+        # If: I initialize a server connection with the metadata
+        # noinspection PyTypeChecker
+        server_conn = pgsmo_utils.querying.ServerConnection(mock_conn, metadata)
+
+        # Then: The properties should come from the metadata instead of being read again
+        self.assertDictEqual(server_conn.dsn_parameters, {'dbname': 'otherdb'})
+        self.assertTupleEqual(server_conn.version, (11, 0, 1))
+        mock_conn.get_dsn_parameters.assert_not_called()
+
     def test_execute_dict_success(self):
         # Setup: Create a mock server connection that will return a result set
         mock_cursor = utils.MockCursor(utils.get_mock_results())
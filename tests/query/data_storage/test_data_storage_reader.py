@@ -6,7 +6,12 @@
 import unittest
 from unittest import mock
 
+from snowflake.connector.connection import SnowflakeConnection
+from snowflake.connector.cursor import ResultMetadata
+
+from snowflaketoolsservice.parsers import datatypes
 from snowflaketoolsservice.query.data_storage import StorageDataReader
+from snowflaketoolsservice.query.data_storage.storage_data_reader import get_fetch_size
 import tests.utils as utils
 
 
@@ -41,6 +46,72 @@ class TestDataStorageReader(unittest.TestCase):
 
         self.assertEqual(read_row_count, total_rows)
 
+    def test_read_rows(self):
+        # Setup: Create a cursor that fetches blocks of rows and records how many rows were asked for
+        cursor = MockFetchManyCursor([(index, 'x' * 100) for index in range(1000)])
+        reader = StorageDataReader(cursor)
+
+        # If: I read every block of rows
+        blocks = []
+        with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=self._get_columns_info_mock):
+            rows = reader.read_rows()
+            while rows:
+                blocks.append(rows)
+                rows = reader.read_rows()
+
+        # Then:
+        # ... The first fetch should have been small, and later fetches sized from the width of the rows
+        adapted_fetch_size = get_fetch_size(cursor.rows, StorageDataReader.TARGET_FETCH_BYTES, StorageDataReader.MIN_FETCH_SIZE,
+                                            StorageDataReader.MAX_FETCH_SIZE)
+        self.assertEqual(cursor.fetch_sizes[0], StorageDataReader.INITIAL_FETCH_SIZE)
+        self.assertTrue(all(size == adapted_fetch_size for size in cursor.fetch_sizes[1:]))
+
+        # ... Every row should have been read in order, and the named cursor told to fetch as many rows per round trip
+        self.assertListEqual([row for block in blocks for row in block], cursor.rows)
+        self.assertEqual(cursor.itersize, adapted_fetch_size)
+
+    def test_read_row_fixed_fetch_size(self):
+        # Setup: Create a reader with a fixed fetch size
+        cursor = MockFetchManyCursor([(index,) for index in range(5)])
+        reader = StorageDataReader(cursor, fetch_size=2)
+
+        # If: I read the rows one at a time
+        read_rows = []
+        with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=self._get_columns_info_mock):
+            while reader.read_row():
+                read_rows.append(reader.get_values())
+
+        # Then: The rows should have been fetched two at a time
+        self.assertListEqual(read_rows, cursor.rows)
+        self.assertListEqual(cursor.fetch_sizes, [2, 2, 2, 2])
+
+    def test_read_rows_result_batches(self):
+        # Setup: Create a Snowflake cursor whose rows were downloaded in batches
+        rows = [(1, 'a'), (2, 'b')]
+        connection = mock.Mock(spec=SnowflakeConnection)
+        description = [ResultMetadata('ID', 0, None, None, 38, 0, False), ResultMetadata('NAME', 2, None, 16777216, None, None, True)]
+        cursor = utils.MockSnowflakeCursor([rows], description, connection)
+        reader = StorageDataReader(cursor, iter(rows))
+
+        # If: I read the downloaded rows
+        read_rows = reader.read_rows()
+
+        # Then: The columns should have been described from the Snowflake type codes, without querying the server
+        self.assertListEqual(read_rows, rows)
+        self.assertListEqual([column.data_type for column in reader.columns_info], [datatypes.DATATYPE_NUMERIC, datatypes.DATATYPE_TEXT])
+        connection.cursor.assert_not_called()
+
+    def test_get_fetch_size(self):
+        # If: I get the fetch size for narrow and wide rows
+        narrow_size = get_fetch_size([(1, 2)] * 10, 1024 * 1024, 100, 10000)
+        wide_size = get_fetch_size([('x' * 100000,)] * 10, 1024 * 1024, 100, 10000)
+        medium_size = get_fetch_size([('x' * 1000, b'y' * 24)] * 10, 1024 * 1024, 100, 10000)
+
+        # Then: The fetch size should aim for the target bytes, within the bounds
+        self.assertEqual(narrow_size, 10000)
+        self.assertEqual(wide_size, 100)
+        self.assertEqual(medium_size, 1024)
+
     def test_is_none(self):
 
         self.execute_read_row_with_patch()
@@ -97,5 +168,23 @@ class TestDataStorageReader(unittest.TestCase):
             self.assertEqual(not_valid_type_error_message, context_manager.exception.args[0])
 
 
+class MockFetchManyCursor(utils.MockCursor):
+    """Named cursor that fetches blocks of rows"""
+
+    itersize = 2000
+
+    def __init__(self, rows):
+        utils.MockCursor.__init__(self, rows)
+        self.rows = rows
+        self.name = 'named_cursor'
+        self.fetch_sizes = []
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        rows = self.rows[self._fetched_count:self._fetched_count + size]
+        self._fetched_count += len(rows)
+        return rows
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from snowflaketoolsservice.query.data_storage import download_result_batches, get_result_batches
+import tests.utils as utils
+
+
+class FakeResultBatch:
+    """Result batch whose rows take a while to download, like a chunk of a Snowflake result set"""
+
+    def __init__(self, rows, delay: float = 0, tracker: 'DownloadTracker' = None):
+        self.rows = rows
+        self.delay = delay
+        self.tracker = tracker
+
+    def __iter__(self):
+        if self.tracker is not None:
+            self.tracker.started()
+        time.sleep(self.delay)
+        if self.tracker is not None:
+            self.tracker.finished()
+        return iter(self.rows)
+
+
+class DownloadTracker:
+    """Counts the most downloads that ran at once"""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def finished(self):
+        with self._lock:
+            self.running -= 1
+
+
+class TestResultBatchDownload(unittest.TestCase):
+
+    def test_get_result_batches(self):
+        # If: I get the result batches of a cursor that splits its results, and of one that doesn't
+        batches = [FakeResultBatch([(1,)])]
+        # Then: Only the Snowflake cursor should return batches, even though mocks make up any method
+        self.assertIs(get_result_batches(utils.MockSnowflakeCursor(batches)), batches)
+        self.assertIsNone(get_result_batches(utils.MockCursor([(1,)])))
+        self.assertIsNone(get_result_batches(mock.Mock()))
+
+    def test_download_in_order(self):
+        # Setup: Create batches where the earlier batches take the longest to download
+        tracker = DownloadTracker()
+        batches = [FakeResultBatch([(index, 'a'), (index, 'b')], delay=0.05 * (5 - index), tracker=tracker) for index in range(6)]
+
+        # If: I download the batches with a parallelism of 3
+        downloaded = list(download_result_batches(batches, 3))
+
+        # Then: The batches should have been downloaded concurrently, but yielded in order
+        self.assertListEqual(downloaded, [batch.rows for batch in batches])
+        self.assertGreater(tracker.max_running, 1)
+        self.assertLessEqual(tracker.max_running, 3)
+
+    def test_download_without_parallelism(self):
+        # Setup: Create batches that track how many download at once
+        tracker = DownloadTracker()
+        batches = [FakeResultBatch([(index,)], delay=0.01, tracker=tracker) for index in range(3)]
+
+        # If: I download the batches with a parallelism of 1
+        downloaded = list(download_result_batches(batches, 1))
+
+        # Then: The batches should have been downloaded one at a time, in order
+        self.assertListEqual(downloaded, [[(0,)], [(1,)], [(2,)]])
+        self.assertEqual(tracker.max_running, 1)
+
+    def test_download_failure(self):
+        # Setup: Create batches where the second one fails to download
+        class FailingBatch:
+            def __iter__(self):
+                raise IOError('Chunk download failed')
+        batches = [FakeResultBatch([(1,)]), FailingBatch(), FakeResultBatch([(3,)])]
+
+        # If: I download the batches
+        downloads = download_result_batches(batches, 2)
+
+        # Then: The batches before the failed one should be yielded, and then the failure raised
+        self.assertListEqual(next(downloads), [(1,)])
+        with self.assertRaises(IOError):
+            next(downloads)
+
+
+if __name__ == '__main__':
+    unittest.main()
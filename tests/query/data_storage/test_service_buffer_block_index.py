@@ -0,0 +1,42 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+from snowflaketoolsservice.query.data_storage import ServiceBufferBlockIndex
+
+
+class TestServiceBufferBlockIndex(unittest.TestCase):
+
+    def test_locate(self):
+        # If: I add blocks of different sizes to an index
+        index = ServiceBufferBlockIndex()
+        first_rows = [index.add_block(offset, row_count) for offset, row_count in ((0, 3), (100, 1), (150, 2))]
+
+        # Then:
+        # ... Each block should start after the rows of the blocks before it
+        self.assertListEqual(first_rows, [0, 3, 4])
+        self.assertEqual(index.block_count, 3)
+        self.assertEqual(index.row_count, 6)
+
+        # ... Each row should be located in its block
+        self.assertListEqual(
+            [index.locate(position) for position in range(6)],
+            [(0, 0), (0, 1), (0, 2), (100, 0), (150, 0), (150, 1)]
+        )
+
+    def test_locate_out_of_range(self):
+        # If: I locate rows outside of the blocks of an index
+        index = ServiceBufferBlockIndex()
+        index.add_block(0, 2)
+
+        # Then: They should not be found
+        for position in (-1, 2):
+            with self.assertRaises(IndexError):
+                index.locate(position)
+
+
+if __name__ == '__main__':
+    unittest.main()
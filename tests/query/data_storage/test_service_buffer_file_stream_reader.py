@@ -3,18 +3,32 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import unittest
+from unittest import mock
 import struct
 import io
 import json
 
+from snowflaketoolsservice.query.data_storage.service_buffer import BLOCK_FORMAT_VERSION, BLOCK_HEADER, BLOCK_LENGTH_TYPECODE, BLOCK_MARKER
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_reader import ServiceBufferFileStreamReader
+from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from snowflaketoolsservice.query.contracts.column import DbColumn
 from snowflaketoolsservice.parsers import datatypes
 
 DECODING_METHOD = 'utf-8'
 
 
+def create_block_stream(*values) -> io.BytesIO:
+    """Creates a stream holding a block of one row, whose columns hold the given bytes"""
+    stream = io.BytesIO()
+    stream.write(BLOCK_HEADER.pack(BLOCK_MARKER, BLOCK_FORMAT_VERSION, 1, len(values), sum(len(value) for value in values)))
+    stream.write(array(BLOCK_LENGTH_TYPECODE, [len(value) for value in values]).tobytes())
+    for value in values:
+        stream.write(value)
+    return stream
+
+
 class TestServiceBufferFileStreamReader(unittest.TestCase):
 
     def setUp(self):
@@ -35,119 +49,26 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         self._datetimetzrange_test_value = "[2014-06-08T12:12:45-07:00,2016-07-06T14:12:08-07:00)"
         self._daterange_test_value = "[2015-06-06,2016-08-08)"
 
-        # file_streams
-        self._bool_file_stream = io.BytesIO()
-        bool_val = bytearray(struct.pack("?", self._bool_test_value))
-        bool_len = len(bool_val)
-        bool_len_to_write = bytearray(struct.pack("i", bool_len))
-        self._bool_file_stream.write(bool_len_to_write)
-        self._bool_file_stream.write(bool_val)
-
-        self._float_file_stream1 = io.BytesIO()
-        float_val1 = bytearray(struct.pack("d", self._float_test_value1))
-        float_len1 = len(float_val1)
-        float_len_to_write1 = bytearray(struct.pack("i", float_len1))
-        self._float_file_stream1.write(float_len_to_write1)
-        self._float_file_stream1.write(float_val1)
-
-        self._float_file_stream2 = io.BytesIO()
-        float_val2 = bytearray(struct.pack("d", self._float_test_value2))
-        float_len2 = len(float_val2)
-        float_len_to_write2 = bytearray(struct.pack("i", float_len2))
-        self._float_file_stream2.write(float_len_to_write2)
-        self._float_file_stream2.write(float_val2)
-
-        self._short_file_stream = io.BytesIO()
-        short_val = bytearray(struct.pack("h", self._short_test_value))
-        short_len = len(short_val)
-        short_len_to_write = bytearray(struct.pack("i", short_len))
-        self._short_file_stream.write(short_len_to_write)
-        self._short_file_stream.write(short_val)
-
-        self._int_file_stream = io.BytesIO()
-        int_val = bytearray(struct.pack("i", self._int_test_value))
-        int_len = len(int_val)
-        int_len_to_write = bytearray(struct.pack("i", int_len))
-        self._int_file_stream.write(int_len_to_write)
-        self._int_file_stream.write(int_val)
-
-        self._long_long_file_stream = io.BytesIO()
-        long_long_val = bytearray(struct.pack("q", self._long_long_test_value))
-        long_long_len = len(long_long_val)
-        long_long_len_to_write = bytearray(struct.pack("i", long_long_len))
-        self._long_long_file_stream.write(long_long_len_to_write)
-        self._long_long_file_stream.write(long_long_val)
-
-        self._bytea_file_stream = io.BytesIO()
-        bytea_val = bytes(self._bytea_test_value)
-        bytea_len = len(bytea_val)
-        bytea_len_to_write = bytearray(struct.pack("i", bytea_len))
-        self._bytea_file_stream.write(bytea_len_to_write)
-        self._bytea_file_stream.write(bytea_val)
-
-        self._dict_file_stream = io.BytesIO()
-        dict_val = bytearray(json.dumps(self._dict_test_value).encode())
-        dict_len = len(dict_val)
-        dict_len_to_write = bytearray(struct.pack("i", dict_len))
-        self._dict_file_stream.write(dict_len_to_write)
-        self._dict_file_stream.write(dict_val)
-
-        self._list_file_stream = io.BytesIO()
-        list_val = bytearray(json.dumps(self._list_test_value).encode())
-        list_len = len(list_val)
-        list_len_to_write = bytearray(struct.pack("i", list_len))
-        self._list_file_stream.write(list_len_to_write)
-        self._list_file_stream.write(list_val)
-
-        self._numericrange_file_stream = io.BytesIO()
-        numericrange_val = bytearray(str(self._numericrange_test_value).encode())
-        numericrange_len = len(numericrange_val)
-        numericrange_len_to_write = bytearray(struct.pack("i", numericrange_len))
-        self._numericrange_file_stream.write(numericrange_len_to_write)
-        self._numericrange_file_stream.write(numericrange_val)
-
-        self._datetimerange_file_stream = io.BytesIO()
-        datetimerange_val = bytearray(str(self._datetimerange_test_value).encode())
-        datetimerange_len = len(datetimerange_val)
-        datetimerange_len_to_write = bytearray(struct.pack("i", datetimerange_len))
-        self._datetimerange_file_stream.write(datetimerange_len_to_write)
-        self._datetimerange_file_stream.write(datetimerange_val)
-
-        self._datetimetzrange_file_stream = io.BytesIO()
-        datetimetzrange_val = bytearray(str(self._datetimetzrange_test_value).encode())
-        datetimetzrange_len = len(datetimetzrange_val)
-        datetimetzrange_len_to_write = bytearray(struct.pack("i", datetimetzrange_len))
-        self._datetimetzrange_file_stream.write(datetimetzrange_len_to_write)
-        self._datetimetzrange_file_stream.write(datetimetzrange_val)
-
-        self._daterange_file_stream = io.BytesIO()
-        daterange_val = bytearray(str(self._daterange_test_value).encode())
-        daterange_len = len(daterange_val)
-        daterange_len_to_write = bytearray(struct.pack("i", daterange_len))
-        self._daterange_file_stream.write(daterange_len_to_write)
-        self._daterange_file_stream.write(daterange_val)
-
-        self._multiple_cols_file_stream = io.BytesIO()
-        val0 = bytearray(struct.pack("d", self._float_test_value1))
-        len0 = len(val0)
-        len0_to_write = bytearray(struct.pack("i", len0))
-        val1 = bytearray(struct.pack("i", self._int_test_value))
-        len1 = len(val1)
-        len1_to_write = bytearray(struct.pack("i", len1))
-        val2 = bytearray(self._str_test_value.encode())
-        len2 = len(val2)
-        len2_to_write = bytearray(struct.pack("i", len2))
-        val3 = bytearray(struct.pack("d", self._float_test_value2))
-        len3 = len(val3)
-        len3_to_write = bytearray(struct.pack("i", len3))
-        self._multiple_cols_file_stream.write(len0_to_write)
-        self._multiple_cols_file_stream.write(val0)
-        self._multiple_cols_file_stream.write(len1_to_write)
-        self._multiple_cols_file_stream.write(val1)
-        self._multiple_cols_file_stream.write(len2_to_write)
-        self._multiple_cols_file_stream.write(val2)
-        self._multiple_cols_file_stream.write(len3_to_write)
-        self._multiple_cols_file_stream.write(val3)
+        # file_streams, each holding a block of one row
+        self._bool_file_stream = create_block_stream(bytearray(struct.pack("?", self._bool_test_value)))
+        self._float_file_stream1 = create_block_stream(bytearray(struct.pack("d", self._float_test_value1)))
+        self._float_file_stream2 = create_block_stream(bytearray(struct.pack("d", self._float_test_value2)))
+        self._short_file_stream = create_block_stream(bytearray(struct.pack("h", self._short_test_value)))
+        self._int_file_stream = create_block_stream(bytearray(struct.pack("i", self._int_test_value)))
+        self._long_long_file_stream = create_block_stream(bytearray(struct.pack("q", self._long_long_test_value)))
+        self._bytea_file_stream = create_block_stream(bytes(self._bytea_test_value))
+        self._dict_file_stream = create_block_stream(bytearray(json.dumps(self._dict_test_value).encode()))
+        self._list_file_stream = create_block_stream(bytearray(json.dumps(self._list_test_value).encode()))
+        self._numericrange_file_stream = create_block_stream(bytearray(str(self._numericrange_test_value).encode()))
+        self._datetimerange_file_stream = create_block_stream(bytearray(str(self._datetimerange_test_value).encode()))
+        self._datetimetzrange_file_stream = create_block_stream(bytearray(str(self._datetimetzrange_test_value).encode()))
+        self._daterange_file_stream = create_block_stream(bytearray(str(self._daterange_test_value).encode()))
+        self._multiple_cols_file_stream = create_block_stream(
+            bytearray(struct.pack("d", self._float_test_value1)),
+            bytearray(struct.pack("i", self._int_test_value)),
+            bytearray(self._str_test_value.encode()),
+            bytearray(struct.pack("d", self._float_test_value2))
+        )
 
         # Readers
         self._bool_reader = ServiceBufferFileStreamReader(self._bool_file_stream)
@@ -177,7 +98,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_BOOL
         test_columns_info.append(col)
 
-        res = self._bool_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._bool_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(self._bool_test_value, res[0].raw_object)
 
     def test_read_float1(self):
@@ -189,7 +110,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_REAL
         test_columns_info.append(col)
 
-        res = self._float_reader1.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._float_reader1.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(self._float_test_value1, res[0].raw_object)
 
     def test_read_float2(self):
@@ -201,7 +122,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_REAL
         test_columns_info.append(col)
 
-        res = self._float_reader2.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._float_reader2.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(self._float_test_value2, res[0].raw_object)
 
     def test_read_bytea(self):
@@ -213,7 +134,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_BYTEA
         test_columns_info.append(col)
 
-        res = self._bytea_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._bytea_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         expected = self._bytea_test_value.tobytes().decode(DECODING_METHOD)
         actual = str(res[0].raw_object)
         self.assertEqual(expected, actual)
@@ -227,7 +148,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_JSON
         test_columns_info.append(col)
 
-        res = self._dict_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._dict_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         actual_raw_object = res[0].raw_object
         expected1 = self._dict_test_value["Ser,ver"]
         actual1 = actual_raw_object["Ser,ver"]
@@ -246,7 +167,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_INT4RANGE
         test_columns_info.append(col)
 
-        res = self._numericrange_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._numericrange_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(str(self._numericrange_test_value), str(res[0].raw_object))
 
     def test_read_datetimerange(self):
@@ -258,7 +179,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_TSRANGE
         test_columns_info.append(col)
 
-        res = self._datetimerange_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._datetimerange_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(str(self._datetimerange_test_value), str(res[0].raw_object))
 
     def test_read_datetimetzrange(self):
@@ -270,7 +191,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_TSTZRANGE
         test_columns_info.append(col)
 
-        res = self._datetimetzrange_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._datetimetzrange_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(str(self._datetimetzrange_test_value), str(res[0].raw_object))
 
     def test_read_daterange(self):
@@ -282,7 +203,7 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         col.data_type = datatypes.DATATYPE_DATERANGE
         test_columns_info.append(col)
 
-        res = self._daterange_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._daterange_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(str(self._daterange_test_value), str(res[0].raw_object))
 
     def test_read_multiple_cols(self):
@@ -304,12 +225,52 @@ class TestServiceBufferFileStreamReader(unittest.TestCase):
         test_columns_info.append(text_column)
         test_columns_info.append(real_column2)
 
-        res = self._multiple_cols_reader.read_row(test_file_offset, test_row_id, test_columns_info)
+        res = self._multiple_cols_reader.read_block_row(test_file_offset, 0, test_row_id, test_columns_info)
         self.assertEqual(self._float_test_value1, res[0].raw_object)
         self.assertEqual(self._int_test_value, res[1].raw_object)
         self.assertEqual(self._str_test_value, res[2].raw_object)
         self.assertEqual(self._float_test_value2, res[3].raw_object)
 
+    def test_read_block_row(self):
+        # Setup: Write two blocks of rows with NULLs and empty values
+        test_columns_info = []
+        for data_type in (datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT):
+            col = DbColumn()
+            col.data_type = data_type
+            test_columns_info.append(col)
+        block_stream = io.BytesIO()
+        writer = ServiceBufferFileStreamWriter(block_stream)
+        first_block_size = writer.write_block([(1, 'one'), (None, ''), (3, None)], test_columns_info)
+        writer.write_block([(4, 'four')], test_columns_info)
+        reader = ServiceBufferFileStreamReader(block_stream)
+
+        # If: I read each row of the first block, and then the row of the second block
+        with mock.patch.object(reader, 'read_block', wraps=reader.read_block) as read_block:
+            rows = [reader.read_block_row(0, index, index, test_columns_info) for index in range(3)]
+            rows.append(reader.read_block_row(first_block_size, 0, 3, test_columns_info))
+
+        # Then:
+        # ... Each block should have been read once
+        self.assertEqual(read_block.call_count, 2)
+
+        # ... The values should have been read back, with NULLs told apart from empty values
+        self.assertListEqual([[cell.raw_object for cell in row] for row in rows], [[1, 'one'], [None, ''], [3, None], [4, 'four']])
+        self.assertListEqual([[cell.is_null for cell in row] for row in rows], [[False, False], [True, False], [False, True], [False, False]])
+        self.assertListEqual([row[0].row_id for row in rows], [0, 1, 2, 3])
+
+    def test_read_block_unsupported_format(self):
+        # Setup: Write a block, and then change its version
+        col = DbColumn()
+        col.data_type = datatypes.DATATYPE_INTEGER
+        block_stream = io.BytesIO()
+        ServiceBufferFileStreamWriter(block_stream).write_block([(1,)], [col])
+        block_stream.getbuffer()[2] = 1
+
+        # If: I read the block
+        # Then: It should be rejected rather than decoded as garbage
+        with self.assertRaises(IOError):
+            ServiceBufferFileStreamReader(block_stream).read_block(0, [col])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,8 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from array import array
 import unittest
-from unittest import mock
 from decimal import Decimal
 import uuid
 import struct
@@ -13,24 +13,22 @@ import datetime
 import psycopg2
 from psycopg2.extras import NumericRange, DateTimeRange, DateTimeTZRange, DateRange
 
+from snowflaketoolsservice.query.data_storage.service_buffer import BLOCK_FORMAT_VERSION, BLOCK_HEADER, BLOCK_LENGTH_SIZE, BLOCK_MARKER
 from snowflaketoolsservice.query.data_storage.service_buffer_file_stream_writer import ServiceBufferFileStreamWriter
 from snowflaketoolsservice.query.contracts import DbColumn
 from snowflaketoolsservice.parsers import datatypes
-import tests.utils as utils
 
 
 class TestServiceBufferFileStreamWriter(unittest.TestCase):
 
-    SIZE_BUFFER_LENGTH = 4
-
     def setUp(self):
 
         self._file_stream = io.BytesIO()
         self._writer = ServiceBufferFileStreamWriter(self._file_stream)
-        self._cursor = utils.MockCursor([tuple([11, 22, 33]), tuple([55, 66, 77])])
 
-    def get_expected_length_with_additional_buffer_for_size(self, test_value_length: int):
-        return TestServiceBufferFileStreamWriter.SIZE_BUFFER_LENGTH + test_value_length
+    def get_expected_block_length(self, test_value_length: int):
+        """Length of a block of one row with one value, which is the block's header, the value's length and the value"""
+        return BLOCK_HEADER.size + BLOCK_LENGTH_SIZE + test_value_length
 
     def test_write_to_file(self):
         val = 5
@@ -38,21 +36,15 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         res = self._writer._write_to_file(self._file_stream, byte_array)
         self.assertEqual(res, 4)
 
-    def test_write_null(self):
-        res = self._writer._write_null()
-        self.assertEqual(res, 0)
-
     def test_write_bool(self):
         test_value = True
         test_columns_info = []
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_BOOL
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(1), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(1), res)
 
     def test_write_float(self):
         test_value = 123.456
@@ -60,11 +52,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_REAL
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(8), res)
 
     def test_write_double(self):
         test_value = 12345678.90123456
@@ -72,11 +62,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_DOUBLE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(8), res)
 
     def test_write_short(self):
         test_value = 12345
@@ -84,11 +72,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_SMALLINT
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(2), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(2), res)
 
     def test_write_int(self):
         test_value = 1234567890
@@ -96,11 +82,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_INTEGER
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(4), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(4), res)
 
     def test_write_long_long(self):
         test_value = 123456789012
@@ -108,11 +92,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_BIGINT
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(8), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(8), res)
 
     def test_write_decimal(self):
         test_val = Decimal(123)
@@ -120,11 +102,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_NUMERIC
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_val)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_val))), res)
+        res = self._writer.write_block([(test_val,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(str(test_val))), res)
 
     def test_write_char(self):
         test_value = 'a'
@@ -132,11 +112,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_BPCHAR
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(1), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(1), res)
 
     def test_write_str(self):
         test_value = 'TestString'
@@ -144,11 +122,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TEXT
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value)), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value)), res)
 
     def test_write_date(self):
         test_value = datetime.date(2004, 10, 19)
@@ -156,11 +132,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_DATE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value.isoformat())), res)
 
     def test_write_time(self):
         test_value = datetime.time(10, 23, 54)
@@ -168,11 +142,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TIME
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value.isoformat())), res)
 
     def test_write_time_with_timezone(self):
         test_value = datetime.time(10, 23, 54, tzinfo=None)
@@ -180,11 +152,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TIME_WITH_TIMEZONE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value.isoformat())), res)
 
     def test_write_datetime(self):
         test_value = datetime.datetime(2004, 10, 19, 10, 23, 54)
@@ -192,11 +162,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TIMESTAMP
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.isoformat())), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value.isoformat())), res)
 
     def test_write_timedelta(self):
         test_value = datetime.timedelta(days=3, hours=4, minutes=5, seconds=6)
@@ -204,11 +172,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_INTERVAL
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_value))), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(str(test_value))), res)
 
     def test_write_uuid(self):
         test_value = uuid.uuid4()
@@ -216,11 +182,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_UUID
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(36), res)  # UUID standard len is 36
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(36), res)  # UUID standard len is 36
 
     def test_write_bytea(self):
         test_value = memoryview(b'TestString')
@@ -228,11 +192,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_BYTEA
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value.tobytes())), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value.tobytes())), res)
 
     def test_write_json(self):
         test_value = {"Name": "TestName", "Schema": "TestSchema"}
@@ -240,11 +202,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_JSON
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(str(test_value))), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(str(test_value))), res)
 
     def test_write_int4range(self):
         test_value = NumericRange(10, 20)
@@ -252,11 +212,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_INT4RANGE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[10,20)")), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len("[10,20)")), res)
 
     def test_write_tsrange(self):
         test_value = DateTimeRange(datetime.datetime(2014, 6, 8, 12, 12, 45), datetime.datetime(2016, 7, 6, 14, 12, 8))
@@ -264,11 +222,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TSRANGE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2014-06-08T12:12:45,2016-07-06T14:12:08)")), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len("[2014-06-08T12:12:45,2016-07-06T14:12:08)")), res)
 
     def test_write_tstzrange(self):
         test_value = DateTimeTZRange(datetime.datetime(2014, 6, 8, 12, 12, 45, tzinfo=psycopg2.tz.FixedOffsetTimezone(offset=720, name=None)),
@@ -277,11 +233,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_TSTZRANGE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2014-06-08T12:12:45+12:00,2016-07-06T14:12:08+12:00)")), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len("[2014-06-08T12:12:45+12:00,2016-07-06T14:12:08+12:00)")), res)
 
     def test_write_daterange(self):
         test_value = DateRange(datetime.date(2015, 6, 6), datetime.date(2016, 8, 8))
@@ -289,11 +243,9 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = datatypes.DATATYPE_DATERANGE
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
 
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len("[2015-06-06,2016-08-08)")), res)
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len("[2015-06-06,2016-08-08)")), res)
 
     def test_write_udt(self):
         test_value = "TestUserDefinedTypes"
@@ -301,30 +253,30 @@ class TestServiceBufferFileStreamWriter(unittest.TestCase):
         col = DbColumn()
         col.data_type = 'UserDefinedTypes'
         test_columns_info.append(col)
-        mock_storage_data_reader = MockStorageDataReader(self._cursor, test_columns_info)
-        mock_storage_data_reader.get_value = mock.MagicMock(return_value=test_value)
-
-        res = self._writer.write_row(mock_storage_data_reader)
-        self.assertEqual(self.get_expected_length_with_additional_buffer_for_size(len(test_value)), res)
-
-
-class MockType:
-    def __enter__(cls):
-        return cls
 
-    def __exit__(cls, typ, value, tb):
-        pass
+        res = self._writer.write_block([(test_value,)], test_columns_info)
+        self.assertEqual(self.get_expected_block_length(len(test_value)), res)
 
-
-class MockStorageDataReader(MockType):
-
-    def __init__(self, cursor, columns_info):
-        self._cursor = cursor
-        self.columns_info = columns_info
-        self.is_none = mock.Mock(return_value=False)
-
-    def get_value(self, i):
-        pass
+    def test_write_block(self):
+        # Setup: Create rows of several types, including NULLs and an empty value
+        test_columns_info = []
+        for data_type in (datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT):
+            col = DbColumn()
+            col.data_type = data_type
+            test_columns_info.append(col)
+        rows = [(1, 'one'), (2, None), (None, '')]
+
+        # If: I write the rows as a block
+        res = self._writer.write_block(rows, test_columns_info)
+
+        # Then: The block should hold its header, then the lengths of each column, then the values of each column
+        expected = b''.join((
+            BLOCK_HEADER.pack(BLOCK_MARKER, BLOCK_FORMAT_VERSION, 3, 2, 4 + 4 + 3),
+            array('i', [4, 4, -1, 3, -1, 0]).tobytes(),
+            struct.pack('i', 1), struct.pack('i', 2), b'one'
+        ))
+        self.assertEqual(self._file_stream.getvalue(), expected)
+        self.assertEqual(res, len(expected))
 
 
 if __name__ == '__main__':
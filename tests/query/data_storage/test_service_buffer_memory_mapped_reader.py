@@ -0,0 +1,74 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import unittest
+
+from snowflaketoolsservice.parsers import datatypes
+from snowflaketoolsservice.query.contracts import DbColumn
+from snowflaketoolsservice.query.data_storage import service_buffer_file_stream as file_stream
+
+
+class TestServiceBufferMemoryMappedReader(unittest.TestCase):
+
+    def setUp(self):
+        self._file_name = file_stream.create_file()
+        self._columns_info = []
+        for data_type in (datatypes.DATATYPE_INTEGER, datatypes.DATATYPE_TEXT, datatypes.DATATYPE_JSON):
+            col = DbColumn()
+            col.data_type = data_type
+            self._columns_info.append(col)
+
+    def tearDown(self):
+        os.remove(self._file_name)
+
+    def test_read_while_writing(self):
+        with file_stream.get_writer(self._file_name) as writer, file_stream.get_memory_mapped_reader(self._file_name) as reader:
+            # If: I write a block, and read its rows while the writer is still open
+            first_block_size = writer.write_block([(1, 'one', {'a': 1}), (None, '', None)], self._columns_info)
+            writer.flush()
+            rows = [reader.read_block_row(0, index, index, self._columns_info) for index in range(2)]
+
+            # ... And then write another block, and read its row with the same reader
+            writer.write_block([(3, 'three', [3])], self._columns_info)
+            writer.flush()
+            rows.append(reader.read_block_row(first_block_size, 0, 2, self._columns_info))
+
+        # Then: The values of both blocks should have been decoded from the mapped file
+        self.assertListEqual(
+            [[cell.raw_object for cell in row] for row in rows],
+            [[1, 'one', {'a': 1}], [None, '', None], [3, 'three', [3]]]
+        )
+        self.assertListEqual([[cell.is_null for cell in row] for row in rows], [[False, False, False], [True, False, True], [False, False, False]])
+
+    def test_read_past_flushed_rows(self):
+        with file_stream.get_writer(self._file_name) as writer, file_stream.get_memory_mapped_reader(self._file_name) as reader:
+            # If: I read a block that the writer hasn't flushed yet
+            writer.write_block([(1, 'one', None)], self._columns_info)
+
+            # Then: It should fail rather than read past the end of the file
+            with self.assertRaises(IOError):
+                reader.read_block_row(0, 0, 0, self._columns_info)
+
+    def test_close(self):
+        with file_stream.get_writer(self._file_name) as writer:
+            writer.write_block([(1, 'one', None)], self._columns_info)
+
+        # Setup: Read a row, so that the reader has mapped the file
+        reader = file_stream.get_memory_mapped_reader(self._file_name)
+        reader.read_block_row(0, 0, 0, self._columns_info)
+        mapping = reader._mapping
+
+        # If: I close the reader
+        reader.close()
+
+        # Then: The mapping should have been released along with the file
+        self.assertTrue(mapping.closed)
+        self.assertIsNone(reader._mapping)
+        self.assertTrue(reader._file_stream.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
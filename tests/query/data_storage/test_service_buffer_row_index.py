@@ -0,0 +1,72 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+from snowflaketoolsservice.query.data_storage import ServiceBufferRowIndex
+
+
+class TestServiceBufferRowIndex(unittest.TestCase):
+
+    def setUp(self):
+        # Index a million rows read in order
+        self._index = ServiceBufferRowIndex()
+        self._index.extend_range(0, 1000000)
+
+    def test_rows_read_in_order(self):
+        # If: I look up rows that were read in order
+        # Then: Each row should be at the position of its index, without the positions being held
+        self.assertEqual(len(self._index), 1000000)
+        self.assertListEqual([self._index[row_id] for row_id in (0, 1, 999999)], [0, 1, 999999])
+        self.assertTrue(self._index.is_compact)
+        self.assertEqual(self._index._overlay, {})
+
+        with self.assertRaises(IndexError):
+            self._index[1000000]
+
+    def test_add_and_update_rows(self):
+        # If: I add a row and update rows, as editing the result set does
+        self._index.append(1000000)
+        self._index[5] = 1000001
+        self._index.append(1000002)
+        self._index[1000000] = 1000003
+
+        # Then: Only the rows that moved should be in the overlay, and the index should still be compact
+        self.assertEqual(len(self._index), 1000002)
+        self.assertListEqual([self._index[row_id] for row_id in (4, 5, 6, 1000000, 1000001)], [4, 1000001, 6, 1000003, 1000002])
+        self.assertEqual(self._index._overlay, {5: 1000001, 1000000: 1000003, 1000001: 1000002})
+        self.assertTrue(self._index.is_compact)
+
+    def test_remove_rows(self):
+        # Setup: Update a row
+        self._index[2] = 1000000
+
+        # If: I remove rows
+        del self._index[0]
+        del self._index[999998]
+
+        # Then: The rows after each removed row should move up, keeping their positions, in an array of positions
+        self.assertFalse(self._index.is_compact)
+        self.assertEqual(len(self._index), 999998)
+        self.assertListEqual([self._index[row_id] for row_id in (0, 1, 2, 999997)], [1, 1000000, 3, 999998])
+
+        # ... And rows can still be added and updated
+        self._index.append(1000001)
+        self._index[0] = 1000002
+        self.assertListEqual(list(self._index)[:2], [1000002, 1000000])
+        self.assertEqual(self._index[999998], 1000001)
+
+    def test_extend_range_after_edits(self):
+        # If: I add rows at consecutive positions after a row has been added out of order
+        index = ServiceBufferRowIndex()
+        index.append(5)
+        index.extend_range(1, 2)
+
+        # Then: The rows should be at the positions they were added with
+        self.assertListEqual(list(index), [5, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
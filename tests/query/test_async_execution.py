@@ -0,0 +1,313 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Test query.async_execution against a local stand in for the Snowflake connector"""
+
+import threading
+import unittest
+from unittest import mock
+
+import psycopg2.extensions
+from snowflake.connector.connection import SnowflakeConnection
+from snowflake.connector.cursor import ResultMetadata
+
+from snowflaketoolsservice.connection.contracts import ConnectionType
+from snowflaketoolsservice.parsers import datatypes
+from snowflaketoolsservice.query import ExecutionState, Query, QueryEvents, QueryExecutionSettings, ResultSetStorageType
+from snowflaketoolsservice.query.async_execution import CANCEL_QUERY_TEMPLATE, QueryStatusPoller, supports_async_execution
+from snowflaketoolsservice.query_execution.contracts import ExecutionPlanOptions
+from snowflaketoolsservice.query_execution.query_execution_service import QueryExecutionService
+import tests.utils as utils
+
+
+class StubSnowflakeConnection(SnowflakeConnection):
+    """Snowflake connection that doesn't connect to a server, whose queries run for a number of status polls"""
+
+    def __init__(self, rows=None, polls_to_finish: int = 2):
+        # The base connection isn't initialized, since it would log in to a server
+        self.rows = rows or []
+        self.polls_to_finish = polls_to_finish
+        self.submitted = []
+        self.executed = []
+        self.status_polls = {}
+        self.errors = {}
+        self.autocommit_modes = []
+        # Called with the query ID before the results of a query are fetched
+        self.on_fetch = None
+
+    def cursor(self):
+        return StubSnowflakeCursor(self)
+
+    def get_query_status_throw_if_error(self, query_id):
+        self.status_polls[query_id] += 1
+        if query_id in self.errors:
+            raise self.errors[query_id]
+        return 'SUCCESS' if self.status_polls[query_id] >= self.polls_to_finish else 'RUNNING'
+
+    @staticmethod
+    def is_still_running(status):
+        return status == 'RUNNING'
+
+    def autocommit(self, mode):
+        self.autocommit_modes.append(mode)
+
+    def close(self, retry=True):
+        pass
+
+
+class StubSnowflakeCursor:
+    def __init__(self, connection: StubSnowflakeConnection):
+        self.connection = connection
+        self.sfqid = None
+        self.description = None
+        self._rows = []
+
+    def execute_async(self, statement):
+        self.sfqid = f'query{len(self.connection.submitted)}'
+        self.connection.submitted.append(statement)
+        self.connection.status_polls[self.sfqid] = 0
+
+    def execute(self, statement, params=None):
+        self.connection.executed.append((statement, params))
+
+    def get_results_from_sfqid(self, query_id):
+        if self.connection.on_fetch is not None:
+            self.connection.on_fetch(query_id)
+        self.description = [
+            ResultMetadata('ID', 0, None, None, 38, 0, False),
+            ResultMetadata('VALUE', 2, None, 16777216, None, None, True)
+        ]
+        self._rows = list(self.connection.rows)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class TestQueryStatusPoller(unittest.TestCase):
+    """Methods for testing the query status poller"""
+
+    def setUp(self):
+        self.poller = QueryStatusPoller(initial_interval=0.01, max_interval=0.08, logger=utils.get_mock_logger())
+        self.done_event = threading.Event()
+        self.errors = []
+
+    def tearDown(self):
+        self.poller.stop()
+
+    def test_supports_async_execution(self):
+        # If: I check connections for asynchronous execution
+        # Then: Only connections with the Snowflake API should support it, even though mocks make up any attribute
+        self.assertTrue(supports_async_execution(StubSnowflakeConnection()))
+        self.assertFalse(supports_async_execution(utils.MockConnection()))
+        self.assertFalse(supports_async_execution(mock.Mock()))
+
+    def test_poll_backs_off_until_finished(self):
+        # Setup: Submit a query that runs for a while
+        connection = StubSnowflakeConnection(polls_to_finish=1000)
+        connection.cursor().execute_async('SELECT 1')
+
+        # If: The poller tracks it while it runs
+        self.poller.track(connection, 'query0', self._on_done)
+        self.assertFalse(self.done_event.wait(0.5))
+
+        # Then: The status should have been polled less often as the query kept running
+        self.assertGreater(connection.status_polls['query0'], 1)
+        self.assertLess(connection.status_polls['query0'], 20)
+        self.assertEqual(self.poller.tracked_count, 1)
+
+        # If: The query finishes
+        connection.polls_to_finish = 0
+
+        # Then: It should be reported done without an error and no longer tracked
+        self.assertTrue(self.done_event.wait(5))
+        self.assertListEqual(self.errors, [None])
+        self.assertEqual(self.poller.tracked_count, 0)
+
+    def test_poll_reports_error(self):
+        # Setup: Submit a query that fails
+        connection = StubSnowflakeConnection()
+        connection.cursor().execute_async('SELECT * FROM missing')
+        error = Exception('Object does not exist')
+        connection.errors['query0'] = error
+
+        # If: The poller tracks it
+        self.poller.track(connection, 'query0', self._on_done)
+
+        # Then: The query's error should be reported
+        self.assertTrue(self.done_event.wait(5))
+        self.assertListEqual(self.errors, [error])
+
+    def test_cancel(self):
+        # Setup: Track a query that never finishes
+        connection = StubSnowflakeConnection(polls_to_finish=1000)
+        connection.cursor().execute_async('SELECT SYSTEM$WAIT(60)')
+        self.poller.track(connection, 'query0', self._on_done)
+
+        # If: I cancel the query by its ID, and then cancel it again
+        canceled = self.poller.cancel('query0')
+        canceled_again = self.poller.cancel('query0')
+
+        # Then: The query should have been canceled on the server once and reported canceled
+        self.assertTrue(canceled)
+        self.assertFalse(canceled_again)
+        self.assertListEqual(connection.executed, [(CANCEL_QUERY_TEMPLATE, ('query0',))])
+        self.assertTrue(self.done_event.is_set())
+        self.assertIsInstance(self.errors[0], psycopg2.extensions.QueryCanceledError)
+        self.assertFalse(self.poller.is_tracked('query0'))
+
+    def _on_done(self, error):
+        self.errors.append(error)
+        self.done_event.set()
+
+
+class TestQueryExecuteAsync(unittest.TestCase):
+    """Methods for testing executing a query asynchronously"""
+
+    def setUp(self):
+        self.poller = QueryStatusPoller(initial_interval=0.01, max_interval=0.05)
+        settings = QueryExecutionSettings(ExecutionPlanOptions(), ResultSetStorageType.IN_MEMORY)
+        self.query = Query('test_uri', 'select 1;select 2;', settings, QueryEvents())
+        self.done_event = threading.Event()
+        self.errors = []
+
+    def tearDown(self):
+        self.poller.stop()
+
+    def test_execute_async(self):
+        # Setup: Create a connection whose queries return rows
+        rows = [('Id1', 'Value1'), ('Id2', 'Value2')]
+        connection = StubSnowflakeConnection(rows=rows)
+
+        # If: I execute the query asynchronously
+        self.query.execute_async(connection, self.poller, self._on_complete)
+        self.assertTrue(self.done_event.wait(5))
+
+        # Then:
+        # ... Each batch should have been submitted in order, and the query completed without error
+        self.assertListEqual(connection.submitted, ['select 1;', 'select 2;'])
+        self.assertListEqual(self.errors, [None])
+        self.assertIs(self.query.execution_state, ExecutionState.EXECUTED)
+
+        # ... Each batch should hold its results, fetched by its query ID
+        for index, batch in enumerate(self.query.batches):
+            self.assertEqual(batch.query_id, f'query{index}')
+            self.assertTrue(batch.has_executed)
+            self.assertFalse(batch.has_error)
+            self.assertEqual(batch.row_count, len(rows))
+
+        # ... The columns should have been described from the Snowflake type codes, without querying the server
+        columns_info = self.query.batches[0].result_set.columns_info
+        self.assertListEqual([column.column_name for column in columns_info], ['ID', 'VALUE'])
+        self.assertListEqual([column.data_type for column in columns_info], [datatypes.DATATYPE_NUMERIC, datatypes.DATATYPE_TEXT])
+        self.assertListEqual(connection.executed, [])
+
+    def test_execute_async_batch_failure(self):
+        # Setup: Create a connection whose first query fails
+        connection = StubSnowflakeConnection()
+        connection.errors['query0'] = Exception('SQL compilation error')
+
+        # If: I execute the query asynchronously
+        self.query.execute_async(connection, self.poller, self._on_complete)
+
+        # Then: The query should stop at the failed batch, reporting its error like a database error
+        self.assertTrue(self.done_event.wait(5))
+        self.assertListEqual(connection.submitted, ['select 1;'])
+        self.assertIsInstance(self.errors[0], psycopg2.DatabaseError)
+        self.assertEqual(str(self.errors[0]), 'SQL compilation error')
+        self.assertTrue(self.query.batches[0].has_error)
+
+    def test_cancel_async(self):
+        # Setup: Execute a query whose first batch never finishes
+        connection = StubSnowflakeConnection(polls_to_finish=1000)
+        self.query.execute_async(connection, self.poller, self._on_complete)
+
+        # If: I cancel the query
+        canceled = self.query.cancel_async(self.poller)
+
+        # Then: The running batch should have been canceled by its query ID, and no further batches run
+        self.assertTrue(canceled)
+        self.assertTrue(self.done_event.wait(5))
+        self.assertListEqual(connection.executed, [(CANCEL_QUERY_TEMPLATE, ('query0',))])
+        self.assertListEqual(connection.submitted, ['select 1;'])
+        self.assertIsInstance(self.errors[0], psycopg2.extensions.QueryCanceledError)
+
+    def test_execute_async_disables_auto_commit(self):
+        # Setup: Create a query that includes its actual execution plan, so auto commit has to be disabled
+        execution_plan_options = ExecutionPlanOptions()
+        execution_plan_options.include_actual_execution_plan_xml = True
+        settings = QueryExecutionSettings(execution_plan_options, ResultSetStorageType.IN_MEMORY)
+        query = Query('test_uri', 'select 1;', settings, QueryEvents())
+        connection = StubSnowflakeConnection()
+
+        # If: I execute the query asynchronously
+        query.execute_async(connection, self.poller, self._on_complete)
+
+        # Then: Auto commit should have been disabled while the query ran, and turned back on once it completed
+        self.assertTrue(self.done_event.wait(5))
+        self.assertListEqual(connection.autocommit_modes, [False, True])
+        self.assertListEqual(self.errors, [None])
+
+    def test_cancel_query_before_execution(self):
+        # Setup: Hand a query that hasn't started yet to a query execution service
+        connection = StubSnowflakeConnection()
+        service = QueryExecutionService()
+        service._query_status_poller = self.poller
+        service._get_connection = mock.Mock(return_value=connection)
+        service.query_results[self.query.owner_uri] = self.query
+
+        # If: I cancel the query before its worker starts executing it
+        service.cancel_query(self.query.owner_uri)
+        self.query.execute_async(connection, self.poller, self._on_complete)
+
+        # Then: The query should be canceled without looking for a connection to cancel it, and nothing submitted
+        self.assertTrue(self.done_event.wait(5))
+        self.assertTrue(self.query.is_canceled)
+        service._get_connection.assert_called_once_with(self.query.owner_uri, ConnectionType.QUERY)
+        self.assertListEqual(connection.submitted, [])
+        self.assertListEqual(self.errors, [None])
+
+    def test_cancel_query_between_batches(self):
+        # Setup:
+        # ... Execute a query whose first batch's results are being fetched, so no statement is running
+        connection = StubSnowflakeConnection()
+        fetch_started = threading.Event()
+        finish_fetch = threading.Event()
+
+        def on_fetch(query_id):
+            fetch_started.set()
+            finish_fetch.wait(5)
+        connection.on_fetch = on_fetch
+
+        # ... Hand the query to a query execution service, whose connection can't be canceled by a backend PID
+        service = QueryExecutionService()
+        service._query_status_poller = self.poller
+        service._get_connection = mock.Mock(return_value=connection)
+        service.query_results[self.query.owner_uri] = self.query
+        self.query.execute_async(connection, self.poller, self._on_complete)
+        self.assertTrue(fetch_started.wait(5))
+
+        # If: I cancel the query between its batches
+        service.cancel_query(self.query.owner_uri)
+        finish_fetch.set()
+
+        # Then: The query should be canceled without a cancel connection, and the next batch never submitted
+        self.assertTrue(self.done_event.wait(5))
+        self.assertTrue(self.query.is_canceled)
+        service._get_connection.assert_called_once_with(self.query.owner_uri, ConnectionType.QUERY)
+        self.assertListEqual(connection.submitted, ['select 1;'])
+        self.assertListEqual(connection.executed, [])
+        self.assertListEqual(self.errors, [None])
+        self.assertIs(self.query.execution_state, ExecutionState.EXECUTED)
+
+    def _on_complete(self, error):
+        self.errors.append(error)
+        self.done_event.set()
+
+
+if __name__ == '__main__':
+    unittest.main()
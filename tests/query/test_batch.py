@@ -151,7 +151,7 @@ class TestBatch(unittest.TestCase):
 
         batch.save_as(params, file_factory, on_success, on_error)
 
-        result_set_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error)
+        result_set_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error, None)
 
     def test_save_as_with_invalid_batch_index(self):
         batch = self.create_and_execute_batch(Batch)
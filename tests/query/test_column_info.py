@@ -5,7 +5,12 @@
 
 import unittest
 from collections import namedtuple
+from unittest import mock
 
+from snowflake.connector.connection import SnowflakeConnection
+from snowflake.connector.cursor import ResultMetadata
+
+from snowflaketoolsservice.parsers import datatypes
 from snowflaketoolsservice.query.column_info import get_columns_info
 import tests.utils as utils
 
@@ -32,6 +37,27 @@ class TestGetColumnsInfo(unittest.TestCase):
         self.assertEqual(columns_info[0].data_type, self._rows[0][1])
         self.assertEqual(columns_info[1].data_type, self._rows[1][1])
 
+    def test_get_column_info_snowflake_connection(self):
+        # Setup: Describe columns with Snowflake type codes, which aren't type OIDs
+        description = [
+            ResultMetadata('ID', 0, None, None, 38, 0, False),
+            ResultMetadata('CREATED', 7, None, None, 0, 9, True),
+            ResultMetadata('DOC', 5, None, 16777216, None, None, True)
+        ]
+        connection = mock.Mock(spec=SnowflakeConnection)
+
+        # If: I get the column info for a Snowflake connection
+        columns_info = get_columns_info(description, connection)
+
+        # Then: The data types should come from the type codes, without querying the server
+        connection.cursor.assert_not_called()
+        self.assertListEqual([column.column_name for column in columns_info], ['ID', 'CREATED', 'DOC'])
+        self.assertListEqual(
+            [column.data_type for column in columns_info],
+            [datatypes.DATATYPE_NUMERIC, datatypes.DATATYPE_TIMESTAMP_WITH_TIMEZONE, datatypes.DATATYPE_TEXT]
+        )
+        self.assertFalse(columns_info[0].allow_db_null)
+
 
 if __name__ == '__main__':
     unittest.main()
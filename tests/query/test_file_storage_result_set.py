@@ -11,6 +11,7 @@ import tests.utils as utils
 from snowflaketoolsservice.query.result_set import ResultSetEvents
 from snowflaketoolsservice.query.file_storage_result_set import FileStorageResultSet
 from snowflaketoolsservice.query.contracts import DbCellValue, SaveResultsRequestParams
+from snowflaketoolsservice.query.data_storage import StorageDataReader
 
 
 class TestFileStorageResultSet(unittest.TestCase):
@@ -33,7 +34,8 @@ class TestFileStorageResultSet(unittest.TestCase):
 
         with mock.patch('snowflaketoolsservice.query.data_storage.service_buffer_file_stream.create_file', new=mock.Mock(return_value=self._file)):
             with mock.patch('snowflaketoolsservice.query.data_storage.service_buffer_file_stream.get_writer', new=mock.Mock(return_value=self._writer)):
-                with mock.patch('snowflaketoolsservice.query.data_storage.service_buffer_file_stream.get_reader', new=mock.Mock(return_value=self._reader)):
+                with mock.patch('snowflaketoolsservice.query.data_storage.service_buffer_file_stream.get_memory_mapped_reader',
+                                new=mock.Mock(return_value=self._reader)):
                     with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
                         self._result_set = FileStorageResultSet(self._id, self._batch_id, self._events)
                         test()
@@ -43,12 +45,13 @@ class TestFileStorageResultSet(unittest.TestCase):
             self.assertEqual(self._result_set._total_bytes_written, 0)
             self.assertEqual(self._result_set._has_been_read, False)
             self.assertEqual(self._result_set._output_file_name, self._file)
-            self.assertEqual(len(self._result_set._file_offsets), 0)
+            self.assertEqual(len(self._result_set._row_positions), 0)
+            self.assertEqual(self._result_set._block_index.block_count, 0)
 
         self.execute_with_patch(validate)
 
     def test_row_count(self):
-        self.execute_with_patch(lambda: self.assertEqual(len(self._result_set._file_offsets), self._result_set.row_count))
+        self.execute_with_patch(lambda: self.assertEqual(len(self._result_set._row_positions), self._result_set.row_count))
 
     def test_get_subset_when_has_read_false(self):
         def test():
@@ -79,24 +82,21 @@ class TestFileStorageResultSet(unittest.TestCase):
     def test_get_subset_valid(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._file_offsets = [5, 6, 3]
+            self._add_blocks()
+            self._set_row_positions([5, 6, 3])
 
             subset = self._result_set.get_subset(0, 2)
 
             self.assertEqual(subset.row_count, 2)
             self.assertEqual(subset.rows[0], self._row)
             self.assertEqual(subset.rows[1], self._row)
-            self.assertEqual(self._reader.read_row.call_count, 2)
+            self.assertEqual(self._reader.read_block_row.call_count, 2)
 
-            call_args = self._reader.read_row.call_args_list
+            # Each row should have been read from its block, found through the block index
+            call_args = self._reader.read_block_row.call_args_list
 
-            self.assertEqual(call_args[0][0][0], self._result_set._file_offsets[0])
-            self.assertEqual(call_args[0][0][1], 0)
-            self.assertEqual(call_args[0][0][2], self._result_set.columns_info)
-
-            self.assertEqual(call_args[1][0][0], self._result_set._file_offsets[1])
-            self.assertEqual(call_args[1][0][1], 1)
-            self.assertEqual(call_args[1][0][2], self._result_set.columns_info)
+            self.assertEqual(call_args[0][0], (200, 1, 0, self._result_set.columns_info))
+            self.assertEqual(call_args[1][0], (200, 2, 1, self._result_set.columns_info))
 
         self.execute_with_patch(test)
 
@@ -106,11 +106,12 @@ class TestFileStorageResultSet(unittest.TestCase):
             self._result_set._total_bytes_written = 10
             self._result_set.add_row(self._cursor)
 
-            self._writer.seek.assert_called_once_with(10)
+            # The row should have been appended to the file as a block of its own
             self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write + 10)
-            self._writer.write_row.assert_called_once()
+            self._writer.write_block.assert_called_once_with([(1, 2, 3)], self._result_set.columns_info)
 
-            self.assertEqual(self._result_set._file_offsets[0], 10)
+            self.assertEqual(self._result_set._row_positions[0], 0)
+            self.assertEqual(self._result_set._block_index.locate(0), (10, 0))
 
         self.execute_with_patch(test)
 
@@ -125,30 +126,30 @@ class TestFileStorageResultSet(unittest.TestCase):
     def test_remove_row(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._file_offsets = [5, 6, 3]
+            self._set_row_positions([5, 6, 3])
 
             self._result_set.remove_row(1)
 
-            self.assertEqual(len(self._result_set._file_offsets), 2)
-            self.assertEqual(self._result_set._file_offsets[0], 5)
-            self.assertEqual(self._result_set._file_offsets[1], 3)
+            self.assertListEqual(list(self._result_set._row_positions), [5, 3])
 
         self.execute_with_patch(test)
 
     def test_update_row(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._total_bytes_written = 10
+            self._add_blocks()
+            self._result_set._total_bytes_written = 300
 
-            self._result_set._file_offsets = [5, 6, 3]
+            self._set_row_positions([5, 6, 3])
 
             self._result_set.update_row(1, self._cursor)
 
-            self._writer.seek.assert_called_once_with(10)
-            self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write + 10)
-            self._writer.write_row.assert_called_once()
+            # The new row should have been appended to the file as a block of its own, which the row now points to
+            self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write + 300)
+            self._writer.write_block.assert_called_once_with([(1, 2, 3)], self._result_set.columns_info)
 
-            self.assertEqual(self._result_set._file_offsets[1], 10)
+            self.assertListEqual(list(self._result_set._row_positions), [5, 8, 3])
+            self.assertEqual(self._result_set._block_index.locate(8), (300, 0))
 
         self.execute_with_patch(test)
 
@@ -172,19 +173,14 @@ class TestFileStorageResultSet(unittest.TestCase):
     def test_get_row(self):
         def test():
             self._result_set._has_been_read = True
-            self._result_set._file_offsets = [5, 6, 3]
+            self._add_blocks()
+            self._set_row_positions([5, 6, 3])
 
             row = self._result_set.get_row(1)
 
             self.assertEqual(row, self._row)
 
-            self._reader.read_row.assert_called_once()
-
-            call_args = self._reader.read_row.call_args_list
-
-            self.assertEqual(call_args[0][0][0], self._result_set._file_offsets[1])
-            self.assertEqual(call_args[0][0][1], 1)
-            self.assertEqual(call_args[0][0][2], self._result_set.columns_info)
+            self._reader.read_block_row.assert_called_once_with(200, 2, 1, self._result_set.columns_info)
 
         self.execute_with_patch(test)
 
@@ -202,10 +198,54 @@ class TestFileStorageResultSet(unittest.TestCase):
 
             self.assertTrue(self._result_set._has_been_read)
 
-            self.assertEqual(len(self._result_set._file_offsets), 2)
-            self.assertEqual(self._result_set._file_offsets[1], 10)
+            self.assertListEqual(list(self._result_set._row_positions), [0, 1])
+            self.assertEqual(self._result_set._total_bytes_written, self._bytes_to_write)
+
+            # Both rows should have been handed to the writer as one block
+            self._writer.write_block.assert_called_once()
+            self.assertEqual(len(self._writer.write_block.call_args[0][0]), 2)
+            self.assertEqual(self._result_set._block_index.locate(1), (0, 1))
+
+        self.execute_with_patch(test)
+
+    def test_read_result_to_end_result_batches(self):
+        # Setup: Create a cursor that splits its results into batches, and a writer that records each row
+        batches = [[(1, 2, 3), (5, 6, 7)], [], [(8, 9, 10)]]
+        cursor = utils.MockSnowflakeCursor(batches)
+        written_rows = []
+        self._writer.write_block.side_effect = lambda rows, columns_info: written_rows.extend(rows) or self._bytes_to_write
+
+        def test():
+            # If: I read the results
+            self._result_set.download_parallelism = 2
+            self._result_set.read_result_to_end(cursor)
 
-            self.assertEqual(self._writer.write_row.call_count, 2)
+            # Then: The rows of every batch should have been written in order
+            self.assertListEqual(written_rows, [(1, 2, 3), (5, 6, 7), (8, 9, 10)])
+            self.assertListEqual(list(self._result_set._row_positions), [0, 1, 2])
+            self.assertTrue(self._result_set._row_positions.is_compact)
+
+        self.execute_with_patch(test)
+
+    def test_read_result_to_end_publishes_rows(self):
+        # Setup: Record the rows that can be fetched each time the result set reports progress
+        published = []
+
+        def on_progress(result_set):
+            published.append((result_set.row_count, result_set.result_set_summary.complete, result_set.get_subset(0, result_set.row_count).row_count))
+        self._events = ResultSetEvents(on_result_set_partially_loaded=on_progress, on_result_set_available=on_progress)
+        self._cursor = utils.MockCursor([(1, 2, 3), (5, 6, 7), (8, 9, 10)])
+
+        def test():
+            # If: I read the results with a first fetch of one row, publishing rows as soon as they are read
+            self._result_set.PARTIAL_LOAD_INTERVAL = 0
+            with mock.patch.object(StorageDataReader, 'INITIAL_FETCH_SIZE', 1):
+                self._result_set.read_result_to_end(self._cursor)
+
+            # Then: Each block should have been flushed and fetchable while the rest were read, and the result set complete after
+            self.assertListEqual(published, [(1, False, 1), (3, False, 3)])
+            self.assertEqual(self._writer.flush.call_count, 3)
+            self.assertTrue(self._result_set.result_set_summary.complete)
 
         self.execute_with_patch(test)
 
@@ -226,13 +266,14 @@ class TestFileStorageResultSet(unittest.TestCase):
             on_success = mock.MagicMock()
 
             self._result_set._has_been_read = True
-            self._result_set._file_offsets = [1]
+            self._result_set._block_index.add_block(0, 1)
+            self._set_row_positions([0])
 
             self._result_set.save_as(params, mock_file_factory, on_success, None)
 
             mock_file_factory.get_writer.assert_called_once_with(params.file_path)
 
-            mock_reader.read_row.assert_called_once_with(self._result_set._file_offsets[0], 0, self._result_set.columns_info)
+            mock_reader.read_block_row.assert_called_once_with(0, 0, 0, self._result_set.columns_info)
             mock_writer.write_row.assert_called_once_with(self._row, self._result_set.columns_info)
 
             mock_writer.complete_write.assert_called_once()
@@ -240,6 +281,40 @@ class TestFileStorageResultSet(unittest.TestCase):
 
         self.execute_with_patch(test)
 
+    def test_dispose(self):
+        def test():
+            self._result_set._has_been_read = True
+            self._add_blocks()
+            self._set_row_positions([5, 6, 3])
+            self._result_set.get_row(1)
+
+            # If: I dispose the result set twice after its rows have been read
+            self._result_set.dispose()
+            self._result_set.dispose()
+
+            # Then: The reader of its file should have been closed once
+            self._reader.close.assert_called_once()
+            self.assertIsNone(self._result_set._reader)
+
+        self.execute_with_patch(test)
+
+    def test_dispose_before_read(self):
+        def test():
+            # If: I dispose a result set whose rows were never read, then no reader should have been opened
+            self._result_set.dispose()
+            self._reader.close.assert_not_called()
+
+        self.execute_with_patch(test)
+
+    def _set_row_positions(self, positions: List[int]):
+        for position in positions:
+            self._result_set._row_positions.append(position)
+
+    def _add_blocks(self):
+        # Add two blocks of four rows to the block index, so that rows 4 to 7 are in the block at offset 200
+        self._result_set._block_index.add_block(100, 4)
+        self._result_set._block_index.add_block(200, 4)
+
 
 class MockType:
     def __enter__(cls):
@@ -251,13 +326,15 @@ class MockType:
 
 class MockReader(MockType):
     def __init__(self, row: List[DbCellValue]) -> None:
-        self.read_row = mock.Mock(return_value=row)
+        self.read_block_row = mock.Mock(return_value=row)
+        self.close = mock.Mock()
 
 
 class MockWriter(MockType):
     def __init__(self, bytes_written: int) -> None:
         self.write_row = mock.Mock(return_value=bytes_written)
-        self.seek = mock.MagicMock()
+        self.write_block = mock.Mock(return_value=bytes_written)
+        self.flush = mock.MagicMock()
         self.complete_write = mock.MagicMock()
 
 
@@ -10,6 +10,7 @@ import tests.utils as utils
 from snowflaketoolsservice.query.result_set import ResultSetEvents
 from snowflaketoolsservice.query.in_memory_result_set import InMemoryResultSet
 from snowflaketoolsservice.query.contracts import SaveResultsRequestParams
+from snowflaketoolsservice.utils.cancellation import CancellationToken
 from tests.query.test_file_storage_result_set import MockWriter
 
 
@@ -124,6 +125,31 @@ class TestInMemoryResultSet(unittest.TestCase):
         mock_writer.complete_write.assert_called_once()
         on_success.assert_called_once()
 
+    def test_save_as_canceled(self):
+        params = SaveResultsRequestParams()
+        params.file_path = 'somepath'
+
+        mock_writer = MockWriter(10)
+        mock_file_factory = mock.MagicMock()
+        mock_file_factory.get_writer = mock.Mock(return_value=mock_writer)
+        on_success = mock.MagicMock()
+        on_failure = mock.MagicMock()
+
+        self._result_set._has_been_read = True
+        self._result_set.rows.append(self._first_row)
+
+        # If: I save the result set with a token that has been canceled
+        cancellation_token = CancellationToken()
+        cancellation_token.cancel()
+        self._result_set.save_as(params, mock_file_factory, on_success, on_failure, cancellation_token)
+        self._result_set._save_as_threads[params.file_path].join()
+
+        # Then: No rows should have been written and the failure callback should have been called
+        mock_writer.write_row.assert_not_called()
+        mock_writer.complete_write.assert_not_called()
+        on_success.assert_not_called()
+        on_failure.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
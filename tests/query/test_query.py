@@ -213,7 +213,7 @@ select * from t1;'''
 
         self.query.save_as(params, file_factory, on_success, on_error)
 
-        batch_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error)
+        batch_save_as_mock.assert_called_once_with(params, file_factory, on_success, on_error, None)
 
 
 def _tuple_from_selection_data(data: SelectionData):
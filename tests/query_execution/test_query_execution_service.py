@@ -18,15 +18,15 @@ from os.path import isfile, join
 
 from snowflaketoolsservice.connection import ConnectionService, ConnectionInfo
 from snowflaketoolsservice.query_execution.query_execution_service import (
-    QueryExecutionService, CANCELATION_QUERY, NO_QUERY_MESSAGE, ExecuteRequestWorkerArgs)
+    QueryExecutionService, CANCELATION_QUERY, NO_QUERY_MESSAGE, ExecuteRequestWorkerArgs, _coalesce_message_notifications)
 from snowflaketoolsservice.query_execution.contracts import (
     ExecuteDocumentSelectionParams, ExecuteStringParams, ExecuteRequestParamsBase)
 from snowflaketoolsservice.utils import constants
 from snowflaketoolsservice.hosting import JSONRPCServer, ServiceProvider, IncomingMessageConfiguration
 from snowflaketoolsservice.query_execution.contracts import (
     ExecutionPlanOptions, MESSAGE_NOTIFICATION, SubsetParams, BATCH_COMPLETE_NOTIFICATION,
-    BATCH_START_NOTIFICATION, QUERY_COMPLETE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION,
-    QueryCancelResult, QueryDisposeParams, SimpleExecuteRequest, ExecuteDocumentStatementParams,
+    BATCH_START_NOTIFICATION, QUERY_COMPLETE_NOTIFICATION, RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION,
+    RESULT_SET_UPDATED_NOTIFICATION, QueryCancelResult, QueryDisposeParams, SimpleExecuteRequest, ExecuteDocumentStatementParams,
     SaveResultsAsJsonRequestParams, SaveResultRequestResult,
     SaveResultsAsCsvRequestParams, SaveResultsAsExcelRequestParams
 )
@@ -107,6 +107,26 @@ class TestQueryService(unittest.TestCase):
                 mock_call[1][0], IncomingMessageConfiguration)
             self.assertTrue(callable(mock_call[1][1]))
 
+    def test_coalesce_message_notifications(self):
+        """Test that query messages are only merged for the same owner URI, batch, and error state"""
+        service = QueryExecutionService()
+        first = service.build_message_params('uri', 0, 'first')
+        second = service.build_message_params('uri', 0, 'second')
+
+        # If: I coalesce messages for the same batch
+        merged = _coalesce_message_notifications(first, second)
+
+        # Then: The messages should be joined, keeping the time of the first message
+        self.assertEqual(merged.owner_uri, 'uri')
+        self.assertEqual(merged.message.message, 'first\nsecond')
+        self.assertEqual(merged.message.time, first.message.time)
+        self.assertFalse(merged.message.is_error)
+
+        # ... Messages for another owner, another batch, or with a different error state should not be merged
+        self.assertIsNone(_coalesce_message_notifications(first, service.build_message_params('uri2', 0, 'second')))
+        self.assertIsNone(_coalesce_message_notifications(first, service.build_message_params('uri', 1, 'second')))
+        self.assertIsNone(_coalesce_message_notifications(first, service.build_message_params('uri', 0, 'second', True)))
+
     def test_get_query_full(self):
         """Test getting a query for a URI from the entire file"""
         # Set up the service and the query
@@ -369,6 +389,30 @@ class TestQueryService(unittest.TestCase):
         subset = ''.join(expected_notices)
         self.assertTrue(subset in call_params_list[0].message.message)
 
+    def test_result_set_notifications(self):
+        """Test that a result set is announced once, while its rows are still being read, and then updated and completed"""
+        # Set up params that are sent as part of a query execution request
+        params = get_execute_string_params()
+
+        # If we handle an execute query request, fetching a single row first and publishing rows as soon as they are read
+        with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
+            with mock.patch('snowflaketoolsservice.query.file_storage_result_set.FileStorageResultSet.PARTIAL_LOAD_INTERVAL', new=0), \
+                    mock.patch('snowflaketoolsservice.query.data_storage.StorageDataReader.INITIAL_FETCH_SIZE', new=1):
+                self.query_execution_service._handle_execute_query_request(self.request_context, params)
+                self.query_execution_service.owner_to_thread_map[params.owner_uri].join()
+
+        # Then the result set should have been available with its first row, updated with the next row, and then completed
+        result_set_notifications = [
+            (call[1][0], call[1][1].result_set_summary.row_count, call[1][1].result_set_summary.complete)
+            for call in self.request_context.send_notification.mock_calls
+            if call[1][0] in (RESULT_SET_AVAILABLE_NOTIFICATION, RESULT_SET_UPDATED_NOTIFICATION, RESULT_SET_COMPLETE_NOTIFICATION)
+        ]
+        self.assertListEqual(result_set_notifications, [
+            (RESULT_SET_AVAILABLE_NOTIFICATION, 1, False),
+            (RESULT_SET_UPDATED_NOTIFICATION, 2, False),
+            (RESULT_SET_COMPLETE_NOTIFICATION, 2, True)
+        ])
+
     def test_message_notices_error(self):
         """Test that the notices are being sent as part of messages correctly in the case of
         an error during execution of a query
@@ -406,6 +450,33 @@ class TestQueryService(unittest.TestCase):
         # Make sure that the whole first message consists of the notices, as expected
         self.assertEqual(notices_str, call_params_list[0].message.message)
 
+    def test_connection_in_use_during_query_execution(self):
+        """Test that the query's connection is marked in use while the query runs, so connection checks don't probe it"""
+        # Setup: Add the query connection to the connection service, and record whether it is probed while the query runs
+        connection_info = ConnectionInfo('test_uri', ConnectionDetails.from_data({}))
+        connection_info.add_connection(ConnectionType.QUERY, self.connection)
+        self.connection_service.owner_to_connection_map['test_uri'] = connection_info
+        self.connection.get_transaction_status.reset_mock()
+        probed_during_query = []
+
+        def check_connections_during_execute(*args):
+            self.connection_service.check_connections()
+            probed_during_query.append(self.connection.get_transaction_status.called)
+        self.cursor.execute = mock.Mock(side_effect=check_connections_during_execute)
+
+        # If: I execute a query while the connections are checked
+        with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
+            self.query_execution_service._handle_execute_query_request(self.request_context, get_execute_string_params())
+            self.query_execution_service.owner_to_thread_map['test_uri'].join()
+
+        # Then:
+        # ... The connection should not have been probed while the query ran
+        self.assertListEqual(probed_during_query, [False])
+
+        # ... And should be probed once the query is done
+        self.connection_service.check_connections()
+        self.connection.get_transaction_status.assert_called()
+
     def test_cancel_query_during_query_execution(self):
         """
         Test that we handle query cancellation requests correctly
@@ -639,18 +710,38 @@ class TestQueryService(unittest.TestCase):
         uri = 'test_uri'
         self.query_execution_service.query_results[uri] = Query(uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
         self.query_execution_service.query_results[uri]._execution_state = ExecutionState.EXECUTED
+        self.query_execution_service.query_results[uri].dispose = mock.Mock()
+        query = self.query_execution_service.query_results[uri]
         params = QueryDisposeParams()
         params.owner_uri = uri
 
         # If we attempt to dispose of an existing owner uri's query results when the result is populated
         self.query_execution_service._handle_dispose_request(self.request_context, params)
 
-        # Then the uri key should no longer be in the results, and we sent an empty response
+        # Then the uri key should no longer be in the results, its results were released, and we sent an empty response
         self.assertTrue(uri not in self.query_execution_service.query_results)
+        query.dispose.assert_called_once()
         self.request_context.send_response.assert_called_once_with({})
         self.request_context.send_error.assert_not_called()
         self.cursor_cancel.execute.assert_not_called()
 
+    def test_execute_query_disposes_executed_query(self):
+        """Test that executing a query again releases the results of the query it replaces"""
+        execute_params = get_execute_string_params()
+        previous_query = Query(execute_params.owner_uri, '', QueryExecutionSettings(ExecutionPlanOptions(), None), QueryEvents())
+        previous_query._execution_state = ExecutionState.EXECUTED
+        previous_query.dispose = mock.Mock()
+        self.query_execution_service.query_results[execute_params.owner_uri] = previous_query
+
+        with mock.patch('snowflaketoolsservice.query.data_storage.storage_data_reader.get_columns_info', new=mock.Mock(return_value=[])):
+            # If I execute a query for an owner URI whose previous query has executed
+            self.query_execution_service._handle_execute_query_request(self.request_context, execute_params)
+            self.query_execution_service.owner_to_thread_map[execute_params.owner_uri].join()
+
+        # Then the previous query should have been replaced, and its results released
+        self.assertIsNot(self.query_execution_service.query_results[execute_params.owner_uri], previous_query)
+        previous_query.dispose.assert_called_once()
+
     def test_query_disposal_failure(self):
         """Test for handling query/dispose request in case where disposal is not possible"""
         # Note that query_results[uri] is never populated
@@ -884,9 +975,16 @@ class TestQueryService(unittest.TestCase):
 
         self.request_context.send_response = mock.Mock(side_effect=send_response_mock)
 
+        self.connection_service.disconnect = mock.Mock(return_value=True)
+
         with mock.patch('uuid.uuid4', new=mock.Mock(return_value=new_owner_uri)):
             self.query_execution_service._handle_simple_execute_request(self.request_context, simple_execution_request)
 
+        # The throwaway owner URI's results and connections should have been released
+        self.request_context.send_response.assert_called_once()
+        self.assertNotIn(new_owner_uri, self.query_execution_service.query_results)
+        self.connection_service.disconnect.assert_called_once_with(new_owner_uri, None)
+
     def test_handle_save_as_csv_request(self):
 
         request_params = SaveResultsAsCsvRequestParams()
@@ -12,6 +12,7 @@ from unittest import mock
 from snowflaketoolsservice.tasks import Task, TaskStatus, TaskService
 from snowflaketoolsservice.tasks.contracts import CANCEL_TASK_REQUEST, CancelTaskParameters, LIST_TASKS_REQUEST, ListTasksParameters, TaskInfo
 from snowflaketoolsservice.utils import constants
+from snowflaketoolsservice.tasks.tasks import coalesce_status_changed_notifications
 from tests.mock_request_validation import RequestFlowValidator
 from tests.mocks.service_provider_mock import ServiceProviderMock
 
@@ -40,6 +41,9 @@ class TaskServiceTests(unittest.TestCase):
             [mock.call(CANCEL_TASK_REQUEST, self.task_service.handle_cancel_request), mock.call(LIST_TASKS_REQUEST, self.task_service.handle_list_request)],
             any_order=True)
 
+        # ... and status changed notifications should be coalesced
+        self.service_provider.server.set_coalescing_policy.assert_called_once_with('tasks/statuschanged', coalesce_status_changed_notifications)
+
     def test_start_task(self):
         """Test that the service can start tasks"""
         # If I start both tasks
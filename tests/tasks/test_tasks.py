@@ -9,6 +9,7 @@ import unittest
 from unittest import mock
 
 from snowflaketoolsservice.tasks import Task, TaskResult, TaskStatus
+from snowflaketoolsservice.tasks.tasks import coalesce_status_changed_notifications
 from snowflaketoolsservice.utils import constants
 from tests import utils
 
@@ -147,3 +148,12 @@ class TestTasks(unittest.TestCase):
         # Then the task is not marked as canceled and the call to cancel returned false
         self.assertFalse(cancel_result)
         self.assertFalse(task.canceled)
+
+    def test_coalesce_status_changed_notifications(self):
+        """Test that only status changed notifications for the same task are coalesced, keeping the latest status"""
+        in_progress = {'taskId': 'task1', 'status': TaskStatus.IN_PROGRESS, 'message': '', 'duration': 0}
+        succeeded = {'taskId': 'task1', 'status': TaskStatus.SUCCEEDED, 'message': 'done', 'duration': 10}
+        other_task = {'taskId': 'task2', 'status': TaskStatus.IN_PROGRESS, 'message': '', 'duration': 0}
+
+        self.assertIs(coalesce_status_changed_notifications(in_progress, succeeded), succeeded)
+        self.assertIsNone(coalesce_status_changed_notifications(succeeded, other_task))
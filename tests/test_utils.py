@@ -5,12 +5,19 @@
 
 """Test utils.py"""
 
+from concurrent.futures import ThreadPoolExecutor
 import enum
+import json
+import threading
 from typing import Optional
 import unittest
+import unittest.mock as mock
 
 import snowflaketoolsservice.utils as utils
+from snowflaketoolsservice.utils.cancellation import CancellationToken, OperationCanceledError
 from snowflaketoolsservice.serialization import Serializable
+from snowflaketoolsservice.serialization.serializable import get_deserializer
+from tests.utils import get_mock_logger
 
 
 class TestUtils(unittest.TestCase):
@@ -45,6 +52,159 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(len(test_object.dict), len(result.dict))
         self.assertEqual(result.enum, test_object.enum)
 
+    def test_from_dict_caches_deserializer(self):
+        """
+        Test that Serializable.from_dict builds the deserializer for a class once and reuses it for later calls
+        """
+        first_result = _NestedTestClass.from_dict({'testInt': 2})
+        deserializer = get_deserializer(_NestedTestClass)
+        second_result = _NestedTestClass.from_dict({'testInt': 3, 'testString': 'value'})
+        self.assertIs(get_deserializer(_NestedTestClass), deserializer)
+        self.assertEqual((first_result.test_int, first_result.test_string), (2, 'test_string'))
+        self.assertEqual((second_result.test_int, second_result.test_string), (3, 'value'))
+        self.assertIsNone(_NestedTestClass.from_dict(None))
+
+    def test_from_dict_extra_attributes(self):
+        """
+        Test that unknown attributes raise an error unless the class ignores extra attributes, on every call
+        """
+        for _ in range(2):
+            with self.assertRaises(AttributeError):
+                _NestedTestClass.from_dict({'testInt': 2, 'unknownValue': 1})
+            result = _IgnoreExtraTestClass.from_dict({'testInt': 2, 'unknownValue': 1})
+            self.assertEqual(result.test_int, 2)
+            self.assertFalse(hasattr(result, 'unknown_value'))
+
+    def test_to_json(self):
+        """
+        Test that the to_json function produces the same JSON as the dictionary conversion, and caches the serializer
+        """
+        test_object = _ConversionTestClass()
+        json_string = utils.serialization.to_json(test_object, sort_keys=True)
+        self.assertEqual(json.loads(json_string), test_object.expected_dict())
+        self.assertEqual(json_string, json.dumps(test_object.expected_dict(), sort_keys=True))
+        self.assertIs(utils.serialization.get_serializer(_NestedTestClass), utils.serialization.get_serializer(_NestedTestClass))
+
+    def test_to_json_unsupported_object(self):
+        """
+        Test that objects without attributes that JSON cannot represent are serialized as null
+        """
+        self.assertEqual(utils.serialization.to_json({'value': {1, 2}, 'nested': [object()]}, sort_keys=True),
+                         '{"nested": [null], "value": null}')
+
+    def test_register_serializer(self):
+        """
+        Test that a registered serializer is used instead of the generated one
+        """
+        class CustomClass:
+            def __init__(self):
+                self.ignored_value = 1
+
+        utils.serialization.register_serializer(CustomClass, lambda obj: 'custom')
+        self.assertEqual(utils.serialization.convert_to_dict([CustomClass()]), ['custom'])
+
+    def test_cancellation_token_callbacks(self):
+        """
+        Test that registered callbacks run once when the token is canceled, unless they were unregistered
+        """
+        token = CancellationToken()
+        callback = mock.Mock()
+        unregistered_callback = mock.Mock()
+        token.register(callback)
+        token.register(unregistered_callback)
+        token.unregister(unregistered_callback)
+
+        token.cancel()
+        token.cancel()
+
+        self.assertTrue(token.canceled)
+        callback.assert_called_once()
+        unregistered_callback.assert_not_called()
+
+        # Callbacks registered after the token was canceled run immediately
+        late_callback = mock.Mock()
+        token.register(late_callback)
+        late_callback.assert_called_once()
+
+    def test_cancellation_token_callback_failure(self):
+        """
+        Test that a callback that fails is logged and doesn't stop the other callbacks from running
+        """
+        logger = get_mock_logger()
+        token = CancellationToken(logger)
+        failing_callback = mock.Mock(side_effect=IOError('Connection reset'))
+        callback = mock.Mock()
+        token.register(failing_callback)
+        token.register(callback)
+
+        token.cancel()
+
+        failing_callback.assert_called_once()
+        callback.assert_called_once()
+        logger.exception.assert_called_once()
+
+        # Callbacks registered after the token was canceled are protected the same way
+        token.register(failing_callback)
+        self.assertEqual(logger.exception.call_count, 2)
+
+    def test_cancellation_token_raise_if_canceled(self):
+        """
+        Test that raise_if_canceled only raises once the token has been canceled
+        """
+        token = CancellationToken()
+        token.raise_if_canceled()
+
+        token.cancel()
+        with self.assertRaises(OperationCanceledError):
+            token.raise_if_canceled()
+
+    def test_run_in_background(self):
+        """
+        Test that run_in_background starts a thread unless a background executor is set
+        """
+        function = mock.Mock()
+        task = utils.thread.run_in_background(function, 'arg')
+        task.join()
+        self.assertIsInstance(task, threading.Thread)
+        self.assertTrue(task.daemon)
+        function.assert_called_once_with('arg')
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            utils.thread.set_background_executor(executor)
+            try:
+                function = mock.Mock()
+                task = utils.thread.run_in_background(function, 'arg')
+                task.join(5)
+            finally:
+                utils.thread.set_background_executor(None)
+
+        self.assertIsInstance(task, utils.thread.BackgroundTask)
+        self.assertFalse(task.is_alive())
+        function.assert_called_once_with('arg')
+
+    def test_run_in_daemon_thread(self):
+        """
+        Test that run_in_daemon_thread starts a thread of its own even if a background executor is set, so that
+        long running work doesn't keep the background workers from running short work
+        """
+        release_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            utils.thread.set_background_executor(executor)
+            try:
+                # If: Long running work is started while the only background worker is busy
+                utils.thread.run_in_background(release_event.wait, 5)
+                function = mock.Mock()
+                task = utils.thread.run_in_daemon_thread(function, 'arg')
+                task.join(5)
+
+                # Then: The work runs on a daemon thread without waiting for the worker
+                self.assertIsInstance(task, threading.Thread)
+                self.assertTrue(task.daemon)
+                function.assert_called_once_with('arg')
+            finally:
+                release_event.set()
+                utils.thread.set_background_executor(None)
+
 
 class _ConversionTestClass(Serializable):
     """Test class to be used for testing dictionary conversions"""
@@ -90,6 +250,14 @@ class _NestedTestClass(Serializable):
         }
 
 
+class _IgnoreExtraTestClass(_NestedTestClass):
+    """Test class that ignores attributes it does not define"""
+
+    @classmethod
+    def ignore_extra_attributes(cls):
+        return True
+
+
 class _TestEnum(enum.Enum):
     """Test enum to be included in the _ConversionTestClass to ensure enum conversion works"""
     FIRST_OPTION = 1
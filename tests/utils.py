@@ -7,6 +7,7 @@ import logging
 import unittest
 import unittest.mock as mock
 import psycopg2
+from snowflake.connector.cursor import SnowflakeCursor
 
 from snowflaketoolsservice.hosting import NotificationContext, RequestContext, ServiceProvider
 
@@ -105,6 +106,7 @@ class MockConnection(object):
 
     def __init__(self, dsn_parameters=None, cursor=None):
         self.close = mock.Mock()
+        self.cancel = mock.Mock()
         self.dsn_parameters = dsn_parameters
         self.server_version = '90602'
         self.cursor = mock.Mock(return_value=cursor)
@@ -198,6 +200,27 @@ class MockCursor:
         return self._mogrified_value
 
 
+class MockSnowflakeCursor(SnowflakeCursor):
+    """Class used to mock Snowflake cursor objects, whose results are split into batches, for testing"""
+
+    # The base cursor isn't initialized, so the properties it reads its state from are replaced with attributes
+    connection = None
+    description = None
+
+    def __init__(self, batches, description=None, connection=None):
+        self.batches = batches
+        self.description = description if description is not None else []
+        self.connection = connection
+        self.close = mock.Mock()
+
+    def get_result_batches(self):
+        return self.batches
+
+    def __iter__(self):
+        for batch in self.batches:
+            yield from batch
+
+
 class MockThread():
     """Mock thread class that mocks the thread's start method to run target code without actually starting a thread"""
 